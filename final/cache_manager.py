@@ -1,125 +1,215 @@
 # cache_manager.py
 # Smart caching layer for vibe predictions and search results
 # Reduces redundant computations and database queries
+#
+# each namespace (vibe / search / venue) is a size-bounded LRU with its own TTL.
+# expired entries are dropped on read and by a background sweeper thread, and the
+# least recently used entry is evicted once a namespace is full - so the caches can't
+# grow forever inside the long running server. everything is behind a lock since the
+# grpc server and the planner threads share these.
+#
+# hit / miss / eviction counts are kept per namespace (get_cache_stats) and can also be
+# pushed somewhere else with set_metrics_sink - the server uses that to feed its
+# MetricsCollector.
 
 import hashlib
-import json
+import threading
 import time
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
-import db_manager
-
-# In-memory cache with TTL (time-to-live)
-_vibe_cache = {}  # {text_hash: (vibes, timestamp)}
-_search_cache = {}  # {query_hash: (results, timestamp)}
-_venue_cache = {}  # {venue_id: (venue_data, timestamp)}
+from collections import OrderedDict
+from typing import Any, Callable, List, Dict, Optional
 
 CACHE_TTL_SECONDS = 3600  # 1 hour
 VIBE_CACHE_TTL = 86400  # 24 hours for vibe predictions
+SWEEP_INTERVAL_SECONDS = 300  # how often the sweeper drops expired entries
+
+# namespace -> (max entries, ttl seconds)
+NAMESPACES = {
+    'vibe': (10000, VIBE_CACHE_TTL),
+    'search': (1000, CACHE_TTL_SECONDS),
+    'venue': (5000, CACHE_TTL_SECONDS),
+}
+
+_metrics_sink: Optional[Callable[[str, str, int], None]] = None
+
+
+class BoundedCache:
+    """Thread-safe LRU cache with a max size and a TTL"""
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, timestamp), oldest use first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key) -> Optional[Any]:
+        event = 'miss'
+        value = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+            elif time.time() - entry[1] >= self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                event = 'hit'
+                value = entry[0]
+        _report(event, self.name)
+        return value
+
+    def set(self, key, value) -> None:
+        evicted = 0
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            _report('eviction', self.name, evicted)
+        _ensure_sweeper()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def remove_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, ts) in self._data.items() if now - ts >= self.ttl]
+            for k in expired:
+                del self._data[k]
+            self.expirations += len(expired)
+        if expired:
+            _report('expiration', self.name, len(expired))
+        return len(expired)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+_caches = {name: BoundedCache(name, size, ttl) for name, (size, ttl) in NAMESPACES.items()}
+
+
+def set_metrics_sink(sink: Optional[Callable[[str, str, int], None]]) -> None:
+    """
+    Report cache events somewhere else too.
+    sink(event, namespace, count) - event is hit, miss, eviction or expiration.
+    """
+    global _metrics_sink
+    _metrics_sink = sink
+
+
+def _report(event: str, namespace: str, count: int = 1) -> None:
+    sink = _metrics_sink
+    if sink is not None:
+        try:
+            sink(event, namespace, count)
+        except Exception:
+            pass  # metrics should never break a cache lookup
+
+
+# background sweeper - started the first time something is cached
+_sweeper = None
+_sweeper_lock = threading.Lock()
+_stop_sweeper = threading.Event()
+
+
+def _sweep_loop():
+    while not _stop_sweeper.wait(SWEEP_INTERVAL_SECONDS):
+        cleanup_expired_cache()
+
+
+def _ensure_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _stop_sweeper.clear()
+            _sweeper = threading.Thread(target=_sweep_loop, name='cache-sweeper', daemon=True)
+            _sweeper.start()
+
+
+def stop_sweeper() -> None:
+    """Stop the background sweeper (it starts again on the next cache write)"""
+    global _sweeper
+    with _sweeper_lock:
+        _stop_sweeper.set()
+        _sweeper = None
+
 
 def _hash_text(text: str) -> str:
     """Create a hash of text for caching"""
     return hashlib.md5(text.lower().encode()).hexdigest()
 
-def _is_cache_valid(timestamp: float, ttl: int = CACHE_TTL_SECONDS) -> bool:
-    """Check if cached item is still valid"""
-    return (time.time() - timestamp) < ttl
-
 def cache_vibe_prediction(text: str, vibes: List[str]) -> None:
     """Cache a vibe prediction"""
-    text_hash = _hash_text(text)
-    _vibe_cache[text_hash] = (vibes, time.time())
+    _caches['vibe'].set(_hash_text(text), vibes)
 
 def get_cached_vibe_prediction(text: str) -> Optional[List[str]]:
     """Get cached vibe prediction if available"""
-    text_hash = _hash_text(text)
-    
-    if text_hash in _vibe_cache:
-        vibes, timestamp = _vibe_cache[text_hash]
-        if _is_cache_valid(timestamp, VIBE_CACHE_TTL):
-            return vibes
-        else:
-            del _vibe_cache[text_hash]
-    
-    return None
+    return _caches['vibe'].get(_hash_text(text))
 
 def cache_search_result(query: str, results: List[Dict]) -> None:
     """Cache a search result"""
-    query_hash = _hash_text(query)
-    _search_cache[query_hash] = (results, time.time())
+    _caches['search'].set(_hash_text(query), results)
 
 def get_cached_search_result(query: str) -> Optional[List[Dict]]:
     """Get cached search result if available"""
-    query_hash = _hash_text(query)
-    
-    if query_hash in _search_cache:
-        results, timestamp = _search_cache[query_hash]
-        if _is_cache_valid(timestamp):
-            return results
-        else:
-            del _search_cache[query_hash]
-    
-    return None
+    return _caches['search'].get(_hash_text(query))
 
 def cache_venue(venue_id: str, venue_data: Dict) -> None:
     """Cache venue data"""
-    _venue_cache[venue_id] = (venue_data, time.time())
+    _caches['venue'].set(venue_id, venue_data)
 
 def get_cached_venue(venue_id: str) -> Optional[Dict]:
     """Get cached venue if available"""
-    if venue_id in _venue_cache:
-        venue_data, timestamp = _venue_cache[venue_id]
-        if _is_cache_valid(timestamp):
-            return venue_data
-        else:
-            del _venue_cache[venue_id]
-    
-    return None
+    return _caches['venue'].get(venue_id)
+
+def get_cache(namespace: str) -> BoundedCache:
+    """Get the cache for a namespace (vibe, search, venue)"""
+    return _caches[namespace]
 
 def clear_cache(cache_type: str = 'all') -> None:
     """Clear cache(s)"""
-    global _vibe_cache, _search_cache, _venue_cache
-    
-    if cache_type in ('all', 'vibe'):
-        _vibe_cache.clear()
-    if cache_type in ('all', 'search'):
-        _search_cache.clear()
-    if cache_type in ('all', 'venue'):
-        _venue_cache.clear()
+    for name, cache in _caches.items():
+        if cache_type in ('all', name):
+            cache.clear()
 
 def get_cache_stats() -> Dict:
     """Get cache statistics"""
-    return {
-        'vibe_predictions': len(_vibe_cache),
-        'search_results': len(_search_cache),
-        'venues': len(_venue_cache),
-        'total_items': len(_vibe_cache) + len(_search_cache) + len(_venue_cache)
+    stats = {
+        'vibe_predictions': len(_caches['vibe']),
+        'search_results': len(_caches['search']),
+        'venues': len(_caches['venue']),
+        'total_items': sum(len(c) for c in _caches.values()),
     }
+    stats['namespaces'] = {name: cache.stats() for name, cache in _caches.items()}
+    return stats
 
 def cleanup_expired_cache() -> int:
     """Remove expired items from cache"""
-    removed = 0
-    
-    # Clean vibe cache
-    expired_keys = [k for k, (_, ts) in _vibe_cache.items() 
-                   if not _is_cache_valid(ts, VIBE_CACHE_TTL)]
-    for k in expired_keys:
-        del _vibe_cache[k]
-        removed += 1
-    
-    # Clean search cache
-    expired_keys = [k for k, (_, ts) in _search_cache.items() 
-                   if not _is_cache_valid(ts)]
-    for k in expired_keys:
-        del _search_cache[k]
-        removed += 1
-    
-    # Clean venue cache
-    expired_keys = [k for k, (_, ts) in _venue_cache.items() 
-                   if not _is_cache_valid(ts)]
-    for k in expired_keys:
-        del _venue_cache[k]
-        removed += 1
-    
-    return removed
-
+    return sum(cache.remove_expired() for cache in _caches.values())
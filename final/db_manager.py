@@ -4,6 +4,9 @@
 # uses pgvector for semantic similarity search
 
 import os
+import json
+import time
+import hashlib
 import pandas as pd
 from typing import List, Dict, Optional
 import psycopg2
@@ -21,26 +24,25 @@ if os.path.exists(_env_path):
 _pool = None
 _embedding_model = None
 
+def _connection_params(host=None, database=None, user=None, password=None, port=5432):
+    """Connection settings, falling back to the DB_* environment variables"""
+    return {
+        'host': host or os.getenv('DB_HOST', 'localhost'),
+        'database': database or os.getenv('DB_NAME', 'sparkdates'),
+        'user': user or os.getenv('DB_USER', 'postgres'),
+        'password': password or os.getenv('DB_PASSWORD', 'postgres'),
+        'port': int(os.getenv('DB_PORT', port)),
+    }
+
 def init_db_pool(host=None, database=None, user=None, password=None, port=5432, min_conn=2, max_conn=10):
     """Initialize database connection pool"""
     global _pool
 
-    host = host or os.getenv('DB_HOST', 'localhost')
-    database = database or os.getenv('DB_NAME', 'sparkdates')
-    user = user or os.getenv('DB_USER', 'postgres')
-    password = password or os.getenv('DB_PASSWORD', 'postgres')
-    port = int(os.getenv('DB_PORT', port))
+    params = _connection_params(host, database, user, password, port)
 
     try:
-        _pool = SimpleConnectionPool(
-            min_conn, max_conn,
-            host=host,
-            database=database,
-            user=user,
-            password=password,
-            port=port
-        )
-        print(f"✓ Database pool initialized: {database}@{host}:{port}")
+        _pool = SimpleConnectionPool(min_conn, max_conn, **params)
+        print(f"✓ Database pool initialized: {params['database']}@{params['host']}:{params['port']}")
         return True
     except Exception as e:
         print(f"✗ Failed to initialize database pool: {e}")
@@ -57,6 +59,19 @@ def return_connection(conn):
     if _pool:
         _pool.putconn(conn)
 
+def get_listen_connection(channel: str):
+    """
+    Open a dedicated autocommit connection that LISTENs on a channel.
+
+    Not from the pool - it stays open for as long as the listener runs.
+    Wait on it with select() and read conn.notifies after conn.poll().
+    """
+    conn = psycopg2.connect(**_connection_params())
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {channel}")
+    return conn
+
 def init_embedding_model(model_name='all-MiniLM-L6-v2'):
     """Initialize sentence transformer for embeddings"""
     global _embedding_model
@@ -147,6 +162,74 @@ def create_tables():
             cur.execute("CREATE INDEX IF NOT EXISTS idx_venues_cost ON venues(cost)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_venues_location ON venues(lat, lon)")
 
+            # Every UPDATE bumps updated_at, so the snapshot version and the incremental
+            # refresh (updated_at >= newest seen) catch changes that don't set it themselves
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION touch_venues_updated_at() RETURNS trigger AS $$
+                BEGIN
+                    NEW.updated_at = clock_timestamp();
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute("DROP TRIGGER IF EXISTS venues_touch_updated_at ON venues")
+            cur.execute("""
+                CREATE TRIGGER venues_touch_updated_at
+                BEFORE UPDATE ON venues
+                FOR EACH ROW EXECUTE FUNCTION touch_venues_updated_at()
+            """)
+
+            # Places content hash of each row, so sync_venues only writes venues that changed
+            cur.execute("ALTER TABLE venues ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+
+            # Change log the venue snapshot refreshes from (ids to re-read or drop).
+            # Writers take an advisory lock before logging, so change ids are handed out
+            # in commit order and a reader's cursor never skips a change committed late
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS venue_changes (
+                    change_id BIGSERIAL PRIMARY KEY,
+                    venue_id VARCHAR(255) NOT NULL,
+                    op VARCHAR(10) NOT NULL,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_venue_changes_changed_at ON venue_changes(changed_at)")
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION log_venue_change() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_advisory_xact_lock(hashtext('venue_changes'));
+                    IF TG_OP = 'DELETE' THEN
+                        INSERT INTO venue_changes (venue_id, op) VALUES (OLD.id, TG_OP);
+                    ELSE
+                        INSERT INTO venue_changes (venue_id, op) VALUES (NEW.id, TG_OP);
+                    END IF;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute("DROP TRIGGER IF EXISTS venues_log_change ON venues")
+            cur.execute("""
+                CREATE TRIGGER venues_log_change
+                AFTER INSERT OR UPDATE OR DELETE ON venues
+                FOR EACH ROW EXECUTE FUNCTION log_venue_change()
+            """)
+
+            # Tell listeners (the planners' in-memory venue snapshot) when venues change
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION notify_venues_changed() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify('venues_changed', '');
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute("DROP TRIGGER IF EXISTS venues_changed ON venues")
+            cur.execute("""
+                CREATE TRIGGER venues_changed
+                AFTER INSERT OR UPDATE OR DELETE ON venues
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_venues_changed()
+            """)
+
             # Vibe keywords table
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS vibe_keywords (
@@ -183,92 +266,136 @@ def create_tables():
         return_connection(conn)
 
 
-def insert_venues(venues: List[Dict]) -> int:
-    """Insert venues into database, handling duplicates"""
+# venue columns written by insert_venues, with the default used when a venue doesn't have the field
+VENUE_FIELDS = [
+    ('id', None), ('name', None), ('address', None), ('short_address', None),
+    ('lat', None), ('lon', None), ('rating', 0), ('reviews_count', 0),
+    ('price_level', None), ('cost', 30), ('primary_type', None), ('primary_type_display_name', None),
+    ('all_types', None), ('type', None), ('google_maps_uri', None), ('website_uri', None),
+    ('regular_opening_hours', ''), ('current_opening_hours', ''),
+    ('description', None), ('review', None), ('review_summary', None), ('neighborhood_summary', None),
+    ('true_vibe', 'casual'),
+    ('serves_dessert', False), ('serves_coffee', False), ('serves_beer', False), ('serves_wine', False),
+    ('serves_cocktails', False), ('serves_vegetarian', False), ('serves_breakfast', False),
+    ('serves_brunch', False), ('serves_lunch', False), ('serves_dinner', False),
+    ('good_for_groups', False), ('good_for_children', False), ('good_for_watching_sports', False),
+    ('live_music', False), ('outdoor_seating', False), ('allows_dogs', False), ('reservable', False),
+    ('takeout', False), ('delivery', False), ('dine_in', False),
+]
+VENUE_COLUMNS = [name for name, _ in VENUE_FIELDS] + ['content_hash', 'description_embedding', 'name_embedding']
+
+# fields that come from Google Places - a venue only counts as changed when one of these does
+# (true_vibe is labeled from the text, cost is derived from price_level)
+CONTENT_FIELDS = [name for name, _ in VENUE_FIELDS if name not in ('id', 'true_vibe', 'cost')]
+# text the keyword vibe labels are computed from
+VIBE_TEXT_FIELDS = ['description', 'review', 'type', 'name', 'primary_type_display_name']
+
+# change log entries kept for snapshot refreshes (older ones are pruned by sync_venues)
+VENUE_CHANGES_KEEP_DAYS = 7
+
+INSERT_VENUES_SQL = f"""
+    INSERT INTO venues ({', '.join(VENUE_COLUMNS)})
+    VALUES %s
+    ON CONFLICT (id) DO UPDATE SET
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# venues per INSERT statement, and texts per SentenceTransformer.encode batch
+INSERT_CHUNK_SIZE = 1000
+EMBED_BATCH_SIZE = 256
+
+def get_embeddings(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """Embeddings for many texts, each distinct text encoded once in large batches"""
+    if _embedding_model is None:
+        init_embedding_model()
+
+    texts = [text if text else "venue" for text in texts]
+    # identical texts (shared names, empty descriptions) hash the same and are encoded once
+    unique = {}
+    for text in texts:
+        unique.setdefault(hashlib.sha1(text.encode('utf-8')).hexdigest(), text)
+    if not unique:
+        return []
+
+    vectors = _embedding_model.encode(list(unique.values()), batch_size=batch_size, convert_to_numpy=True)
+    by_hash = {key: vector.tolist() for key, vector in zip(unique, vectors)}
+    return [by_hash[hashlib.sha1(text.encode('utf-8')).hexdigest()] for text in texts]
+
+def _hash_value(value):
+    # same value from a dict, a DataFrame record or numpy hashes the same
+    if hasattr(value, 'item') and not isinstance(value, (list, dict, str)):
+        value = value.item()
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+def venue_content_hash(venue: Dict) -> str:
+    """Hash over a venue's Google Places fields"""
+    values = [_hash_value(venue.get(name, default)) for name, default in VENUE_FIELDS if name in CONTENT_FIELDS]
+    return hashlib.sha256(json.dumps(values).encode('utf-8')).hexdigest()
+
+def _existing_venue_ids(cur, ids: List[str]) -> set:
+    cur.execute("SELECT id FROM venues WHERE id = ANY(%s)", (ids,))
+    return {row[0] for row in cur.fetchall()}
+
+def _venue_row(venue: Dict, desc_embedding, name_embedding) -> tuple:
+    return (tuple(venue.get(name, default) for name, default in VENUE_FIELDS)
+            + (venue_content_hash(venue), desc_embedding, name_embedding))
+
+def insert_venues(venues: List[Dict], chunk_size: int = INSERT_CHUNK_SIZE) -> int:
+    """
+    Insert venues into database, handling duplicates.
+
+    Venues are written in chunks with one multi-row INSERT each. Names and descriptions
+    are embedded in batches, and only for new venues - an existing id keeps its row
+    (the conflict just bumps updated_at), so encoding its text again would be wasted.
+    """
     if not venues:
         return 0
 
+    # one row per id, the last one wins (a statement can't upsert the same id twice)
+    unique = list({venue.get('id'): venue for venue in venues}.values())
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            inserted = 0
-            for venue in venues:
-                # Get embeddings
-                desc_embedding = get_embedding(venue.get('description', ''))
-                name_embedding = get_embedding(venue.get('name', ''))
-
-                # Prepare data
-                data = (
-                    venue.get('id'),
-                    venue.get('name'),
-                    venue.get('address'),
-                    venue.get('short_address'),
-                    venue.get('lat'),
-                    venue.get('lon'),
-                    venue.get('rating', 0),
-                    venue.get('reviews_count', 0),
-                    venue.get('price_level'),
-                    venue.get('cost', 30),
-                    venue.get('primary_type'),
-                    venue.get('primary_type_display_name'),
-                    venue.get('all_types'),
-                    venue.get('type'),
-                    venue.get('google_maps_uri'),
-                    venue.get('website_uri'),
-                    venue.get('regular_opening_hours', ''),
-                    venue.get('current_opening_hours', ''),
-                    venue.get('description'),
-                    venue.get('review'),
-                    venue.get('review_summary'),
-                    venue.get('neighborhood_summary'),
-                    venue.get('true_vibe', 'casual'),
-                    venue.get('serves_dessert', False),
-                    venue.get('serves_coffee', False),
-                    venue.get('serves_beer', False),
-                    venue.get('serves_wine', False),
-                    venue.get('serves_cocktails', False),
-                    venue.get('serves_vegetarian', False),
-                    venue.get('serves_breakfast', False),
-                    venue.get('serves_brunch', False),
-                    venue.get('serves_lunch', False),
-                    venue.get('serves_dinner', False),
-                    venue.get('good_for_groups', False),
-                    venue.get('good_for_children', False),
-                    venue.get('good_for_watching_sports', False),
-                    venue.get('live_music', False),
-                    venue.get('outdoor_seating', False),
-                    venue.get('allows_dogs', False),
-                    venue.get('reservable', False),
-                    venue.get('takeout', False),
-                    venue.get('delivery', False),
-                    venue.get('dine_in', False),
-                    desc_embedding,
-                    name_embedding,
+            written = 0
+            encoded = 0
+            encode_time = 0.0
+            start = time.perf_counter()
+            for offset in range(0, len(unique), chunk_size):
+                chunk = unique[offset:offset + chunk_size]
+                existing = _existing_venue_ids(cur, [venue.get('id') for venue in chunk])
+                new = [venue for venue in chunk if venue.get('id') not in existing]
+
+                encode_start = time.perf_counter()
+                vectors = get_embeddings(
+                    [venue.get('description', '') for venue in new] + [venue.get('name', '') for venue in new]
                 )
+                encode_time += time.perf_counter() - encode_start
+                encoded += len(new)
+                embeddings = {
+                    venue.get('id'): (vectors[i], vectors[len(new) + i]) for i, venue in enumerate(new)
+                }
+
+                rows = [_venue_row(venue, *embeddings.get(venue.get('id'), (None, None))) for venue in chunk]
+                execute_values(cur, INSERT_VENUES_SQL, rows, page_size=len(rows))
+                written += len(rows)
 
-                # Upsert
-                cur.execute("""
-                    INSERT INTO venues (
-                        id, name, address, short_address, lat, lon, rating, reviews_count,
-                        price_level, cost, primary_type, primary_type_display_name, all_types,
-                        type, google_maps_uri, website_uri, regular_opening_hours, current_opening_hours,
-                        description, review, review_summary, neighborhood_summary, true_vibe,
-                        serves_dessert, serves_coffee, serves_beer, serves_wine, serves_cocktails,
-                        serves_vegetarian, serves_breakfast, serves_brunch, serves_lunch, serves_dinner,
-                        good_for_groups, good_for_children, good_for_watching_sports, live_music,
-                        outdoor_seating, allows_dogs, reservable, takeout, delivery, dine_in,
-                        description_embedding, name_embedding
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                              %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                              %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        updated_at = CURRENT_TIMESTAMP
-                """, data)
-                inserted += 1
+                elapsed = time.perf_counter() - start
+                print(f"  {written}/{len(unique)} venues ({written / max(elapsed, 1e-9):.0f} venues/s)")
 
             conn.commit()
-            print(f"✓ Inserted {inserted} venues into database")
-            return inserted
+            elapsed = time.perf_counter() - start
+            print(f"✓ Inserted {written} venues into database in {elapsed:.1f}s "
+                  f"({written / max(elapsed, 1e-9):.0f} venues/s, {encoded} embedded in {encode_time:.1f}s)")
+            return written
     except Exception as e:
         conn.rollback()
         print(f"✗ Error inserting venues: {e}")
@@ -276,12 +403,134 @@ def insert_venues(venues: List[Dict]) -> int:
     finally:
         return_connection(conn)
 
+SYNC_VENUES_SQL = f"""
+    INSERT INTO venues ({', '.join(VENUE_COLUMNS)})
+    VALUES %s
+    ON CONFLICT (id) DO UPDATE SET
+        {', '.join(f"{name} = EXCLUDED.{name}" for name in CONTENT_FIELDS + ['cost', 'content_hash'])},
+        true_vibe = COALESCE(EXCLUDED.true_vibe, venues.true_vibe),
+        description_embedding = COALESCE(EXCLUDED.description_embedding, venues.description_embedding),
+        name_embedding = COALESCE(EXCLUDED.name_embedding, venues.name_embedding),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+def sync_venues(venues: List[Dict], label_vibe=None, chunk_size: int = INSERT_CHUNK_SIZE) -> Optional[Dict[str, int]]:
+    """
+    Incremental upsert: only venues whose Places content hash changed are written.
+
+    New venues are embedded and labeled in full. For changed venues the description /
+    name embeddings are recomputed only when that text changed, and the vibe (via
+    label_vibe(venue), if given) only when the text it is labeled from changed.
+    Every written row lands in venue_changes, which the planners' snapshot refreshes from.
+
+    Returns counts: {'inserted', 'updated', 'unchanged', 'embedded'} (None on error)
+    """
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'embedded': 0}
+    if not venues:
+        return stats
+
+    unique = list({venue.get('id'): venue for venue in venues}.values())
+    stored_columns = ['id', 'content_hash'] + VIBE_TEXT_FIELDS
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            start = time.perf_counter()
+            for offset in range(0, len(unique), chunk_size):
+                chunk = unique[offset:offset + chunk_size]
+                cur.execute(
+                    f"SELECT {', '.join(stored_columns)} FROM venues WHERE id = ANY(%s)",
+                    ([venue.get('id') for venue in chunk],)
+                )
+                stored = {row[0]: dict(zip(stored_columns, row)) for row in cur.fetchall()}
+
+                # (venue, embed description?, embed name?, relabel vibe?)
+                work = []
+                for venue in chunk:
+                    old = stored.get(venue.get('id'))
+                    if old is None:
+                        work.append((venue, True, True, True))
+                        stats['inserted'] += 1
+                    elif old['content_hash'] == venue_content_hash(venue):
+                        stats['unchanged'] += 1
+                    else:
+                        work.append((
+                            venue,
+                            old['description'] != venue.get('description'),
+                            old['name'] != venue.get('name'),
+                            any(old[name] != venue.get(name) for name in VIBE_TEXT_FIELDS),
+                        ))
+                        stats['updated'] += 1
+                if not work:
+                    continue
+
+                texts = [venue.get('description', '') for venue, embed, _, _ in work if embed]
+                texts += [venue.get('name', '') for venue, _, embed, _ in work if embed]
+                vectors = iter(get_embeddings(texts))
+                stats['embedded'] += len(texts)
+                desc_vectors = [next(vectors) if embed else None for _, embed, _, _ in work]
+                name_vectors = [next(vectors) if embed else None for _, _, embed, _ in work]
+
+                rows = []
+                for (venue, _, _, relabel), desc, name in zip(work, desc_vectors, name_vectors):
+                    is_new = venue.get('id') not in stored
+                    if relabel and label_vibe is not None:
+                        vibe = label_vibe(venue)
+                    elif is_new:
+                        vibe = venue.get('true_vibe') or 'casual'
+                    else:
+                        vibe = None  # keep the stored label
+                    row = _venue_row(venue, desc, name)
+                    vibe_at = VENUE_COLUMNS.index('true_vibe')
+                    rows.append(row[:vibe_at] + (vibe,) + row[vibe_at + 1:])
+                execute_values(cur, SYNC_VENUES_SQL, rows, page_size=len(rows))
+
+            cur.execute(
+                "DELETE FROM venue_changes WHERE changed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'",
+                (VENUE_CHANGES_KEEP_DAYS,)
+            )
+            conn.commit()
+            elapsed = time.perf_counter() - start
+            print(f"✓ Synced {len(unique)} venues in {elapsed:.1f}s: {stats['inserted']} new, "
+                  f"{stats['updated']} changed, {stats['unchanged']} unchanged, {stats['embedded']} texts embedded")
+            return stats
+    except Exception as e:
+        conn.rollback()
+        print(f"✗ Error syncing venues: {e}")
+        return None
+    finally:
+        return_connection(conn)
+
+def _venues_version(conn):
+    """Snapshot version of the venues table (latest updated_at + row count)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT MAX(updated_at), COUNT(*) FROM venues")
+        latest, count = cur.fetchone()
+    return (latest, count) if latest is not None else None
+
+def get_venues_version():
+    """
+    Get the current venues table version.
+
+    Planner caches (like venue_index.VenueIndex) are keyed on this, so they get
+    rebuilt whenever venues are inserted or updated.
+    """
+    conn = get_connection()
+    try:
+        return _venues_version(conn)
+    except Exception as e:
+        print(f"✗ Error fetching venues version: {e}")
+        return None
+    finally:
+        return_connection(conn)
+
 def get_all_venues() -> pd.DataFrame:
     """Get all venues as DataFrame"""
     conn = get_connection()
     try:
         query = "SELECT * FROM venues ORDER BY rating DESC"
         df = pd.read_sql(query, conn)
+        df.attrs['venues_version'] = _venues_version(conn)
         return df
     except Exception as e:
         print(f"✗ Error fetching venues: {e}")
@@ -289,6 +538,99 @@ def get_all_venues() -> pd.DataFrame:
     finally:
         return_connection(conn)
 
+# Only the columns the planners need (not all 40+ columns)
+# Includes Google Places info for frontend display
+GA_COLUMNS = [
+    'id', 'name', 'address', 'short_address', 'lat', 'lon', 'rating', 'reviews_count', 'cost',
+    'type', 'all_types', 'primary_type_display_name', 'true_vibe',
+    'serves_dessert', 'serves_coffee', 'serves_beer', 'serves_wine',
+    'serves_cocktails', 'good_for_groups', 'good_for_children',
+    'live_music', 'outdoor_seating', 'allows_dogs', 'reservable',
+    'google_maps_uri', 'website_uri', 'regular_opening_hours', 'current_opening_hours',
+    'description', 'review_summary', 'price_level', 'updated_at'
+]
+
+def _venue_change_cursor(conn):
+    """Newest venue_changes id (None if the change log table doesnt exist yet)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('venue_changes') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            return None
+        cur.execute("SELECT COALESCE(MAX(change_id), 0) FROM venue_changes")
+        return cur.fetchone()[0]
+
+def get_venues_snapshot(since=None, ids=None):
+    """
+    Load venues (GA columns) for the in-memory venue snapshot.
+
+    Args:
+        since: only rows with updated_at >= since (for incremental refreshes)
+        ids: only these venues (for refreshes from the change log)
+
+    Returns:
+        (DataFrame, version) - the version and the change log cursor
+        (df.attrs['venue_change_id']) are read before the rows, so the rows are
+        at least as new as them. (None, None) on error.
+    """
+    conn = get_connection()
+    try:
+        version = _venues_version(conn)
+        change_id = _venue_change_cursor(conn)
+        sql = f"SELECT {', '.join(GA_COLUMNS)} FROM venues"
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("updated_at >= %s")
+            params.append(since)
+        if ids is not None:
+            conditions.append("id = ANY(%s)")
+            params.append(list(ids))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        df = pd.read_sql(sql, conn, params=params)
+        df.attrs['venues_version'] = version
+        df.attrs['venue_change_id'] = change_id
+        return df, version
+    except Exception as e:
+        print(f"✗ Error loading venue snapshot: {e}")
+        return None, None
+    finally:
+        return_connection(conn)
+
+def get_venue_changes(after: int):
+    """
+    Venues changed since change log id `after`.
+
+    Returns (newest change id, ids to re-read, ids deleted) - the last change of each
+    venue decides which list it is in. None when the log can't say (no log yet, or
+    entries after `after` were already pruned), then the caller has to reload everything.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(change_id) FROM venue_changes")
+            oldest = cur.fetchone()[0]
+            if oldest is None or oldest > after + 1:
+                return None
+            cur.execute(
+                "SELECT change_id, venue_id, op FROM venue_changes WHERE change_id > %s ORDER BY change_id",
+                (after,)
+            )
+            last_op = {}
+            newest = after
+            for change_id, venue_id, op in cur.fetchall():
+                last_op[venue_id] = op
+                newest = change_id
+        upserted = [venue_id for venue_id, op in last_op.items() if op != 'DELETE']
+        deleted = [venue_id for venue_id, op in last_op.items() if op == 'DELETE']
+        return newest, upserted, deleted
+    except Exception as e:
+        conn.rollback()
+        print(f"✗ Error reading venue changes: {e}")
+        return None
+    finally:
+        return_connection(conn)
+
 def get_venues_for_ga(vibes: List[str] = None, types: List[str] = None,
                       max_cost: int = None, min_rating: float = 0,
                       limit: int = 500) -> pd.DataFrame:
@@ -310,18 +652,7 @@ def get_venues_for_ga(vibes: List[str] = None, types: List[str] = None,
     """
     conn = get_connection()
     try:
-        # Only load columns needed for GA (not all 40+ columns)
-        # Includes Google Places info for frontend display
-        columns = [
-            'id', 'name', 'address', 'short_address', 'lat', 'lon', 'rating', 'reviews_count', 'cost',
-            'type', 'all_types', 'primary_type_display_name', 'true_vibe',
-            'serves_dessert', 'serves_coffee', 'serves_beer', 'serves_wine',
-            'serves_cocktails', 'good_for_groups', 'good_for_children',
-            'live_music', 'outdoor_seating', 'allows_dogs', 'reservable',
-            'google_maps_uri', 'website_uri', 'regular_opening_hours', 'current_opening_hours',
-            'description', 'review_summary', 'price_level'
-        ]
-        columns_str = ', '.join(columns)
+        columns_str = ', '.join(GA_COLUMNS)
 
         sql = f"SELECT {columns_str} FROM venues WHERE 1=1"
         params = []
@@ -353,6 +684,7 @@ def get_venues_for_ga(vibes: List[str] = None, types: List[str] = None,
         params.append(limit)
 
         df = pd.read_sql(sql, conn, params=params)
+        df.attrs['venues_version'] = _venues_version(conn)
         return df
     except Exception as e:
         print(f"✗ Error fetching venues for GA: {e}")
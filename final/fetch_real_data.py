@@ -2,12 +2,11 @@
 # fetches venue data from the google places API
 # run this to populate/update the csv with real ottawa venues
 
-import requests
+import asyncio
 import pandas as pd
-import time
 import os
-import json
 import nlp_classifier
+import places_fetcher
 from dotenv import load_dotenv
 
 # api key from environment variable - keeps it secure
@@ -195,124 +194,11 @@ FIELD_MASK = ",".join([
     "places.dineIn",
 ])
 
-def _bool_field(place: dict, key: str) -> bool:
-    # safely get a boolean field, returns False if missing
-    return bool(place.get(key))
-
-def _json_or_empty(value) -> str:
-    # converts nested objects to json strings for csv storage
-    # returns empty string if value is None or conversion fails
-    if not value:
-        return ""
-    try:
-        return json.dumps(value, ensure_ascii=False)
-    except TypeError:
-        return ""
-
-def fetch_places(query: str, api_key: str):
-    # fetches places from google places api for a search query
-    # returns list of venue dictionaries
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": api_key,
-        "X-Goog-FieldMask": FIELD_MASK,
-    }
-
-    payload = {
-        "textQuery": query,
-        "pageSize": 20,  # Max results per page
-        "languageCode": "en",
-        "regionCode": "CA", # Restrict to Canada to avoid ambiguity
-    }
-
-    print(f"Searching for: '{query}'...")
-
-    try:
-        response = requests.post(URL, headers=headers, json=payload)
-
-        if response.status_code == 200:
-            data = response.json()
-            results = data.get("places", [])
-            all_places = []
-
-            for place in results:
-                location = place.get("location") or {}
-                types = place.get("types") or []
-
-                # Prioritize AI-generated summaries, then editorial, then fallback
-                gen_summary = (place.get("generativeSummary") or {}).get("overview", {}).get("text")
-                editorial_summary = (place.get("editorialSummary") or {}).get("text")
-
-                if gen_summary:
-                    description = f"[AI Summary] {gen_summary}"
-                elif editorial_summary:
-                    description = editorial_summary
-                else:
-                    description = "No description available."
-
-                # Get the first user review as a sample
-                reviews = place.get("reviews") or []
-                review = reviews[0].get("text", {}).get("text", "No review available.") if reviews else "No review available."
-
-                # Flatten the data structure for CSV storage
-                venue = {
-                    "id": place.get("id"),
-                    "name": (place.get("displayName") or {}).get("text"),
-                    "address": place.get("formattedAddress"),
-                    "short_address": place.get("shortFormattedAddress"),
-                    "lat": location.get("latitude"),
-                    "lon": location.get("longitude"),
-                    "rating": place.get("rating", 0),
-                    "reviews_count": place.get("userRatingCount", 0),
-                    "price_level": str(place.get("priceLevel", "PRICE_LEVEL_UNSPECIFIED")),
-                    "price_range": place.get("priceRange"),
-                    "primary_type": place.get("primaryType"),
-                    "primary_type_display_name": (place.get("primaryTypeDisplayName") or {}).get("text"),
-                    "all_types": "|".join(types) if types else "",
-                    "type": types[0] if types else "unknown",
-                    "google_maps_uri": place.get("googleMapsUri"),
-                    "website_uri": place.get("websiteUri"),
-                    "regular_opening_hours": _json_or_empty(place.get("regularOpeningHours")),
-                    "current_opening_hours": _json_or_empty(place.get("currentOpeningHours")),
-                    "description": description,
-                    "review": review,
-                    "review_summary": (place.get("reviewSummary") or {}).get("text"),
-                    "neighborhood_summary": (place.get("neighborhoodSummary") or {}).get("text"),
-                    "serves_dessert": _bool_field(place, "servesDessert"),
-                    "serves_coffee": _bool_field(place, "servesCoffee"),
-                    "serves_beer": _bool_field(place, "servesBeer"),
-                    "serves_wine": _bool_field(place, "servesWine"),
-                    "serves_cocktails": _bool_field(place, "servesCocktails"),
-                    "serves_vegetarian": _bool_field(place, "servesVegetarianFood"),
-                    "serves_breakfast": _bool_field(place, "servesBreakfast"),
-                    "serves_brunch": _bool_field(place, "servesBrunch"),
-                    "serves_lunch": _bool_field(place, "servesLunch"),
-                    "serves_dinner": _bool_field(place, "servesDinner"),
-                    "good_for_groups": _bool_field(place, "goodForGroups"),
-                    "good_for_children": _bool_field(place, "goodForChildren"),
-                    "good_for_watching_sports": _bool_field(place, "goodForWatchingSports"),
-                    "live_music": _bool_field(place, "liveMusic"),
-                    "outdoor_seating": _bool_field(place, "outdoorSeating"),
-                    "allows_dogs": _bool_field(place, "allowsDogs"),
-                    "reservable": _bool_field(place, "reservable"),
-                    "takeout": _bool_field(place, "takeout"),
-                    "delivery": _bool_field(place, "delivery"),
-                    "dine_in": _bool_field(place, "dineIn"),
-                    "true_vibe": "", # Placeholder, will be filled later
-                }
-                all_places.append(venue)
-
-            print(f"   -> Found {len(results)} places.")
-            return all_places
-
-        else:
-            print(f"   -> Error: {response.status_code}")
-            return []
-
-    except Exception as e:
-        print(f"   -> Exception occurred: {e}")
-        return []
+def fetch_all_places(api_key: str, queries=None, seen_ids=None):
+    # every unique venue for the search queries, fetched concurrently with paging
+    # ids already in seen_ids are skipped
+    fetcher = places_fetcher.PlacesFetcher(api_key, FIELD_MASK, url=URL)
+    return asyncio.run(fetcher.fetch_all(queries or SEARCH_QUERIES, seen_ids=seen_ids))
 
 def fetch_and_save_data(api_key: str, output_file: str = OUTPUT_FILE):
     # main function - fetches all queries and saves to csv
@@ -331,17 +217,10 @@ def fetch_and_save_data(api_key: str, output_file: str = OUTPUT_FILE):
         except Exception as e:
             print(f"Warning: Could not read existing file: {e}")
 
-    # fetch new data from each search query
-    for q in SEARCH_QUERIES:
-        places = fetch_places(q, api_key)
-        new_count = 0
-        for p in places:
-            if p["id"] not in seen_ids:
-                master_list.append(p)
-                seen_ids.add(p["id"])
-                new_count += 1
-        print(f"   -> Added {new_count} new unique venues.")
-        time.sleep(1)  # dont hit api rate limits
+    # fetch new data from all search queries at once (rate limited in places_fetcher)
+    new_places = fetch_all_places(api_key, seen_ids=seen_ids)
+    master_list.extend(new_places)
+    print(f"   -> Added {len(new_places)} new unique venues.")
 
     df = pd.DataFrame(master_list)
     if df.empty:
@@ -0,0 +1,224 @@
+# ga_fitness.py
+# batch fitness engine for the genetic algorithm
+# calculate_fitness in ga_planner scores one itinerary at a time by walking dicts,
+# which is where most of the GA time goes (100 individuals x 50 generations).
+# here we encode the venue pool once into numpy columns and then score a whole
+# population (as a matrix of row indexes into the pool) in one vectorized pass.
+#
+# the scores are the same as calculate_fitness - anything that only depends on a
+# single venue (rating, vibe, location, feature flags) is folded into one
+# per-venue bonus column up front, and the itinerary-level rules (duplicates,
+# budget, type coverage, diversity, flow, distance) are done with array ops.
+# per-venue slot/stage/vibes/features and distances come from the shared VenueIndex.
+
+import numpy as np
+import pandas as pd
+
+from venue_index import SLOT_IDS, get_venue_index
+from config.scoring_config import ScoringConfig
+
+# same list calculate_fitness uses to decide if a single type is a cuisine request
+CUISINE_KEYWORDS = ['italian', 'french', 'japanese', 'chinese', 'vietnamese',
+                    'thai', 'indian', 'mexican', 'korean', 'greek', 'pizza',
+                    'sushi', 'ramen', 'pho', 'burger', 'steak', 'seafood']
+
+
+def _normalize_vibes(target_vibes):
+    # target vibes can come in as strings or (vibe, score) tuples
+    vibes = []
+    for v in target_vibes or []:
+        if isinstance(v, (list, tuple)):
+            vibes.append(str(v[0]).lower() if v else '')
+        else:
+            vibes.append(str(v).lower())
+    return vibes
+
+
+class BatchFitness:
+    """
+    Encodes a venue pool once and scores whole GA populations against it.
+
+    The request parameters (budget, types, vibes, ...) are fixed at construction
+    time, since they don't change during a single GA run.
+    """
+
+    def __init__(self, pool_df, budget_limit, location_filter=None, hidden_gem=False,
+                 target_types=None, target_vibes=None, venue_index=None):
+        records = pool_df.to_dict('records')
+        n = len(records)
+
+        if venue_index is None:
+            venue_index = get_venue_index(pool_df)
+        index_rows = venue_index.rows(pool_df['id'])
+
+        self.budget_limit = budget_limit
+        self.n_venues = n
+
+        # id -> row lookup so individuals (lists of venue dicts) can be turned into index rows
+        self._row_of = {}
+        for i, r in enumerate(records):
+            self._row_of.setdefault(r['id'], i)
+        self.id_code = pd.factorize(pd.Series([r['id'] for r in records], dtype=object))[0]
+
+        # numeric columns
+        self.cost = np.array([r['cost'] for r in records], dtype=float)
+        self.rating = np.array([r.get('rating', 3.0) for r in records], dtype=float)
+        self.reviews = np.nan_to_num(
+            np.array([r.get('reviews_count', 0) for r in records], dtype=float), nan=0.0)
+
+        # distances go through the index's spatial index (pool row -> index row)
+        self.index_rows = index_rows
+        self.spatial = venue_index.spatial()
+
+        # slot / stage ids
+        self.slot_id = venue_index.slot_id[index_rows]
+        self.stage = venue_index.stage[index_rows]
+
+        # vibe membership matrix (venue x vibe vocabulary)
+        parsed = [venue_index.vibes[row] for row in index_rows]
+        self.vibe_vocab = {}
+        for vibes in parsed:
+            for v in vibes:
+                self.vibe_vocab.setdefault(v, len(self.vibe_vocab))
+        self.vibe_matrix = np.zeros((n, len(self.vibe_vocab)), dtype=bool)
+        for i, vibes in enumerate(parsed):
+            self.vibe_matrix[i, [self.vibe_vocab[v] for v in vibes]] = True
+
+        # boolean feature flags
+        self.features = {name: column[index_rows] for name, column in venue_index.features.items()}
+
+        # type match matrix (venue x unique target type)
+        self.target_types = list(target_types) if target_types else []
+        self._unique_targets = list(dict.fromkeys(self.target_types))
+        self.type_match = np.zeros((n, len(self._unique_targets)), dtype=bool)
+        for j, t in enumerate(self._unique_targets):
+            self.type_match[:, j] = venue_index.type_match(t)[index_rows]
+
+        # cuisine check uses the same normalized target as calculate_fitness
+        # (tuples unwrapped, lowercased), not the raw target type
+        self.cuisine_request = False
+        self.cuisine_match = None
+        if len(self.target_types) == 1:
+            t = self.target_types[0]
+            if isinstance(t, (list, tuple)):
+                t = t[0] if t else ''
+            target = str(t).lower()
+            self.cuisine_request = any(kw in target for kw in CUISINE_KEYWORDS)
+            if self.cuisine_request:
+                self.cuisine_match = venue_index.type_match(target)[index_rows]
+
+        self.venue_bonus = self._venue_bonus(records, location_filter, hidden_gem,
+                                             _normalize_vibes(target_vibes))
+
+    def _venue_bonus(self, records, location_filter, hidden_gem, vibes_lower):
+        # everything in calculate_fitness that only depends on one venue at a time
+        bonus = np.zeros(self.n_venues)
+
+        if hidden_gem:
+            gem = ((self.reviews >= ScoringConfig.HIDDEN_GEM_MIN_REVIEWS) &
+                   (self.reviews <= ScoringConfig.HIDDEN_GEM_MAX_REVIEWS))
+            bonus += np.where(gem, ScoringConfig.HIDDEN_GEM_BONUS, 0)
+        else:
+            bonus += self.rating * ScoringConfig.GA_RATING_MULTIPLIER
+
+        if vibes_lower:
+            cols = [self.vibe_vocab[v] for v in vibes_lower if v in self.vibe_vocab]
+            vibe_hit = self.vibe_matrix[:, cols].any(axis=1)
+            bonus += np.where(vibe_hit, ScoringConfig.GA_VIBE_MATCH_BONUS, 0)
+
+        if location_filter:
+            location_filter_str = str(location_filter).lower()
+            if location_filter_str != "ottawa":
+                addrs = [(str(r.get('address', '')) + str(r.get('short_address', ''))).lower()
+                         for r in records]
+                miss = np.array([location_filter_str not in a for a in addrs], dtype=bool)
+                bonus -= np.where(miss, ScoringConfig.GA_LOCATION_MISMATCH_PENALTY, 0)
+
+        if vibes_lower and self.features:
+            f = self.features
+            if 'romantic' in vibes_lower:
+                bonus += np.where(f['reservable'], 25, 0)
+                bonus -= np.where(f['good_for_children'], 30, 0)
+            if 'outdoors' in vibes_lower or 'outdoor' in vibes_lower:
+                bonus += np.where(f['outdoor_seating'], 40, 0)
+            if 'family' in vibes_lower:
+                bonus += np.where(f['good_for_children'], 50, 0)
+            if 'energetic' in vibes_lower:
+                bonus += np.where(f['live_music'], 40, 0)
+            if any(v in vibes_lower for v in ['group', 'groups', 'friends', 'party']):
+                bonus += np.where(f['good_for_groups'], 40, 0)
+
+        return bonus
+
+    def encode(self, population):
+        # turns a list of itineraries (lists of venue dicts) into a (P, L) matrix of
+        # row indexes into the pool. shorter itineraries are padded with -1 at the end
+        length = max((len(ind) for ind in population), default=0)
+        idx = np.full((len(population), length), -1, dtype=np.int64)
+        for r, ind in enumerate(population):
+            idx[r, :len(ind)] = [self._row_of[p['id']] for p in ind]
+        return idx
+
+    def score_population(self, population):
+        """Score a list of itineraries, returns a float array of fitness values"""
+        return self.score_indices(self.encode(population))
+
+    def score_indices(self, idx):
+        """Score a (P, L) matrix of pool row indexes (-1 = empty slot)"""
+        idx = np.asarray(idx, dtype=np.int64)
+        P, L = idx.shape
+        if P == 0:
+            return np.zeros(0)
+
+        valid = idx >= 0
+        rows = np.where(valid, idx, 0)
+        lengths = valid.sum(axis=1)
+
+        scores = np.full(P, float(ScoringConfig.GA_INITIAL_SCORE))
+
+        # hard constraints - duplicates and budget
+        # padding gets unique negative codes so it never looks like a duplicate
+        codes = np.where(valid, self.id_code[rows], -1 - np.arange(L))
+        codes = np.sort(codes, axis=1)
+        has_dup = (codes[:, 1:] == codes[:, :-1]).any(axis=1)
+        total_cost = np.where(valid, self.cost[rows], 0).sum(axis=1)
+        invalid = has_dup | (total_cost > self.budget_limit)
+
+        # type coverage
+        if self.target_types:
+            hits = self.type_match[rows] & valid[:, :, None]
+            covered = hits.any(axis=1).sum(axis=1)
+            scores += covered * ScoringConfig.GA_TYPE_COVERAGE_BONUS
+            scores += np.where(covered == len(self.target_types),
+                               ScoringConfig.GA_FULL_TYPE_COVERAGE_BONUS, 0)
+            scores -= (len(self._unique_targets) - covered) * ScoringConfig.GA_MISSING_TYPE_PENALTY
+
+            if self.cuisine_request:
+                wrong = valid & (self.slot_id[rows] == SLOT_IDS['meal']) & ~self.cuisine_match[rows]
+                scores -= wrong.sum(axis=1) * ScoringConfig.WRONG_CUISINE_PENALTY
+
+        if L >= 2:
+            # padding is always at the end, so a pair is real iff its second element is
+            pair_valid = valid[:, 1:]
+
+            # diversity + flow only count for itineraries with 2+ venues
+            slot_ids = self.slot_id[rows]
+            present = (slot_ids[:, :, None] == np.arange(len(SLOT_IDS))) & valid[:, :, None]
+            unique_slots = present.any(axis=1).sum(axis=1)
+
+            stages = self.stage[rows]
+            ascending = ((stages[:, :-1] <= stages[:, 1:]) | ~pair_valid).all(axis=1)
+
+            multi = lengths >= 2
+            scores += np.where(multi, unique_slots * ScoringConfig.GA_DIVERSITY_BONUS, 0)
+            scores += np.where(multi & ascending, ScoringConfig.GA_GOOD_FLOW_BONUS, 0)
+
+            # distance between consecutive stops
+            index_rows = self.index_rows[rows]
+            dist = self.spatial.pair_distances(index_rows[:, :-1], index_rows[:, 1:])
+            scores -= np.where(pair_valid, dist, 0).sum(axis=1) * ScoringConfig.GA_DISTANCE_PENALTY
+
+        # per-venue terms
+        scores += np.where(valid, self.venue_bonus[rows], 0).sum(axis=1)
+
+        return np.where(invalid, 0, np.maximum(scores, 0))
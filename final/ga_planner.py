@@ -20,28 +20,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import db_manager
 from heuristic_planner import check_type_match
 from planner_utils import (RELATED_TERMS, sort_by_date_sequence, get_venue_stage,
-                           get_venue_slot, venue_matches_type, get_venue_features)
+                           get_venue_slot, venue_matches_type, get_venue_features,
+                           haversine_distance)
 from config.scoring_config import ScoringConfig
+from ga_fitness import BatchFitness
+from venue_index import get_venue_index
+from venue_snapshot import get_venue_snapshot
 
 # Setup logging for performance tracking
 logger = logging.getLogger(__name__)
 
-# Cache for distance calculations (optimization)
-_distance_cache = {}
-
-
-def haversine_distance_cached(lat1, lon1, lat2, lon2):
-    """
-    OPTIMIZED: Cached haversine distance calculation.
-    Avoids recalculating distances between same venue pairs.
-    """
-    cache_key = (round(lat1, 4), round(lon1, 4), round(lat2, 4), round(lon2, 4))
-    if cache_key not in _distance_cache:
-        # Use the original haversine function
-        from planner_utils import haversine_distance as hd
-        _distance_cache[cache_key] = hd(lat1, lon1, lat2, lon2)
-    return _distance_cache[cache_key]
-
 
 def calculate_fitness(itinerary, budget_limit, location_filter=None, hidden_gem=False,
                       current_dt=None, target_types=None, target_vibes=None):
@@ -52,6 +40,9 @@ def calculate_fitness(itinerary, budget_limit, location_filter=None, hidden_gem=
     #    plus complementary stuff (activity, bar, dessert) - not other cuisines
     # 2. if they ask for a category like bars, give them all bars
     # 3. wrong cuisine restaurants = massive penalty
+    #
+    # NOTE: ga_fitness.BatchFitness is the vectorized version of this used by the GA loop,
+    # if you change a rule here change it there too (test_ga_fitness checks they agree)
     score = 1000  # start high, subtract for problems (GA_INITIAL_SCORE)
 
     # hard constraints - these are instant fails
@@ -129,10 +120,10 @@ def calculate_fitness(itinerary, budget_limit, location_filter=None, hidden_gem=
         else:
             score += rating * 10  # GA_RATING_MULTIPLIER
 
-    # penalize far apart venues (OPTIMIZED: use cached distance)
+    # penalize far apart venues
     for i in range(len(itinerary) - 1):
         p1, p2 = itinerary[i], itinerary[i+1]
-        dist = haversine_distance_cached(p1['lat'], p1['lon'], p2['lat'], p2['lon'])
+        dist = haversine_distance(p1['lat'], p1['lon'], p2['lat'], p2['lon'])
         score -= dist * 5  # GA_DISTANCE_PENALTY
 
     # vibe matching
@@ -200,7 +191,14 @@ def calculate_fitness(itinerary, budget_limit, location_filter=None, hidden_gem=
     return max(score, 0)
 
 
-def create_diverse_stage_individual(pool_df, matching_df, itinerary_length):
+def _stage(venue, venue_index=None):
+    # stage lookup - uses the precomputed index when we have one
+    if venue_index is not None:
+        return venue_index.stage_of(venue)
+    return get_venue_stage(venue)
+
+
+def create_diverse_stage_individual(pool_df, matching_df, itinerary_length, venue_index=None):
     # creates an itinerary with different stages (activity -> meal -> drinks)
     # makes sure at least one venue matches what the user asked for
     # then fills in with complementary stuff
@@ -213,7 +211,7 @@ def create_diverse_stage_individual(pool_df, matching_df, itinerary_length):
         main_venue = matching_df.sample(1).iloc[0]
         selected.append(main_venue.to_dict())
         selected_ids.add(main_venue['id'])
-        main_stage = get_venue_stage(main_venue)
+        main_stage = _stage(main_venue, venue_index)
     else:
         main_stage = 3  # Default to meal stage
 
@@ -238,7 +236,10 @@ def create_diverse_stage_individual(pool_df, matching_df, itinerary_length):
 
         # Find venues with this stage
         stage_venues = pool_df[~pool_df['id'].isin(selected_ids)].copy()
-        stage_venues['_stage'] = stage_venues.apply(lambda r: get_venue_stage(r), axis=1)
+        if venue_index is not None:
+            stage_venues['_stage'] = venue_index.stage[venue_index.rows(stage_venues['id'])]
+        else:
+            stage_venues['_stage'] = stage_venues.apply(lambda r: get_venue_stage(r), axis=1)
         stage_venues = stage_venues[stage_venues['_stage'] == stage]
 
         if len(stage_venues) > 0:
@@ -262,7 +263,7 @@ def create_diverse_stage_individual(pool_df, matching_df, itinerary_length):
             break
 
     # Sort by stage for natural flow
-    selected.sort(key=lambda v: get_venue_stage(v))
+    selected.sort(key=lambda v: _stage(v, venue_index))
 
     return selected
 
@@ -302,7 +303,7 @@ def create_individual(df, itinerary_length, bias_top_n=None):
         return df.sample(n=itinerary_length, replace=False).to_dict('records')
 
 
-def crossover(parent1, parent2):
+def crossover(parent1, parent2, venue_index=None):
     # SEQUENCE-AWARE crossover - combines two parent itineraries
     # tries to maintain logical date flow (activity -> meal -> drinks)
     # takes venues from both parents and orders them by stage
@@ -324,7 +325,7 @@ def crossover(parent1, parent2):
                 seen_ids.add(v['id'])
 
         # sort by stage to get good date flow
-        unique_venues.sort(key=lambda v: get_venue_stage(v))
+        unique_venues.sort(key=lambda v: _stage(v, venue_index))
 
         # pick best ones (variety of stages preferred)
         child = []
@@ -332,7 +333,7 @@ def crossover(parent1, parent2):
         for v in unique_venues:
             if len(child) >= size:
                 break
-            stage = get_venue_stage(v)
+            stage = _stage(v, venue_index)
             # prefer venues from different stages
             if stage not in stages_used or len(child) < size:
                 child.append(v)
@@ -391,7 +392,7 @@ def crossover(parent1, parent2):
         return child
 
 
-def mutate(individual, df, mutation_rate=0.1, prefer_high_score=False):
+def mutate(individual, df, mutation_rate=0.1, prefer_high_score=False, venue_index=None):
     # mutation adds randomness to explore new solutions
     # can prefer high-scoring venues when we're stuck (diversity is low)
     # uses different mutation operators randomly for variety
@@ -412,12 +413,12 @@ def mutate(individual, df, mutation_rate=0.1, prefer_high_score=False):
     elif mutation_type == 'sequence_fix':
         # NEW: sort the itinerary by stage to fix bad sequences
         # this mutation directly improves date flow
-        individual.sort(key=lambda v: get_venue_stage(v))
+        individual.sort(key=lambda v: _stage(v, venue_index))
 
     elif mutation_type == 'stage_swap' and len(individual) >= 2:
         # NEW: find venues in wrong order and swap them
         # e.g., if dessert is before dinner, swap them
-        stages = [(i, get_venue_stage(v)) for i, v in enumerate(individual)]
+        stages = [(i, _stage(v, venue_index)) for i, v in enumerate(individual)]
         for i in range(len(stages) - 1):
             if stages[i][1] > stages[i+1][1]:  # backwards!
                 # swap them to fix the sequence
@@ -459,13 +460,20 @@ def calculate_population_diversity(population):
     return unique_ratio
 
 
-def local_search(individual, df, budget_limit, target_types, target_vibes, location_filter, hidden_gem, current_dt):
+def local_search(individual, df, budget_limit, target_types, target_vibes, location_filter, hidden_gem, current_dt,
+                 fitness=None):
     # local search tries to improve an itinerary by swapping individual venues
     # this turns the GA into a Memetic Algorithm (GA + local search)
     # basically hill climbing on top of the evolutionary search
+    # if a BatchFitness is passed in, all candidate swaps for a position are scored in one batch
+
+    def score_all(itineraries):
+        if fitness is not None:
+            return fitness.score_population(itineraries)
+        return [calculate_fitness(ind, budget_limit, location_filter, hidden_gem,
+                                  current_dt, target_types, target_vibes) for ind in itineraries]
 
-    current_fitness = calculate_fitness(individual, budget_limit, location_filter, hidden_gem,
-                                        current_dt, target_types, target_vibes)
+    current_fitness = score_all([individual])[0]
 
     current_ids = {p['id'] for p in individual}
     improved = True
@@ -484,31 +492,28 @@ def local_search(individual, df, budget_limit, target_types, target_vibes, locat
             if len(candidates) == 0:
                 continue
 
-            for _, candidate in candidates.iterrows():
-                # try swapping
-                old_venue = individual[i]
-                individual[i] = candidate.to_dict()
-
-                new_fitness = calculate_fitness(individual, budget_limit, location_filter,
-                                               hidden_gem, current_dt, target_types, target_vibes)
+            candidates = candidates.to_dict('records')
+            trials = [individual[:i] + [c] + individual[i+1:] for c in candidates]
+            trial_scores = score_all(trials)
 
+            # keep the first swap that improves things (same order as trying them one by one)
+            for candidate, new_fitness in zip(candidates, trial_scores):
                 if new_fitness > current_fitness:
-                    # keep the improvement
                     current_fitness = new_fitness
-                    current_ids.discard(old_venue['id'])
+                    current_ids.discard(individual[i]['id'])
                     current_ids.add(candidate['id'])
+                    individual[i] = candidate
                     improved = True
                     break
-                else:
-                    # revert
-                    individual[i] = old_venue
 
     return individual
 
-def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, location_filter=None, target_types=None, hidden_gem=False, current_dt=None, semantic_query="", randomness=0.2, excluded_venue_ids=None):
+def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, location_filter=None, target_types=None, hidden_gem=False, current_dt=None, semantic_query="", randomness=0.2, excluded_venue_ids=None, should_stop=None):
     # main GA function - evolves itineraries to find the best combo
     # slower than heuristic but explores way more options
     # randomness controls mutation/exploration (0=stable, 1=chaotic)
+    # should_stop is an optional callable checked every generation - the server's planner
+    # pool uses it to stop a run early when the chat gets killed or the request times out
     # OPTIMIZED: Smart database loading, vectorized operations, caching
 
     start_time = time.time()
@@ -574,6 +579,13 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
     matching_df = pool_df[pool_df['similarity_score'] >= 2.0]  # direct type match
     has_matches = len(matching_df) > 0
 
+    # precomputed per-venue slot/stage/vibes/features (shared with the heuristic planner)
+    venue_index = get_venue_index(pool_df)
+
+    # encode the pool once so whole generations can be scored in one vectorized pass
+    fitness = BatchFitness(pool_df, budget_limit, location_filter, hidden_gem,
+                           target_types, target_vibes, venue_index=venue_index)
+
     # initialize population
     bias_n = min(30, len(pool_df) // 3)
     population = []
@@ -583,7 +595,8 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
             # We have type-matching venues - ensure they're included
             if i < ScoringConfig.POPULATION_SIZE * 0.5:
                 # 50%: seed with matching venues + diverse stages
-                population.append(create_diverse_stage_individual(pool_df, matching_df, itinerary_length))
+                population.append(create_diverse_stage_individual(pool_df, matching_df, itinerary_length,
+                                                                  venue_index=venue_index))
             elif i < ScoringConfig.POPULATION_SIZE * 0.8:
                 # 30%: bias towards high-scoring venues
                 population.append(create_individual(pool_df, itinerary_length, bias_top_n=bias_n))
@@ -603,9 +616,11 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
 
     # main evolution loop
     for _ in range(ScoringConfig.GENERATIONS):
+        if should_stop is not None and should_stop():
+            break  # cancelled, caller wont use the result anyway
+
         # score everyone
-        scores = [calculate_fitness(ind, budget_limit, location_filter, hidden_gem,
-                                   current_dt, target_types, target_vibes) for ind in population]
+        scores = fitness.score_population(population).tolist()
 
         current_best = max(scores)
         best_score_history.append(current_best)
@@ -650,7 +665,7 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
 
             # crossover rate - controlled by randomness slider
             if random.random() < crossover_rate:
-                child = crossover(parent1, parent2)
+                child = crossover(parent1, parent2, venue_index=venue_index)
             else:
                 # just copy one parent (with deep copy)
                 child = [v.copy() for v in parent1]
@@ -658,21 +673,22 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
             # if diversity is low, bias mutations towards good venues
             diversity = calculate_population_diversity(population)
             prefer_high = diversity < 0.3
-            child = mutate(child, pool_df, current_mutation_rate, prefer_high_score=prefer_high)
+            child = mutate(child, pool_df, current_mutation_rate, prefer_high_score=prefer_high,
+                           venue_index=venue_index)
 
             next_gen.append(child)
 
         population = next_gen
 
     # find the best one at the end
-    final_scores = [calculate_fitness(ind, budget_limit, location_filter, hidden_gem, current_dt, target_types, target_vibes) for ind in population]
+    final_scores = fitness.score_population(population)
     best_idx = np.argmax(final_scores)
 
     # apply local search to polish the best solution (memetic algorithm)
     # this can squeeze out a few more points of fitness
     best_plan = population[best_idx]
     best_plan = local_search(best_plan, pool_df, budget_limit, target_types, target_vibes,
-                             location_filter, hidden_gem, current_dt)
+                             location_filter, hidden_gem, current_dt, fitness=fitness)
 
     # could print final score here for debugging but leaving it out
 
@@ -692,7 +708,7 @@ def run_genetic_algorithm(df, target_vibes, budget_limit, itinerary_length=3, lo
             reasons.append("hidden gem")
 
         if target_types:
-            matched_type = check_type_match(venue, target_types)
+            matched_type = check_type_match(venue, target_types, venue_index=venue_index)
             if matched_type:
                 reasons.append(f"is a {matched_type}")
 
@@ -711,17 +727,18 @@ def plan_date(preferences):
     """
     Integration wrapper for AI Orchestrator
     Plans a date from preferences dictionary using genetic algorithm
-    OPTIMIZED: Uses smart database loading for 5-10x faster performance
+    OPTIMIZED: Filters the in-memory venue snapshot instead of querying the database
 
     Args:
         preferences: dict with keys:
-            - venues_df: DataFrame of venues (optional, will load from DB if not provided)
+            - venues_df: DataFrame of venues (optional, uses the venue snapshot if not provided)
             - start_location: tuple (lat, lon)
             - vibe: str, target vibe
             - budget_range: tuple (min, max) or None
             - max_venues: int, max number of venues
             - target_types: list of types to filter by (optional)
             - hidden_gem: bool, prefer hidden gems (optional)
+            - should_stop: callable, return True to stop evolving early (optional)
 
     Returns:
         dict with success status, itinerary, vibe, num_venues
@@ -729,24 +746,28 @@ def plan_date(preferences):
     try:
         venues_df = preferences.get('venues_df')
 
-        # OPTIMIZATION: Use smart database loading if no venues provided
+        # OPTIMIZATION: filter the in-memory venue snapshot if no venues provided
         if venues_df is None or venues_df.empty:
-            db_manager.init_db_pool()
-
             # Extract filters for smart loading
             vibe = preferences.get('vibe', 'casual')
             budget_range = preferences.get('budget_range')
             target_types = preferences.get('target_types')
-
-            # Load only needed venues with filters applied at DB level
             max_cost = budget_range[1] if budget_range else None
-            venues_df = db_manager.get_venues_for_ga(
+            filters = dict(
                 vibes=[vibe] if vibe else None,
                 types=target_types,
                 max_cost=max_cost,
                 limit=500  # Load up to 500 venues for GA
             )
 
+            # same filters as get_venues_for_ga but no db round trip - the snapshot
+            # is loaded once per process and refreshed in the background
+            snapshot = get_venue_snapshot()
+            if snapshot is not None:
+                venues_df = snapshot.filter(**filters)
+            else:
+                venues_df = db_manager.get_venues_for_ga(**filters)
+
             if venues_df is None or venues_df.empty:
                 return {'success': False, 'error': 'No venues available in database'}
 
@@ -766,7 +787,8 @@ def plan_date(preferences):
             itinerary_length=max_venues,
             location_filter=start_location,
             target_types=preferences.get('target_types'),
-            hidden_gem=preferences.get('hidden_gem', False)
+            hidden_gem=preferences.get('hidden_gem', False),
+            should_stop=preferences.get('should_stop')
         )
 
         return {
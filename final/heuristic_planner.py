@@ -15,22 +15,24 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import nlp_classifier
-import db_manager
 from planner_utils import (
     haversine_distance, is_open_now, add_similarity_scores, RELATED_TERMS,
     get_time_score_adjustment, suggest_itinerary_order, sort_by_date_sequence,
     get_venue_slot, venue_matches_type, get_venue_features
 )
 from config.scoring_config import ScoringConfig
+from venue_index import get_venue_index
+from venue_snapshot import get_venue_snapshot
 
 # keeping this alias so old code still works
 calculate_distance = haversine_distance
 
 
-def check_type_match(venue, needed_types):
+def check_type_match(venue, needed_types, venue_index=None):
     # checks if venue matches any of the types the user asked for
     # uses venue_matches_type which checks type fields AND serves_* columns
     # returns the matched type or None if no match
+    # pass a VenueIndex to use its precomputed matches instead
 
     if not needed_types:
         return None
@@ -39,7 +41,10 @@ def check_type_match(venue, needed_types):
 
     # Check each needed type
     for t in needed_types:
-        if venue_matches_type(venue, t):
+        if venue_index is not None:
+            if venue_index.matches_type(venue, t):
+                return t
+        elif venue_matches_type(venue, t):
             return t
 
     return None
@@ -47,7 +52,7 @@ def check_type_match(venue, needed_types):
 
 def score_venue(venue, current_location, current_cost, target_vibes, budget_limit,
                 needed_types=None, hidden_gem=False, visited_types=None,
-                current_hour=None, stop_number=0):
+                current_hour=None, stop_number=0, venue_index=None):
     # this is the main scoring function - figures out how good a venue is
     # higher score = better venue for the itinerary
     # returns -1 if the venue is invalid (like over budget)
@@ -60,6 +65,9 @@ def score_venue(venue, current_location, current_cost, target_vibes, budget_limi
     # - is it a hidden gem if they want that?
     # - have we already picked a similar venue?
     # - does it make sense for this time of day?
+    #
+    # venue_index (a VenueIndex) is optional, when given we read slot/vibes/features
+    # from it instead of re-parsing the venue every time
 
     score = 0
     visited_types = visited_types or set()
@@ -69,7 +77,10 @@ def score_venue(venue, current_location, current_cost, target_vibes, budget_limi
         return -1
 
     # vibe matching - give points if the venue matches what they want
-    venue_vibes = [v.strip().lower() for v in str(venue['true_vibe']).split(',')]
+    if venue_index is not None:
+        venue_vibes = venue_index.vibes_of(venue)
+    else:
+        venue_vibes = [v.strip().lower() for v in str(venue['true_vibe']).split(',')]
 
     if isinstance(target_vibes, list):
         match_count = sum(1 for v in target_vibes if v.lower() in venue_vibes)
@@ -115,12 +126,12 @@ def score_venue(venue, current_location, current_cost, target_vibes, budget_limi
         score -= (dist ** ScoringConfig.DISTANCE_EXPONENT) * ScoringConfig.DISTANCE_PENALTY_MULTIPLIER
 
     # type matching is super important - if they asked for coffee, prioritize cafes
-    matched_type = check_type_match(venue, needed_types)
+    matched_type = check_type_match(venue, needed_types, venue_index)
     if matched_type:
         score += ScoringConfig.TYPE_MATCH_BONUS  # big bonus, this is what they asked for!
     elif needed_types:
         # Use slot-based logic to determine penalty
-        slot = get_venue_slot(venue)
+        slot = venue_index.slot_of(venue) if venue_index is not None else get_venue_slot(venue)
 
         if slot == 'meal':
             # It's a restaurant but wrong type - MASSIVE penalty
@@ -157,7 +168,7 @@ def score_venue(venue, current_location, current_cost, target_vibes, budget_limi
     # use csv columns for extra scoring
     if target_vibes:
         vibes_lower = [v.lower() for v in target_vibes] if isinstance(target_vibes, list) else [target_vibes.lower()]
-        features = get_venue_features(venue)
+        features = venue_index.features_of(venue) if venue_index is not None else get_venue_features(venue)
 
         # Romantic dates: bonus for reservable, penalty for kids venues
         if 'romantic' in vibes_lower:
@@ -188,11 +199,145 @@ def score_venue(venue, current_location, current_cost, target_vibes, budget_limi
 
     return score
 
-def run_heuristic_search(df, target_vibes, budget_limit, itinerary_length=3, location_filter=None, target_types=None, hidden_gem=False, current_dt=None, semantic_query=None, randomness=0.2):
+class VectorizedScorer:
+    # array version of score_venue - scores every venue in the dataframe at once
+    # the parts that dont change between steps (vibes, ratings, similarity, features,
+    # type matches) are computed once up front, then each step only does the parts
+    # that depend on the current plan (budget, distance, needed types, diversity, time)
+    # same scoring rules as score_venue, if you change one change the other too
+
+    def __init__(self, df, target_vibes, hidden_gem=False, venue_index=None):
+        if venue_index is None:
+            venue_index = get_venue_index(df)
+        self.venue_index = venue_index
+        rows = venue_index.rows(df['id'])
+        n = len(df)
+
+        self.ids = df['id'].to_numpy()
+        self.cost = df['cost'].to_numpy(dtype=float)
+        self.rows = rows
+        self.spatial = venue_index.spatial()
+        self.slot = np.array([venue_index.slot[r] for r in rows], dtype=object)
+
+        rating = df['rating'].to_numpy(dtype=float) if 'rating' in df.columns else np.full(n, 3.0)
+        reviews = df['reviews_count'].to_numpy(dtype=float) if 'reviews_count' in df.columns else np.zeros(n)
+        reviews = np.nan_to_num(reviews, nan=0.0)
+        self.rating = rating
+
+        # vibe matching
+        vibes = [venue_index.vibes[r] for r in rows]
+        if isinstance(target_vibes, list):
+            wanted = [v.lower() for v in target_vibes]
+        elif target_vibes:
+            wanted = [target_vibes.lower()]
+        else:
+            wanted = []
+        match_count = np.array([sum(1 for v in wanted if v in vv) for vv in vibes], dtype=float)
+        static = match_count * ScoringConfig.VIBE_MATCH_BONUS
+        static += np.array(['neutral' in vv for vv in vibes]) * ScoringConfig.NEUTRAL_VIBE_BONUS
+
+        # ratings
+        if hidden_gem:
+            gem = (reviews >= ScoringConfig.HIDDEN_GEM_MIN_REVIEWS) & (reviews <= ScoringConfig.HIDDEN_GEM_MAX_REVIEWS)
+            static += np.where(gem, ScoringConfig.HIDDEN_GEM_BONUS, 0)
+            static -= np.where(~gem & (reviews > 1000), ScoringConfig.HIDDEN_GEM_POPULARITY_PENALTY, 0)
+            static += rating * ScoringConfig.HIDDEN_GEM_RATING_MULTIPLIER
+        else:
+            C = ScoringConfig.BAYESIAN_AVERAGE_CONSTANT
+            m = ScoringConfig.BAYESIAN_MIN_REVIEWS
+            static += (rating * reviews + C * m) / (reviews + m) * ScoringConfig.RATING_MULTIPLIER
+
+        if 'similarity_score' in df.columns:
+            static += df['similarity_score'].to_numpy(dtype=float) * 100
+        self.static = static
+
+        # type info for diversity and time of day
+        types = df['type'] if 'type' in df.columns else [''] * n
+        self.venue_type = np.array([str(t).lower() for t in types], dtype=object)
+        self.category = np.array([t.split('_')[0] if '_' in t else t for t in self.venue_type], dtype=object)
+        self._time_mult = {}
+
+        # feature bonuses (added after the time multiplier, like score_venue)
+        bonus = np.zeros(n)
+        if target_vibes:
+            f = {name: column[rows] for name, column in venue_index.features.items()}
+            if 'romantic' in wanted:
+                bonus += f['reservable'] * ScoringConfig.ROMANTIC_RESERVABLE_BONUS
+                bonus -= f['good_for_children'] * ScoringConfig.ROMANTIC_KIDS_PENALTY
+            if 'outdoors' in wanted or 'outdoor' in wanted:
+                bonus += f['outdoor_seating'] * ScoringConfig.OUTDOOR_SEATING_BONUS
+            if 'family' in wanted:
+                bonus += f['good_for_children'] * ScoringConfig.FAMILY_KIDS_BONUS
+            if 'energetic' in wanted:
+                bonus += f['live_music'] * ScoringConfig.ENERGETIC_LIVE_MUSIC_BONUS
+            if any(v in wanted for v in ['group', 'groups', 'friends', 'party']):
+                bonus += f['good_for_groups'] * ScoringConfig.GROUP_FRIENDLY_BONUS
+        self.feature_bonus = bonus
+
+        # slot penalties for venues that dont match a needed type
+        slot_adjust = np.full(n, -float(ScoringConfig.UNKNOWN_SLOT_PENALTY))
+        slot_adjust[self.slot == 'meal'] = -ScoringConfig.WRONG_CUISINE_PENALTY
+        slot_adjust[np.isin(self.slot, ['activity', 'drinks', 'dessert', 'coffee'])] = ScoringConfig.COMPLEMENTARY_VENUE_BONUS
+        self.slot_adjust = slot_adjust
+
+    def type_mask(self, needed_types):
+        matched = np.zeros(len(self.ids), dtype=bool)
+        for t in needed_types or []:
+            matched |= self.venue_index.type_match(t)[self.rows]
+        return matched
+
+    def time_multiplier(self, hour):
+        # get_time_score_adjustment only depends on the type string, so do it once per unique type
+        if hour not in self._time_mult:
+            types, inverse = np.unique(self.venue_type, return_inverse=True)
+            mult = np.array([get_time_score_adjustment(t, hour) for t in types])
+            self._time_mult[hour] = mult[inverse]
+        return self._time_mult[hour]
+
+    def score(self, current_location, current_cost, budget_limit, needed_types=None,
+              visited_types=None, current_hour=None, stop_number=0, rng=None):
+        """Score every venue, returns an array with -1 for venues that cant be picked"""
+        visited_types = visited_types or set()
+        rng = rng or np.random.default_rng(random.getrandbits(32))
+
+        score = self.static.copy()
+        score += rng.uniform(0, ScoringConfig.RANDOMNESS_MULTIPLIER, len(score)) * (self.rating / 5.0)
+
+        if current_location is not None:
+            # once weve picked a venue, current_location is that venue - use its row so
+            # the spatial index can answer from the distance matrix
+            dist = self.spatial.distances_from(current_location['lat'], current_location['lon'], self.rows,
+                                               row=self.venue_index.row_of.get(current_location.get('id')))
+            score -= (dist ** ScoringConfig.DISTANCE_EXPONENT) * ScoringConfig.DISTANCE_PENALTY_MULTIPLIER
+
+        if needed_types:
+            matched = self.type_mask(needed_types)
+            score += np.where(matched, ScoringConfig.TYPE_MATCH_BONUS, self.slot_adjust)
+
+        if visited_types:
+            visited = list(visited_types)
+            score -= ((self.venue_type != '') & np.isin(self.venue_type, visited)) * ScoringConfig.REPEATED_TYPE_PENALTY
+            new_category = (self.category != '') & ~np.isin(self.category, visited)
+        else:
+            new_category = self.category != ''
+        score += new_category * ScoringConfig.NEW_CATEGORY_BONUS
+
+        if current_hour is not None:
+            score *= self.time_multiplier((current_hour + stop_number * 2) % 24)
+
+        score += self.feature_bonus
+
+        # hard constraint - over budget is never valid
+        return np.where(current_cost + self.cost > budget_limit, -1.0, score)
+
+
+def run_heuristic_search(df, target_vibes, budget_limit, itinerary_length=3, location_filter=None, target_types=None, hidden_gem=False, current_dt=None, semantic_query=None, randomness=0.2, should_stop=None):
     # main function - builds an itinerary using greedy search
     # basically at each step we just pick the best looking venue and add it
     # not guaranteed to find the absolute best combo but its fast and works pretty well
     # randomness parameter controls how often we pick randomly vs best (0=always best, 1=very random)
+    # should_stop is an optional callable checked before each step (same as the GA) - the
+    # server's planner pool uses it to stop early when the chat gets killed or times out
 
     # learn from data if we havent already (data-driven approach)
     from planner_utils import initialize_from_data
@@ -252,39 +397,44 @@ def run_heuristic_search(df, target_vibes, budget_limit, itinerary_length=3, loc
             df = df[loc_mask].copy()
         # if no venues match location, just use all of ottawa
 
-    # ok now the actual greedy search - for each stop find the best venue
-    for step in range(itinerary_length):
-        # collect all valid venues with their scores
-        scored_venues = []
+    if should_stop is not None and should_stop():
+        return []
+
+    # precomputed per-venue slot/vibes/features/type matches (shared with the GA)
+    venue_index = get_venue_index(df)
 
-        for _, venue in df.iterrows():
-            if venue['id'] in visited_ids:
-                continue
+    # ok now the actual greedy search - for each stop find the best venue
+    # all venues are scored at once as arrays, then we take the argmax (or sample the top few)
+    scorer = VectorizedScorer(df, target_vibes, hidden_gem, venue_index)
+    # seed numpy from python's random so random.seed() still makes plans reproducible
+    rng = np.random.default_rng(random.getrandbits(32))
 
-            score = score_venue(venue, current_location, current_cost, target_vibes,
-                              budget_limit, needed_types, hidden_gem, visited_types,
-                              current_hour=current_hour, stop_number=step)
+    for step in range(itinerary_length):
+        if should_stop is not None and should_stop():
+            break  # cancelled, caller wont use the result anyway
 
-            if score > -1:  # valid venue
-                scored_venues.append((score, venue))
+        scores = scorer.score(current_location, current_cost, budget_limit, needed_types,
+                              visited_types, current_hour=current_hour, stop_number=step, rng=rng)
 
-        if not scored_venues:
+        # valid venues - not already picked, and score > -1 (same rule as score_venue)
+        candidates = np.flatnonzero(~np.isin(scorer.ids, list(visited_ids)) & (scores > -1))
+        if len(candidates) == 0:
             continue
 
-        # sort by score descending
-        scored_venues.sort(key=lambda x: x[0], reverse=True)
-
         # randomness controls selection:
         # 0 = always pick best, 1 = pick randomly from top candidates
-        if randomness > 0 and len(scored_venues) > 1 and random.random() < randomness:
+        if randomness > 0 and len(candidates) > 1 and random.random() < randomness:
             # pick from top N candidates based on randomness level
             # higher randomness = consider more candidates
-            top_n = max(2, int(len(scored_venues) * randomness * 0.5))
-            top_n = min(top_n, len(scored_venues))
-            best_score, best_venue = random.choice(scored_venues[:top_n])
+            top_n = max(2, int(len(candidates) * randomness * 0.5))
+            top_n = min(top_n, len(candidates))
+            top = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+            pos = random.choice(list(top))
         else:
-            # deterministic - just pick the best one
-            best_score, best_venue = scored_venues[0]
+            # deterministic - just pick the best one (first one wins ties, like a stable sort)
+            pos = candidates[np.argmax(scores[candidates])]
+
+        best_score, best_venue = scores[pos], df.iloc[pos].copy()
 
         # if we found something good, add it to the plan
         if best_venue is not None and best_score > -1:
@@ -305,7 +455,7 @@ def run_heuristic_search(df, target_vibes, budget_limit, itinerary_length=3, loc
             elif hidden_gem and 10 <= best_venue.get('reviews_count', 0) <= 300:
                 reasons.append("is a hidden gem")
 
-            matched_type = check_type_match(best_venue, needed_types)
+            matched_type = check_type_match(best_venue, needed_types, venue_index)
             if matched_type:
                 reasons.append(f"is a {matched_type}")
 
@@ -324,7 +474,7 @@ def run_heuristic_search(df, target_vibes, budget_limit, itinerary_length=3, loc
             visited_types.add(venue_type)
 
             # if this venue fulfilled a type request, remove it from needed
-            fulfilled_type = check_type_match(best_venue, needed_types)
+            fulfilled_type = check_type_match(best_venue, needed_types, venue_index)
             if fulfilled_type:
                 needed_types.remove(fulfilled_type)
 
@@ -350,6 +500,9 @@ def plan_date(preferences):
             - budget_range: tuple (min, max) or None
             - max_venues: int, max number of venues
             - max_duration_hours: int, max duration
+            - target_types: list of types to filter by (optional)
+            - hidden_gem: bool, prefer hidden gems (optional)
+            - should_stop: callable, return True to stop searching early (optional)
 
     Returns:
         dict with success status, itinerary, vibe, num_venues
@@ -359,14 +512,13 @@ def plan_date(preferences):
         venues_df = preferences.get('venues_df')
 
         if venues_df is None or venues_df.empty:
-            # Try to load from database
-            db_manager.init_db_pool()
-            venues_df = db_manager.get_all_venues()
+            # Use the in-memory venue snapshot (loads from the database once per process)
+            snapshot = get_venue_snapshot()
+            venues_df = snapshot.df.copy() if snapshot is not None else None
 
             if venues_df is None or venues_df.empty:
                 return {'success': False, 'error': 'No venues available in database'}
 
-        start_location = preferences.get('start_location', (45.4215, -75.6972))
         vibe = preferences.get('vibe', 'casual')
         budget_range = preferences.get('budget_range')
         max_venues = preferences.get('max_venues', 5)
@@ -375,12 +527,14 @@ def plan_date(preferences):
         budget_limit = budget_range[1] if budget_range else 150
 
         # Plan the date
-        itinerary = plan_date_heuristic(
+        itinerary = run_heuristic_search(
             venues_df,
-            start_location,
             target_vibes=[vibe],
             budget_limit=budget_limit,
-            itinerary_length=max_venues
+            itinerary_length=max_venues,
+            target_types=preferences.get('target_types'),
+            hidden_gem=preferences.get('hidden_gem', False),
+            should_stop=preferences.get('should_stop')
         )
 
         return {
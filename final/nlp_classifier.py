@@ -4,23 +4,25 @@
 # NOW SUPPORTS POSTGRESQL DATABASE FOR LEARNING AND CACHING
 
 import pandas as pd
-import spacy
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
 import db_manager
 import cache_manager
+from vibe_matcher import VibeMatcher
 import os
+import spacy_parser
 
-# load spacy model once at startup - this takes a few seconds
-nlp = spacy.load("en_core_web_md")
+# the spacy model is only needed for semantic similarity, so it isnt loaded on import
+# anymore - spacy_parser loads it on first use and both modules share that one copy
 
 def compute_semantic_similarity(df, query_text):
     # computes how similar a query is to each venue in the dataset
     # uses spacy word vectors - pretty slow for large datasets but works well
     # returns a pandas series of scores from 0 to 1
 
+    nlp = spacy_parser.get_nlp_model()
     query_doc = nlp(query_text.lower())
 
     # combine all the text fields for each venue
@@ -83,6 +85,24 @@ def train_vibe_classifier(data_source='ottawa_venues.csv'):
     return vectorizer, clf
 
 
+# compiled keyword matcher - built on first use, thrown away when the keyword tables are re-learned
+_vibe_matcher = None
+
+
+def get_vibe_matcher():
+    # the VibeMatcher for the current SEED / LEARNED keywords and TYPE_VIBE_MAP
+    global _vibe_matcher
+    if _vibe_matcher is None:
+        _vibe_matcher = VibeMatcher(SEED_VIBE_KEYWORDS, LEARNED_VIBE_KEYWORDS, TYPE_VIBE_MAP)
+    return _vibe_matcher
+
+
+def reset_vibe_matcher():
+    # call this after changing any of the keyword tables
+    global _vibe_matcher
+    _vibe_matcher = None
+
+
 # seed keywords to bootstrap the learning - the rest gets learned from data
 SEED_VIBE_KEYWORDS = {
     'romantic': ['romantic', 'intimate', 'candlelit', 'date night'],
@@ -186,6 +206,8 @@ def learn_vibe_keywords_from_data(csv_path='ottawa_venues.csv', min_frequency=0.
         combined.update(LEARNED_VIBE_KEYWORDS.get(vibe, []))
         VIBE_KEYWORDS[vibe] = list(combined)
 
+    reset_vibe_matcher()
+    cache_manager.clear_cache('vibe')
     print(f"  Learned keywords for {len(LEARNED_VIBE_KEYWORDS)} vibes from data")
 
 
@@ -256,6 +278,8 @@ def learn_type_vibe_map_from_data(csv_path='ottawa_venues.csv'):
         combined.update(LEARNED_TYPE_VIBE_MAP.get(t, []))
         TYPE_VIBE_MAP[t] = list(combined)
 
+    reset_vibe_matcher()
+    cache_manager.clear_cache('vibe')
     print(f"  Learned type-vibe mappings for {len(LEARNED_TYPE_VIBE_MAP)} venue types")
 
 
@@ -263,64 +287,59 @@ def learn_type_vibe_map_from_data(csv_path='ottawa_venues.csv'):
 if os.path.exists('ottawa_venues.csv'):
     learn_type_vibe_map_from_data()
 
+def _vibe_cache_key(text, venue_type, use_learned):
+    # venue type and use_learned change the answer, so they're part of the key
+    # (plain text stays the key for the default call)
+    if venue_type is None and use_learned:
+        return text
+    return f"{text}\x00{venue_type}\x00{use_learned}"
+
+
 def get_keyword_vibes(text, venue_type=None, use_learned=True):
     # extracts vibes by matching keywords in the text
     # uses SEED keywords for precise matching
     # optionally uses LEARNED keywords for better recall (venue classification)
     # NOW WITH SMART CACHING to avoid redundant computations
+    # the matching itself is done by the compiled VibeMatcher (see vibe_matcher.py)
 
     # Check cache first
-    cached_vibes = cache_manager.get_cached_vibe_prediction(text)
+    cache_key = _vibe_cache_key(text, venue_type, use_learned)
+    cached_vibes = cache_manager.get_cached_vibe_prediction(cache_key)
     if cached_vibes is not None:
         return cached_vibes
 
-    text = text.lower()
-    vibes = set()
-
-    import re
-
-    # Always check SEED keywords (precise matching)
-    for vibe, keys in SEED_VIBE_KEYWORDS.items():
-        pattern = r'\b(' + '|'.join(map(re.escape, keys)) + r')\b'
-        if re.search(pattern, text):
-            vibes.add(vibe)
-
-    # If use_learned=True, also check LEARNED keywords
-    # This gives better recall for venue classification
-    if use_learned and LEARNED_VIBE_KEYWORDS:
-        for vibe, keys in LEARNED_VIBE_KEYWORDS.items():
-            # Require at least 2 learned keyword matches to reduce false positives
-            match_count = 0
-            for key in keys:
-                if len(key) >= 4:  # Skip short words to reduce noise
-                    pattern = r'\b' + re.escape(key) + r'\b'
-                    if re.search(pattern, text):
-                        match_count += 1
-            if match_count >= 2:
-                vibes.add(vibe)
-
-    # also check venue type for vibes if we have it
-    if venue_type:
-        venue_type_lower = venue_type.lower().replace(' ', '_')
-        # check exact match first
-        if venue_type_lower in TYPE_VIBE_MAP:
-            for v in TYPE_VIBE_MAP[venue_type_lower]:
-                vibes.add(v)
-        else:
-            # check partial matches (e.g. "sports_bar" contains "bar")
-            for type_key, type_vibes in TYPE_VIBE_MAP.items():
-                if type_key in venue_type_lower or venue_type_lower in type_key:
-                    for v in type_vibes:
-                        vibes.add(v)
-
-    result = list(vibes)
+    result = list(get_vibe_matcher().match(text, venue_type, use_learned))
 
     # Cache the result for future use
-    cache_manager.cache_vibe_prediction(text, result)
+    cache_manager.cache_vibe_prediction(cache_key, result)
 
     return result
 
 
+def get_keyword_vibes_batch(texts, venue_types=None, use_learned=True):
+    # same as get_keyword_vibes for a list of texts - cached ones come from the cache,
+    # the rest are classified together in one regex pass
+    results = [None] * len(texts)
+    todo = []
+    for i, text in enumerate(texts):
+        venue_type = venue_types[i] if venue_types is not None else None
+        cached = cache_manager.get_cached_vibe_prediction(_vibe_cache_key(text, venue_type, use_learned))
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    if todo:
+        todo_types = [venue_types[i] for i in todo] if venue_types is not None else None
+        matched = get_vibe_matcher().match_batch([texts[i] for i in todo], todo_types, use_learned)
+        for i, vibes in zip(todo, matched):
+            results[i] = list(vibes)
+            venue_type = venue_types[i] if venue_types is not None else None
+            cache_manager.cache_vibe_prediction(_vibe_cache_key(texts[i], venue_type, use_learned), results[i])
+
+    return results
+
+
 def semantic_type_match(venue, target_types, threshold=0.35):
     # fast type matching using substrings and related terms
     # we used to use spacy similarity here but it was way too slow
@@ -0,0 +1,280 @@
+# places_fetcher.py
+# Concurrent Google Places text search for the venue fetch scripts
+# queries run side by side on one httpx.AsyncClient: a token bucket keeps the request
+# rate under the API quota, a semaphore bounds requests in flight, 429 / 5xx / network
+# errors are retried with jittered exponential backoff (Retry-After wins when sent),
+# and every query follows its nextPageToken pages while the other queries keep going.
+# venues come out in batches as pages arrive, so the caller can write them to the
+# database while the rest are still being fetched
+
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+PLACES_URL = "https://places.googleapis.com/v1/places:searchText"
+
+# requests per second (and burst) allowed by the token bucket
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5
+# requests in flight at once
+DEFAULT_CONCURRENCY = 8
+# pages of 20 results followed per query
+MAX_PAGES = 3
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# venues handed to the caller at a time
+DEFAULT_BATCH_SIZE = 200
+
+
+def _bool_field(place: dict, key: str) -> bool:
+    """Safely get a boolean field, returns False if missing"""
+    return bool(place.get(key))
+
+def _json_or_empty(value) -> str:
+    """Converts nested objects to json strings, returns empty string if None"""
+    if not value:
+        return ""
+    try:
+        return json.dumps(value, ensure_ascii=False)
+    except TypeError:
+        return ""
+
+def parse_place(place: dict) -> dict:
+    """Flattens one Places API result into a venue record"""
+    location = place.get("location") or {}
+    types = place.get("types") or []
+
+    # prioritize AI-generated summaries, then editorial, then fallback
+    gen_summary = (place.get("generativeSummary") or {}).get("overview", {}).get("text")
+    editorial_summary = (place.get("editorialSummary") or {}).get("text")
+
+    if gen_summary:
+        description = f"[AI Summary] {gen_summary}"
+    elif editorial_summary:
+        description = editorial_summary
+    else:
+        description = "No description available."
+
+    # the first user review as a sample
+    reviews = place.get("reviews") or []
+    review = reviews[0].get("text", {}).get("text", "No review available.") if reviews else "No review available."
+
+    return {
+        "id": place.get("id"),
+        "name": (place.get("displayName") or {}).get("text"),
+        "address": place.get("formattedAddress"),
+        "short_address": place.get("shortFormattedAddress"),
+        "lat": location.get("latitude"),
+        "lon": location.get("longitude"),
+        "rating": place.get("rating", 0),
+        "reviews_count": place.get("userRatingCount", 0),
+        "price_level": str(place.get("priceLevel", "PRICE_LEVEL_UNSPECIFIED")),
+        "price_range": place.get("priceRange"),
+        "primary_type": place.get("primaryType"),
+        "primary_type_display_name": (place.get("primaryTypeDisplayName") or {}).get("text"),
+        "all_types": "|".join(types) if types else "",
+        "type": types[0] if types else "unknown",
+        "google_maps_uri": place.get("googleMapsUri"),
+        "website_uri": place.get("websiteUri"),
+        "regular_opening_hours": _json_or_empty(place.get("regularOpeningHours")),
+        "current_opening_hours": _json_or_empty(place.get("currentOpeningHours")),
+        "description": description,
+        "review": review,
+        "review_summary": (place.get("reviewSummary") or {}).get("text"),
+        "neighborhood_summary": (place.get("neighborhoodSummary") or {}).get("text"),
+        "serves_dessert": _bool_field(place, "servesDessert"),
+        "serves_coffee": _bool_field(place, "servesCoffee"),
+        "serves_beer": _bool_field(place, "servesBeer"),
+        "serves_wine": _bool_field(place, "servesWine"),
+        "serves_cocktails": _bool_field(place, "servesCocktails"),
+        "serves_vegetarian": _bool_field(place, "servesVegetarianFood"),
+        "serves_breakfast": _bool_field(place, "servesBreakfast"),
+        "serves_brunch": _bool_field(place, "servesBrunch"),
+        "serves_lunch": _bool_field(place, "servesLunch"),
+        "serves_dinner": _bool_field(place, "servesDinner"),
+        "good_for_groups": _bool_field(place, "goodForGroups"),
+        "good_for_children": _bool_field(place, "goodForChildren"),
+        "good_for_watching_sports": _bool_field(place, "goodForWatchingSports"),
+        "live_music": _bool_field(place, "liveMusic"),
+        "outdoor_seating": _bool_field(place, "outdoorSeating"),
+        "allows_dogs": _bool_field(place, "allowsDogs"),
+        "reservable": _bool_field(place, "reservable"),
+        "takeout": _bool_field(place, "takeout"),
+        "delivery": _bool_field(place, "delivery"),
+        "dine_in": _bool_field(place, "dineIn"),
+        "true_vibe": "",
+    }
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """rate tokens per second, saving up at most burst of them"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # callers queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PlacesFetcher:
+    """Runs many text searches concurrently within the API's rate limit"""
+
+    def __init__(self, api_key: str, field_mask: str, url: str = PLACES_URL,
+                 rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_pages: int = MAX_PAGES,
+                 max_retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF,
+                 timeout: float = 30.0):
+        self.url = url
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # the page token has to be asked for like any other field
+        if max_pages > 1 and "nextPageToken" not in field_mask.split(","):
+            field_mask = f"{field_mask},nextPageToken"
+        self.headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": api_key,
+            "X-Goog-FieldMask": field_mask,
+        }
+        self.stats = {"requests": 0, "retries": 0, "pages": 0, "failed_queries": 0, "venues": 0}
+
+    async def _post(self, client, limiter, slots, payload: dict) -> Optional[dict]:
+        """One search request, retried on rate limiting and transient errors"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            retry_after = None
+            async with slots:
+                self.stats["requests"] += 1
+                try:
+                    response = await client.post(self.url, json=payload)
+                except httpx.TransportError as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 200:
+                        return response.json()
+                    if response.status_code not in RETRY_STATUS:
+                        print(f"    -> Error: {response.status_code} for '{payload['textQuery']}'")
+                        return None
+                    error = f"HTTP {response.status_code}"
+                    retry_after = _retry_after(response)
+
+            if attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            delay = retry_after if retry_after is not None else self.backoff * 2 ** attempt
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        print(f"    -> Giving up on '{payload['textQuery']}': {error}")
+        return None
+
+    async def _fetch_query(self, client, limiter, slots, query: str, out: asyncio.Queue):
+        """All pages of one query onto the queue, then None"""
+        payload = {
+            "textQuery": query,
+            "pageSize": 20,
+            "languageCode": "en",
+            "regionCode": "CA",
+        }
+        try:
+            for _ in range(self.max_pages):
+                data = await self._post(client, limiter, slots, payload)
+                if data is None:
+                    self.stats["failed_queries"] += 1
+                    break
+                self.stats["pages"] += 1
+                await out.put([parse_place(place) for place in data.get("places", [])])
+
+                token = data.get("nextPageToken")
+                if not token:
+                    break
+                payload = dict(payload, pageToken=token)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed_queries"] += 1
+            print(f"    -> Exception for '{query}': {e}")
+        finally:
+            out.put_nowait(None)
+
+    async def iter_batches(self, queries: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                           seen_ids: Optional[set] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Unique venues across all queries, in batches of up to batch_size as pages come in.
+        Ids already in seen_ids are skipped (and new ones are added to it).
+        """
+        seen_ids = set() if seen_ids is None else seen_ids
+        limiter = TokenBucket(self.rate, self.burst)
+        slots = asyncio.Semaphore(self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        start = time.perf_counter()
+
+        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+            tasks = [
+                asyncio.create_task(self._fetch_query(client, limiter, slots, query, queue))
+                for query in queries
+            ]
+            try:
+                remaining = len(tasks)
+                batch = []
+                while remaining:
+                    places = await queue.get()
+                    if places is None:
+                        remaining -= 1
+                        continue
+                    for venue in places:
+                        if venue["id"] and venue["id"] not in seen_ids:
+                            seen_ids.add(venue["id"])
+                            batch.append(venue)
+                    if len(batch) >= batch_size:
+                        self.stats["venues"] += len(batch)
+                        yield batch
+                        batch = []
+                if batch:
+                    self.stats["venues"] += len(batch)
+                    yield batch
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        elapsed = time.perf_counter() - start
+        print(f"✓ Fetched {self.stats['venues']} venues from {len(queries)} queries in {elapsed:.1f}s "
+              f"({self.stats['requests']} requests, {self.stats['retries']} retries, "
+              f"{self.stats['failed_queries']} failed queries)")
+
+    async def fetch_all(self, queries: List[str], seen_ids: Optional[set] = None) -> List[Dict]:
+        """Every unique venue for the queries, in one list"""
+        venues = []
+        async for batch in self.iter_batches(queries, seen_ids=seen_ids):
+            venues.extend(batch)
+        return venues
@@ -9,6 +9,7 @@
 
 import math
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from collections import defaultdict
@@ -394,6 +395,21 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_distance_np(lat1, lon1, lat2, lon2):
+    # same formula as haversine_distance but works on numpy arrays
+    # so we can get a whole batch of distances in one go (used by the GA fitness engine)
+    R = 6371
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return R * c
+
+
 def is_open_now(hours_json, current_dt=None):
     # checks if a venue is open right now based on its hours from google places
     # returns True if open, False if closed
@@ -33,11 +33,7 @@ def seed_from_api(api_key: str = None):
     # Fetch data from API
     print("\n2. Fetching venue data from Google Places API...")
     print("   This may take a few minutes...")
-    venues = []
-    
-    for query in fetch_real_data.SEARCH_QUERIES:
-        places = fetch_real_data.fetch_places(query, api_key)
-        venues.extend(places)
+    venues = fetch_real_data.fetch_all_places(api_key)
     
     if not venues:
         print("✗ No venues fetched from API")
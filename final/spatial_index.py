@@ -0,0 +1,91 @@
+# spatial_index.py
+# venue-to-venue distances for both planners
+#
+# the GA used to cache haversine results in _distance_cache, a global dict keyed on
+# rounded coordinates that never got cleared - fine for a script, a slow leak in the
+# server. SpatialIndex replaces it. it belongs to a VenueIndex (so it lives and dies with
+# a venue snapshot) and works on index rows:
+#   - up to MATRIX_MAX_VENUES venues: full pairwise distance matrix, lookups are free
+#   - above that: distances are computed on the fly with numpy, and radius queries go
+#     through a haversine BallTree
+# all distances are in km, same formula as planner_utils.haversine_distance
+
+import threading
+
+import numpy as np
+
+from planner_utils import haversine_distance_np
+
+# 1500 x 1500 float64 = 18MB per process, bigger than that isnt worth keeping around
+MATRIX_MAX_VENUES = 1500
+
+EARTH_RADIUS_KM = 6371
+
+
+class SpatialIndex:
+    """Pairwise distances and radius queries over a fixed set of venue coordinates"""
+
+    def __init__(self, lat, lon, matrix_max=MATRIX_MAX_VENUES):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.matrix = None
+        self._tree = None
+        self._tree_rows = None
+        self._lock = threading.Lock()
+
+        if len(self.lat) <= matrix_max:
+            self.matrix = haversine_distance_np(self.lat[:, None], self.lon[:, None],
+                                                self.lat[None, :], self.lon[None, :])
+
+    def __len__(self):
+        return len(self.lat)
+
+    def pair_distances(self, a, b):
+        """Distance between rows a[i] and b[i] (arrays of any matching shape)"""
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        if self.matrix is not None:
+            return self.matrix[a, b]
+        return haversine_distance_np(self.lat[a], self.lon[a], self.lat[b], self.lon[b])
+
+    def distances_from(self, lat, lon, rows=None, row=None):
+        """
+        Distance from a point to every venue (or just `rows`).
+        Pass row= when the point is itself a venue in the index, so the matrix can be used.
+        """
+        if row is not None and self.matrix is not None:
+            return self.matrix[row] if rows is None else self.matrix[row, rows]
+        lats = self.lat if rows is None else self.lat[rows]
+        lons = self.lon if rows is None else self.lon[rows]
+        return haversine_distance_np(lat, lon, lats, lons)
+
+    def _get_tree(self):
+        if self._tree is None:
+            with self._lock:
+                if self._tree is None:
+                    from sklearn.neighbors import BallTree
+                    # BallTree cant take NaNs, venues without coordinates are never in range anyway
+                    self._tree_rows = np.flatnonzero(np.isfinite(self.lat) & np.isfinite(self.lon))
+                    points = np.radians(np.column_stack([self.lat[self._tree_rows],
+                                                         self.lon[self._tree_rows]]))
+                    self._tree = BallTree(points, metric='haversine')
+        return self._tree
+
+    def within(self, lat, lon, radius_km, rows=None):
+        """Rows within radius_km of a point (sorted), optionally only out of `rows`"""
+        if self.matrix is not None or rows is not None:
+            candidates = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+            dist = haversine_distance_np(lat, lon, self.lat[candidates], self.lon[candidates])
+            return np.sort(candidates[dist <= radius_km])
+
+        point = np.radians([[lat, lon]])
+        found = self._get_tree().query_radius(point, r=radius_km / EARTH_RADIUS_KM)[0]
+        return np.sort(self._tree_rows[found])
+
+    def neighbors(self, row, radius_km):
+        """Other venues within radius_km of venue `row`"""
+        if self.matrix is not None:
+            found = np.flatnonzero(self.matrix[row] <= radius_km)
+        else:
+            found = self.within(self.lat[row], self.lon[row], radius_km)
+        return found[found != row]
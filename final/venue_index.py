@@ -0,0 +1,234 @@
+# venue_index.py
+# precomputed venue feature table shared by both planners
+#
+# get_venue_slot / get_venue_stage / get_venue_cuisine / venue_matches_type / get_venue_features
+# all do lowercase + substring work every time theyre called, and the GA and heuristic
+# planner call them thousands of times per request. VenueIndex runs them once per venue
+# and keeps the results in arrays keyed by venue id, so the planners just look things up.
+#
+# the index is cached per venue snapshot. the snapshot version is the venue table's
+# (max(updated_at), row count) - db_manager puts it on df.attrs['venues_version'] when it
+# loads venues, otherwise we fall back to the updated_at column. no version (like a csv)
+# = no caching, we just build a fresh index for that request.
+#
+# rows are keyed by venue id only. if a request hands in a dataframe whose columns differ
+# from the snapshot (say it overwrote cost or true_vibe for itself), the index still
+# returns the snapshot values for venues it already has. callers that change venue
+# columns per request should pass a dataframe without a version so they get their own index.
+#
+# planners read the index from several threads while extend() adds venues. extend builds
+# the grown columns first and publishes row_of last (a new dict), so a reader that finds
+# an id in row_of always finds its row in the arrays. readers should look rows up before
+# touching the columns, like rows() + slot_id[...] does.
+
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from planner_utils import (SLOT_STAGE, get_venue_slot, get_venue_cuisine,
+                           venue_matches_type, get_venue_features)
+from spatial_index import SpatialIndex
+
+# slot name -> small int id so slots can live in an array
+SLOT_IDS = {slot: i for i, slot in enumerate(SLOT_STAGE)}
+
+_TOKEN_RE = re.compile(r"[a-z0-9éè]+")
+
+
+def parse_vibes(true_vibe):
+    # same parsing the planners do on the true_vibe column
+    return [v.strip().lower() for v in str(true_vibe).split(',')]
+
+
+def _type_tokens(venue):
+    text = ' '.join(str(venue.get(col, '')) for col in
+                    ('type', 'all_types', 'name', 'primary_type_display_name'))
+    return frozenset(_TOKEN_RE.findall(text.lower().replace('_', ' ')))
+
+
+def venues_version(df):
+    # figures out which venue snapshot a dataframe came from
+    if df is None:
+        return None
+    version = df.attrs.get('venues_version')
+    if version is not None:
+        return version
+    if 'updated_at' in df.columns and len(df) > 0:
+        latest = df['updated_at'].max()
+        if not pd.isna(latest):
+            return latest
+    return None
+
+
+class VenueIndex:
+    """
+    Per-venue slot, stage, cuisine, vibes, feature flags, type tokens and
+    coordinates, computed once from a venue dataframe.
+    """
+
+    def __init__(self, df, version=None):
+        self.version = version
+        self.ids = []
+        self.row_of = {}
+        self._records = []
+        self.slot = []
+        self.cuisine = []
+        self.vibes = []
+        self.type_tokens = []
+        self.slot_id = np.zeros(0, dtype=np.int8)
+        self.stage = np.zeros(0, dtype=np.int8)
+        self.lat = np.zeros(0)
+        self.lon = np.zeros(0)
+        self.features = {}
+        self._type_match = {}
+        self._spatial = None
+        self._lock = threading.Lock()
+        self._add_records(df.to_dict('records'))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, venue_id):
+        return venue_id in self.row_of
+
+    def _add_records(self, records):
+        # callers hold self._lock (or own the index, like __init__)
+        records = [r for r in records if r['id'] not in self.row_of]
+        if not records:
+            return
+
+        start = len(self.ids)
+        row_of = dict(self.row_of)
+        for i, r in enumerate(records):
+            row_of[r['id']] = start + i
+
+        slots = [get_venue_slot(r) for r in records]
+        self.slot.extend(slots)
+        self.cuisine.extend(get_venue_cuisine(r) for r in records)
+        self.vibes.extend(frozenset(parse_vibes(r.get('true_vibe', ''))) for r in records)
+        self.type_tokens.extend(_type_tokens(r) for r in records)
+
+        self.slot_id = np.concatenate([self.slot_id, np.array([SLOT_IDS[s] for s in slots], dtype=np.int8)])
+        self.stage = np.concatenate([self.stage, np.array([SLOT_STAGE[s] for s in slots], dtype=np.int8)])
+        self.lat = np.concatenate([self.lat, np.array([r.get('lat') for r in records], dtype=float)])
+        self.lon = np.concatenate([self.lon, np.array([r.get('lon') for r in records], dtype=float)])
+        self._spatial = None  # rebuilt with the new venues on next use
+
+        new_features = [get_venue_features(r) for r in records]
+        for name in new_features[0]:
+            column = np.array([f[name] for f in new_features], dtype=bool)
+            self.features[name] = np.concatenate([self.features.get(name, np.zeros(start, dtype=bool)), column])
+
+        # type match columns are lazy, extend the ones we already have
+        for target, column in self._type_match.items():
+            extra = np.array([venue_matches_type(r, target) for r in records], dtype=bool)
+            self._type_match[target] = np.concatenate([column, extra])
+
+        # publish the new rows only after every column has grown
+        self.ids.extend(r['id'] for r in records)
+        self._records.extend(records)
+        self.row_of = row_of
+
+    def covers(self, ids):
+        row_of = self.row_of
+        return all(venue_id in row_of for venue_id in ids)
+
+    def extend(self, df):
+        # add any venues from df we havent seen yet (same snapshot, different filter)
+        with self._lock:
+            self._add_records(df[~df['id'].isin(self.row_of.keys())].to_dict('records'))
+
+    def rows(self, ids):
+        # positions in the index for a list/series of venue ids
+        row_of = self.row_of
+        return np.array([row_of[venue_id] for venue_id in ids], dtype=np.int64)
+
+    def type_match(self, target):
+        """Boolean array: does each venue match target (same rules as venue_matches_type)"""
+        key = tuple(target) if isinstance(target, list) else target
+        column = self._type_match.get(key)
+        if column is None:
+            with self._lock:
+                column = np.array([venue_matches_type(r, target) for r in self._records], dtype=bool)
+                self._type_match[key] = column
+        return column
+
+    def spatial(self):
+        """SpatialIndex (distances, radius queries) over every venue in the index, built on first use"""
+        spatial = self._spatial
+        if spatial is None:
+            with self._lock:
+                if self._spatial is None:
+                    self._spatial = SpatialIndex(self.lat, self.lon)
+                spatial = self._spatial
+        return spatial
+
+    # single venue lookups - fall back to the planner_utils functions for venues
+    # that arent in the index (shouldnt happen, but better than a KeyError mid-plan)
+
+    def slot_of(self, venue):
+        row = self.row_of.get(venue.get('id'))
+        return self.slot[row] if row is not None else get_venue_slot(venue)
+
+    def stage_of(self, venue):
+        row = self.row_of.get(venue.get('id'))
+        return int(self.stage[row]) if row is not None else SLOT_STAGE.get(get_venue_slot(venue), 3)
+
+    def cuisine_of(self, venue):
+        row = self.row_of.get(venue.get('id'))
+        return self.cuisine[row] if row is not None else get_venue_cuisine(venue)
+
+    def vibes_of(self, venue):
+        row = self.row_of.get(venue.get('id'))
+        return self.vibes[row] if row is not None else frozenset(parse_vibes(venue.get('true_vibe', '')))
+
+    def features_of(self, venue):
+        row = self.row_of.get(venue.get('id'))
+        if row is None:
+            return get_venue_features(venue)
+        return {name: bool(column[row]) for name, column in self.features.items()}
+
+    def matches_type(self, venue, target):
+        if not target:
+            return False
+        row = self.row_of.get(venue.get('id'))
+        if row is None:
+            return venue_matches_type(venue, target)
+        return bool(self.type_match(target)[row])
+
+
+_cached_index = None
+_cache_lock = threading.Lock()
+
+
+def get_venue_index(df):
+    """
+    Get the VenueIndex for df's venue snapshot, building it only when the snapshot changes.
+
+    Dataframes from the same snapshot (same updated_at version) share one index, and
+    filtered subsets just add their missing venues to it.
+    """
+    global _cached_index
+
+    version = venues_version(df)
+    if version is None:
+        return VenueIndex(df)
+
+    with _cache_lock:
+        index = _cached_index
+        if index is None or index.version != version:
+            index = VenueIndex(df, version)
+            _cached_index = index
+            return index
+
+    if not index.covers(df['id']):
+        index.extend(df)
+    return index
+
+
+def clear_venue_index():
+    global _cached_index
+    with _cache_lock:
+        _cached_index = None
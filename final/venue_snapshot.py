@@ -0,0 +1,290 @@
+# venue_snapshot.py
+# in-memory copy of the venues table for the planners
+#
+# ga_planner.plan_date used to call get_venues_for_ga (ILIKE filters + pd.read_sql) on
+# every chat turn. now each process loads the venue table once into a VenueSnapshot and
+# the same vibe / type / cost / rating filters run against it in memory, so planning
+# doesnt touch the database at all.
+#
+# refreshes are incremental: the venue_changes log (filled by a trigger, see
+# db_manager.create_tables) says which ids changed or were deleted since our cursor, and
+# only those rows get re-read and merged in by id. without the log (older databases, or
+# our cursor was pruned from it) rows with updated_at >= the newest one we have are
+# re-read instead. if the row count doesnt add up afterwards we just reload the whole
+# table. a background thread does the refresh every
+# REFRESH_INTERVAL seconds, or right away when postgres sends a venues_changed NOTIFY
+# (db_manager.create_tables installs the trigger for that, plus one that bumps updated_at
+# on every UPDATE so the version and the incremental query see every change).
+#
+# if the database is down we keep serving the last good snapshot. with no snapshot at all,
+# loads are retried with a backoff instead of on every planning request.
+
+import select
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import db_manager
+
+NOTIFY_CHANNEL = 'venues_changed'
+REFRESH_INTERVAL = 300  # seconds between refreshes when no NOTIFY arrives
+NOTIFY_DEBOUNCE = 1.0   # bulk imports send a burst of notifies, wait for them to settle
+
+_MAX_CACHED_PATTERNS = 256
+
+LOAD_RETRY_MIN = 5      # seconds before retrying a failed load, doubled per failure
+LOAD_RETRY_MAX = 300
+
+
+class _SubstringIndex:
+    # ILIKE '%pattern%' over one text column. the match runs over the distinct values
+    # (a few hundred vibe strings / types) instead of every row, and is cached per pattern
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).str.lower())
+        self.codes = codes  # -1 for NULL
+        self.uniques = [str(u) for u in uniques]
+        self._cache = {}
+
+    def match(self, pattern):
+        pattern = str(pattern).lower()
+        hits = self._cache.get(pattern)
+        if hits is None:
+            # extra False at the end so code -1 (NULL) never matches, like in SQL
+            hits = np.array([pattern in u for u in self.uniques] + [False], dtype=bool)
+            if len(self._cache) >= _MAX_CACHED_PATTERNS:
+                self._cache.clear()
+            self._cache[pattern] = hits
+        return hits[self.codes]
+
+    def match_any(self, patterns):
+        mask = np.zeros(len(self.codes), dtype=bool)
+        for p in patterns:
+            mask |= self.match(p)
+        return mask
+
+
+class VenueSnapshot:
+    """
+    One version of the venues table held in memory, with the columns the filters
+    need pre-extracted into arrays. Snapshots are never modified - a refresh
+    builds a new one and swaps it in.
+    """
+
+    def __init__(self, df, version=None, change_id=None):
+        if change_id is None:
+            change_id = df.attrs.get('venue_change_id')
+        df = df.reset_index(drop=True)
+        df.attrs['venues_version'] = version
+        self.df = df
+        self.version = version
+        # venue_changes id this snapshot is up to date with (None without a change log)
+        self.change_id = change_id
+
+        self.latest_update = None
+        if 'updated_at' in df.columns and len(df) > 0:
+            latest = df['updated_at'].max()
+            if not pd.isna(latest):
+                self.latest_update = latest.to_pydatetime() if hasattr(latest, 'to_pydatetime') else latest
+
+        self._vibes = _SubstringIndex(df['true_vibe'])
+        self._types = _SubstringIndex(df['type'])
+        self._cost = pd.to_numeric(df['cost'], errors='coerce').to_numpy(dtype=float)
+        self._rating = pd.to_numeric(df['rating'], errors='coerce').to_numpy(dtype=float)
+
+        # ORDER BY rating DESC - postgres puts NULLs first for DESC, so do the same
+        self._order = np.argsort(-np.nan_to_num(self._rating, nan=np.inf), kind='stable')
+
+    def __len__(self):
+        return len(self.df)
+
+    def filter(self, vibes=None, types=None, max_cost=None, min_rating=0, limit=500):
+        """
+        Same filters as db_manager.get_venues_for_ga, run in memory.
+
+        Returns a new DataFrame (safe for the planners to add columns to) tagged
+        with this snapshot's version.
+        """
+        mask = np.ones(len(self.df), dtype=bool)
+        if vibes:
+            mask &= self._vibes.match_any(vibes)
+        if types:
+            mask &= self._types.match_any(types)
+        if max_cost:
+            mask &= self._cost <= max_cost
+        if min_rating > 0:
+            mask &= self._rating >= min_rating
+
+        rows = self._order[mask[self._order]][:limit]
+        result = self.df.iloc[rows].reset_index(drop=True)
+        result.attrs['venues_version'] = self.version
+        return result
+
+    def merged(self, changed_df, version, deleted=(), change_id=None):
+        """New snapshot with changed_df's rows replacing (or added to) ours, minus deleted ids"""
+        change_id = self.change_id if change_id is None else change_id
+        kept = self.df
+        if deleted:
+            kept = kept[~kept['id'].isin(list(deleted))]
+        if changed_df is None or changed_df.empty:
+            return VenueSnapshot(kept, version, change_id)
+        kept = kept[~kept['id'].isin(changed_df['id'])]
+        return VenueSnapshot(pd.concat([kept, changed_df], ignore_index=True), version, change_id)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_refresh_thread = None
+_stop_refresh = threading.Event()
+_load_failures = 0
+_next_load_attempt = 0.0
+
+
+def _load_locked():
+    # full load, caller holds _snapshot_lock. failures push the next attempt back
+    global _snapshot, _load_failures, _next_load_attempt
+    df, version = db_manager.get_venues_snapshot()
+    if df is None:
+        _load_failures += 1
+        _next_load_attempt = time.monotonic() + min(LOAD_RETRY_MAX, LOAD_RETRY_MIN * 2 ** (_load_failures - 1))
+        return None
+    _load_failures = 0
+    _next_load_attempt = 0.0
+    _snapshot = VenueSnapshot(df, version)
+    print(f"✓ Venue snapshot loaded: {len(_snapshot)} venues")
+    return _snapshot
+
+
+def load_venue_snapshot():
+    """Load the whole venues table into a fresh snapshot (None if the db isnt reachable)"""
+    with _snapshot_lock:
+        return _load_locked()
+
+
+def get_venue_snapshot():
+    """
+    Get this process's venue snapshot, loading it on first use.
+    Returns None while the database is unreachable (retried with a backoff).
+    """
+    snapshot = _snapshot
+    if snapshot is None and time.monotonic() >= _next_load_attempt:
+        with _snapshot_lock:
+            snapshot = _snapshot
+            if snapshot is None and time.monotonic() >= _next_load_attempt:
+                snapshot = _load_locked()
+    return snapshot
+
+
+def set_venue_snapshot(df, version=None):
+    """Use an already loaded dataframe (csv, tests) as the snapshot"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = VenueSnapshot(df, version)
+        return _snapshot
+
+
+def refresh_venue_snapshot():
+    """
+    Bring the snapshot up to date with the database.
+    Cheap when nothing changed - just the version query. Keeps the current
+    snapshot if the database can't be read.
+    """
+    global _snapshot
+    current = _snapshot
+    if current is None:
+        return get_venue_snapshot()
+    if current.latest_update is None:
+        with _snapshot_lock:
+            return _load_locked() or current
+
+    version = db_manager.get_venues_version()
+    if version is None or version == current.version:
+        return current
+
+    deleted = []
+    with _snapshot_lock:
+        if _snapshot is not current:
+            return _snapshot  # someone else refreshed while we checked the version
+        if current.change_id is not None:
+            changes = db_manager.get_venue_changes(current.change_id)
+            if changes is None:
+                # the log cant tell us (pruned past our cursor) - start over
+                return _load_locked() or current
+            change_id, upserted, deleted = changes
+            changed = None
+            if upserted:
+                changed, version = db_manager.get_venues_snapshot(ids=upserted)
+                if changed is None:
+                    return current
+            snapshot = current.merged(changed, version, deleted=deleted, change_id=change_id)
+        else:
+            changed, version = db_manager.get_venues_snapshot(since=current.latest_update)
+            if changed is None:
+                return current
+            snapshot = current.merged(changed, version)
+
+        if version is not None and version[1] != len(snapshot):
+            # rows were deleted (or the count moved underneath us) - start over
+            return _load_locked() or current
+
+        _snapshot = snapshot
+
+    changed_count = 0 if changed is None else len(changed)
+    print(f"✓ Venue snapshot refreshed: {changed_count} changed, {len(deleted)} deleted, {len(snapshot)} venues")
+    return snapshot
+
+
+def _refresh_loop(interval):
+    # waits for a NOTIFY (or the timeout) and refreshes. if LISTEN isnt possible
+    # we fall back to plain polling every interval seconds
+    conn = None
+    while not _stop_refresh.is_set():
+        if conn is None:
+            try:
+                conn = db_manager.get_listen_connection(NOTIFY_CHANNEL)
+            except Exception as e:
+                print(f"✗ Venue snapshot LISTEN failed, polling instead: {e}")
+
+        if conn is not None:
+            try:
+                if select.select([conn], [], [], interval) != ([], [], []):
+                    _stop_refresh.wait(NOTIFY_DEBOUNCE)
+                    conn.poll()
+                    conn.notifies.clear()
+            except Exception as e:
+                print(f"✗ Venue snapshot listener error: {e}")
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+                _stop_refresh.wait(interval)
+        else:
+            _stop_refresh.wait(interval)
+
+        if _stop_refresh.is_set():
+            break
+        try:
+            refresh_venue_snapshot()
+        except Exception as e:
+            print(f"✗ Venue snapshot refresh failed: {e}")
+
+    if conn is not None:
+        conn.close()
+
+
+def start_auto_refresh(interval=REFRESH_INTERVAL):
+    """Start the background refresh thread (once per process)"""
+    global _refresh_thread
+    if _refresh_thread is not None and _refresh_thread.is_alive():
+        return
+    _stop_refresh.clear()
+    _refresh_thread = threading.Thread(target=_refresh_loop, args=(interval,),
+                                       name='venue-snapshot-refresh', daemon=True)
+    _refresh_thread.start()
+
+
+def stop_auto_refresh():
+    _stop_refresh.set()
@@ -0,0 +1,138 @@
+# vibe_matcher.py
+# compiled keyword -> vibe matcher used by nlp_classifier.get_keyword_vibes
+#
+# get_keyword_vibes used to build a regex per vibe (and one per learned keyword) on
+# every call, then scan TYPE_VIBE_MAP for partial type matches. it runs for every search
+# result, so all that regex compiling added up. VibeMatcher compiles every keyword into
+# one alternation regex once, and nlp_classifier rebuilds it when the keyword tables
+# get re-learned.
+#
+# matching rules are the same as before:
+#   - a seed keyword anywhere in the text (as a whole word/phrase) adds its vibe
+#   - learned keywords (4+ chars) only add a vibe if 2+ different ones match
+#   - venue type: exact TYPE_VIBE_MAP key, otherwise any key that contains / is
+#     contained in the type
+#
+# the regex sits inside a lookahead so it reports a match at every position, and the
+# alternatives are longest first. when two keywords match at the same spot the shorter
+# one is a prefix of the longer one, so those are worked out up front (_implied) - that
+# way overlapping keywords ("fine" / "fine dining") are all found like the old per-vibe
+# searches did.
+
+import re
+from bisect import bisect_right
+
+LEARNED_MIN_LENGTH = 4   # learned keywords shorter than this are too noisy
+LEARNED_MIN_MATCHES = 2  # distinct learned keywords needed before a learned vibe counts
+
+# joins texts for the batch scan - not a word character (so \b still works at the edges)
+# and not in any keyword, so a match can never run from one text into the next
+_SEPARATOR = '\n'
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == '_'
+
+
+class VibeMatcher:
+    """One compiled regex for every seed and learned vibe keyword"""
+
+    def __init__(self, seed_keywords, learned_keywords=None, type_vibe_map=None):
+        # keyword -> vibes it implies, seed and learned kept apart (different rules)
+        self.seed = {}
+        self.learned = {}
+        for vibe, keys in seed_keywords.items():
+            for k in keys:
+                self.seed.setdefault(k.lower(), set()).add(vibe)
+        for vibe, keys in (learned_keywords or {}).items():
+            for k in keys:
+                if len(k) >= LEARNED_MIN_LENGTH:
+                    self.learned.setdefault(k.lower(), set()).add(vibe)
+
+        keywords = sorted(set(self.seed) | set(self.learned), key=lambda k: (-len(k), k))
+        self._regex = None
+        if keywords:
+            alternation = '|'.join(re.escape(k) for k in keywords)
+            self._regex = re.compile(r'(?=\b(' + alternation + r')\b)')
+
+        # shorter keywords that also match wherever a longer one does
+        self._implied = {}
+        for k in keywords:
+            self._implied[k] = [s for s in keywords
+                                if len(s) < len(k) and k.startswith(s)
+                                and _is_word_char(k[len(s) - 1]) != _is_word_char(k[len(s)])]
+
+        self.type_vibe_map = {t: list(v) for t, v in (type_vibe_map or {}).items()}
+        self._type_cache = {}
+
+    def _found_keywords(self, matches):
+        found = set()
+        for k in matches:
+            if k not in found:
+                found.add(k)
+                found.update(self._implied[k])
+        return found
+
+    def _vibes_for(self, found, use_learned):
+        vibes = set()
+        learned_counts = {}
+        for k in found:
+            vibes.update(self.seed.get(k, ()))
+            if use_learned:
+                for vibe in self.learned.get(k, ()):
+                    learned_counts[vibe] = learned_counts.get(vibe, 0) + 1
+        vibes.update(v for v, count in learned_counts.items() if count >= LEARNED_MIN_MATCHES)
+        return vibes
+
+    def type_vibes(self, venue_type):
+        """Vibes implied by a venue type (exact key first, then partial matches)"""
+        if not venue_type:
+            return set()
+        key = venue_type.lower().replace(' ', '_')
+        vibes = self._type_cache.get(key)
+        if vibes is None:
+            if key in self.type_vibe_map:
+                vibes = set(self.type_vibe_map[key])
+            else:
+                vibes = set()
+                for type_key, type_vibes in self.type_vibe_map.items():
+                    if type_key in key or key in type_key:
+                        vibes.update(type_vibes)
+            vibes = frozenset(vibes)
+            self._type_cache[key] = vibes
+        return vibes
+
+    def match(self, text, venue_type=None, use_learned=True):
+        """Vibes for one text, as a set"""
+        matches = []
+        if self._regex is not None:
+            matches = [m.group(1) for m in self._regex.finditer(str(text).lower())]
+        vibes = self._vibes_for(self._found_keywords(matches), use_learned)
+        vibes.update(self.type_vibes(venue_type))
+        return vibes
+
+    def match_batch(self, texts, venue_types=None, use_learned=True):
+        """
+        Vibes for many texts with a single regex scan over all of them joined together.
+        Returns a list of sets, one per text.
+        """
+        texts = [str(t).lower() for t in texts]
+        per_text = [[] for _ in texts]
+
+        if self._regex is not None and texts:
+            # start offset of each text in the joined string, to map matches back
+            starts = []
+            offset = 0
+            for t in texts:
+                starts.append(offset)
+                offset += len(t) + len(_SEPARATOR)
+            for m in self._regex.finditer(_SEPARATOR.join(texts)):
+                per_text[bisect_right(starts, m.start()) - 1].append(m.group(1))
+
+        results = []
+        for i, matches in enumerate(per_text):
+            vibes = self._vibes_for(self._found_keywords(matches), use_learned)
+            if venue_types is not None:
+                vibes.update(self.type_vibes(venue_types[i]))
+            results.append(vibes)
+        return results
@@ -0,0 +1,12 @@
+-- Flyway Migration: Store predicted vibe per event
+-- Migration version: V9.1.0
+-- Description: Vibes are classified once at ingest and stored with the event, so semantic
+--              search no longer has to run the classifier on every result
+-- Date: 2026-10-16
+
+ALTER TABLE event
+ADD COLUMN IF NOT EXISTS vibe TEXT;
+
+-- Rows ingested before this migration keep vibe = NULL; the search engine classifies
+-- those in one batch at query time until they are re-ingested
+COMMENT ON COLUMN event.vibe IS 'AI Orchestrator: Comma separated vibes predicted at ingest time';
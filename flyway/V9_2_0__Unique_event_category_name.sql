@@ -0,0 +1,36 @@
+-- Flyway Migration: Unique category names
+-- Migration version: V9.2.0
+-- Description: Bulk ingest upserts categories with INSERT ... ON CONFLICT (name), which
+--              needs a unique index on event_category.name. Duplicate names are merged
+--              into the lowest category_id first.
+-- Date: 2026-10-16
+
+CREATE TEMP TABLE category_merge ON COMMIT DROP AS
+SELECT ec.category_id AS old_id, keep.category_id AS keep_id
+FROM event_category ec
+JOIN (
+    SELECT name, MIN(category_id) AS category_id
+    FROM event_category
+    GROUP BY name
+    HAVING COUNT(*) > 1
+) keep ON keep.name = ec.name
+WHERE ec.category_id <> keep.category_id;
+
+-- Re-link events to the surviving category (one row per event, even if the event
+-- was linked to several duplicates)
+INSERT INTO event_category_link (event_id, category_id)
+SELECT DISTINCT ecl.event_id, m.keep_id
+FROM event_category_link ecl
+JOIN category_merge m ON m.old_id = ecl.category_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM event_category_link ecl
+USING category_merge m
+WHERE ecl.category_id = m.old_id;
+
+DELETE FROM event_category ec
+USING category_merge m
+WHERE ec.category_id = m.old_id;
+
+DROP INDEX IF EXISTS idx_event_category_name;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_event_category_name ON event_category (name);
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PostgreSQL vector search
+Times the single-query search (ANN scan + lateral category join) against the old
+query shape (distance in SELECT and WHERE, one category query per row)
+
+Usage: python scripts/benchmark_vector_search.py [--runs 50] [--top-k 10]
+"""
+
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pgvector.psycopg2 import register_vector
+from server.tools.postgresql_vector_store import PostgreSQLVectorStore
+
+logging.basicConfig(level=logging.WARNING)
+
+QUERIES = [
+    "romantic dinner", "outdoor adventure", "cozy coffee shop", "live music",
+    "art gallery", "family friendly", "rainy day activity", "fancy cocktails",
+]
+
+# the query shape before the single-query search, kept here for comparison
+LEGACY_QUERY = """
+    SELECT e.event_id, e.title, l.city,
+           (1 - (e.embedding <=> %s::vector(384))) AS similarity_score
+    FROM event e
+    LEFT JOIN location l ON e.location_id = l.location_id
+    WHERE e.embedding IS NOT NULL
+        AND (1 - (e.embedding <=> %s::vector(384))) >= %s
+    ORDER BY similarity_score DESC LIMIT %s
+"""
+
+LEGACY_CATEGORY_QUERY = """
+    SELECT ec.name
+    FROM event_category_link ecl
+    JOIN event_category ec ON ecl.category_id = ec.category_id
+    WHERE ecl.event_id = %s
+"""
+
+
+def legacy_search(store, embedding, top_k, threshold):
+    with store.db_config.get_connection() as conn:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            vector = embedding.tolist()
+            cur.execute(LEGACY_QUERY, (vector, vector, threshold, top_k))
+            rows = cur.fetchall()
+            for row in rows:
+                cur.execute(LEGACY_CATEGORY_QUERY, (row[0],))
+                cur.fetchall()
+            return rows
+
+
+def new_search(store, embedding, top_k, threshold):
+    return store._search_postgresql_simple(embedding, top_k, None, None, None, None, None, None, threshold)
+
+
+def time_runs(fn, store, embeddings, top_k, threshold, runs):
+    timings = []
+    for i in range(runs):
+        embedding = embeddings[i % len(embeddings)]
+        start = time.perf_counter()
+        fn(store, embedding, top_k, threshold)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector search query shapes")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    store = PostgreSQLVectorStore(use_fallback=False)
+    if not store.model:
+        print("✗ Sentence transformer model not available")
+        return 1
+
+    embeddings = store.model.encode(QUERIES, convert_to_numpy=True)
+
+    # warm up connections and caches so the first run doesn't skew things
+    for fn in (legacy_search, new_search):
+        fn(store, embeddings[0], args.top_k, args.threshold)
+
+    print(f"{args.runs} runs, top_k={args.top_k}, threshold={args.threshold}")
+    for name, fn in (("legacy (N+1)", legacy_search), ("single query", new_search)):
+        timings = time_runs(fn, store, embeddings, args.top_k, args.threshold, args.runs)
+        print(f"  {name:14s} p50={np.percentile(timings, 50):7.2f}ms  "
+              f"p95={np.percentile(timings, 95):7.2f}ms  mean={timings.mean():7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,7 @@ Provides REST endpoints for chat, admin operations, and health checks
 import logging
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -14,7 +14,8 @@ from slowapi.errors import RateLimitExceeded
 
 from .routes import chat, admin, health
 from . import ml_endpoints
-from ..middleware import RateLimitMiddleware
+from ..middleware import RateLimitMiddleware, MetricsMiddleware
+from ..metrics import get_metrics, PROMETHEUS_CONTENT_TYPE
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +27,20 @@ limiter = Limiter(key_func=get_remote_address)
 async def lifespan(app: FastAPI):
     """Manage app lifecycle"""
     logger.info("🚀 Starting AI Orchestrator API")
-    yield
-    logger.info("🛑 Shutting down AI Orchestrator API")
+    from ..chat_handler import get_chat_handler, shutdown_chat_handler
+
+    # One handler for all requests: the LLM client, HTTP clients and DB pools are shared
+    app.state.chat_handler = get_chat_handler()
+    await app.state.chat_handler.setup_storage()
+    # Transformer models load in the background instead of on import
+    from ..model_registry import warm_up_models
+    warm_up_models()
+    try:
+        yield
+    finally:
+        logger.info("🛑 Shutting down AI Orchestrator API")
+        # Closes the shared stores and executors, so only here - never per request
+        await shutdown_chat_handler()
 
 
 def create_app() -> FastAPI:
@@ -56,12 +69,20 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Outermost, so rate-limited and failed requests are timed too
+    app.add_middleware(MetricsMiddleware)
+
     # Include routers
     app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
     app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
     app.include_router(health.router, prefix="/api/health", tags=["health"])
     app.include_router(ml_endpoints.router, tags=["ml-service"])
 
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(get_metrics().render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
     logger.info("✅ FastAPI application configured with account-based rate limiting")
 
     return app
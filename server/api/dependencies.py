@@ -0,0 +1,18 @@
+"""
+Shared state for the REST routes
+"""
+
+from fastapi import Request
+
+
+def get_shared_chat_handler(request: Request):
+    """
+    The chat handler created at app startup, shared by every request.
+    Falls back to the global handler when the app runs without its lifespan.
+    """
+    handler = getattr(request.app.state, "chat_handler", None)
+    if handler is None:
+        from ..chat_handler import get_chat_handler
+        handler = get_chat_handler()
+        request.app.state.chat_handler = handler
+    return handler
@@ -282,12 +282,12 @@ async def delete_date_idea(idea_id: str):
 async def list_date_ideas():
     """List all date ideas"""
     try:
-        from ...tools.vector_search import get_vector_store
+        from ...tools.async_vector_store import get_async_vector_store
 
-        vector_store = get_vector_store()
+        vector_store = get_async_vector_store()
 
         # Get all venues from vector store
-        results = await vector_store.search("", limit=1000)
+        results = await vector_store.search("", top_k=1000)
 
         return {
             "success": True,
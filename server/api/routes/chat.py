@@ -4,14 +4,20 @@ Handles conversation with the agent for date ideas
 Enhanced with ML service integration
 """
 
+import json
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from ..models import ChatMessage, ChatRequest, ChatResponse, Constraints, Location
 from ...core.ml_integration import get_ml_wrapper
 from ...core.search_engine import get_search_engine
+from ...metrics import get_metrics
+from ...streaming import StreamCoalescer
+from ...tracing import start_trace, get_session_timings
+from ..dependencies import get_shared_chat_handler
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +38,73 @@ class ConversationResponse(BaseModel):
     session_id: str
     response: str
     suggestions: Optional[List[str]] = None
+    timings: Optional[Dict[str, Any]] = None
+
+
+def _conversation_args(request: ConversationRequest) -> dict:
+    """Convert a conversation request into the LLM engine's run_chat arguments"""
+    # Convert messages to the format expected by the handler
+    messages_data = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.messages
+    ]
+
+    # Prepare constraints
+    constraints = None
+    if request.constraints:
+        constraints = {
+            "city": request.constraints.city,
+            "budgetTier": request.constraints.budget_tier,
+            "hours": request.constraints.hours,
+            "indoor": request.constraints.indoor,
+            "categories": request.constraints.categories
+        }
+
+    # Prepare location
+    user_location = None
+    if request.user_location:
+        user_location = {
+            "lat": request.user_location.lat,
+            "lon": request.user_location.lon
+        }
+
+    return {
+        "messages": messages_data,
+        "session_id": request.session_id,
+        "constraints": constraints,
+        "user_location": user_location
+    }
+
+
+async def _store_exchange(
+    handler,
+    request: ConversationRequest,
+    full_response: str,
+    timings: Optional[Dict[str, float]] = None
+):
+    """Store the user's last message and the assistant's response (with its stage timings) in chat storage"""
+    if not handler.chat_storage:
+        return
+    await handler.chat_storage.add_message(
+        session_id=request.session_id or "default",
+        role="user",
+        content=request.messages[-1].content if request.messages else ""
+    )
+    await handler.chat_storage.add_message(
+        session_id=request.session_id or "default",
+        role="assistant",
+        content=full_response,
+        metadata={"timings": timings} if timings else None
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 @router.post("/conversation", response_model=ConversationResponse)
-async def chat_conversation(request: ConversationRequest):
+async def chat_conversation(request: ConversationRequest, http_request: Request):
     """
     Start or continue a conversation with the AI agent
 
@@ -48,64 +117,27 @@ async def chat_conversation(request: ConversationRequest):
     - Integrate ML-based date planning
     """
     try:
-        from ...chat_handler import EnhancedChatHandler
-
-        # Use chat handler with optimized LLM engine
-        handler = EnhancedChatHandler()
-
-        # Convert messages to the format expected by the handler
-        messages_data = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
-
-        # Prepare constraints
-        constraints = None
-        if request.constraints:
-            constraints = {
-                "city": request.constraints.city,
-                "budgetTier": request.constraints.budget_tier,
-                "hours": request.constraints.hours,
-                "indoor": request.constraints.indoor,
-                "categories": request.constraints.categories
-            }
-
-        # Prepare location
-        user_location = None
-        if request.user_location:
-            user_location = {
-                "lat": request.user_location.lat,
-                "lon": request.user_location.lon
-            }
-
-        # Get response from LLM engine (optimized for cost-efficiency)
-        full_response = ""
-        async for chunk in handler.llm_engine.run_chat(
-            messages=messages_data,
-            agent_tools=handler.agent_tools,
-            session_id=request.session_id,
-            constraints=constraints,
-            user_location=user_location
-        ):
-            full_response += chunk
-        
-        # Store conversation in chat storage
-        if handler.chat_storage:
-            await handler.chat_storage.add_message(
-                session_id=request.session_id or "default",
-                role="user",
-                content=request.messages[-1].content if request.messages else ""
-            )
-            await handler.chat_storage.add_message(
-                session_id=request.session_id or "default",
-                role="assistant",
-                content=full_response
-            )
-        
+        # Shared handler (one LLM client, vector store and storage pool for the app)
+        handler = get_shared_chat_handler(http_request)
+
+        with start_trace("chat.rest", session_id=request.session_id or "default") as trace:
+            # Get response from LLM engine (optimized for cost-efficiency)
+            chunks = []
+            async for chunk in handler.llm_engine.run_chat(
+                agent_tools=handler.agent_tools,
+                **_conversation_args(request)
+            ):
+                chunks.append(chunk)
+            full_response = "".join(chunks)
+
+            # Store conversation in chat storage
+            await _store_exchange(handler, request, full_response, timings=trace.breakdown())
+
         return ConversationResponse(
             session_id=request.session_id or "default",
             response=full_response,
-            suggestions=None
+            suggestions=None,
+            timings=trace.summary()
         )
     
     except Exception as e:
@@ -113,9 +145,55 @@ async def chat_conversation(request: ConversationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/conversation/stream")
+async def chat_conversation_stream(request: ConversationRequest, http_request: Request):
+    """
+    Streaming variant of /conversation (server-sent events)
+
+    Events:
+    - delta: {"text": ...} as the response is generated (coalesced like the gRPC stream)
+    - done: {"session_id": ..., "timings": {stage: seconds}} once the response is complete and stored
+    - error: {"detail": ...} if generation fails part way
+    """
+    try:
+        handler = get_shared_chat_handler(http_request)
+    except Exception as e:
+        logger.error(f"Chat conversation stream error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        session_id = request.session_id or "default"
+        coalescer = StreamCoalescer.from_config(handler.streaming_config)
+        with start_trace("chat.sse", session_id=session_id) as trace:
+            chunks = handler.llm_engine.run_chat(
+                agent_tools=handler.agent_tools,
+                **_conversation_args(request)
+            )
+            try:
+                async for text in coalescer.stream(chunks):
+                    yield _sse_event("delta", {"text": text})
+
+                if coalescer.time_to_first_message is not None:
+                    get_metrics().observe("chat.sse.ttfb_seconds", coalescer.time_to_first_message)
+                timings = trace.breakdown()
+                await _store_exchange(handler, request, coalescer.text(), timings=timings)
+                yield _sse_event("done", {"session_id": session_id, "timings": timings})
+
+            except Exception as e:
+                logger.error(f"Chat conversation stream error: {e}", exc_info=True)
+                yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/history/{session_id}")
 async def get_chat_history(
     session_id: str,
+    http_request: Request,
     limit: int = Query(50, ge=1, le=500)
 ):
     """
@@ -126,9 +204,7 @@ async def get_chat_history(
         limit: Maximum number of messages to return (default: 50, max: 500)
     """
     try:
-        from ...chat_handler import EnhancedChatHandler
-        
-        handler = EnhancedChatHandler()
+        handler = get_shared_chat_handler(http_request)
         
         if not handler.chat_storage:
             raise HTTPException(status_code=503, detail="Chat storage not available")
@@ -150,8 +226,22 @@ async def get_chat_history(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/session/{session_id}/timings")
+async def get_session_timings_endpoint(session_id: str):
+    """
+    Per-stage latency breakdown of the session's recent requests on this server
+
+    Args:
+        session_id: The session ID to get timings for
+    """
+    return {
+        "session_id": session_id,
+        "traces": get_session_timings(session_id)
+    }
+
+
 @router.delete("/session/{session_id}")
-async def delete_session(session_id: str):
+async def delete_session(session_id: str, http_request: Request):
     """
     Delete a chat session and its history
     
@@ -159,9 +249,7 @@ async def delete_session(session_id: str):
         session_id: The session ID to delete
     """
     try:
-        from ...chat_handler import EnhancedChatHandler
-        
-        handler = EnhancedChatHandler()
+        handler = get_shared_chat_handler(http_request)
         
         if not handler.chat_storage:
             raise HTTPException(status_code=503, detail="Chat storage not available")
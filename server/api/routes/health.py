@@ -4,23 +4,25 @@ Enhanced with ML service status
 """
 
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from datetime import datetime
 
+from ..dependencies import get_shared_chat_handler
+from ...model_registry import get_model_registry
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.get("/status")
-async def health_status():
+async def health_status(request: Request):
     """Get overall health status of the service including ML integration"""
     try:
-        from ...chat_handler import EnhancedChatHandler
         from ...core.ml_integration import get_ml_wrapper
         from ...core.search_engine import get_search_engine
 
-        handler = EnhancedChatHandler()
+        handler = get_shared_chat_handler(request)
         ml_wrapper = get_ml_wrapper()
 
         health_details = {
@@ -38,7 +40,8 @@ async def health_status():
         return {
             "status": overall_status,
             "timestamp": datetime.utcnow().isoformat(),
-            "components": health_details
+            "components": health_details,
+            "models": get_model_registry().stats()
         }
 
     except Exception as e:
@@ -51,12 +54,10 @@ async def health_status():
 
 
 @router.get("/ready")
-async def readiness_check():
+async def readiness_check(request: Request):
     """Check if service is ready to accept requests"""
     try:
-        from ...chat_handler import EnhancedChatHandler
-        
-        handler = EnhancedChatHandler()
+        handler = get_shared_chat_handler(request)
         
         # Check critical components
         if not handler.llm_engine or not handler.chat_storage:
@@ -11,6 +11,14 @@ from .tools.chat_context_storage import get_chat_storage
 from .llm.engine import get_llm_engine
 from .core.ml_integration import get_ml_wrapper
 from .core.search_engine import get_search_engine
+from .planner_executor import get_planner_executor, shutdown_planner_executor
+from .embedding_service import shutdown_embedding_services
+from .tools.local_vector_index import shutdown_local_vector_index
+from .tools.async_vector_store import get_async_vector_store, close_async_vector_store
+from .streaming import StreamCoalescer
+from .config import StreamingConfig
+from .metrics import get_metrics
+from .tracing import start_trace, shutdown_tracing
 
 # Import generated protobuf files
 import sys
@@ -20,6 +28,9 @@ import chat_service_pb2
 import chat_service_pb2_grpc
 
 logger = logging.getLogger(__name__)
+# Hot-path loggers, so their volume can be set on its own (LOG_LEVELS in main.setup_logging)
+request_logger = logging.getLogger(f"{__name__}.request")
+stream_logger = logging.getLogger(f"{__name__}.stream")
 
 class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
     """Enhanced AI orchestrator chat handler with agent tools and context storage"""
@@ -29,6 +40,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
 
         # Initialize vector store and web client FIRST (needed by LLM engine)
         self.vector_store = get_vector_store()
+        self.async_vector_store = get_async_vector_store(self.vector_store)
         logger.debug("✅ Vector store initialized")
 
         self.web_client = get_web_client()
@@ -52,6 +64,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
 
         # Track active chat sessions for kill functionality
         self.active_sessions = {}
+        self.streaming_config = StreamingConfig.from_env()
         logger.info("🎯 Enhanced ChatHandler fully initialized with ML integration")
 
     async def setup_storage(self):
@@ -65,7 +78,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
     async def _vector_search_wrapper(self, **kwargs):
         """Wrapper to make vector store search async-compatible"""
         logger.info(f"🔍 [VECTOR_SEARCH_REQUEST] Args: {kwargs}")
-        results = self.vector_store.search(**kwargs)
+        results = await self.async_vector_store.search(**kwargs)
         logger.info(f"📊 [VECTOR_SEARCH_RESPONSE] Returned {len(results)} results")
         
         # Log each result summary
@@ -92,6 +105,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
         # Will get session ID from the request
         session_id = None
         user_id = None
+        trace = None
         
         try:
             # Get the first (and expected only) request from the stream
@@ -114,6 +128,9 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                 )
                 return
 
+            # Time every stage of this request (search, planner, storage, OpenAI) per session
+            trace = start_trace("chat", session_id=session_id)
+
             # Setup chat session in storage
             await self.chat_storage.create_session(
                 session_id=session_id,
@@ -133,7 +150,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
             logger.info(f"📊 [SESSION_TRACKING] Enhanced session {session_id} added to active sessions")
 
             # LOG COMPLETE REQUEST DETAILS
-            logger.info("📋 [REQUEST_DETAILS] Complete enhanced request breakdown:")
+            request_logger.info("📋 [REQUEST_DETAILS] Complete enhanced request breakdown:")
             
             # Extract request data
             messages = []
@@ -142,7 +159,7 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                     "role": msg.role,
                     "content": msg.content
                 })
-                logger.info(f"  📝 Message {i+1}: role='{msg.role}', content='{msg.content}'")
+                request_logger.debug(f"  📝 Message {i+1}: role='{msg.role}', content='{msg.content}'")
 
             constraints = None
             if request.constraints:
@@ -153,9 +170,9 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                     "indoor": request.constraints.indoor,
                     "categories": list(request.constraints.categories)
                 }
-                logger.info(f"  🎯 Constraints: {constraints}")
+                request_logger.info(f"  🎯 Constraints: {constraints}")
             else:
-                logger.info("  🎯 Constraints: None")
+                request_logger.info("  🎯 Constraints: None")
 
             user_location = None
             if request.userLocation:
@@ -163,58 +180,45 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                     "lat": request.userLocation.lat,
                     "lon": request.userLocation.lon
                 }
-                logger.info(f"  📍 User location: {user_location}")
+                request_logger.info(f"  📍 User location: {user_location}")
             else:
-                logger.info("  📍 User location: None")
+                request_logger.info("  📍 User location: None")
 
             # Stream the LLM response with enhanced agent tools and ML integration
             logger.info("🤖 [ENHANCED_LLM_STREAM_START] Starting enhanced LLM chat stream with ML integration")
-            full_response = ""
-            chunk_count = 0
-            buffer = ""
-            buffer_size = 50  # Send chunks when buffer reaches this size
+            coalescer = StreamCoalescer.from_config(self.streaming_config)
+            log_sends = stream_logger.isEnabledFor(logging.DEBUG)
 
-            # Use LLM engine for chat
+            # Use LLM engine for chat; its chunks are coalesced into fewer, larger deltas
             logger.info(f"🚀 Using LLM engine for chat")
-            async for text_chunk in self.llm_engine.run_chat(
+            chunks = self.llm_engine.run_chat(
                 messages=messages,
                 agent_tools=self.agent_tools,
                 session_id=session_id,
                 constraints=constraints,
                 user_location=user_location
-            ):
-                # Note: Removed external cancellation check during streaming to avoid database errors
-                # The session will be deactivated in the finally block
-
-                full_response += text_chunk
-                buffer += text_chunk
-                chunk_count += 1
-                
-                # Send buffer when it reaches target size or on word boundaries
-                if len(buffer) >= buffer_size or text_chunk.endswith((' ', '\n', '.', '!', '?', ',')):
-                    if buffer.strip():  # Only send non-empty buffers
-                        logger.debug(f"📤 [BUFFER_SEND] Sending buffered chunk: '{buffer[:50]}{'...' if len(buffer) > 50 else ''}'")
-                        
-                        delta = chat_service_pb2.ChatDelta(
-                            session_id=session_id,
-                            text_delta=buffer,
-                            done=False
-                        )
-                        yield delta
-                        buffer = ""
-            
-            # Send any remaining buffer content
-            if buffer.strip():
-                logger.debug(f"📤 [BUFFER_FINAL] Sending final buffer: '{buffer[:50]}{'...' if len(buffer) > 50 else ''}'")
-                delta = chat_service_pb2.ChatDelta(
+            )
+            async for text in coalescer.stream(chunks):
+                if log_sends:
+                    stream_logger.debug(f"📤 [BUFFER_SEND] Sending chunk: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+                yield chat_service_pb2.ChatDelta(
                     session_id=session_id,
-                    text_delta=buffer,
+                    text_delta=text,
                     done=False
                 )
-                yield delta
 
-            logger.info(f"✅ [ENHANCED_LLM_STREAM_COMPLETE] Raw chunks received: {chunk_count}, Total length: {len(full_response)}")
-            logger.info(f"📝 [FULL_TEXT_RESPONSE] Complete text: {full_response}")
+            full_response = coalescer.text()
+            metrics = get_metrics()
+            if coalescer.time_to_first_message is not None:
+                metrics.observe("chat.stream.ttfb_seconds", coalescer.time_to_first_message)
+            metrics.observe("chat.stream.messages", coalescer.message_count)
+            metrics.observe("chat.stream.chunks", coalescer.chunk_count)
+
+            logger.info(
+                f"✅ [ENHANCED_LLM_STREAM_COMPLETE] Raw chunks received: {coalescer.chunk_count}, "
+                f"messages sent: {coalescer.message_count}, total length: {len(full_response)}"
+            )
+            stream_logger.debug("📝 [FULL_TEXT_RESPONSE] Complete text: %s", full_response)
             
             # Try to extract structured answer from the full response
             logger.info("🔧 [EXTRACT_START] Extracting structured answer")
@@ -226,18 +230,18 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                 
                 # Log each option details
                 for i, option in enumerate(structured_answer.options):
-                    logger.info(f"  🎯 Option {i+1}: '{option.title}'")
-                    logger.info(f"    💰 Price: {option.price}, 🕐 Duration: {option.duration_min} min")
-                    logger.info(f"    📂 Categories: {list(option.categories)}")
-                    logger.info(f"    🌐 Website: {option.website}")
-                    logger.info(f"    📍 Source: {option.source}")
+                    stream_logger.debug(f"  🎯 Option {i+1}: '{option.title}'")
+                    stream_logger.debug(f"    💰 Price: {option.price}, 🕐 Duration: {option.duration_min} min")
+                    stream_logger.debug(f"    📂 Categories: {list(option.categories)}")
+                    stream_logger.debug(f"    🌐 Website: {option.website}")
+                    stream_logger.debug(f"    📍 Source: {option.source}")
                     
                     if option.entity_references and option.entity_references.primary_entity:
                         primary = option.entity_references.primary_entity
-                        logger.info(f"    🔗 Primary Entity: {primary.title} ({primary.type}) -> {primary.url}")
+                        stream_logger.debug(f"    🔗 Primary Entity: {primary.title} ({primary.type}) -> {primary.url}")
                         
                         for j, related in enumerate(option.entity_references.related_entities):
-                            logger.info(f"      🔗 Related {j+1}: {related.title} ({related.type}) -> {related.url}")
+                            stream_logger.debug(f"      🔗 Related {j+1}: {related.title} ({related.type}) -> {related.url}")
                 
                 delta = chat_service_pb2.ChatDelta(
                     session_id=session_id,
@@ -267,6 +271,9 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
             if session_id and self.chat_storage:
                 await self.chat_storage.deactivate_session(session_id)
 
+            if trace is not None:
+                trace.finish()
+
     def _extract_structured_answer(self, response_text: str) -> Optional[chat_service_pb2.StructuredAnswer]:
         """Extract structured answer from LLM response"""
         try:
@@ -470,6 +477,9 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
             # Always deactivate in storage first (stateless source of truth)
             db_success = await self.chat_storage.deactivate_session(session_id)
             
+            # Stop any GA run still working for this session
+            get_planner_executor().cancel_session(session_id)
+            
             # Check if session exists locally and abort it
             local_found = False
             if session_id in self.active_sessions:
@@ -577,6 +587,9 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
             
             # Active sessions count
             health_details["active_sessions"] = str(len(self.active_sessions))
+            planner_stats = get_planner_executor().get_stats()
+            health_details["planner_in_flight"] = str(planner_stats['in_flight'])
+            health_details["planner_queue_depth"] = str(planner_stats['queue_depth'])
             
             timestamp = int(time.time())
             message = f"Enhanced service is {overall_status}"
@@ -606,9 +619,33 @@ class EnhancedChatHandler(chat_service_pb2_grpc.AiOrchestratorServicer):
                 await self.agent_tools.close()
             if self.chat_storage:
                 await self.chat_storage.close()
+            await close_async_vector_store()
+            shutdown_planner_executor(wait=False)
+            shutdown_embedding_services()
+            shutdown_local_vector_index()
+            shutdown_tracing()
             logger.info("🧹 Enhanced ChatHandler cleanup completed")
         except Exception as e:
             logger.error(f"Error during enhanced cleanup: {e}")
 
 # Legacy handler for backwards compatibility
-ChatHandler = EnhancedChatHandler
\ No newline at end of file
+ChatHandler = EnhancedChatHandler
+
+# Process-wide handler shared by the gRPC server and the REST routes
+_chat_handler: Optional[EnhancedChatHandler] = None
+
+
+def get_chat_handler() -> EnhancedChatHandler:
+    """Get the global chat handler, creating it on first use"""
+    global _chat_handler
+    if _chat_handler is None:
+        _chat_handler = EnhancedChatHandler()
+    return _chat_handler
+
+
+async def shutdown_chat_handler():
+    """Clean up the global chat handler (closes the shared stores and executors - process shutdown only)"""
+    global _chat_handler
+    if _chat_handler is not None:
+        handler, _chat_handler = _chat_handler, None
+        await handler.cleanup()
\ No newline at end of file
@@ -55,6 +55,159 @@ class FeatureConfig:
     enable_monitoring: bool
 
 
+@dataclass
+class PlannerConfig:
+    """Date planner process pool configuration"""
+    max_workers: int
+    max_queue: int
+    timeout_seconds: float
+    warm_venues: bool
+
+    @classmethod
+    def from_env(cls) -> 'PlannerConfig':
+        """Load planner settings (doesn't need the rest of the config to be valid)"""
+        max_workers = int(os.getenv('PLANNER_WORKERS', str(min(4, os.cpu_count() or 1))))
+        return cls(
+            max_workers=max_workers,
+            max_queue=int(os.getenv('PLANNER_MAX_QUEUE', str(max_workers * 4))),
+            timeout_seconds=float(os.getenv('PLANNER_TIMEOUT', '20')),
+            warm_venues=os.getenv('PLANNER_WARM_VENUES', 'true').lower() == 'true'
+        )
+
+
+@dataclass
+class EmbeddingConfig:
+    """Query embedding cache / micro-batching configuration"""
+    cache_size: int
+    batch_window_ms: float
+    max_batch_size: int
+
+    @classmethod
+    def from_env(cls) -> 'EmbeddingConfig':
+        """Load embedding settings (doesn't need the rest of the config to be valid)"""
+        return cls(
+            cache_size=int(os.getenv('EMBEDDING_CACHE_SIZE', '5000')),
+            batch_window_ms=float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5')),
+            max_batch_size=int(os.getenv('EMBEDDING_MAX_BATCH', '64'))
+        )
+
+
+@dataclass
+class ModelConfig:
+    """Shared transformer / sentence-transformer models (server.model_registry)"""
+    warmup: bool
+    warmup_models: list
+    zero_shot_model: str
+    embedding_model: str
+    template_dir: str
+    fast_intent_threshold: float
+    load_retry_seconds: float
+
+    @classmethod
+    def from_env(cls) -> 'ModelConfig':
+        """Load model settings (doesn't need the rest of the config to be valid)"""
+        models = os.getenv('MODEL_WARMUP_MODELS', '')
+        return cls(
+            warmup=os.getenv('MODEL_WARMUP', 'true').lower() == 'true',
+            warmup_models=[m.strip() for m in models.split(',') if m.strip()],
+            zero_shot_model=os.getenv('ZERO_SHOT_MODEL', 'facebook/bart-large-mnli'),
+            embedding_model=os.getenv('INTENT_EMBEDDING_MODEL', 'all-MiniLM-L6-v2'),
+            template_dir=os.getenv(
+                'INTENT_TEMPLATE_DIR',
+                os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'models')
+            ),
+            # probability the fast intent tier needs before it answers without the NLI model
+            fast_intent_threshold=float(os.getenv('FAST_INTENT_THRESHOLD', '0.8')),
+            # how long a model that failed to load is skipped before the next attempt
+            load_retry_seconds=float(os.getenv('MODEL_LOAD_RETRY_SECONDS', '60'))
+        )
+
+
+def parse_log_levels(spec: str) -> dict:
+    """Parse "logger=LEVEL,logger=LEVEL" into {logger: level} (bad entries are skipped)"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+@dataclass
+class StreamingConfig:
+    """Coalescing of streamed chat output into ChatDelta messages"""
+    max_chars: int
+    max_delay: float
+    max_pending: int
+
+    @classmethod
+    def from_env(cls) -> 'StreamingConfig':
+        """Load streaming settings (doesn't need the rest of the config to be valid)"""
+        return cls(
+            max_chars=int(os.getenv('STREAM_COALESCE_CHARS', '256')),
+            max_delay=float(os.getenv('STREAM_COALESCE_MS', '50')) / 1000.0,
+            max_pending=int(os.getenv('STREAM_MAX_PENDING_CHARS', '65536'))
+        )
+
+
+@dataclass
+class MetricsConfig:
+    """Prometheus exposition (server.metrics)"""
+    port: int
+    host: str
+
+    @classmethod
+    def from_env(cls) -> 'MetricsConfig':
+        """Load metrics settings (doesn't need the rest of the config to be valid)"""
+        return cls(
+            # sidecar /metrics port next to the gRPC server, 0 disables it
+            port=int(os.getenv('METRICS_PORT', '9464')),
+            host=os.getenv('METRICS_HOST', '0.0.0.0')
+        )
+
+
+@dataclass
+class TracingConfig:
+    """Per-request timing spans (server.tracing)"""
+    enabled: bool
+    max_spans: int
+    max_sessions: int
+    otlp_endpoint: Optional[str]
+    service_name: str
+
+    @classmethod
+    def from_env(cls) -> 'TracingConfig':
+        """Load tracing settings (doesn't need the rest of the config to be valid)"""
+        return cls(
+            enabled=os.getenv('TRACING_ENABLED', 'true').lower() == 'true',
+            max_spans=int(os.getenv('TRACE_MAX_SPANS', '256')),
+            max_sessions=int(os.getenv('TRACE_MAX_SESSIONS', '1000')),
+            otlp_endpoint=os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT') or None,
+            service_name=os.getenv('OTEL_SERVICE_NAME', 'ai-orchestrator')
+        )
+
+
+@dataclass
+class LocalVectorIndexConfig:
+    """In-process HNSW index in front of pgvector"""
+    enabled: bool
+    cities: list
+    sync_interval: float
+    ef_search: int
+
+    @classmethod
+    def from_env(cls) -> 'LocalVectorIndexConfig':
+        """Load local index settings (doesn't need the rest of the config to be valid)"""
+        cities = os.getenv('LOCAL_VECTOR_INDEX_CITIES', '')
+        return cls(
+            enabled=os.getenv('LOCAL_VECTOR_INDEX', 'false').lower() == 'true',
+            cities=[c.strip() for c in cities.split(',') if c.strip()],
+            sync_interval=float(os.getenv('LOCAL_VECTOR_INDEX_SYNC', '60')),
+            ef_search=int(os.getenv('LOCAL_VECTOR_INDEX_EF', '64'))
+        )
+
+
 class Config:
     """Main configuration class"""
     
@@ -109,6 +262,12 @@ class Config:
             enable_caching=os.getenv('ENABLE_CACHING', 'true').lower() == 'true',
             enable_monitoring=os.getenv('ENABLE_MONITORING', 'false').lower() == 'true'
         )
+
+        self.planner = PlannerConfig.from_env()
+        self.embedding = EmbeddingConfig.from_env()
+        self.local_vector_index = LocalVectorIndexConfig.from_env()
+        self.streaming = StreamingConfig.from_env()
+        self.models = ModelConfig.from_env()
     
     def log_config(self):
         """Log configuration (without sensitive data)"""
@@ -117,6 +276,7 @@ class Config:
         logger.info(f"Database: {self.database.host}:{self.database.port}/{self.database.database}")
         logger.info(f"Search Provider: {self.api.search_provider}")
         logger.info(f"Default City: {self.api.default_city}")
+        logger.info(f"Planner: {self.planner.max_workers} workers, queue {self.planner.max_queue}, timeout {self.planner.timeout_seconds}s")
         logger.debug(f"Features: Vector={self.features.enable_vector_search}, Web={self.features.enable_web_search}")
 
 
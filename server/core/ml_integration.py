@@ -53,14 +53,24 @@ class MLServiceWrapper:
     
     def predict_vibes_batch(self, texts: List[str]) -> List[str]:
         """Predict vibes for multiple texts"""
+        vibes = self.classify_vibes_batch(texts)
+        return vibes if vibes is not None else ["casual"] * len(texts)
+    
+    def classify_vibes_batch(self, texts: List[str]) -> Optional[List[str]]:
+        """
+        Predict vibes for multiple texts, or None if the model didn't run.
+        
+        Use this when the vibes get stored - the "casual" placeholder from
+        predict_vibes_batch would never be reclassified.
+        """
         if not self.available:
-            return ["casual"] * len(texts)
+            return None
         
         try:
-            return self.ml_service.predict_vibes_batch(texts)
+            return self.ml_service.classify_vibes_batch(texts)
         except Exception as e:
             logger.warning(f"Error predicting vibes: {e}")
-            return ["casual"] * len(texts)
+            return None
     
     def plan_date(self, preferences: Dict[str, Any], algorithm: str = "heuristic") -> Optional[Dict[str, Any]]:
         """Plan a date based on preferences"""
@@ -76,6 +86,29 @@ class MLServiceWrapper:
             logger.warning(f"Error planning date: {e}")
             return None
     
+    async def plan_date_async(
+        self,
+        preferences: Dict[str, Any],
+        algorithm: str = "heuristic",
+        session_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Plan a date in the planner process pool so the event loop stays free"""
+        if not self.available:
+            return None
+        
+        from ..planner_executor import get_planner_executor
+        from ..exceptions import AIOrchhestratorException
+        
+        try:
+            return await get_planner_executor().plan(preferences, algorithm, session_id=session_id)
+        except AIOrchhestratorException as e:
+            # busy / timed out / cancelled
+            logger.warning(f"Date planning not completed: {e.error_code} - {e.message}")
+            return None
+        except Exception as e:
+            logger.warning(f"Error planning date: {e}")
+            return None
+    
     def clear_cache(self):
         """Clear vibe prediction cache"""
         self._vibe_cache.clear()
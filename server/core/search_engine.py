@@ -5,8 +5,11 @@ Combines vector search, web search, and ML-based filtering
 
 import logging
 import asyncio
+import inspect
 from typing import List, Dict, Any, Optional
 from .ml_integration import get_ml_wrapper
+from ..tools.async_vector_store import as_async_vector_store
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +19,13 @@ class SearchEngine:
     
     def __init__(self, vector_store=None, web_client=None):
         """Initialize search engine"""
-        self.vector_store = vector_store
+        # PostgreSQLVectorStore gets wrapped in the async store so searches don't block the loop
+        self.vector_store = as_async_vector_store(vector_store)
         self.web_client = web_client
         self.ml_wrapper = get_ml_wrapper()
         logger.info("✅ SearchEngine initialized")
     
+    @traced("search.semantic")
     async def semantic_search(
         self,
         query: str,
@@ -33,25 +38,43 @@ class SearchEngine:
             return []
 
         try:
-            # Note: vector_store.search is synchronous, not async
             # Build search parameters
             search_params = {'query': query, 'top_k': limit}
             if filters:
                 search_params.update(filters)
 
-            results = self.vector_store.search(**search_params)
-
-            # Enrich results with vibe predictions
-            for result in results:
-                if 'title' in result and 'description' in result:
-                    text = f"{result['title']} {result['description']}"
-                    result['predicted_vibe'] = self.ml_wrapper.predict_vibe(text)
+            if inspect.iscoroutinefunction(self.vector_store.search):
+                results = await self.vector_store.search(**search_params)
+            else:
+                # synchronous store (query encoding + database), so run it in a thread
+                results = await asyncio.to_thread(self.vector_store.search, **search_params)
+            self._enrich_vibes(results)
 
             return results
         except Exception as e:
             logger.error(f"Semantic search error: {e}")
             return []
     
+    def _enrich_vibes(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Fill in predicted_vibe for results that came back without one.
+        
+        Vibes are normally classified at ingest and stored with the event, so this
+        only covers older rows - and it classifies all of them in one batch.
+        """
+        missing = [
+            r for r in results
+            if not r.get('predicted_vibe') and 'title' in r and 'description' in r
+        ]
+        if not missing:
+            return
+
+        texts = [f"{r['title']} {r['description']}" for r in missing]
+        for result, vibe in zip(missing, self.ml_wrapper.predict_vibes_batch(texts)):
+            result['predicted_vibe'] = vibe
+        logger.debug(f"Classified vibes for {len(missing)}/{len(results)} results without a stored vibe")
+    
+    @traced("search.web")
     async def web_search(
         self,
         query: str,
@@ -70,6 +93,7 @@ class SearchEngine:
             logger.error(f"Web search error: {e}")
             return []
     
+    @traced("search.hybrid")
     async def hybrid_search(
         self,
         query: str,
@@ -101,6 +125,7 @@ class SearchEngine:
             logger.error(f"Hybrid search error: {e}")
             return []
     
+    @traced("search.vibe_filtered")
     async def vibe_filtered_search(
         self,
         query: str,
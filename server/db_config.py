@@ -5,6 +5,7 @@ import os
 import logging
 from typing import Optional
 from contextlib import contextmanager
+from urllib.parse import quote
 import threading
 
 # Load environment variables from .env
@@ -107,8 +108,10 @@ class DatabaseConfig:
     
     @property
     def connection_string(self) -> str:
-        """Get the connection string for PostgreSQL"""
-        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+        """Get the connection string for PostgreSQL (user and password are URL-escaped)"""
+        user = quote(self.user or "", safe="")
+        password = quote(self.password or "", safe="")
+        return f"postgresql://{user}:{password}@{self.host}:{self.port}/{self.database}"
     
     @contextmanager
     def get_connection(self):
@@ -0,0 +1,250 @@
+"""
+Embedding Service
+Shared sentence-transformer encoder with an LRU cache and micro-batching.
+
+Concurrent encode requests are collected for a few milliseconds and sent to the model
+as one batch from a background thread, so N chats searching at once cost roughly one
+forward pass instead of N - and repeated phrasings never reach the model at all.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .config import EmbeddingConfig
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for a text: lowercased with whitespace collapsed"""
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+
+class EmbeddingService:
+    """Cached, micro-batched wrapper around a SentenceTransformer model"""
+
+    def __init__(
+        self,
+        model: Any,
+        cache_size: int = 5000,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 64,
+        name: str = "default"
+    ):
+        self.model = model
+        self.name = name
+        self.cache_size = cache_size
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # key -> future for texts already queued, so duplicates share one slot in the batch
+        self._pending: Dict[str, Future] = {}
+        self._queue: Queue = Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    # -- cache -----------------------------------------------------------------
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def _cache_put(self, key: str, vector: np.ndarray):
+        # every caller gets this same array, so nobody may write to it
+        vector.setflags(write=False)
+        with self._cache_lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -- batching --------------------------------------------------------------
+
+    def _ensure_worker(self):
+        # takes the lock every time so a submit racing close() waits for the old
+        # worker to stop and then starts a new one (nothing is left in the queue)
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._batch_loop, name=f"embedding-batcher-{self.name}", daemon=True
+                )
+                self._worker.start()
+
+    def _submit(self, key: str) -> Future:
+        with self._cache_lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = Future()
+                self._pending[key] = future
+                self._queue.put((key, future))
+        self._ensure_worker()
+        return future
+
+    def _batch_loop(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=1.0)
+            except Empty:
+                continue
+            if first is None:
+                break
+
+            # collect whatever else arrives within the batch window
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch: List[tuple]):
+        keys = [key for key, _ in batch]
+        start = time.perf_counter()
+        try:
+            # one array object per key, shared by the cache and the waiting futures
+            vectors = list(self.model.encode(keys, convert_to_numpy=True))
+        except Exception as e:
+            with self._cache_lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for key, vector in zip(keys, vectors):
+            self._cache_put(key, vector)
+        with self._cache_lock:
+            for key in keys:
+                self._pending.pop(key, None)
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+        self.batches += 1
+        self.batched_texts += len(batch)
+        metrics = get_metrics()
+        metrics.increment_counter(f"embedding.{self.name}.batches")
+        metrics.increment_counter(f"embedding.{self.name}.encoded", len(batch))
+        logger.debug(f"Encoded batch of {len(batch)} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    # -- public API --------------------------------------------------------------
+
+    def encode(self, text: str, timeout: Optional[float] = 30.0) -> np.ndarray:
+        """Embedding for one text (blocks until its batch has been encoded)"""
+        key = normalize_text(text)
+        vector = self._cache_get(key)
+        if vector is not None:
+            return vector
+        return self._submit(key).result(timeout=timeout)
+
+    def encode_many(self, texts: List[str], timeout: Optional[float] = 30.0) -> np.ndarray:
+        """Embeddings for several texts, stacked into one array"""
+        keys = [normalize_text(t) for t in texts]
+        vectors: List[Optional[np.ndarray]] = [self._cache_get(k) for k in keys]
+        futures = {k: self._submit(k) for k, v in zip(keys, vectors) if v is None}
+        for i, key in enumerate(keys):
+            if vectors[i] is None:
+                vectors[i] = futures[key].result(timeout=timeout)
+        return np.stack(vectors) if vectors else np.empty((0, 0))
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """Embedding for one text without blocking the event loop"""
+        key = normalize_text(text)
+        vector = self._cache_get(key)
+        if vector is not None:
+            return vector
+        return await asyncio.wrap_future(self._submit(key))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and batching statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._cache),
+            "cache_max_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "batches": self.batches,
+            "avg_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Stop the batching thread (the next encode starts a new one)"""
+        with self._worker_lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join(timeout=2.0)
+                self._worker = None
+
+
+# Global instances, one per model
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str, model: Any = None) -> Optional[EmbeddingService]:
+    """
+    Get the embedding service for a model.
+    The first caller has to pass the loaded model; later callers can just use the name.
+    """
+    with _services_lock:
+        service = _services.get(model_name)
+        if service is None and model is not None:
+            config = EmbeddingConfig.from_env()
+            service = EmbeddingService(
+                model,
+                cache_size=config.cache_size,
+                batch_window_ms=config.batch_window_ms,
+                max_batch_size=config.max_batch_size,
+                name=model_name
+            )
+            _services[model_name] = service
+            logger.info(
+                f"✅ Embedding service for {model_name}: cache {config.cache_size}, "
+                f"batch window {config.batch_window_ms}ms"
+            )
+        return service
+
+
+def shutdown_embedding_services():
+    """Stop every embedding service's batching thread"""
+    with _services_lock:
+        for service in _services.values():
+            service.close()
+        _services.clear()
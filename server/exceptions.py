@@ -129,6 +129,41 @@ class ServiceUnavailableError(AIOrchhestratorException):
         )
 
 
+class PlannerBusyError(AIOrchhestratorException):
+    """Raised when the planner queue is full"""
+    
+    def __init__(self, message: str = "Date planner is busy, try again shortly", queue_depth: Optional[int] = None):
+        super().__init__(
+            message=message,
+            error_code="PLANNER_BUSY",
+            status_code=503,
+            details={'queue_depth': queue_depth}
+        )
+
+
+class PlannerTimeoutError(AIOrchhestratorException):
+    """Raised when a planning run takes longer than its timeout"""
+    
+    def __init__(self, message: str = "Date planning timed out", timeout: Optional[float] = None):
+        super().__init__(
+            message=message,
+            error_code="PLANNER_TIMEOUT",
+            status_code=504,
+            details={'timeout': timeout}
+        )
+
+
+class PlannerCancelledError(AIOrchhestratorException):
+    """Raised when a planning run is cancelled (e.g. the chat was killed)"""
+    
+    def __init__(self, message: str = "Date planning was cancelled"):
+        super().__init__(
+            message=message,
+            error_code="PLANNER_CANCELLED",
+            status_code=499
+        )
+
+
 def log_exception(exc: Exception, context: str = ""):
     """Log exception with context"""
     if isinstance(exc, AIOrchhestratorException):
@@ -1,7 +1,11 @@
 import grpc
+import inspect
 import logging
+import time
 from grpc import aio
 
+from .metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
 class AuthInterceptor(grpc.aio.ServerInterceptor):
@@ -70,3 +74,48 @@ class LoggingInterceptor(grpc.aio.ServerInterceptor):
         except Exception as e:
             logger.error(f"gRPC request failed: {method} - {str(e)}")
             raise
+
+
+def _timed_behavior(method: str, behavior):
+    """Wrap an RPC behavior so its duration and outcome are recorded under the method name"""
+    if inspect.isasyncgenfunction(behavior):
+        async def timed_stream(request_or_iterator, context):
+            start = time.perf_counter()
+            status = 500
+            try:
+                async for response in behavior(request_or_iterator, context):
+                    yield response
+                status = 200
+            finally:
+                get_metrics().record_request(method, time.perf_counter() - start, status)
+        return timed_stream
+
+    async def timed(request_or_iterator, context):
+        start = time.perf_counter()
+        status = 500
+        try:
+            result = behavior(request_or_iterator, context)
+            if inspect.isawaitable(result):
+                result = await result
+            status = 200
+            return result
+        finally:
+            get_metrics().record_request(method, time.perf_counter() - start, status)
+    return timed
+
+
+class MetricsInterceptor(grpc.aio.ServerInterceptor):
+    """gRPC interceptor recording request latency and errors per method"""
+
+    BEHAVIORS = ('unary_unary', 'unary_stream', 'stream_unary', 'stream_stream')
+
+    async def intercept_service(self, continuation, handler_call_details):
+        """Time the handler's behavior (for streams: until the last response is sent)"""
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        for name in self.BEHAVIORS:
+            behavior = getattr(handler, name)
+            if behavior is not None:
+                return handler._replace(**{name: _timed_behavior(handler_call_details.method, behavior)})
+        return handler
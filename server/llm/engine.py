@@ -6,12 +6,15 @@ Flow: User Input -> Local ML (vibe + planning) -> Genetic Algorithm (optimizatio
 This is the main, optimized engine that minimizes costs while maximizing quality.
 """
 
+import asyncio
 import logging
 import re
 from typing import AsyncIterator, List, Dict, Any, Optional
 from ..core.ml_integration import get_ml_wrapper
 from ..core.search_engine import get_search_engine
 from ..ml.input_validator import InputValidator
+from ..metrics import track_api_call
+from ..tracing import span, traced
 from openai import AsyncOpenAI
 
 try:
@@ -19,14 +22,15 @@ try:
 except ImportError:
     ScoringConfig = None
 
-# Pre-trained zero-shot classification model for intent detection
-try:
-    from transformers import pipeline
-    ZERO_SHOT_CLASSIFIER = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-    ML_CLASSIFIER_AVAILABLE = True
-except ImportError:
-    ZERO_SHOT_CLASSIFIER = None
-    ML_CLASSIFIER_AVAILABLE = False
+# Pre-trained zero-shot classification model for intent detection (loaded on first use, shared)
+from ..model_registry import get_zero_shot_classifier, TRANSFORMERS_AVAILABLE as ML_CLASSIFIER_AVAILABLE
+# Fast TF-IDF tier in front of it, answering the confident cases in a few milliseconds
+from ..ml.fast_intent import (
+    get_fast_intent_classifier,
+    SKLEARN_AVAILABLE as FAST_INTENT_AVAILABLE,
+    NEW_DATE_REQUEST,
+    FOLLOW_UP_QUESTION,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -67,8 +71,23 @@ def _score_intent_ml(user_message: str) -> Dict[str, float]:
     Uses facebook/bart-large-mnli for semantic understanding.
 
     Returns a dict with intent types and their confidence scores (0-1).
+    The fast intent tier answers first; the zero-shot model only runs when it isn't confident.
     """
-    if not ML_CLASSIFIER_AVAILABLE or ZERO_SHOT_CLASSIFIER is None:
+    fast_classifier = get_fast_intent_classifier() if FAST_INTENT_AVAILABLE else None
+    if fast_classifier is not None:
+        decision = fast_classifier.classify(user_message)
+        if decision is not None:
+            label, confidence, scores = decision
+            logger.debug(f"Fast intent tier: {label} ({confidence:.2f})")
+            return {
+                "new_request": scores[NEW_DATE_REQUEST],
+                "detail_question": scores[FOLLOW_UP_QUESTION],
+            }
+
+    if not ML_CLASSIFIER_AVAILABLE:
+        return {}
+    classifier = get_zero_shot_classifier()
+    if classifier is None:
         return {}
 
     try:
@@ -81,7 +100,7 @@ def _score_intent_ml(user_message: str) -> Dict[str, float]:
         ]
 
         # Run zero-shot classification
-        result = ZERO_SHOT_CLASSIFIER(user_message, candidate_labels, multi_label=False)
+        result = classifier(user_message, candidate_labels, multi_label=False)
 
         # Convert to dict with intent names and scores
         scores = {}
@@ -173,7 +192,7 @@ def is_follow_up_question(user_message: str, conversation_history: List[Dict[str
 
     # PRIMARY: Try ML-based classification first (more robust to language variations)
     # This uses zero-shot classification which handles language variations better than hard-coded patterns
-    if ML_CLASSIFIER_AVAILABLE:
+    if ML_CLASSIFIER_AVAILABLE or FAST_INTENT_AVAILABLE:
         try:
             ml_scores = _score_intent_ml(user_message)
             if ml_scores:
@@ -329,6 +348,12 @@ class LLMEngine:
         self.client = AsyncOpenAI()
         logger.info("✅ OptimizedLLMEngine initialized (ML-first, LLM-minimal)")
     
+    @track_api_call("openai")
+    async def _create_completion(self, **kwargs):
+        """Open a streamed chat completion (timed until the stream starts)"""
+        return await self.client.chat.completions.create(**kwargs)
+
+    @traced("llm.run_chat")
     async def run_chat(
         self,
         messages: List[Dict[str, str]],
@@ -367,14 +392,17 @@ class LLMEngine:
             logger.info(f"🎯 [CHAT_FLOW] Processing: {user_message[:100]}")
 
             # VALIDATION: Check if input is valid for date ideas chat
-            is_valid, error_message, validation_metadata = InputValidator.validate(user_message)
+            # (the intent checks below may load and run transformer models, so off the event loop)
+            with span("chat.validate"):
+                is_valid, error_message, validation_metadata = await asyncio.to_thread(InputValidator.validate, user_message)
             if not is_valid:
                 logger.warning(f"❌ Input validation failed: {validation_metadata['validation_layers'][-1]['reason']}")
                 yield error_message
                 return
 
             # Check if this is a follow-up question
-            is_followup = is_follow_up_question(user_message, messages)
+            with span("chat.intent"):
+                is_followup = await asyncio.to_thread(is_follow_up_question, user_message, messages)
             logger.info(f"📋 [FLOW_TYPE] {'Follow-up question' if is_followup else 'New date request'}")
 
             if is_followup and session_id:
@@ -409,13 +437,15 @@ class LLMEngine:
         """Handle a new date request using GA optimization"""
         # STEP 1: Predict vibe using LOCAL ML (FREE)
         logger.info("📊 [STEP 1] Predicting vibe with local ML...")
-        vibe = self.ml_wrapper.predict_vibe(user_message)
+        with span("chat.vibe"):
+            vibe = self.ml_wrapper.predict_vibe(user_message)
         logger.info(f"✅ Predicted vibe: {vibe}")
         yield f"🎨 Detected vibe: {vibe}\n"
 
         # STEP 2: Extract preferences from user message
         logger.info("🔍 [STEP 2] Extracting preferences...")
-        preferences = extract_preferences(user_message)
+        with span("chat.preferences"):
+            preferences = extract_preferences(user_message)
         logger.info(f"✅ Extracted preferences: budget=${preferences['budget_limit']}, duration={preferences['duration_minutes']}min, types={preferences['target_types']}")
 
         # STEP 3: Search for venues filtered by vibe (CHEAP)
@@ -431,12 +461,14 @@ class LLMEngine:
 
         # STEP 4: OPTIMIZE itinerary using GENETIC ALGORITHM (FREE)
         logger.info("🧬 [STEP 4] Optimizing itinerary with genetic algorithm...")
-        optimized_itinerary = await self._optimize_with_ga(
-            search_results,
-            preferences,
-            vibes_list,
-            excluded_venue_ids=excluded_venue_ids
-        )
+        with span("chat.optimize", venues=len(search_results)):
+            optimized_itinerary = await self._optimize_with_ga(
+                search_results,
+                preferences,
+                vibes_list,
+                excluded_venue_ids=excluded_venue_ids,
+                session_id=session_id
+            )
 
         if optimized_itinerary:
             logger.info(f"✅ GA optimized itinerary: {len(optimized_itinerary)} venues")
@@ -548,17 +580,18 @@ IMPORTANT: Only use the venue names and details provided above. Do not make up v
             {"role": "user", "content": context}
         ]
 
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",  # Using cheaper model (~90% cost reduction)
-            messages=formatting_messages,
-            max_tokens=600,  # Keep response reasonable
-            stream=True
-        )
+        with span("openai.format"):
+            response = await self._create_completion(
+                model="gpt-4o-mini",  # Using cheaper model (~90% cost reduction)
+                messages=formatting_messages,
+                max_tokens=600,  # Keep response reasonable
+                stream=True
+            )
 
-        # Stream the formatted response
-        async for chunk in response:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            # Stream the formatted response
+            async for chunk in response:
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
         # Send structured venue data as JSON after text response
         if venues_data:
@@ -713,17 +746,18 @@ IMPORTANT: Only use the venue names and details provided above. Do not make up v
             {"role": "user", "content": context}
         ]
 
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",  # Using cheaper model (~90% cost reduction)
-            messages=formatting_messages,
-            max_tokens=400,
-            stream=True
-        )
+        with span("openai.format"):
+            response = await self._create_completion(
+                model="gpt-4o-mini",  # Using cheaper model (~90% cost reduction)
+                messages=formatting_messages,
+                max_tokens=400,
+                stream=True
+            )
 
-        # Stream the formatted response
-        async for chunk in response:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            # Stream the formatted response
+            async for chunk in response:
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
         # Send structured venue data as JSON after text response
         if itinerary:
@@ -743,16 +777,20 @@ IMPORTANT: Only use the venue names and details provided above. Do not make up v
         search_results: List[Dict[str, Any]],
         preferences: Dict[str, Any],
         target_vibes: List[str],
-        excluded_venue_ids: Optional[List[str]] = None
+        excluded_venue_ids: Optional[List[str]] = None,
+        session_id: Optional[str] = None
     ) -> Optional[List[Dict[str, Any]]]:
         """
         Optimize itinerary using genetic algorithm
 
+        The GA runs in the planner process pool, so other chat streams keep going while it works.
+
         Args:
             search_results: List of venues from semantic search
             preferences: Dict with budget_limit, duration_minutes, target_types, hidden_gem
             target_vibes: List of target vibes
             excluded_venue_ids: List of venue IDs to exclude from results
+            session_id: Chat session, so KillChat can cancel the GA run
 
         Returns:
             Optimized itinerary (list of venues) or None if GA fails
@@ -852,7 +890,7 @@ IMPORTANT: Only use the venue names and details provided above. Do not make up v
 
             excluded_count = len(excluded_venue_ids or [])
             logger.info(f"🧬 Calling GA with: vibe={ga_preferences['vibe']}, budget={ga_preferences['budget_range']}, max_venues={ga_preferences['max_venues']}, excluded={excluded_count}")
-            result = self.ml_wrapper.plan_date(ga_preferences, algorithm="genetic")
+            result = await self.ml_wrapper.plan_date_async(ga_preferences, algorithm="genetic", session_id=session_id)
 
             if result and result.get('success'):
                 itinerary = result.get('itinerary', [])
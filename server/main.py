@@ -6,11 +6,13 @@ import sys
 from grpc import aio
 from dotenv import load_dotenv
 
-from .interceptors import LoggingInterceptor
-from .chat_handler import EnhancedChatHandler
-from .config import get_config
+from .interceptors import LoggingInterceptor, MetricsInterceptor
+from .chat_handler import get_chat_handler, shutdown_chat_handler
+from .config import get_config, parse_log_levels, MetricsConfig
 from .health import get_health_checker
-from .metrics import get_metrics
+from .metrics import get_metrics, start_metrics_server, shutdown_metrics_server
+from .planner_executor import get_planner_executor
+from .model_registry import warm_up_models
 from .exceptions import ConfigurationError, log_exception
 from .sentry_integration import init_sentry
 
@@ -55,6 +57,11 @@ def setup_logging(log_level: str, environment: str):
     logging.getLogger('grpc').setLevel(logging.INFO)
     logging.getLogger('sentence_transformers').setLevel(logging.WARNING)
 
+    # Per-logger overrides for hot paths, e.g.
+    # LOG_LEVELS="server.chat_handler.stream=DEBUG,server.chat_handler.request=WARNING"
+    for logger_name, level in parse_log_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(logger_name).setLevel(level)
+
     logger = logging.getLogger(__name__)
     logger.info(f"✅ Logging configured for {environment} environment")
 
@@ -91,15 +98,16 @@ async def serve():
     
     # Create interceptors
     logging_interceptor = LoggingInterceptor()
+    metrics_interceptor = MetricsInterceptor()
 
     # Create server with interceptors
     server = aio.server(
-        interceptors=[logging_interceptor]
+        interceptors=[logging_interceptor, metrics_interceptor]
     )
 
     # Add servicer with enhanced features
     logger.info("🚀 Initializing Enhanced ChatHandler with agent tools and context storage")
-    chat_handler = EnhancedChatHandler()
+    chat_handler = get_chat_handler()
 
     # Setup enhanced features
     try:
@@ -109,6 +117,13 @@ async def serve():
         logger.warning(f"⚠️ Chat storage setup failed, continuing anyway: {e}")
         log_exception(e, "chat_storage_setup")
 
+    # Start planner worker processes now so the first chat doesn't pay for loading them
+    try:
+        get_planner_executor().start()
+    except Exception as e:
+        logger.warning(f"⚠️ Planner pool failed to start, will retry on first request: {e}")
+        log_exception(e, "planner_pool_start")
+
     chat_service_pb2_grpc.add_AiOrchestratorServicer_to_server(chat_handler, server)
 
     # Bind to port
@@ -127,14 +142,22 @@ async def serve():
     logger.info(f"🤖 Chat mode: Enhanced with Agent Tools")
     
     await server.start()
+
+    # gRPC has no HTTP endpoint of its own, so Prometheus scrapes a sidecar port
+    metrics_config = MetricsConfig.from_env()
+    start_metrics_server(metrics_config.port, metrics_config.host)
+
+    # Load the transformer models in the background now that the port is accepting
+    # connections (the first chats that need one before then wait for that load)
+    warm_up_models()
     
     try:
         await server.wait_for_termination()
     except KeyboardInterrupt:
         logger.info("Received interrupt, shutting down...")
-        if hasattr(chat_handler, 'cleanup'):
-            logger.info("🧹 Cleaning up resources...")
-            await chat_handler.cleanup()
+        logger.info("🧹 Cleaning up resources...")
+        await shutdown_chat_handler()
+        shutdown_metrics_server()
         await server.stop(5)
 
 def main():
@@ -1,99 +1,368 @@
 """
 Metrics and Monitoring Module
 Tracks application metrics for observability
+
+Durations and other distributions go into fixed-bucket histograms, so memory stays
+constant however many requests are served and p50/p95/p99 can be estimated per
+endpoint, external API, planner and tool (the planners and tools through their
+tracing spans). Everything is exposed in the Prometheus text format: on /metrics of
+the FastAPI app, and on a small sidecar HTTP port next to the gRPC server.
 """
 
+import bisect
 import logging
+import math
+import re
+import threading
 import time
-from typing import Dict, Any, Callable
+from typing import Any, Callable, Dict, List, Optional, Sequence
 from functools import wraps
 from datetime import datetime
 from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 logger = logging.getLogger(__name__)
 
+# Prefix of every exported Prometheus metric
+NAMESPACE = "ai_orchestrator"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) for durations: ~1ms resolution at the fast end, up to 2 minutes
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5, 0.75,
+    1.0, 1.5, 2.5, 3.5, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0, 120.0,
+)
+
+# Upper bounds for sizes and counts (messages per response, chunks, ...)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def buckets_for(name: str) -> Sequence[float]:
+    """Latency buckets for *seconds metrics, size buckets for everything else"""
+    return LATENCY_BUCKETS if name.endswith("seconds") else SIZE_BUCKETS
+
+
+class Histogram:
+    """
+    Bucketed distribution with fixed memory (one count per bucket).
+
+    Quantiles are interpolated within the bucket they fall in, the way Prometheus'
+    histogram_quantile does, and clamped to the smallest / largest value seen.
+    Not thread-safe on its own - MetricsCollector guards it.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds: List[float] = sorted(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0 < q < 1), or None if nothing was observed"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else min(self.min, self.bounds[0])
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            'count': self.count,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+        for q in PERCENTILES:
+            summary[f'p{int(q * 100)}'] = self.quantile(q)
+        return summary
+
+    def cumulative_buckets(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(self.bounds + [math.inf], self.counts):
+            total += count
+            yield bound, total
+
+
+def _metric_name(name: str) -> str:
+    """A Prometheus-safe metric name under NAMESPACE ("span.search.semantic.seconds" -> ..._span_search_semantic_seconds)"""
+    return f"{NAMESPACE}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
 
 class MetricsCollector:
-    """Collects application metrics"""
-    
+    """Collects application metrics (safe to use from the event loop and worker threads)"""
+
     def __init__(self):
         """Initialize metrics collector"""
         self.start_time = datetime.now()
+        self._lock = threading.Lock()
         self.request_count = 0
         self.error_count = 0
-        self.request_times = defaultdict(list)
+        self.request_times: Dict[str, Histogram] = {}
+        self.request_errors = defaultdict(int)
         self.api_calls = defaultdict(int)
+        self.api_errors = defaultdict(int)
+        self.api_times: Dict[str, Histogram] = {}
         self.cache_hits = 0
         self.cache_misses = 0
-    
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.observations: Dict[str, Histogram] = {}
+
     def record_request(self, endpoint: str, duration: float, status: int):
         """Record API request"""
-        self.request_count += 1
-        self.request_times[endpoint].append(duration)
-        if status >= 400:
-            self.error_count += 1
-    
-    def record_api_call(self, api_name: str):
-        """Record external API call"""
-        self.api_calls[api_name] += 1
-    
+        with self._lock:
+            self.request_count += 1
+            histogram = self.request_times.get(endpoint)
+            if histogram is None:
+                histogram = self.request_times[endpoint] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(duration)
+            if status >= 400:
+                self.error_count += 1
+                self.request_errors[endpoint] += 1
+
+    def record_api_call(self, api_name: str, duration: Optional[float] = None, error: bool = False):
+        """Record external API call (and how long it took, when known)"""
+        with self._lock:
+            self.api_calls[api_name] += 1
+            if error:
+                self.api_errors[api_name] += 1
+            if duration is not None:
+                histogram = self.api_times.get(api_name)
+                if histogram is None:
+                    histogram = self.api_times[api_name] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(duration)
+
     def record_cache_hit(self):
         """Record cache hit"""
-        self.cache_hits += 1
-    
+        with self._lock:
+            self.cache_hits += 1
+
     def record_cache_miss(self):
         """Record cache miss"""
-        self.cache_misses += 1
-    
+        with self._lock:
+            self.cache_misses += 1
+
+    def increment_counter(self, name: str, amount: int = 1):
+        """Increment a named counter"""
+        with self._lock:
+            self.counters[name] += amount
+
+    def set_gauge(self, name: str, value: float):
+        """Set a point-in-time value (queue depth, in-flight jobs, ...)"""
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record one sample of a distribution (time to first byte, messages per response, ...)"""
+        with self._lock:
+            histogram = self.observations.get(name)
+            if histogram is None:
+                histogram = self.observations[name] = Histogram(buckets_for(name))
+            histogram.observe(value)
+
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics"""
         uptime = (datetime.now() - self.start_time).total_seconds()
-        
-        # Calculate average response times
-        avg_times = {}
-        for endpoint, times in self.request_times.items():
-            if times:
-                avg_times[endpoint] = sum(times) / len(times)
-        
-        # Calculate cache hit rate
-        total_cache_ops = self.cache_hits + self.cache_misses
-        cache_hit_rate = (self.cache_hits / total_cache_ops * 100) if total_cache_ops > 0 else 0
-        
-        return {
-            'uptime_seconds': uptime,
-            'total_requests': self.request_count,
-            'total_errors': self.error_count,
-            'error_rate': (self.error_count / self.request_count * 100) if self.request_count > 0 else 0,
-            'average_response_times': avg_times,
-            'api_calls': dict(self.api_calls),
-            'cache_hits': self.cache_hits,
-            'cache_misses': self.cache_misses,
-            'cache_hit_rate': cache_hit_rate,
-            'timestamp': datetime.now().isoformat()
-        }
-    
+
+        with self._lock:
+            response_times = {endpoint: h.summary() for endpoint, h in self.request_times.items()}
+
+            # Calculate cache hit rate
+            total_cache_ops = self.cache_hits + self.cache_misses
+            cache_hit_rate = (self.cache_hits / total_cache_ops * 100) if total_cache_ops > 0 else 0
+
+            return {
+                'uptime_seconds': uptime,
+                'total_requests': self.request_count,
+                'total_errors': self.error_count,
+                'error_rate': (self.error_count / self.request_count * 100) if self.request_count > 0 else 0,
+                'average_response_times': {endpoint: s['avg'] for endpoint, s in response_times.items()},
+                'response_times': response_times,
+                'api_calls': dict(self.api_calls),
+                'api_errors': dict(self.api_errors),
+                'api_response_times': {api: h.summary() for api, h in self.api_times.items()},
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cache_hit_rate': cache_hit_rate,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'observations': {name: h.summary() for name, h in self.observations.items()},
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, label: Optional[str], series: Dict[str, Histogram]):
+            for key, h in series.items():
+                labels = {label: key} if label else {}
+                for bound, total in h.cumulative_buckets():
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': _format_value(bound)})} {total}")
+                lines.append(f"{name}_sum{_labels(labels)} {_format_value(h.sum)}")
+                lines.append(f"{name}_count{_labels(labels)} {h.count}")
+
+        with self._lock:
+            family(f"{NAMESPACE}_uptime_seconds", "gauge", "Seconds since the process started collecting metrics")
+            lines.append(f"{NAMESPACE}_uptime_seconds {_format_value((datetime.now() - self.start_time).total_seconds())}")
+
+            if self.request_times:
+                family(f"{NAMESPACE}_request_duration_seconds", "histogram", "Request latency by endpoint")
+                histogram(f"{NAMESPACE}_request_duration_seconds", "endpoint", self.request_times)
+                family(f"{NAMESPACE}_request_errors_total", "counter", "Failed requests by endpoint")
+                for endpoint in self.request_times:
+                    lines.append(f"{NAMESPACE}_request_errors_total{_labels({'endpoint': endpoint})} {self.request_errors.get(endpoint, 0)}")
+
+            if self.api_calls:
+                family(f"{NAMESPACE}_api_calls_total", "counter", "External API calls")
+                for api, count in self.api_calls.items():
+                    lines.append(f"{NAMESPACE}_api_calls_total{_labels({'api': api})} {count}")
+                family(f"{NAMESPACE}_api_call_errors_total", "counter", "Failed external API calls")
+                for api in self.api_calls:
+                    lines.append(f"{NAMESPACE}_api_call_errors_total{_labels({'api': api})} {self.api_errors.get(api, 0)}")
+            if self.api_times:
+                family(f"{NAMESPACE}_api_call_duration_seconds", "histogram", "External API latency")
+                histogram(f"{NAMESPACE}_api_call_duration_seconds", "api", self.api_times)
+
+            family(f"{NAMESPACE}_cache_hits_total", "counter", "Cache hits")
+            lines.append(f"{NAMESPACE}_cache_hits_total {self.cache_hits}")
+            family(f"{NAMESPACE}_cache_misses_total", "counter", "Cache misses")
+            lines.append(f"{NAMESPACE}_cache_misses_total {self.cache_misses}")
+
+            for name, value in sorted(self.counters.items()):
+                metric = _metric_name(name) + "_total"
+                family(metric, "counter", f"Counter {name}")
+                lines.append(f"{metric} {_format_value(value)}")
+            for name, value in sorted(self.gauges.items()):
+                metric = _metric_name(name)
+                family(metric, "gauge", f"Gauge {name}")
+                lines.append(f"{metric} {_format_value(value)}")
+            for name, h in sorted(self.observations.items()):
+                metric = _metric_name(name)
+                family(metric, "histogram", f"Distribution of {name}")
+                histogram(metric, None, {name: h})
+
+        return "\n".join(lines) + "\n"
+
     def reset(self):
         """Reset metrics"""
-        self.request_count = 0
-        self.error_count = 0
-        self.request_times.clear()
-        self.api_calls.clear()
-        self.cache_hits = 0
-        self.cache_misses = 0
+        with self._lock:
+            self.request_count = 0
+            self.error_count = 0
+            self.request_times.clear()
+            self.request_errors.clear()
+            self.api_calls.clear()
+            self.api_errors.clear()
+            self.api_times.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.counters.clear()
+            self.gauges.clear()
+            self.observations.clear()
 
 
 # Global metrics instance
 _metrics: MetricsCollector = None
+_metrics_lock = threading.Lock()
 
 
 def get_metrics() -> MetricsCollector:
     """Get global metrics instance"""
     global _metrics
     if _metrics is None:
-        _metrics = MetricsCollector()
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsCollector()
     return _metrics
 
 
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics from the global collector"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics scrape: " + format % args)
+
+
+# Sidecar HTTP server for processes without an HTTP app (the gRPC server)
+_metrics_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on its own port in a background thread (port 0 or less disables it)"""
+    global _metrics_server
+    if port <= 0 or _metrics_server is not None:
+        return _metrics_server
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ Metrics server could not bind to port {port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    _metrics_server = server
+    logger.info(f"📈 Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def shutdown_metrics_server():
+    """Stop the sidecar metrics server if it was started"""
+    global _metrics_server
+    if _metrics_server is not None:
+        server, _metrics_server = _metrics_server, None
+        server.shutdown()
+        server.server_close()
+
+
 def track_request(endpoint: str):
     """Decorator to track request metrics"""
     def decorator(func: Callable):
@@ -109,7 +378,7 @@ def track_request(endpoint: str):
                 duration = time.time() - start
                 get_metrics().record_request(endpoint, duration, 500)
                 raise
-        
+
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
             start = time.time()
@@ -122,35 +391,46 @@ def track_request(endpoint: str):
                 duration = time.time() - start
                 get_metrics().record_request(endpoint, duration, 500)
                 raise
-        
+
         # Return appropriate wrapper
         import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
             return sync_wrapper
-    
+
     return decorator
 
 
 def track_api_call(api_name: str):
-    """Decorator to track external API calls"""
+    """Decorator to track external API calls and their latency"""
     def decorator(func: Callable):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            get_metrics().record_api_call(api_name)
-            return await func(*args, **kwargs)
-        
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                get_metrics().record_api_call(api_name, time.perf_counter() - start, error=True)
+                raise
+            get_metrics().record_api_call(api_name, time.perf_counter() - start)
+            return result
+
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            get_metrics().record_api_call(api_name)
-            return func(*args, **kwargs)
-        
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                get_metrics().record_api_call(api_name, time.perf_counter() - start, error=True)
+                raise
+            get_metrics().record_api_call(api_name, time.perf_counter() - start)
+            return result
+
         import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         else:
             return sync_wrapper
-    
-    return decorator
 
+    return decorator
@@ -3,6 +3,7 @@ Middleware modules for AI Orchestrator
 """
 
 from .rate_limit_middleware import RateLimitMiddleware
+from .metrics_middleware import MetricsMiddleware
 
-__all__ = ["RateLimitMiddleware"]
+__all__ = ["RateLimitMiddleware", "MetricsMiddleware"]
 
@@ -0,0 +1,46 @@
+"""
+Request metrics middleware for FastAPI
+Records latency and status of every request in the MetricsCollector
+"""
+
+import time
+
+from ..metrics import get_metrics
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording each request under its route template
+    ("GET /api/chat/history/{session_id}", not one series per session id).
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses (SSE) are
+    timed until their last chunk is sent, not just until the headers go out.
+    """
+
+    # Prometheus scrapes shouldn't show up in the request latencies they report
+    SKIP_PATHS = {"/metrics"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # unmatched paths share one series, so scanners can't grow the metrics
+            endpoint = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            get_metrics().record_request(endpoint, time.perf_counter() - start, status)
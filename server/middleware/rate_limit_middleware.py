@@ -25,6 +25,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         "/redoc",
         "/openapi.json",
         "/swagger-ui",
+        "/metrics",
     }
     
     async def dispatch(self, request: Request, call_next):
@@ -0,0 +1,125 @@
+"""
+Fast Intent Tier
+
+A small TF-IDF + logistic regression classifier for the question every chat message
+asks first: is this a new date request or a follow-up about what was suggested?
+
+It is trained at startup from examples the routers already carry
+(HybridRouter.INTENT_TEMPLATES and the engine's INTENT_KEYWORDS), predicts in a couple
+of milliseconds on CPU, and only answers when it is confident. Everything else
+still goes to the zero-shot NLI model, which costs hundreds of milliseconds per message.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.sparse import hstack
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+from ..config import ModelConfig
+
+logger = logging.getLogger(__name__)
+
+NEW_DATE_REQUEST = "new_date_request"
+FOLLOW_UP_QUESTION = "follow_up_question"
+
+# Probability the top label needs before the fast tier answers on its own
+# (ModelConfig.fast_intent_threshold / FAST_INTENT_THRESHOLD in deployments)
+DEFAULT_THRESHOLD = 0.8
+
+REGISTRY_KEY = "fast-intent"
+
+
+class FastIntentClassifier:
+    """Word + character n-gram TF-IDF features into a logistic regression"""
+
+    def __init__(self, examples: Dict[str, List[str]], threshold: float = DEFAULT_THRESHOLD):
+        if not SKLEARN_AVAILABLE:
+            raise ImportError("scikit-learn is required for the fast intent tier")
+
+        texts, labels = [], []
+        for label, phrases in examples.items():
+            for phrase in phrases:
+                texts.append(phrase.lower())
+                labels.append(label)
+
+        self.threshold = threshold
+        self.words = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        self.chars = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)
+        features = hstack([self.words.fit_transform(texts), self.chars.fit_transform(texts)]).tocsr()
+        self.model = LogisticRegression(C=20.0, max_iter=1000, class_weight="balanced")
+        self.model.fit(features, labels)
+        self.labels = [str(label) for label in self.model.classes_]
+        self.training_size = len(texts)
+
+    def _features(self, texts: List[str]):
+        texts = [t.lower() for t in texts]
+        words = self.words.transform(texts)
+        return words, hstack([words, self.chars.transform(texts)]).tocsr()
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Label probabilities for each text (columns follow self.labels)"""
+        return self.model.predict_proba(self._features(texts)[1])
+
+    def predict(self, text: str) -> Tuple[str, float, Dict[str, float]]:
+        """(top label, its probability, all label probabilities)"""
+        probabilities = self.predict_proba([text])[0]
+        scores = {label: float(p) for label, p in zip(self.labels, probabilities)}
+        best = max(scores, key=scores.get)
+        return best, scores[best], scores
+
+    def classify(self, text: str) -> Optional[Tuple[str, float, Dict[str, float]]]:
+        """
+        The prediction if it clears the confidence threshold, else None (defer to NLI).
+        A message with no word the classifier was trained on is never answered here -
+        character n-grams alone would make it confident about anything.
+        """
+        words, features = self._features([text])
+        if words.nnz == 0:
+            return None
+        probabilities = self.model.predict_proba(features)[0]
+        scores = {label: float(p) for label, p in zip(self.labels, probabilities)}
+        label = max(scores, key=scores.get)
+        if scores[label] < self.threshold:
+            return None
+        return label, scores[label], scores
+
+
+def training_examples() -> Dict[str, List[str]]:
+    """Labelled phrases from the hybrid router's templates and the engine's intent keywords"""
+    from .hybrid_router import HybridRouter, IntentType
+    from ..llm.engine import INTENT_KEYWORDS
+
+    examples = {
+        NEW_DATE_REQUEST: list(HybridRouter.INTENT_TEMPLATES[IntentType.NEW_DATE_REQUEST]),
+        FOLLOW_UP_QUESTION: list(HybridRouter.INTENT_TEMPLATES[IntentType.FOLLOW_UP_QUESTION]),
+    }
+    # reference_to_previous is only pronouns and ordinals - not a signal on its own
+    examples[NEW_DATE_REQUEST] += INTENT_KEYWORDS["new_request"]["keywords"]
+    examples[FOLLOW_UP_QUESTION] += INTENT_KEYWORDS["detail_question"]["keywords"]
+    examples[FOLLOW_UP_QUESTION] += INTENT_KEYWORDS["modification"]["keywords"]
+    return examples
+
+
+def build_fast_intent_classifier() -> FastIntentClassifier:
+    classifier = FastIntentClassifier(training_examples(), threshold=ModelConfig.from_env().fast_intent_threshold)
+    logger.info(f"Trained fast intent tier on {classifier.training_size} examples")
+    return classifier
+
+
+def get_fast_intent_classifier() -> Optional[FastIntentClassifier]:
+    """Shared fast intent classifier (trained on first use), or None without scikit-learn"""
+    if not SKLEARN_AVAILABLE:
+        return None
+    from ..model_registry import get_model_registry
+
+    registry = get_model_registry()
+    registry.register(REGISTRY_KEY, build_fast_intent_classifier)
+    return registry.get(REGISTRY_KEY)
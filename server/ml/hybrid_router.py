@@ -1,38 +1,42 @@
 """
 Hybrid Intent Router - Dynamic & Robust
 
-Uses a 3-stage pipeline:
-1. FAST: Sentence-Transformer embedding similarity (low latency)
+Uses a staged pipeline:
+0. FASTEST: Small TF-IDF intent classifier (answers only when confident)
+1. FAST: Sentence-Transformer similarity against the precomputed template matrix (low latency)
 2. ACCURATE: Zero-shot NLI classifier (high accuracy on edge cases)
 3. INTERACTIVE: Ask targeted clarification question if still ambiguous
 
 This avoids brittle hardcoded patterns and works for all inputs.
 """
 
+import hashlib
+import json
 import logging
-from typing import Tuple, Dict, Any, Optional
+import os
+from typing import Tuple, Dict, Any, List, Optional
 from enum import Enum
 
+import numpy as np
+
+from ..config import ModelConfig
+
 logger = logging.getLogger(__name__)
 
-# Try to load embedding model
-try:
-    from sentence_transformers import SentenceTransformer, util
-    EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-    EMBEDDING_AVAILABLE = True
-except ImportError:
-    EMBEDDING_MODEL = None
-    EMBEDDING_AVAILABLE = False
-    logger.warning("sentence-transformers not available, will use fallback")
+# Models come from the shared registry and load on first use
+from ..model_registry import (
+    get_model_registry,
+    get_sentence_transformer,
+    get_zero_shot_classifier,
+    SENTENCE_TRANSFORMERS_AVAILABLE as EMBEDDING_AVAILABLE,
+    TRANSFORMERS_AVAILABLE as NLI_AVAILABLE,
+)
 
-# Try to load zero-shot classifier
-try:
-    from transformers import pipeline
-    ZERO_SHOT_CLASSIFIER = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-    NLI_AVAILABLE = True
-except ImportError:
-    ZERO_SHOT_CLASSIFIER = None
-    NLI_AVAILABLE = False
+from .fast_intent import get_fast_intent_classifier, NEW_DATE_REQUEST
+
+if not EMBEDDING_AVAILABLE:
+    logger.warning("sentence-transformers not available, will use fallback")
+if not NLI_AVAILABLE:
     logger.warning("transformers not available, will use fallback")
 
 
@@ -105,6 +109,11 @@ class HybridRouter:
         IntentType.FOLLOW_UP_QUESTION: "Are you asking about a specific venue, or looking for new suggestions?",
     }
 
+    # Embedding similarity above this answers without the NLI stage
+    EMBEDDING_CONFIDENCE = 0.75
+    # NLI confidence above this answers without asking for clarification
+    NLI_CONFIDENCE = 0.7
+
     @staticmethod
     def route(user_message: str, conversation_history: Optional[list] = None) -> Tuple[IntentType, float, Dict[str, Any]]:
         """
@@ -120,59 +129,125 @@ class HybridRouter:
             - confidence: 0.0-1.0 confidence score
             - metadata: Dict with stage info, scores, etc.
         """
-        metadata = {
-            "stages": [],
-            "embedding_scores": {},
-            "nli_scores": {},
-            "final_decision": None,
-        }
+        return HybridRouter.route_many([user_message])[0]
+
+    @staticmethod
+    def route_many(messages: List[str], batch_size: int = 64) -> List[Tuple[IntentType, float, Dict[str, Any]]]:
+        """
+        Route many messages, e.g. for offline evaluation over logged traffic.
 
-        # STAGE 1: Check for invalid input (empty, too short)
-        if not user_message or len(user_message.strip()) < 3:
-            logger.warning(f"Invalid input: '{user_message}'")
-            return IntentType.INVALID, 0.0, metadata
-
-        # STAGE 1.5: Quick off-topic check (math, general knowledge)
-        if HybridRouter._is_obviously_off_topic(user_message):
-            logger.warning(f"Off-topic input: '{user_message}'")
-            return IntentType.AMBIGUOUS, 0.3, {
-                "stages": [{"stage": "off_topic_check", "reason": "Math or general knowledge question"}],
-                "final_decision": "Off-topic detected",
+        Same decisions as route() for each message, but the embedding stage encodes
+        messages in batches and scores a whole batch with one matrix product.
+        """
+        results: List[Optional[Tuple[IntentType, float, Dict[str, Any]]]] = [None] * len(messages)
+        pending = []
+
+        for i, user_message in enumerate(messages):
+            metadata = {
+                "stages": [],
+                "embedding_scores": {},
+                "nli_scores": {},
+                "final_decision": None,
             }
 
-        # STAGE 2: Fast embedding-based similarity (CHEAP)
+            # STAGE 1: Check for invalid input (empty, too short)
+            if not user_message or len(user_message.strip()) < 3:
+                logger.warning(f"Invalid input: '{user_message}'")
+                results[i] = (IntentType.INVALID, 0.0, metadata)
+                continue
+
+            # STAGE 1.5: Quick off-topic check (math, general knowledge)
+            if HybridRouter._is_obviously_off_topic(user_message):
+                logger.warning(f"Off-topic input: '{user_message}'")
+                results[i] = (IntentType.AMBIGUOUS, 0.3, {
+                    "stages": [{"stage": "off_topic_check", "reason": "Math or general knowledge question"}],
+                    "final_decision": "Off-topic detected",
+                })
+                continue
+
+            # STAGE 1.75: Fast intent tier (CHEAPEST) - only answers when it's confident
+            fast = HybridRouter._stage_fast(user_message)
+            if fast is not None:
+                intent, confidence, stage_meta = fast
+                metadata["stages"].append(stage_meta)
+                logger.info(f"✅ Fast tier: High confidence {confidence:.2f} → {intent.value}")
+                metadata["final_decision"] = f"Fast tier - confidence {confidence:.2f}"
+                results[i] = (intent, confidence, metadata)
+                continue
+
+            pending.append((i, metadata))
+
+        # STAGE 2: Fast embedding-based similarity (CHEAP) - one encode + matmul per batch
+        undecided = []
         if EMBEDDING_AVAILABLE:
-            intent, confidence, stage_meta = HybridRouter._stage_embedding(user_message)
-            metadata["stages"].append(stage_meta)
-            metadata["embedding_scores"] = stage_meta.get("scores", {})
-
-            # If high confidence, return early
-            if confidence > 0.75:
-                logger.info(f"✅ Stage 1 (Embedding): High confidence {confidence:.2f} → {intent.value}")
-                metadata["final_decision"] = f"Stage 1 (Embedding) - confidence {confidence:.2f}"
-                return intent, confidence, metadata
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                stages = HybridRouter._stage_embedding_batch([messages[i] for i, _ in batch])
+                for (i, metadata), (intent, confidence, stage_meta) in zip(batch, stages):
+                    metadata["stages"].append(stage_meta)
+                    metadata["embedding_scores"] = stage_meta.get("scores", {})
+
+                    # If high confidence, return early
+                    if confidence > HybridRouter.EMBEDDING_CONFIDENCE:
+                        logger.info(f"✅ Stage 1 (Embedding): High confidence {confidence:.2f} → {intent.value}")
+                        metadata["final_decision"] = f"Stage 1 (Embedding) - confidence {confidence:.2f}"
+                        results[i] = (intent, confidence, metadata)
+                    else:
+                        undecided.append((i, metadata))
         else:
-            intent, confidence = IntentType.AMBIGUOUS, 0.5
             logger.debug("Embedding model not available, skipping Stage 1")
+            undecided = pending
+
+        for i, metadata in undecided:
+            user_message = messages[i]
+
+            # STAGE 3: Accurate NLI-based classification (ACCURATE)
+            if NLI_AVAILABLE:
+                intent, confidence, stage_meta = HybridRouter._stage_nli(user_message)
+                metadata["stages"].append(stage_meta)
+                metadata["nli_scores"] = stage_meta.get("scores", {})
+
+                # If high confidence, return
+                if confidence > HybridRouter.NLI_CONFIDENCE:
+                    logger.info(f"✅ Stage 2 (NLI): High confidence {confidence:.2f} → {intent.value}")
+                    metadata["final_decision"] = f"Stage 2 (NLI) - confidence {confidence:.2f}"
+                    results[i] = (intent, confidence, metadata)
+                    continue
+            else:
+                logger.debug("NLI model not available, skipping Stage 2")
 
-        # STAGE 3: Accurate NLI-based classification (ACCURATE)
-        if NLI_AVAILABLE:
-            intent, confidence, stage_meta = HybridRouter._stage_nli(user_message)
-            metadata["stages"].append(stage_meta)
-            metadata["nli_scores"] = stage_meta.get("scores", {})
-
-            # If high confidence, return
-            if confidence > 0.7:
-                logger.info(f"✅ Stage 2 (NLI): High confidence {confidence:.2f} → {intent.value}")
-                metadata["final_decision"] = f"Stage 2 (NLI) - confidence {confidence:.2f}"
-                return intent, confidence, metadata
-        else:
-            logger.debug("NLI model not available, skipping Stage 2")
+            # STAGE 4: Still ambiguous? Mark for clarification
+            logger.warning(f"⚠️ Ambiguous input: '{user_message[:80]}' - needs clarification")
+            metadata["final_decision"] = "Stage 3 (Ambiguous) - needs clarification"
+            results[i] = (IntentType.AMBIGUOUS, 0.5, metadata)
+
+        return results
+
+    @staticmethod
+    def _stage_fast(user_message: str) -> Optional[Tuple[IntentType, float, Dict[str, Any]]]:
+        """
+        Small TF-IDF classifier trained from INTENT_TEMPLATES and the engine's keywords.
 
-        # STAGE 4: Still ambiguous? Mark for clarification
-        logger.warning(f"⚠️ Ambiguous input: '{user_message[:80]}' - needs clarification")
-        metadata["final_decision"] = "Stage 3 (Ambiguous) - needs clarification"
-        return IntentType.AMBIGUOUS, 0.5, metadata
+        A few milliseconds on CPU. Returns None when it isn't confident (or isn't
+        available), and the embedding and NLI stages decide instead.
+        """
+        try:
+            classifier = get_fast_intent_classifier()
+            decision = classifier.classify(user_message) if classifier is not None else None
+        except Exception as e:
+            logger.error(f"Fast intent stage failed: {e}")
+            return None
+        if decision is None:
+            return None
+
+        label, confidence, scores = decision
+        intent = IntentType.NEW_DATE_REQUEST if label == NEW_DATE_REQUEST else IntentType.FOLLOW_UP_QUESTION
+        return intent, confidence, {
+            "stage": "fast",
+            "scores": scores,
+            "best_intent": intent.value,
+            "confidence": confidence,
+        }
 
     @staticmethod
     def _stage_embedding(user_message: str) -> Tuple[IntentType, float, Dict[str, Any]]:
@@ -182,39 +257,38 @@ class HybridRouter:
         Embeds user message and compares to intent templates.
         Very fast (<10ms), good for most cases.
         """
-        try:
-            # Embed user message
-            user_embedding = EMBEDDING_MODEL.encode(user_message, convert_to_tensor=True)
+        return HybridRouter._stage_embedding_batch([user_message])[0]
 
-            scores = {}
-            for intent_type, templates in HybridRouter.INTENT_TEMPLATES.items():
-                # Embed all templates for this intent
-                template_embeddings = EMBEDDING_MODEL.encode(templates, convert_to_tensor=True)
+    @staticmethod
+    def _stage_embedding_batch(messages: List[str]) -> List[Tuple[IntentType, float, Dict[str, Any]]]:
+        """Embedding stage for several messages: one encode call and one matrix product"""
+        try:
+            model = get_sentence_transformer()
+            templates = get_template_embeddings()
+            if model is None or templates is None:
+                raise RuntimeError("embedding model failed to load")
 
-                # Get max similarity to any template
-                similarities = util.pytorch_cos_sim(user_embedding, template_embeddings)[0]
-                max_similarity = float(similarities.max())
-                scores[intent_type.value] = max_similarity
+            vectors = model.encode(messages, convert_to_numpy=True, normalize_embeddings=True)
+            similarities = templates.scores(vectors)
+        except Exception as e:
+            logger.error(f"Embedding stage failed: {e}")
+            return [(IntentType.AMBIGUOUS, 0.5, {"stage": "embedding", "error": str(e)}) for _ in messages]
 
-            # Get best intent
-            best_intent = max(scores.items(), key=lambda x: x[1])
-            best_intent_type = IntentType(best_intent[0])
-            confidence = best_intent[1]
+        results = []
+        for row in similarities:
+            scores = {intent.value: float(score) for intent, score in zip(templates.intents, row)}
+            best_intent_type = templates.intents[int(np.argmax(row))]
+            confidence = scores[best_intent_type.value]
 
             logger.debug(f"Embedding scores: {scores}")
 
-            return best_intent_type, confidence, {
+            results.append((best_intent_type, confidence, {
                 "stage": "embedding",
                 "scores": scores,
                 "best_intent": best_intent_type.value,
                 "confidence": confidence,
-            }
-        except Exception as e:
-            logger.error(f"Embedding stage failed: {e}")
-            return IntentType.AMBIGUOUS, 0.5, {
-                "stage": "embedding",
-                "error": str(e),
-            }
+            }))
+        return results
 
     @staticmethod
     def _stage_nli(user_message: str) -> Tuple[IntentType, float, Dict[str, Any]]:
@@ -230,7 +304,11 @@ class HybridRouter:
                 "asking a question about a specific venue or date",
             ]
 
-            result = ZERO_SHOT_CLASSIFIER(user_message, candidate_labels, multi_label=False)
+            classifier = get_zero_shot_classifier()
+            if classifier is None:
+                raise RuntimeError("zero-shot classifier failed to load")
+
+            result = classifier(user_message, candidate_labels, multi_label=False)
 
             # Map to intent types
             scores = {
@@ -309,3 +387,110 @@ class HybridRouter:
 
         return False
 
+
+class TemplateEmbeddings:
+    """
+    HybridRouter.INTENT_TEMPLATES embedded once as a normalized (templates x dim) matrix,
+    rows grouped by intent. Saved as a versioned .npz artifact - the version hashes the
+    model name and the templates, so editing either builds a new one instead of reusing
+    stale vectors.
+    """
+
+    def __init__(self, intents: List[IntentType], counts: List[int], matrix: np.ndarray, version: str):
+        self.intents = intents
+        self.counts = counts
+        self.matrix = matrix
+        self.version = version
+        # first row of each intent's block, for the per-intent max
+        self.starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.intp)
+
+    @staticmethod
+    def version_for(model_name: str, templates: Dict[IntentType, List[str]]) -> str:
+        payload = json.dumps(
+            [model_name, [[intent.value, list(phrases)] for intent, phrases in templates.items()]]
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def path_for(directory: str, version: str) -> str:
+        return os.path.join(directory, f"intent_templates.{version}.npz")
+
+    @classmethod
+    def build(cls, model, model_name: str, templates: Dict[IntentType, List[str]]) -> 'TemplateEmbeddings':
+        phrases = [phrase for group in templates.values() for phrase in group]
+        matrix = model.encode(phrases, convert_to_numpy=True, normalize_embeddings=True)
+        return cls(
+            list(templates),
+            [len(group) for group in templates.values()],
+            np.asarray(matrix, dtype=np.float32),
+            cls.version_for(model_name, templates)
+        )
+
+    def save(self, directory: str) -> str:
+        """Write the artifact (atomically - a reader never sees a partial file)"""
+        os.makedirs(directory, exist_ok=True)
+        path = self.path_for(directory, self.version)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                matrix=self.matrix,
+                counts=np.asarray(self.counts),
+                intents=np.asarray([intent.value for intent in self.intents]),
+                version=np.asarray(self.version)
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'TemplateEmbeddings':
+        with np.load(path) as data:
+            return cls(
+                [IntentType(value) for value in data["intents"]],
+                [int(count) for count in data["counts"]],
+                data["matrix"].astype(np.float32),
+                str(data["version"])
+            )
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        """Best template similarity per intent for each normalized vector: (n, intents)"""
+        similarities = np.atleast_2d(vectors).astype(np.float32) @ self.matrix.T
+        return np.maximum.reduceat(similarities, self.starts, axis=1)
+
+
+def load_template_embeddings(model_name: Optional[str] = None, directory: Optional[str] = None) -> Optional[TemplateEmbeddings]:
+    """The template matrix from its artifact, building (and saving) it if there's none for this version"""
+    config = ModelConfig.from_env()
+    model_name = model_name or config.embedding_model
+    directory = directory or config.template_dir
+    version = TemplateEmbeddings.version_for(model_name, HybridRouter.INTENT_TEMPLATES)
+    path = TemplateEmbeddings.path_for(directory, version)
+
+    if os.path.exists(path):
+        try:
+            templates = TemplateEmbeddings.load(path)
+            logger.info(f"Loaded intent template embeddings {version} from {path}")
+            return templates
+        except Exception as e:
+            logger.warning(f"Intent template artifact {path} unreadable, rebuilding: {e}")
+
+    model = get_sentence_transformer(model_name)
+    if model is None:
+        return None
+    templates = TemplateEmbeddings.build(model, model_name, HybridRouter.INTENT_TEMPLATES)
+    try:
+        templates.save(directory)
+        logger.info(f"Saved intent template embeddings {version} to {path}")
+    except OSError as e:
+        logger.warning(f"Could not save intent template embeddings: {e}")
+    return templates
+
+
+def get_template_embeddings() -> Optional[TemplateEmbeddings]:
+    """Shared template matrix for the configured embedding model (loaded once, via the model registry)"""
+    if not EMBEDDING_AVAILABLE:
+        return None
+    key = f"intent-templates:{ModelConfig.from_env().embedding_model}"
+    registry = get_model_registry()
+    registry.register(key, load_template_embeddings)
+    return registry.get(key)
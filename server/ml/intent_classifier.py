@@ -17,25 +17,17 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-# Try to load ML models
-try:
-    from sentence_transformers import util
-    EMBEDDING_AVAILABLE = True
-except ImportError:
-    EMBEDDING_AVAILABLE = False
-    logger.warning("sentence-transformers not available")
+# ML models come from the shared registry and load on first use
+from ..model_registry import (
+    get_zero_shot_classifier,
+    SENTENCE_TRANSFORMERS_AVAILABLE as EMBEDDING_AVAILABLE,
+    TRANSFORMERS_AVAILABLE as NLI_AVAILABLE,
+)
 
-try:
-    from transformers import pipeline
-    ZERO_SHOT_CLASSIFIER = pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli",
-        device=-1  # CPU
-    )
-    NLI_AVAILABLE = True
-except Exception as e:
-    NLI_AVAILABLE = False
-    logger.warning(f"Zero-shot classifier not available: {e}")
+if not EMBEDDING_AVAILABLE:
+    logger.warning("sentence-transformers not available")
+if not NLI_AVAILABLE:
+    logger.warning("Zero-shot classifier not available: transformers isn't installed")
 
 
 class Intent(Enum):
@@ -155,7 +147,11 @@ class IntentClassifier:
                 "asking for information about a specific venue or restaurant",
             ]
             
-            result = ZERO_SHOT_CLASSIFIER(user_message, candidate_labels, multi_label=False)
+            classifier = get_zero_shot_classifier()
+            if classifier is None:
+                raise RuntimeError("zero-shot classifier failed to load")
+
+            result = classifier(user_message, candidate_labels, multi_label=False)
             
             intent_map = {
                 0: Intent.PLAN_DATE,
@@ -13,17 +13,10 @@ from typing import Tuple, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
-# Pre-trained zero-shot classifier
-try:
-    from transformers import pipeline
-    INTENT_CLASSIFIER = pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli"
-    )
-    ML_INTENT_AVAILABLE = True
-except ImportError:
-    INTENT_CLASSIFIER = None
-    ML_INTENT_AVAILABLE = False
+# Pre-trained zero-shot classifier, shared through the model registry and loaded on first use
+from ..model_registry import get_zero_shot_classifier, TRANSFORMERS_AVAILABLE as ML_INTENT_AVAILABLE
+
+if not ML_INTENT_AVAILABLE:
     logger.warning("transformers not available, ML intent validation disabled")
 
 
@@ -57,12 +50,13 @@ class IntentValidator:
             - confidence: Confidence score (0-1)
             - all_scores: Dict of all intent scores
         """
-        if not ML_INTENT_AVAILABLE or not INTENT_CLASSIFIER:
+        classifier = get_zero_shot_classifier() if ML_INTENT_AVAILABLE else None
+        if classifier is None:
             logger.warning("ML classifier not available, cannot classify intent")
             return "unknown", 0.0, {}
 
         try:
-            result = INTENT_CLASSIFIER(
+            result = classifier(
                 message,
                 IntentValidator.INTENT_CATEGORIES,
                 multi_class=False
@@ -6,10 +6,9 @@ Replaces hard-coded type matching logic
 from typing import List, Dict, Tuple, Optional
 import logging
 
-logger = logging.getLogger(__name__)
+from ..model_registry import get_zero_shot_classifier
 
-# Global model cache
-_classifier = None
+logger = logging.getLogger(__name__)
 
 TYPE_LABELS = [
     "restaurant", "cafe", "bar", "museum", "park",
@@ -21,20 +20,11 @@ TYPE_LABELS = [
 ]
 
 def _get_classifier():
-    """Lazy load the zero-shot classifier"""
-    global _classifier
-    if _classifier is None:
-        try:
-            from transformers import pipeline
-            _classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli"
-            )
-            logger.info("Loaded zero-shot classifier for types")
-        except ImportError:
-            logger.warning("transformers not available, type classification disabled")
-            return None
-    return _classifier
+    """The shared zero-shot classifier (loaded on first use by the model registry)"""
+    classifier = get_zero_shot_classifier()
+    if classifier is None:
+        logger.warning("zero-shot classifier not available, type classification disabled")
+    return classifier
 
 def classify_venue_types(description: str, name: str = "", 
                         threshold: float = 0.5) -> Optional[List[str]]:
@@ -7,23 +7,16 @@ import numpy as np
 from typing import Dict, List, Tuple
 import logging
 
-logger = logging.getLogger(__name__)
+from ..model_registry import get_sentence_transformer
 
-# Global model cache
-_model = None
+logger = logging.getLogger(__name__)
 
 def _get_model():
-    """Lazy load the sentence-transformers model"""
-    global _model
-    if _model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            _model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Loaded sentence-transformers model")
-        except ImportError:
-            logger.warning("sentence-transformers not available, similarity disabled")
-            return None
-    return _model
+    """The shared sentence-transformers model (loaded on first use by the model registry)"""
+    model = get_sentence_transformer('all-MiniLM-L6-v2')
+    if model is None:
+        logger.warning("sentence-transformers not available, similarity disabled")
+    return model
 
 def get_venue_embeddings(venue: Dict) -> np.ndarray:
     """
@@ -6,10 +6,9 @@ Replaces hard-coded keyword matching
 from typing import List, Dict, Tuple, Optional
 import logging
 
-logger = logging.getLogger(__name__)
+from ..model_registry import get_zero_shot_classifier
 
-# Global model cache
-_classifier = None
+logger = logging.getLogger(__name__)
 
 VIBE_LABELS = [
     "romantic", "energetic", "cozy", "fancy",
@@ -18,20 +17,11 @@ VIBE_LABELS = [
 ]
 
 def _get_classifier():
-    """Lazy load the zero-shot classifier"""
-    global _classifier
-    if _classifier is None:
-        try:
-            from transformers import pipeline
-            _classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli"
-            )
-            logger.info("Loaded zero-shot classifier for vibes")
-        except ImportError:
-            logger.warning("transformers not available, vibe classification disabled")
-            return None
-    return _classifier
+    """The shared zero-shot classifier (loaded on first use by the model registry)"""
+    classifier = get_zero_shot_classifier()
+    if classifier is None:
+        logger.warning("zero-shot classifier not available, vibe classification disabled")
+    return classifier
 
 def classify_vibe(description: str, name: str = "") -> Optional[str]:
     """
@@ -9,6 +9,8 @@ import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from .metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
 # Import ML service components from final/ folder
@@ -20,6 +22,7 @@ try:
     import heuristic_planner
     import ga_planner
     import planner_utils
+    import cache_manager
 
     ML_SERVICE_AVAILABLE = True
     logger.info("✅ ML Service loaded successfully from final/ folder")
@@ -28,6 +31,20 @@ except ImportError as e:
     logger.warning(f"⚠️  ML Service not available: {e}")
 
 
+def _record_cache_event(event: str, namespace: str, count: int) -> None:
+    """Forward final/cache_manager hit/miss/eviction events to the metrics collector"""
+    metrics = get_metrics()
+    metrics.increment_counter(f'cache.{namespace}.{event}', count)
+    if event == 'hit':
+        metrics.record_cache_hit()
+    elif event == 'miss':
+        metrics.record_cache_miss()
+
+
+if ML_SERVICE_AVAILABLE:
+    cache_manager.set_metrics_sink(_record_cache_event)
+
+
 class MLServiceIntegration:
     """Integration layer for ML service components"""
     
@@ -50,8 +67,21 @@ class MLServiceIntegration:
             return "casual"
     
     def predict_vibes_batch(self, texts: List[str]) -> List[str]:
-        """Predict vibes for multiple texts"""
-        return [self.predict_vibe(text) for text in texts]
+        """Predict vibes for multiple texts (one keyword-matcher pass over all of them)"""
+        vibes = self.classify_vibes_batch(texts)
+        return vibes if vibes is not None else ["casual"] * len(texts)
+    
+    def classify_vibes_batch(self, texts: List[str]) -> Optional[List[str]]:
+        """Like predict_vibes_batch, but None if the classifier didn't run (no placeholder vibes)"""
+        if not self.available:
+            return None
+        
+        try:
+            batch = nlp_classifier.get_keyword_vibes_batch(texts)
+            return [", ".join(vibes) if vibes else "casual" for vibes in batch]
+        except Exception as e:
+            logger.warning(f"Error predicting vibes: {e}")
+            return None
     
     def plan_date_heuristic(self, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Plan a date using heuristic planner"""
@@ -0,0 +1,243 @@
+"""
+Model Registry
+One lazily loaded instance per model, shared by every module that needs it.
+
+Loading BART-MNLI or a sentence-transformer at import time made every worker pay for
+models it might never use, and each module that imported transformers held its own
+copy. Models are registered by key ("zero-shot:<name>", "sentence-transformer:<name>")
+with a loader, loaded on first use, and can be warmed up in a background thread once
+the server is accepting connections. Load time and RSS growth are recorded per model.
+
+get() blocks while a model loads or runs, so async callers go through asyncio.to_thread.
+A failed load is retried on a later get() once retry_seconds have passed.
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .config import ModelConfig
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None if it can't be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # peak, not current - still a usable upper bound per load (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+class _Entry:
+    """A registered model and what it cost to load"""
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self.model: Any = None
+        self.loaded = False
+        self.error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+        # one load per model at a time; different models load concurrently
+        self.lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.rss_bytes: Optional[int] = None
+
+
+class ModelRegistry:
+    """Lazily loaded, process-wide models keyed by name"""
+
+    def __init__(self, retry_seconds: float = 60.0):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.retry_seconds = retry_seconds
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, key: str, loader: Callable[[], Any]):
+        """Register a loader for key (keeps an existing registration)"""
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _Entry(loader)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def is_loaded(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.loaded
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        The model for key, loading it on first use.
+        Returns None if it failed to load; the load is tried again once retry_seconds
+        have passed, not on every call.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            raise KeyError(f"Model not registered: {key}")
+        if entry.loaded:
+            return entry.model
+        if self._backing_off(entry):
+            return None
+
+        with entry.lock:
+            if entry.loaded:
+                return entry.model
+            if self._backing_off(entry):
+                return None
+
+            # RSS growth is approximate while other models load at the same time
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                model = entry.loader()
+            except Exception as e:
+                entry.error = f"{type(e).__name__}: {e}"
+                entry.failed_at = time.monotonic()
+                entry.load_seconds = time.perf_counter() - start
+                logger.warning(f"⚠️ Model {key} failed to load (retrying in {self.retry_seconds:.0f}s): {e}")
+                return None
+            entry.load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                entry.rss_bytes = max(0, rss_after - rss_before)
+            entry.model = model
+            entry.error = None
+            entry.loaded = True
+
+        get_metrics().observe("models.load_seconds", entry.load_seconds)
+        rss = f", +{entry.rss_bytes / 2**20:.0f}MB RSS" if entry.rss_bytes is not None else ""
+        logger.info(f"✅ Loaded model {key} in {entry.load_seconds:.1f}s{rss}")
+        return entry.model
+
+    def _backing_off(self, entry: _Entry) -> bool:
+        """Whether the entry's last load failed too recently to try again"""
+        return entry.failed_at is not None and time.monotonic() - entry.failed_at < self.retry_seconds
+
+    def warm_up(self, keys: Optional[Iterable[str]] = None) -> threading.Thread:
+        """Load models (all registered ones by default) in a background thread"""
+        keys = list(keys) if keys else self.keys()
+
+        def run():
+            start = time.perf_counter()
+            for key in keys:
+                try:
+                    self.get(key)
+                except KeyError:
+                    logger.warning(f"⚠️ Unknown model in warm-up list: {key}")
+            logger.info(f"🔥 Model warm-up finished in {time.perf_counter() - start:.1f}s")
+
+        thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        self._warmup_thread = thread
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load state, time and memory per model"""
+        with self._lock:
+            entries = dict(self._entries)
+        return {
+            key: {
+                "loaded": entry.loaded,
+                "error": entry.error,
+                "load_seconds": round(entry.load_seconds, 3) if entry.load_seconds is not None else None,
+                "rss_mb": round(entry.rss_bytes / 2**20, 1) if entry.rss_bytes is not None else None,
+            }
+            for key, entry in entries.items()
+        }
+
+
+def _load_zero_shot(model_name: str):
+    from transformers import pipeline
+    return pipeline("zero-shot-classification", model=model_name, device=-1)
+
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _build_fast_intent():
+    from .ml.fast_intent import build_fast_intent_classifier
+    return build_fast_intent_classifier()
+
+
+def _load_template_embeddings():
+    from .ml.hybrid_router import load_template_embeddings
+    return load_template_embeddings()
+
+
+# Global instance
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the global model registry, with the configured default models registered"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = ModelConfig.from_env()
+            _registry = ModelRegistry(retry_seconds=config.load_retry_seconds)
+            if SKLEARN_AVAILABLE:
+                # milliseconds to train, and it answers most messages without the models below
+                _registry.register("fast-intent", _build_fast_intent)
+            if SENTENCE_TRANSFORMERS_AVAILABLE:
+                _registry.register(
+                    f"sentence-transformer:{config.embedding_model}",
+                    lambda: _load_sentence_transformer(config.embedding_model)
+                )
+                # the intent template matrix that goes with it, read from its artifact at boot
+                _registry.register(f"intent-templates:{config.embedding_model}", _load_template_embeddings)
+            if TRANSFORMERS_AVAILABLE:
+                _registry.register(
+                    f"zero-shot:{config.zero_shot_model}",
+                    lambda: _load_zero_shot(config.zero_shot_model)
+                )
+        return _registry
+
+
+def get_zero_shot_classifier(model_name: Optional[str] = None) -> Optional[Any]:
+    """Shared zero-shot-classification pipeline (BART-MNLI by default), or None if unavailable"""
+    if not TRANSFORMERS_AVAILABLE:
+        return None
+    model_name = model_name or ModelConfig.from_env().zero_shot_model
+    registry = get_model_registry()
+    key = f"zero-shot:{model_name}"
+    registry.register(key, lambda: _load_zero_shot(model_name))
+    return registry.get(key)
+
+
+def get_sentence_transformer(model_name: Optional[str] = None) -> Optional[Any]:
+    """Shared SentenceTransformer for model_name, or None if unavailable"""
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return None
+    model_name = model_name or ModelConfig.from_env().embedding_model
+    registry = get_model_registry()
+    key = f"sentence-transformer:{model_name}"
+    registry.register(key, lambda: _load_sentence_transformer(model_name))
+    return registry.get(key)
+
+
+def warm_up_models() -> Optional[threading.Thread]:
+    """Start the background warm-up configured by MODEL_WARMUP / MODEL_WARMUP_MODELS"""
+    config = ModelConfig.from_env()
+    if not config.warmup:
+        return None
+    return get_model_registry().warm_up(config.warmup_models or None)
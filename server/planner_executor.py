@@ -0,0 +1,357 @@
+"""
+Planner Executor
+Runs GA / heuristic date planning in a process pool so planning never blocks the event loop
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import PlannerConfig
+from .exceptions import PlannerBusyError, PlannerTimeoutError, PlannerCancelledError
+from .metrics import get_metrics
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+# Shared cancel flags (one byte per job slot) and the slot of the job this worker is running
+_cancel_flags = None
+_current_slot = None
+
+
+def _init_worker(cancel_flags, warm_venues: bool):
+    """Worker initializer: load the planners once and warm them with the venue table"""
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+    # Ctrl-C is handled by the server process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if not warm_venues:
+        return
+
+    try:
+        from .ml_service_integration import ML_SERVICE_AVAILABLE
+        if not ML_SERVICE_AVAILABLE:
+            return
+
+        # The venue snapshot, learned vibe/type mappings and venue index are all
+        # per-process, so build them before the first request arrives
+        import planner_utils
+        import venue_index
+        import venue_snapshot
+
+        snapshot = venue_snapshot.get_venue_snapshot()
+        if snapshot is not None and len(snapshot) > 0:
+            planner_utils.initialize_from_data(snapshot.df)
+            venue_index.get_venue_index(snapshot.df)
+            venue_snapshot.start_auto_refresh()
+            logger.info(f"Planner worker warmed with {len(snapshot)} venues")
+    except Exception as e:
+        # A failing initializer breaks the whole pool, so only log here
+        logger.warning(f"Planner worker warm-up failed: {e}")
+
+
+def should_stop() -> bool:
+    """Called from inside a worker: has the current job been cancelled?"""
+    if _cancel_flags is None or _current_slot is None:
+        return False
+    return bool(_cancel_flags[_current_slot])
+
+
+def _call_in_slot(slot: int, fn: Callable, args: tuple):
+    """Run fn in a worker with `slot` as the current job's cancel flag"""
+    global _current_slot
+    _current_slot = slot
+    try:
+        return fn(*args)
+    finally:
+        _current_slot = None
+
+
+def _run_plan(preferences: Dict[str, Any], algorithm: str) -> Optional[Dict[str, Any]]:
+    """Worker entry point for date planning"""
+    from .ml_service_integration import get_ml_service
+    ml_service = get_ml_service()
+
+    preferences = dict(preferences, should_stop=should_stop)
+    if algorithm == "genetic":
+        return ml_service.plan_date_genetic(preferences)
+    return ml_service.plan_date_heuristic(preferences)
+
+
+def _noop():
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+class _Job:
+    """A submitted planning job"""
+
+    def __init__(self, slot: int, session_id: Optional[str]):
+        self.slot = slot
+        self.session_id = session_id
+        self.future = None
+        self.cancelled = False
+        self.start_time = time.time()
+
+
+class PlannerExecutor:
+    """Bounded process pool for date planning with per-request timeouts and session cancellation"""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        timeout_seconds: float = 20.0,
+        warm_venues: bool = True
+    ):
+        """Initialize planner executor (workers are started lazily or by start())"""
+        self.max_workers = max_workers
+        self.max_queue = max(max_queue, max_workers)
+        self.timeout_seconds = timeout_seconds
+        self.warm_venues = warm_venues
+
+        # spawn instead of fork - the server process has gRPC and asyncio threads running
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._cancel_flags = self._mp_context.RawArray('b', self.max_queue)
+        self._free_slots = list(range(self.max_queue))
+        self._jobs: Dict[int, _Job] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.completed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._mp_context,
+                initializer=_init_worker,
+                initargs=(self._cancel_flags, self.warm_venues)
+            )
+            logger.info(f"🧵 Planner pool started with {self.max_workers} workers")
+        return self._pool
+
+    def start(self):
+        """Start the worker processes now instead of on the first request"""
+        pool = self._get_pool()
+        # The pool spawns a new worker whenever none are idle, so this brings up all of them
+        for _ in range(self.max_workers):
+            pool.submit(_noop)
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs submitted and not finished yet (running or queued)"""
+        return len(self._jobs)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self.in_flight - self.max_workers)
+
+    def _update_gauges(self):
+        metrics = get_metrics()
+        metrics.set_gauge('planner.in_flight', self.in_flight)
+        metrics.set_gauge('planner.queue_depth', self.queue_depth)
+
+    def _acquire(self, session_id: Optional[str]) -> _Job:
+        with self._lock:
+            if not self._free_slots:
+                self.rejected += 1
+                get_metrics().increment_counter('planner.rejected')
+                raise PlannerBusyError(queue_depth=self.queue_depth)
+            slot = self._free_slots.pop()
+            self._cancel_flags[slot] = 0
+            job = _Job(slot, session_id)
+            self._jobs[slot] = job
+        self._update_gauges()
+        return job
+
+    def _release(self, job: _Job):
+        # Runs when the process future finishes, so a cancelled job keeps its slot
+        # (and its cancel flag) until the worker actually lets go of it
+        with self._lock:
+            if self._jobs.get(job.slot) is job:
+                del self._jobs[job.slot]
+                self._free_slots.append(job.slot)
+
+    def _on_job_done(self, loop, waiter, job: _Job, future):
+        # Called from the pool's result thread - free the slot here, hand the
+        # rest (waiter + metrics) to the event loop
+        self._release(job)
+        try:
+            loop.call_soon_threadsafe(self._settle, waiter, future)
+        except RuntimeError:
+            pass  # loop already closed, nobody is waiting
+
+    def _settle(self, waiter, future):
+        self._update_gauges()
+        if waiter.done():
+            return  # timed out or the awaiting task was cancelled
+        if future.cancelled():
+            waiter.set_exception(PlannerCancelledError())
+        elif future.exception() is not None:
+            waiter.set_exception(future.exception())
+        else:
+            waiter.set_result(future.result())
+
+    def _cancel(self, job: _Job):
+        job.cancelled = True
+        self._cancel_flags[job.slot] = 1
+        if job.future is not None:
+            job.future.cancel()  # only works if it hasn't started yet
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        session_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run fn(*args) in a planner worker and await the result
+
+        Raises PlannerBusyError if the queue is full, PlannerTimeoutError if the job
+        takes longer than timeout, and PlannerCancelledError if its session was cancelled.
+        """
+        timeout = self.timeout_seconds if timeout is None else timeout
+        job = self._acquire(session_id)
+
+        try:
+            job.future = self._get_pool().submit(_call_in_slot, job.slot, fn, args)
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault) - start a fresh pool and try once more
+            logger.warning("Planner pool was broken, restarting it")
+            self._pool = None
+            job.future = self._get_pool().submit(_call_in_slot, job.slot, fn, args)
+        except Exception:
+            self._release(job)
+            self._update_gauges()
+            raise
+
+        # The waiter only settles on the loop: a job cancelled by cancel_session() becomes
+        # PlannerCancelledError there, so a CancelledError seen below always means the
+        # awaiting task itself was cancelled (client went away, shutdown)
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        job.future.add_done_callback(lambda future: self._on_job_done(loop, waiter, job, future))
+
+        try:
+            result = await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._cancel(job)
+            self.timeouts += 1
+            get_metrics().increment_counter('planner.timeouts')
+            logger.warning(f"⏱️ Planner job timed out after {timeout}s (session: {session_id})")
+            raise PlannerTimeoutError(timeout=timeout) from None
+        except asyncio.CancelledError:
+            # Tell the worker to stop, but let the cancellation through unchanged
+            self._cancel(job)
+            raise
+
+        if job.cancelled:
+            # The worker stopped early and returned a partial result - don't use it
+            raise PlannerCancelledError()
+
+        self.completed += 1
+        get_metrics().increment_counter('planner.completed')
+        return result
+
+    async def plan(
+        self,
+        preferences: Dict[str, Any],
+        algorithm: str = "genetic",
+        session_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Plan a date in a worker process"""
+        start = time.perf_counter()
+        try:
+            with span(f"planner.{algorithm}"):
+                return await self.run(_run_plan, preferences, algorithm, session_id=session_id, timeout=timeout)
+        except Exception:
+            get_metrics().increment_counter(f'planner.{algorithm}.errors')
+            raise
+        finally:
+            # a histogram per planner (p50/p95/p99), separate from the request endpoints
+            get_metrics().observe(f'planner.{algorithm}.seconds', time.perf_counter() - start)
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every planner job belonging to a chat session, returns how many were cancelled"""
+        with self._lock:
+            jobs: List[_Job] = [job for job in self._jobs.values() if job.session_id == session_id]
+        for job in jobs:
+            self._cancel(job)
+        if jobs:
+            self.cancelled += len(jobs)
+            get_metrics().increment_counter('planner.cancelled', len(jobs))
+            logger.info(f"🛑 Cancelled {len(jobs)} planner job(s) for session {session_id}")
+        return len(jobs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Cancel outstanding jobs and stop the worker processes"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self._cancel(job)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            logger.info("🧹 Planner pool shut down")
+
+
+# Global instance
+_planner_executor: Optional[PlannerExecutor] = None
+
+
+def get_planner_executor() -> PlannerExecutor:
+    """Get or create the planner executor"""
+    global _planner_executor
+    if _planner_executor is None:
+        config = PlannerConfig.from_env()
+        _planner_executor = PlannerExecutor(
+            max_workers=config.max_workers,
+            max_queue=config.max_queue,
+            timeout_seconds=config.timeout_seconds,
+            warm_venues=config.warm_venues
+        )
+    return _planner_executor
+
+
+def shutdown_planner_executor(wait: bool = True):
+    """Shut down the global planner executor if it was started"""
+    global _planner_executor
+    if _planner_executor is not None:
+        _planner_executor.shutdown(wait=wait)
+        _planner_executor = None
@@ -0,0 +1,123 @@
+"""
+Streaming output stage for chat responses.
+
+LLM streams arrive as many tiny chunks (often a token each). Sending every chunk as
+its own ChatDelta costs a message frame, a protobuf encode and a client wake-up per
+token; the old "flush at 50 chars or any word boundary" rule still flushed on nearly
+every chunk. StreamCoalescer turns the chunk stream into fewer, larger messages:
+
+- the first text goes out as soon as it arrives, so time-to-first-byte isn't delayed
+- after that, text is held until max_chars are pending or max_delay has passed since
+  the oldest pending chunk, whichever comes first
+- a reader task keeps pulling from the LLM while the consumer is suspended on a gRPC
+  write (HTTP/2 flow control pushes back when the client is slow), so a slow client
+  gets fewer, bigger messages instead of stalling the model; past max_pending chars the
+  reader stops pulling and the backpressure reaches the LLM stream
+- the full response is kept as a list of chunks and joined once
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional
+
+from .config import StreamingConfig
+
+
+class StreamCoalescer:
+    """Coalesces an async stream of text chunks into fewer, larger messages"""
+
+    def __init__(self, max_chars: int = 256, max_delay: float = 0.05, max_pending: int = 65536):
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_chars)
+
+        self.chunks: List[str] = []
+        self.chunk_count = 0
+        self.message_count = 0
+        self.first_message_at: Optional[float] = None
+        self.started_at: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[StreamingConfig] = None) -> 'StreamCoalescer':
+        config = config or StreamingConfig.from_env()
+        return cls(config.max_chars, config.max_delay, config.max_pending)
+
+    @property
+    def time_to_first_message(self) -> Optional[float]:
+        if self.first_message_at is None or self.started_at is None:
+            return None
+        return self.first_message_at - self.started_at
+
+    def text(self) -> str:
+        """Everything received so far"""
+        return "".join(self.chunks)
+
+    async def stream(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Yield coalesced text; an error from the upstream stream is re-raised here"""
+        loop = asyncio.get_running_loop()
+        self.started_at = time.perf_counter()
+        pending: List[str] = []
+        state = {"chars": 0, "oldest": None, "done": False, "error": None}
+        changed = asyncio.Condition()
+
+        async def read():
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    async with changed:
+                        await changed.wait_for(lambda: state["chars"] < self.max_pending)
+                        if not pending:
+                            state["oldest"] = loop.time()
+                        pending.append(chunk)
+                        state["chars"] += len(chunk)
+                        self.chunks.append(chunk)
+                        self.chunk_count += 1
+                        changed.notify_all()
+            except Exception as e:
+                state["error"] = e
+            finally:
+                async with changed:
+                    state["done"] = True
+                    changed.notify_all()
+
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                async with changed:
+                    await changed.wait_for(lambda: pending or state["done"])
+                    if self.message_count > 0:
+                        # hold the window open until it's full or old enough
+                        while state["chars"] < self.max_chars and not state["done"]:
+                            remaining = state["oldest"] + self.max_delay - loop.time()
+                            if remaining <= 0:
+                                break
+                            try:
+                                await asyncio.wait_for(changed.wait(), remaining)
+                            except asyncio.TimeoutError:
+                                break
+                    text = "".join(pending)
+                    if not text.strip() and not state["done"]:
+                        # whitespace only - wait for the text it separates
+                        await changed.wait()
+                        continue
+                    pending.clear()
+                    state["chars"] = 0
+                    state["oldest"] = None
+                    changed.notify_all()
+                    finished = state["done"]
+
+                if text.strip():
+                    if self.first_message_at is None:
+                        self.first_message_at = time.perf_counter()
+                    self.message_count += 1
+                    # the consumer's write happens while we're suspended here
+                    yield text
+                if finished:
+                    break
+
+            if state["error"] is not None:
+                raise state["error"]
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
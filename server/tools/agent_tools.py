@@ -8,7 +8,9 @@ import os
 import logging
 from typing import Dict, Any, List, Optional
 from .vector_search import get_vector_store
+from .async_vector_store import get_async_vector_store
 from .web_search import WebSearchClient
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,7 @@ class AgentToolsManager:
         # Initialize only essential services
         self.web_client = WebSearchClient()
         self.vector_store = get_vector_store()
+        self.async_vector_store = get_async_vector_store(self.vector_store)
         
         # Tool cache for performance
         self._tool_cache = {}
@@ -29,10 +32,11 @@ class AgentToolsManager:
         
         logger.info("✅ Simplified AgentToolsManager initialized (vector search + web search only)")
     
+    @traced("tool.vector_search")
     async def vector_search(self, query: str, limit: int = 10) -> Dict[str, Any]:
         """Search vector database for venues"""
         try:
-            results = self.vector_store.search(query, top_k=limit)
+            results = await self.async_vector_store.search(query, top_k=limit)
             return {
                 'success': True,
                 'results': results,
@@ -42,6 +46,7 @@ class AgentToolsManager:
             logger.error(f"Vector search error: {e}")
             return {'success': False, 'error': str(e)}
     
+    @traced("tool.web_search")
     async def web_search(self, query: str, limit: int = 5) -> Dict[str, Any]:
         """Search the web for information"""
         try:
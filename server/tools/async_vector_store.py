@@ -0,0 +1,274 @@
+"""
+Async PostgreSQL vector store.
+
+Same search / ingest / stats as PostgreSQLVectorStore, but the database work goes
+through a psycopg 3 AsyncConnectionPool and the model work (query encoding, ingest
+embeddings and vibe classification) runs off the event loop, so concurrent searches
+from the gRPC and REST handlers actually overlap.
+
+It wraps a PostgreSQLVectorStore and shares its model, embedding service, local HNSW
+index, fallback index and SQL, so the two stores always return the same results.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+    from pgvector.psycopg import register_vector_async
+    ASYNC_POSTGRESQL_AVAILABLE = True
+except ImportError:
+    ASYNC_POSTGRESQL_AVAILABLE = False
+
+from ..metrics import get_metrics
+from .bulk_ingest import bulk_save_async
+from .postgresql_vector_store import (
+    PostgreSQLVectorStore, get_vector_store, SET_EF_SEARCH_SQL, STATS_SQL, STATS_KEYS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPostgreSQLVectorStore:
+    """Async facade over PostgreSQLVectorStore on an AsyncConnectionPool"""
+
+    def __init__(self, store: Optional[PostgreSQLVectorStore] = None, min_size: int = 1, max_size: int = 10):
+        self.store = store or get_vector_store()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+
+    @property
+    def model(self):
+        return self.store.model
+
+    async def _get_pool(self):
+        """Open the pool on first use (it needs a running event loop)"""
+        if self.pool is None:
+            async with self._pool_lock:
+                if self.pool is None:
+                    # keyword arguments, so passwords with @, / or : don't need URL escaping
+                    pool = AsyncConnectionPool(
+                        kwargs=self.store.db_config.connection_params,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        timeout=30,
+                        configure=register_vector_async,
+                        open=False
+                    )
+                    await pool.open()
+                    self.pool = pool
+                    logger.info(f"✅ Async vector store pool opened ({self.min_size}-{self.max_size} connections)")
+        return self.pool
+
+    async def _encode_query(self, query: str) -> np.ndarray:
+        store = self.store
+        if store.embedder is not None:
+            return await store.embedder.encode_async(query)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: store.model.encode([query], convert_to_numpy=True)[0]
+        )
+
+    # -- search -----------------------------------------------------------------
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        city: str = None,
+        max_price_tier: int = None,
+        indoor: bool = None,
+        categories: List[str] = None,
+        min_duration: int = None,
+        max_duration: int = None,
+        similarity_threshold: float = 0.1
+    ) -> List[Dict[str, Any]]:
+        """Search for date ideas using semantic similarity"""
+        store = self.store
+        if not store.model:
+            logger.warning("Model not loaded - cannot perform search")
+            return []
+
+        try:
+            query_embedding = await self._encode_query(query)
+        except Exception as e:
+            logger.error(f"Failed to create query embedding: {e}")
+            return []
+
+        # Local HNSW index answers without a database round-trip when it can
+        if store.local_index is not None:
+            results = store.local_index.search(
+                query_embedding, top_k, city, max_price_tier, indoor,
+                min_duration, max_duration, similarity_threshold
+            )
+            if results is not None:
+                get_metrics().increment_counter("vector_search.local_index")
+                return results
+
+        if ASYNC_POSTGRESQL_AVAILABLE:
+            results = await self._search_postgresql(
+                query_embedding, top_k, city, max_price_tier, indoor,
+                min_duration, max_duration, similarity_threshold
+            )
+            if results is not None:
+                return results
+
+        # Fallback to file-based search (index loads once, the search itself is numpy)
+        if store.use_fallback:
+            return await asyncio.to_thread(
+                store._search_file_fallback, query_embedding, top_k, city, max_price_tier,
+                indoor, categories, min_duration, max_duration
+            )
+
+        logger.warning("No search backend available")
+        return []
+
+    async def _search_postgresql(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        city: str,
+        max_price_tier: int,
+        indoor: bool,
+        min_duration: int,
+        max_duration: int,
+        similarity_threshold: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        """The single-query pgvector search, on the async pool"""
+        store = self.store
+
+        async def run(cur):
+            await cur.execute(SET_EF_SEARCH_SQL, store._ef_search_params(top_k))
+            await cur.execute(*store._simple_search_query(
+                query_embedding, top_k, city, max_price_tier, indoor,
+                min_duration, max_duration, similarity_threshold, vibe=store.has_vibe_column
+            ))
+            return await cur.fetchall()
+
+        try:
+            pool = await self._get_pool()
+            async with pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    try:
+                        rows = await run(cur)
+                    except Exception as e:
+                        if not store._vibe_column_missing(e):
+                            raise
+                        await conn.rollback()
+                        rows = await run(cur)
+
+            results = [store._simple_search_result(row) for row in rows]
+            logger.info(f"Found {len(results)} results from async PostgreSQL search")
+            return results
+        except Exception as e:
+            logger.error(f"Async PostgreSQL search failed: {e}")
+            return None
+
+    # -- ingest -----------------------------------------------------------------
+
+    async def add_date_ideas(self, date_ideas: List[Dict[str, Any]]) -> bool:
+        """Add date ideas to the vector store"""
+        store = self.store
+        if not store.model:
+            logger.error("Model not loaded - cannot add date ideas")
+            return False
+
+        logger.info(f"Adding {len(date_ideas)} date ideas to vector store (async)")
+
+        # Embeddings + vibe classification are CPU-bound
+        embeddings = await asyncio.to_thread(store._prepare_ingest, date_ideas)
+        if embeddings is None:
+            return False
+
+        if ASYNC_POSTGRESQL_AVAILABLE and await self._save_to_postgresql(date_ideas, embeddings):
+            logger.info("Successfully saved to PostgreSQL")
+            return True
+        elif store.use_fallback:
+            logger.info("Falling back to file-based storage")
+            return await asyncio.to_thread(store._save_to_file, date_ideas, embeddings)
+        else:
+            logger.error("Failed to save date ideas - no storage backend available")
+            return False
+
+    async def _save_to_postgresql(self, date_ideas: List[Dict[str, Any]], embeddings: np.ndarray) -> bool:
+        """Save date ideas and embeddings in one transaction with the COPY bulk path"""
+        try:
+            pool = await self._get_pool()
+            async with pool.connection() as conn:  # commits when the block exits cleanly
+                async with conn.cursor() as cur:
+                    inserted, updated = await bulk_save_async(
+                        cur, date_ideas, embeddings, self.store._location_values, self.store._event_values
+                    )
+
+            logger.info(f"Saved {len(date_ideas)} date ideas to PostgreSQL ({inserted} new, {updated} updated, async)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save to PostgreSQL: {e}")
+            return False
+
+    # -- stats ------------------------------------------------------------------
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the vector store"""
+        store = self.store
+        stats = store._base_stats()
+
+        if ASYNC_POSTGRESQL_AVAILABLE:
+            try:
+                pool = await self._get_pool()
+                async with pool.connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(STATS_SQL)
+                        stats.update(zip(STATS_KEYS, await cur.fetchone()))
+            except Exception as e:
+                stats["postgresql_error"] = str(e)
+
+        await asyncio.to_thread(store._add_fallback_stats, stats)
+        return stats
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("🔌 Async vector store connection pool closed")
+
+
+# Global instance
+_async_vector_store: Optional[AsyncPostgreSQLVectorStore] = None
+
+
+def get_async_vector_store(store: Optional[PostgreSQLVectorStore] = None) -> AsyncPostgreSQLVectorStore:
+    """Get the global async vector store (wrapping `store`, or the global sync store)"""
+    global _async_vector_store
+    if _async_vector_store is None:
+        _async_vector_store = AsyncPostgreSQLVectorStore(store)
+    elif store is not None and _async_vector_store.store is not store:
+        # same database either way, so the new wrapper keeps the open pool
+        previous = _async_vector_store
+        _async_vector_store = AsyncPostgreSQLVectorStore(store, previous.min_size, previous.max_size)
+        _async_vector_store.pool = previous.pool
+    return _async_vector_store
+
+
+def as_async_vector_store(vector_store):
+    """
+    Async store for whatever a caller was handed: a PostgreSQLVectorStore gets the
+    shared async wrapper, anything else is returned unchanged
+    """
+    if isinstance(vector_store, PostgreSQLVectorStore):
+        return get_async_vector_store(vector_store)
+    return vector_store
+
+
+async def close_async_vector_store():
+    """Close the global async vector store's pool"""
+    global _async_vector_store
+    if _async_vector_store is not None:
+        await _async_vector_store.close()
+        _async_vector_store = None
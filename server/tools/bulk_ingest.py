@@ -0,0 +1,310 @@
+"""
+Bulk ingest for the vector store.
+
+Date ideas are staged with COPY into temp tables, one chunk at a time, and then
+resolved with a fixed set of set-based statements:
+    - locations are matched on (city, address, name); missing ones are inserted once
+    - categories are upserted with INSERT ... ON CONFLICT (name)
+    - new events get ids from the event sequence up front, so existing and new
+      events are written with one UPDATE ... FROM and one INSERT ... SELECT
+    - category links are replaced with one DELETE and one INSERT ... SELECT
+
+The number of statements per chunk is constant, so a large import costs a few
+round-trips per chunk instead of several per idea. Both psycopg2 (sync store) and
+psycopg 3 (async store) run the same SQL - only the COPY call differs.
+"""
+
+import io
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 5000
+
+STAGE_SQL = [
+    """
+    CREATE TEMP TABLE IF NOT EXISTS ingest_event (
+        idx INTEGER,
+        event_id INTEGER,
+        is_new BOOLEAN DEFAULT FALSE,
+        has_location BOOLEAN,
+        loc_name TEXT,
+        loc_address TEXT,
+        loc_city TEXT,
+        loc_lat REAL,
+        loc_lon REAL,
+        location_id INTEGER,
+        title TEXT,
+        description TEXT,
+        price DECIMAL(10, 2),
+        duration_min INTEGER,
+        indoor BOOLEAN,
+        kid_friendly BOOLEAN,
+        website TEXT,
+        phone TEXT,
+        rating REAL,
+        review_count INTEGER,
+        is_ai_recommended BOOLEAN,
+        ai_score DECIMAL(5, 2),
+        popularity INTEGER,
+        embedding TEXT,
+        vibe TEXT,
+        metadata TEXT
+    ) ON COMMIT DROP
+    """,
+    "CREATE TEMP TABLE IF NOT EXISTS ingest_category (idx INTEGER, name TEXT) ON COMMIT DROP",
+    "TRUNCATE ingest_event, ingest_category",
+]
+
+# Column order of the ingest_event COPY payload
+STAGE_EVENT_COLUMNS = (
+    "idx", "event_id", "has_location", "loc_name", "loc_address", "loc_city", "loc_lat", "loc_lon",
+    "title", "description", "price", "duration_min", "indoor", "kid_friendly", "website", "phone",
+    "rating", "review_count", "is_ai_recommended", "ai_score", "popularity", "embedding", "vibe", "metadata"
+)
+COPY_EVENT_SQL = f"COPY ingest_event ({', '.join(STAGE_EVENT_COLUMNS)}) FROM STDIN"
+COPY_CATEGORY_SQL = "COPY ingest_category (idx, name) FROM STDIN"
+
+# event columns written from the stage table, in the order of PostgreSQLVectorStore._event_values
+EVENT_COLUMNS = (
+    "title", "description", "price", "location_id", "duration_min", "indoor", "kid_friendly",
+    "website", "phone", "rating", "review_count", "is_ai_recommended", "ai_score", "popularity",
+    "embedding", "vibe", "metadata"
+)
+
+
+def _stage_expr(column: str) -> str:
+    if column == "embedding":
+        return "s.embedding::vector(384)"
+    if column == "metadata":
+        return "s.metadata::jsonb"
+    return f"s.{column}"
+
+
+# What a staged location is matched on. The insert de-duplicates staged rows on the
+# same expressions, so ideas that would match one location create it only once.
+_LOCATION_KEY = ("{}city", "COALESCE({}address, '')", "COALESCE({}name, '')")
+
+
+def _location_key(prefix: str) -> List[str]:
+    """_LOCATION_KEY for location columns (prefix "l.") or the stage table's (prefix "loc_")"""
+    return [expr.format(prefix) for expr in _LOCATION_KEY]
+
+
+_MATCH_CONDITIONS = "\n      AND ".join(
+    f"{existing} IS NOT DISTINCT FROM {staged}"
+    for existing, staged in zip(_location_key("l."), _location_key("s.loc_"))
+)
+
+_MATCH_LOCATIONS_SQL = f"""
+    UPDATE ingest_event s SET location_id = l.location_id
+    FROM location l
+    WHERE s.has_location AND s.location_id IS NULL
+      AND {_MATCH_CONDITIONS}
+"""
+
+RESOLVE_SQL = [
+    # locations: match existing ones, fill in missing coordinates, insert the rest once
+    _MATCH_LOCATIONS_SQL,
+    """
+    UPDATE location l SET lat = s.loc_lat, lon = s.loc_lon
+    FROM ingest_event s
+    WHERE l.location_id = s.location_id
+      AND (s.loc_lat <> 0 OR s.loc_lon <> 0)
+      AND (l.lat IS NULL OR l.lon IS NULL)
+    """,
+    f"""
+    INSERT INTO location (name, address, city, lat, lon)
+    SELECT DISTINCT ON ({", ".join(_location_key("loc_"))}) loc_name, loc_address, loc_city, loc_lat, loc_lon
+    FROM ingest_event
+    WHERE has_location AND location_id IS NULL
+    ORDER BY {", ".join(_location_key("loc_"))}, idx
+    """,
+    _MATCH_LOCATIONS_SQL,
+
+    # categories
+    """
+    INSERT INTO event_category (name)
+    SELECT DISTINCT name FROM ingest_category
+    ON CONFLICT (name) DO NOTHING
+    """,
+
+    # events: ids for new rows up front
+    """
+    UPDATE ingest_event
+    SET event_id = nextval(pg_get_serial_sequence('event', 'event_id')), is_new = TRUE
+    WHERE event_id IS NULL
+    """,
+]
+
+# events: one UPDATE for existing ids and one INSERT for new ones (rowcounts are
+# the updated / inserted totals - staged ids missing from event match nothing)
+UPDATE_EVENTS_SQL = f"""
+    UPDATE event e SET
+        {", ".join(f"{c} = {_stage_expr(c)}" for c in EVENT_COLUMNS)},
+        modified_time = NOW()
+    FROM (
+        SELECT DISTINCT ON (event_id) * FROM ingest_event
+        WHERE NOT is_new ORDER BY event_id, idx DESC
+    ) s
+    WHERE e.event_id = s.event_id
+    """
+
+INSERT_EVENTS_SQL = f"""
+    INSERT INTO event (event_id, {", ".join(EVENT_COLUMNS)})
+    SELECT s.event_id, {", ".join(_stage_expr(c) for c in EVENT_COLUMNS)}
+    FROM ingest_event s
+    WHERE s.is_new
+    """
+
+# category links: replace the links of every event that came with categories
+LINK_SQL = [
+    """
+    DELETE FROM event_category_link l
+    USING ingest_event s
+    WHERE l.event_id = s.event_id
+      AND NOT s.is_new
+      AND EXISTS (SELECT 1 FROM ingest_category c WHERE c.idx = s.idx)
+    """,
+    """
+    INSERT INTO event_category_link (event_id, category_id)
+    SELECT DISTINCT e.event_id, c.category_id
+    FROM ingest_category ic
+    JOIN ingest_event s ON s.idx = ic.idx
+    JOIN event e ON e.event_id = s.event_id
+    JOIN event_category c ON c.name = ic.name
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+def _copy_value(value: Any) -> str:
+    """One field in COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def _vector_literals(embeddings: np.ndarray) -> List[str]:
+    """pgvector text literals ('[x,y,...]') for every row of a matrix"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or not len(matrix):
+        return []
+    row_format = "[" + ",".join(["%.7g"] * matrix.shape[1]) + "]"
+    return [row_format % tuple(row) for row in matrix.tolist()]
+
+
+def build_copy_payloads(
+    date_ideas: List[Dict[str, Any]],
+    embeddings: np.ndarray,
+    location_values: Callable[[Dict[str, Any]], Optional[tuple]],
+    event_values: Callable[[Dict[str, Any], Optional[int], Any], Tuple[Optional[int], tuple]],
+    offset: int = 0
+) -> Tuple[str, str]:
+    """COPY text payloads for ingest_event and ingest_category"""
+    vectors = _vector_literals(embeddings)
+    event_lines = []
+    category_lines = []
+
+    for i, (idea, vector) in enumerate(zip(date_ideas, vectors)):
+        idx = offset + i
+        location = location_values(idea)
+        event_id, values = event_values(idea, None, vector)
+        # values follow EVENT_COLUMNS; location_id (3) is resolved in SQL
+        row = (
+            idx, event_id, location is not None,
+            *(location if location is not None else (None,) * 5),
+            *values[:3], *values[4:]
+        )
+        event_lines.append("\t".join(_copy_value(v) for v in row))
+
+        seen = set()
+        for category in idea.get("categories") or []:
+            if category and category not in seen:
+                seen.add(category)
+                category_lines.append(f"{idx}\t{_copy_value(category)}")
+
+    event_payload = "\n".join(event_lines) + "\n" if event_lines else ""
+    category_payload = "\n".join(category_lines) + "\n" if category_lines else ""
+    return event_payload, category_payload
+
+
+def _chunks(date_ideas, embeddings, chunk_size):
+    for start in range(0, len(date_ideas), chunk_size):
+        yield start, date_ideas[start:start + chunk_size], embeddings[start:start + chunk_size]
+
+
+def _log_progress(done: int, total: int, inserted: int, updated: int, started: float):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    logger.info(f"📦 Bulk ingest {done}/{total} ideas ({inserted} new, {updated} updated) - {rate:.0f} ideas/s")
+
+
+def _chunk_statements(ideas, vectors, offset, location_values, event_values):
+    """
+    The statements for one chunk, in order, as (sql, payload) - payload is the COPY
+    data for a COPY statement and None for everything else.
+    """
+    for sql in STAGE_SQL:
+        yield sql, None
+    event_payload, category_payload = build_copy_payloads(ideas, vectors, location_values, event_values, offset)
+    yield COPY_EVENT_SQL, event_payload
+    if category_payload:
+        yield COPY_CATEGORY_SQL, category_payload
+    for sql in RESOLVE_SQL:
+        yield sql, None
+    yield UPDATE_EVENTS_SQL, None
+    yield INSERT_EVENTS_SQL, None
+    for sql in LINK_SQL:
+        yield sql, None
+
+
+def bulk_save(cur, date_ideas, embeddings, location_values, event_values,
+              chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Stage and write date ideas on a psycopg2 cursor (caller commits).
+    Returns (inserted, updated).
+    """
+    started = time.perf_counter()
+    inserted = updated = 0
+    for start, ideas, vectors in _chunks(date_ideas, embeddings, chunk_size):
+        for sql, payload in _chunk_statements(ideas, vectors, start, location_values, event_values):
+            if payload is not None:
+                cur.copy_expert(sql, io.StringIO(payload))
+                continue
+            cur.execute(sql)
+            if sql is UPDATE_EVENTS_SQL:
+                updated += cur.rowcount
+            elif sql is INSERT_EVENTS_SQL:
+                inserted += cur.rowcount
+        _log_progress(start + len(ideas), len(date_ideas), inserted, updated, started)
+    return inserted, updated
+
+
+async def bulk_save_async(cur, date_ideas, embeddings, location_values, event_values,
+                          chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, int]:
+    """Same as bulk_save, on a psycopg 3 async cursor"""
+    started = time.perf_counter()
+    inserted = updated = 0
+    for start, ideas, vectors in _chunks(date_ideas, embeddings, chunk_size):
+        for sql, payload in _chunk_statements(ideas, vectors, start, location_values, event_values):
+            if payload is not None:
+                async with cur.copy(sql) as copy:
+                    await copy.write(payload)
+                continue
+            await cur.execute(sql)
+            if sql is UPDATE_EVENTS_SQL:
+                updated += cur.rowcount
+            elif sql is INSERT_EVENTS_SQL:
+                inserted += cur.rowcount
+        _log_progress(start + len(ideas), len(date_ideas), inserted, updated, started)
+    return inserted, updated
@@ -12,6 +12,8 @@ from datetime import datetime, timedelta
 import psycopg
 from psycopg_pool import AsyncConnectionPool
 
+from ..tracing import traced
+
 logger = logging.getLogger(__name__)
 
 class ChatContextStorage:
@@ -145,6 +147,7 @@ class ChatContextStorage:
             logger.error(f"Error creating chat context tables: {e}")
             return False
 
+    @traced("storage.create_session")
     async def create_session(self, session_id: str, user_id: Optional[str] = None, metadata: Optional[Dict] = None) -> bool:
         """Create a new chat session"""
         if not self.pool:
@@ -168,6 +171,7 @@ class ChatContextStorage:
             logger.error(f"Error creating chat session {session_id}: {e}")
             return False
 
+    @traced("storage.store_message")
     async def store_message(
         self,
         session_id: str,
@@ -214,6 +218,7 @@ class ChatContextStorage:
         """Convenience method to add a message to a session"""
         return await self.store_message(session_id, role, content, metadata)
 
+    @traced("storage.store_tool_call")
     async def store_tool_call(
         self, 
         session_id: str, 
@@ -255,6 +260,7 @@ class ChatContextStorage:
             logger.error(f"Error storing tool call: {e}")
             return False
 
+    @traced("storage.get_session_messages")
     async def get_session_messages(
         self, 
         session_id: str, 
@@ -304,6 +310,7 @@ class ChatContextStorage:
             logger.error(f"Error retrieving messages for session {session_id}: {e}")
             return []
 
+    @traced("storage.get_session_context")
     async def get_session_context(self, session_id: str, context_length: int = 10) -> Dict[str, Any]:
         """Get recent context for a chat session"""
         if not self.pool:
@@ -360,6 +367,7 @@ class ChatContextStorage:
             logger.error(f"Error getting session context for {session_id}: {e}")
             return {"messages": [], "summaries": [], "tool_calls": []}
 
+    @traced("storage.search_chat_history")
     async def search_chat_history(
         self, 
         user_id: Optional[str] = None,
@@ -447,6 +455,7 @@ class ChatContextStorage:
             logger.error(f"Error cleaning up old sessions: {e}")
             return 0
 
+    @traced("storage.deactivate_session")
     async def deactivate_session(self, session_id: str) -> bool:
         """Mark a session as inactive"""
         if not self.pool:
@@ -468,6 +477,7 @@ class ChatContextStorage:
             logger.error(f"Error deactivating session {session_id}: {e}")
             return False
 
+    @traced("storage.is_session_active")
     async def is_session_active(self, session_id: str) -> bool:
         """Check if a session is active"""
         if not self.pool:
@@ -486,6 +496,7 @@ class ChatContextStorage:
             # Return True to allow streaming to continue even if we can't check
             return True
 
+    @traced("storage.store_itinerary")
     async def store_itinerary(self, session_id: str, itinerary: List[Dict[str, Any]], vibe: str, budget_limit: float) -> bool:
         """Store the current itinerary for a session"""
         if not self.pool:
@@ -541,6 +552,7 @@ class ChatContextStorage:
         else:
             return obj
 
+    @traced("storage.get_current_itinerary")
     async def get_current_itinerary(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get the current itinerary for a session"""
         if not self.pool:
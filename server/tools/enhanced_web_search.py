@@ -14,6 +14,8 @@ from urllib.parse import urlparse, urljoin
 import re
 
 from ..db_config import get_db_config
+from ..metrics import get_metrics
+from ..tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +118,7 @@ class EnhancedWebSearchService:
         # Run in thread since it's sync
         await asyncio.get_event_loop().run_in_executor(None, create_table)
     
+    @traced("web_search.enhanced")
     async def enhanced_search(self, search_query: SearchQuery) -> Dict[str, Any]:
         """Perform enhanced web search with multiple providers and result enrichment"""
         if not self.db_config:
@@ -183,6 +186,7 @@ class EnhancedWebSearchService:
         query_str = json.dumps(asdict(search_query), sort_keys=True)
         return hashlib.sha256(query_str.encode()).hexdigest()
     
+    @traced("web_search.cache_get")
     async def _get_cached_results(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached search results"""
         def get_from_cache():
@@ -209,6 +213,7 @@ class EnhancedWebSearchService:
         
         return await asyncio.get_event_loop().run_in_executor(None, get_from_cache)
     
+    @traced("web_search.cache_put")
     async def _cache_results(self, cache_key: str, query_text: str, results: Dict[str, Any]):
         """Cache search results"""
         expires_at = datetime.now() + timedelta(hours=self.cache_ttl_hours)
@@ -266,7 +271,14 @@ class EnhancedWebSearchService:
     async def _search_with_provider(self, provider_name: str, provider_func, query: str) -> List[EnhancedSearchResult]:
         """Search with a specific provider"""
         try:
-            results = await provider_func(query)
+            start = time.perf_counter()
+            try:
+                with span(f"web_search.{provider_name}"):
+                    results = await provider_func(query)
+            except Exception:
+                get_metrics().record_api_call(provider_name, time.perf_counter() - start, error=True)
+                raise
+            get_metrics().record_api_call(provider_name, time.perf_counter() - start)
             
             enhanced_results = []
             for result in results:
@@ -399,6 +411,7 @@ class EnhancedWebSearchService:
         union = set1.union(set2)
         return len(intersection) / len(union) if union else 0.0
     
+    @traced("web_search.enrich")
     async def _enrich_search_results(self, results: List[EnhancedSearchResult], search_query: SearchQuery) -> List[EnhancedSearchResult]:
         """Enrich search results with additional metadata"""
         for result in results:
@@ -0,0 +1,237 @@
+"""
+File-based fallback index for the vector store.
+
+Used when PostgreSQL isn't available. Every save writes a new generation of three files:
+    <base>.<gen>.npy          float32 embedding matrix, opened with mmap
+    <base>.<gen>.meta.npz     filter columns (city, price_tier, indoor, duration_min)
+    <base>.<gen>.ideas.json   the full date idea records, in the same row order
+and then swaps <base>.index.json (the manifest naming the current generation) in with a
+single os.replace, so a reader always opens three files from the same save. The previous
+generation is kept for readers that are still opening it; older ones are deleted.
+
+It is loaded once per process (and reloaded only when the generation changes), filters are
+applied as masks over the columns before ranking, and only the top_k rows are sorted.
+"""
+
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FallbackIndex:
+    """Memory-mapped embedding matrix plus columnar filter metadata"""
+
+    def __init__(self, embeddings: np.ndarray, columns: Dict[str, np.ndarray],
+                 date_ideas: List[Dict[str, Any]], model_name: str = ""):
+        self.embeddings = embeddings
+        self.columns = columns
+        self.date_ideas = date_ideas
+        self.model_name = model_name
+
+    def __len__(self):
+        return len(self.date_ideas)
+
+    @staticmethod
+    def build_columns(date_ideas: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Filter columns for a list of date ideas"""
+        indoor = [idea.get("indoor") for idea in date_ideas]
+        return {
+            "city": np.array([str(idea.get("city") or "").lower() for idea in date_ideas], dtype=str),
+            "price_tier": np.array([idea.get("price_tier") or 1 for idea in date_ideas], dtype=np.int16),
+            # -1 = unknown, so it never matches an indoor/outdoor filter
+            "indoor": np.array([-1 if v is None else int(bool(v)) for v in indoor], dtype=np.int8),
+            "duration_min": np.array([idea.get("duration_min") or 60 for idea in date_ideas], dtype=np.int32),
+        }
+
+    def mask(
+        self,
+        city: str = None,
+        max_price_tier: int = None,
+        indoor: bool = None,
+        min_duration: int = None,
+        max_duration: int = None
+    ) -> Optional[np.ndarray]:
+        """Boolean mask of rows passing the filters (None when nothing is filtered)"""
+        mask = None
+
+        def add(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if city:
+            add(self.columns["city"] == city.lower())
+        if max_price_tier:
+            add(self.columns["price_tier"] <= max_price_tier)
+        if indoor is not None:
+            add(self.columns["indoor"] == int(indoor))
+        if min_duration:
+            add(self.columns["duration_min"] >= min_duration)
+        if max_duration:
+            add(self.columns["duration_min"] <= max_duration)
+        return mask
+
+    def search(self, query_embedding: np.ndarray, top_k: int, **filters) -> List[Tuple[int, float]]:
+        """Top_k (row, similarity) pairs among the rows that pass the filters"""
+        if len(self) == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        mask = self.mask(**filters)
+        if mask is None:
+            rows = None
+            scores = self.embeddings @ query
+        else:
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return []
+            scores = self.embeddings[rows] @ query
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+    # -- files -----------------------------------------------------------------
+
+    @staticmethod
+    def paths(base_path: str, generation: str) -> Dict[str, str]:
+        """Data files of one generation"""
+        return {
+            "embeddings": f"{base_path}.{generation}.npy",
+            "meta": f"{base_path}.{generation}.meta.npz",
+            "ideas": f"{base_path}.{generation}.ideas.json",
+        }
+
+    @staticmethod
+    def manifest_path(base_path: str) -> str:
+        return base_path + ".index.json"
+
+    @classmethod
+    def current_generation(cls, base_path: str) -> Optional[str]:
+        """Generation named by the manifest (None if nothing has been saved)"""
+        try:
+            with open(cls.manifest_path(base_path)) as f:
+                return json.load(f)["generation"]
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def save(cls, base_path: str, date_ideas: List[Dict[str, Any]], embeddings: np.ndarray,
+             model_name: str = "") -> str:
+        """Write a new generation of the index and make it current, returns its id"""
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        previous = cls.current_generation(base_path)
+        generation = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+        paths = cls.paths(base_path, generation)
+
+        with open(paths["embeddings"], "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        with open(paths["meta"], "wb") as f:
+            np.savez(f, model_name=np.array(model_name), **cls.build_columns(date_ideas))
+        with open(paths["ideas"], "w") as f:
+            json.dump(date_ideas, f, default=str)
+
+        # the manifest is the only file replaced in place - one atomic switch
+        manifest = cls.manifest_path(base_path)
+        with open(manifest + ".tmp", "w") as f:
+            json.dump({"generation": generation, "count": len(date_ideas)}, f)
+        os.replace(manifest + ".tmp", manifest)
+
+        cls._remove_old_generations(base_path, keep={generation, previous})
+        return generation
+
+    @classmethod
+    def _remove_old_generations(cls, base_path: str, keep: set):
+        directory = os.path.dirname(base_path) or "."
+        prefix = os.path.basename(base_path) + "."
+        suffixes = (".npy", ".meta.npz", ".ideas.json")
+        for name in os.listdir(directory):
+            if not name.startswith(prefix) or not name.endswith(suffixes):
+                continue
+            generation = name[len(prefix):]
+            for suffix in suffixes:
+                if generation.endswith(suffix):
+                    generation = generation[:-len(suffix)]
+                    break
+            if generation and "." not in generation and generation not in keep:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, base_path: str, generation: Optional[str] = None) -> "FallbackIndex":
+        """Open an index generation (default: the current one), with the embeddings memory-mapped"""
+        if generation is None:
+            generation = cls.current_generation(base_path)
+            if generation is None:
+                raise FileNotFoundError(cls.manifest_path(base_path))
+        paths = cls.paths(base_path, generation)
+        embeddings = np.load(paths["embeddings"], mmap_mode="r")
+        with np.load(paths["meta"]) as meta:
+            columns = {name: meta[name] for name in meta.files if name != "model_name"}
+            model_name = str(meta["model_name"]) if "model_name" in meta.files else ""
+        with open(paths["ideas"]) as f:
+            date_ideas = json.load(f)
+        if len(date_ideas) != embeddings.shape[0]:
+            raise ValueError(f"Fallback index is inconsistent: {len(date_ideas)} ideas, {embeddings.shape[0]} embeddings")
+        return cls(embeddings, columns, date_ideas, model_name)
+
+    @classmethod
+    def from_pickle(cls, pickle_path: str, base_path: str) -> "FallbackIndex":
+        """Convert an old pickle vector store file into the index format"""
+        with open(pickle_path, "rb") as f:
+            data = pickle.load(f)
+        cls.save(base_path, data.get("date_ideas", []), np.asarray(data.get("embeddings")),
+                 data.get("model_name", ""))
+        logger.info(f"Converted {pickle_path} to the mmap fallback index")
+        return cls.load(base_path)
+
+
+# One loaded index per base path, reloaded when the manifest names a new generation
+_indexes: Dict[str, Tuple[str, FallbackIndex]] = {}
+_indexes_lock = threading.Lock()
+
+# A reader can lose a race with two quick saves (its generation gets deleted) - re-read the manifest
+_LOAD_ATTEMPTS = 3
+
+
+def get_fallback_index(base_path: str, legacy_pickle: Optional[str] = None) -> Optional[FallbackIndex]:
+    """
+    Get the fallback index for base_path, loading it on first use.
+    If only the old pickle file exists it is converted once.
+    """
+    with _indexes_lock:
+        for attempt in range(_LOAD_ATTEMPTS):
+            generation = FallbackIndex.current_generation(base_path)
+            if generation is None:
+                if legacy_pickle and os.path.exists(legacy_pickle):
+                    FallbackIndex.from_pickle(legacy_pickle, base_path)
+                    continue
+                return None
+
+            cached = _indexes.get(base_path)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+
+            try:
+                index = FallbackIndex.load(base_path, generation)
+            except FileNotFoundError:
+                if attempt == _LOAD_ATTEMPTS - 1:
+                    raise
+                continue
+            _indexes[base_path] = (generation, index)
+            logger.info(f"Loaded fallback index with {len(index)} date ideas")
+            return index
+        return None
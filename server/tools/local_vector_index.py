@@ -0,0 +1,418 @@
+"""
+In-process HNSW index over event embeddings, used as a tier in front of pgvector.
+
+The event table (or just the hot cities) is loaded once into an hnswlib index plus a
+metadata cache, then kept in sync by a background thread that re-reads rows whose
+modified_time moved and rebuilds from scratch when the row count or the newest event_id
+no longer match the table (deletes, or rows that arrived with an old modified_time).
+Searches that the index can answer never touch PostgreSQL; anything it can't answer (not
+built yet, a city filter that could match a city it doesn't hold, too few rows left after
+filtering) returns None so the caller falls back to pgvector, which stays the source of truth.
+
+City filters mean the same as the pgvector search's `city ILIKE '%<city>%'`: a substring,
+case-insensitive. With hot cities configured the index only answers when every known city
+containing the filter is one it holds, e.g. "ottawa" is routed to pgvector once an
+"Ottawa-Gatineau" location exists and isn't indexed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 384
+PRICE_TIER_MAX = {1: 25.0, 2: 75.0, 3: 200.0}
+
+# candidates fetched per requested result when filtering; doubled while too few rows
+# pass the filters, up to MAX_OVERSAMPLE before giving the search to pgvector
+OVERSAMPLE = 4
+MAX_OVERSAMPLE = 64
+
+EVENT_QUERY = """
+    SELECT
+        e.event_id,
+        e.title,
+        COALESCE(e.description, ''),
+        COALESCE(l.city, ''),
+        e.price,
+        COALESCE(e.duration_min, 60),
+        COALESCE(e.indoor, false),
+        COALESCE(e.kid_friendly, false),
+        COALESCE(e.website, ''),
+        COALESCE(e.phone, ''),
+        COALESCE(e.rating, 0.0),
+        COALESCE(e.review_count, 0),
+        COALESCE(l.name, ''),
+        COALESCE(l.address, ''),
+        e.vibe,
+        COALESCE(c.names, ARRAY[]::text[]),
+        e.modified_time,
+        e.embedding
+    FROM event e
+    LEFT JOIN location l ON e.location_id = l.location_id
+    LEFT JOIN LATERAL (
+        SELECT array_agg(ec.name::text) AS names
+        FROM event_category_link ecl
+        JOIN event_category ec ON ecl.category_id = ec.category_id
+        WHERE ecl.event_id = e.event_id
+    ) c ON true
+    WHERE e.embedding IS NOT NULL
+"""
+
+
+def _price_tier(price) -> int:
+    # same CASE as the SQL: a NULL price matches neither bound and falls to tier 3
+    if price is None:
+        return 3
+    if price <= 25:
+        return 1
+    return 2 if price <= 75 else 3
+
+
+def _row_to_record(row) -> Dict[str, Any]:
+    """Event row -> search result dict (same shape as the pgvector simple search)"""
+    record = {
+        "id": f"event_{row[0]}",
+        "title": row[1],
+        "description": row[2],
+        "categories": list(row[15] or []),
+        "city": row[3],
+        "lat": 0.0,
+        "lon": 0.0,
+        "price_tier": _price_tier(row[4]),
+        "duration_min": row[5],
+        "indoor": row[6],
+        "kid_friendly": row[7],
+        "website": row[8],
+        "phone": row[9],
+        "rating": row[10],
+        "review_count": row[11],
+        "venue_name": row[12],
+        "address": row[13],
+        "source": "local_hnsw",
+    }
+    if row[14]:
+        record["predicted_vibe"] = row[14]
+    return record
+
+
+class LocalVectorIndex:
+    """hnswlib index keyed by event_id, with the result metadata held alongside"""
+
+    def __init__(
+        self,
+        db_config,
+        cities: Optional[List[str]] = None,
+        ef_search: int = 64,
+        dim: int = EMBEDDING_DIM,
+        m: int = 16,
+        ef_construction: int = 64
+    ):
+        self.db_config = db_config
+        self.cities = [c.lower() for c in (cities or [])]
+        self.ef_search = ef_search
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+
+        self._index = None
+        self._records: Dict[int, Dict[str, Any]] = {}
+        self._prices: Dict[int, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self._last_modified = None
+        # lowercased city of every location, used by covers() when limited to hot cities
+        self._known_cities: Optional[List[str]] = None
+
+        self._sync_thread: Optional[threading.Thread] = None
+        self._stop_sync = threading.Event()
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    # -- loading / syncing -------------------------------------------------------
+
+    def _fetch(self, since=None) -> List[tuple]:
+        from pgvector.psycopg2 import register_vector
+
+        query = EVENT_QUERY
+        params: List[Any] = []
+        if self.cities:
+            query += " AND lower(l.city) = ANY(%s)"
+            params.append(self.cities)
+        if since is not None:
+            # >= so rows sharing the last timestamp aren't missed; re-adding them is harmless
+            query += " AND e.modified_time >= %s"
+            params.append(since)
+
+        with self.db_config.get_connection() as conn:
+            register_vector(conn)
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+
+    def _version(self) -> Tuple[int, Optional[int]]:
+        """(row count, newest event_id) of the indexed rows in the table"""
+        query = (
+            "SELECT COUNT(*), MAX(e.event_id) FROM event e LEFT JOIN location l ON e.location_id = l.location_id "
+            "WHERE e.embedding IS NOT NULL"
+        )
+        params: List[Any] = []
+        if self.cities:
+            query += " AND lower(l.city) = ANY(%s)"
+            params.append(self.cities)
+        with self.db_config.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                count, newest_id = cur.fetchone()
+                return count, newest_id
+
+    def _fetch_cities(self) -> List[str]:
+        with self.db_config.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT lower(city) FROM location WHERE city IS NOT NULL")
+                return [row[0] for row in cur.fetchall()]
+
+    def _local_version(self) -> Tuple[int, Optional[int]]:
+        return len(self._records), max(self._records) if self._records else None
+
+    def _refresh_cities(self):
+        if self.cities:
+            self._known_cities = self._fetch_cities()
+
+    def _new_index(self, capacity: int):
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index.init_index(max_elements=max(capacity, 1024), ef_construction=self.ef_construction, M=self.m)
+        index.set_ef(self.ef_search)
+        return index
+
+    @staticmethod
+    def _newest(rows, current=None):
+        newest = current
+        for row in rows:
+            if row[16] is not None and (newest is None or row[16] > newest):
+                newest = row[16]
+        return newest
+
+    def build(self, rows: Optional[List[tuple]] = None) -> int:
+        """Full (re)build from the event table; the old index keeps serving meanwhile"""
+        start = time.perf_counter()
+        if rows is None:
+            rows = self._fetch()
+        self._refresh_cities()
+
+        index = self._new_index(len(rows) * 2)
+        records = {row[0]: _row_to_record(row) for row in rows}
+        prices = {row[0]: (float(row[4]) if row[4] is not None else None) for row in rows}
+        if rows:
+            vectors = np.asarray([np.asarray(row[17], dtype=np.float32) for row in rows])
+            index.add_items(vectors, np.asarray([row[0] for row in rows], dtype=np.int64))
+
+        with self._lock:
+            self._index = index
+            self._records = records
+            self._prices = prices
+            self._last_modified = self._newest(rows)
+
+        logger.info(f"✅ Local vector index built with {len(rows)} events in {time.perf_counter() - start:.2f}s")
+        return len(rows)
+
+    def sync(self) -> int:
+        """Pull rows changed since the last sync; rebuild if rows were deleted"""
+        if self._index is None:
+            return self.build()
+
+        rows = self._fetch(since=self._last_modified)
+        if rows:
+            vectors = np.asarray([np.asarray(row[17], dtype=np.float32) for row in rows])
+            labels = np.asarray([row[0] for row in rows], dtype=np.int64)
+            with self._lock:
+                needed = len(self._records) + len(rows)
+                if needed > self._index.get_max_elements():
+                    self._index.resize_index(needed * 2)
+                # existing labels are updated in place
+                self._index.add_items(vectors, labels)
+                for row in rows:
+                    self._records[row[0]] = _row_to_record(row)
+                    self._prices[row[0]] = float(row[4]) if row[4] is not None else None
+                self._last_modified = self._newest(rows, self._last_modified)
+
+        if self._version() != self._local_version():
+            # something was deleted, moved out of the indexed cities or missed by the
+            # modified_time cursor - a delete plus an insert keeps the count but not the ids
+            return self.build()
+        self._refresh_cities()
+        return len(rows)
+
+    def _sync_loop(self, interval: float):
+        while not self._stop_sync.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"⚠️  Local vector index sync failed: {e}")
+            self._stop_sync.wait(interval)
+
+    def start(self, interval: float = 60.0):
+        """Build in the background and keep syncing every interval seconds"""
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        self._stop_sync.clear()
+        self._sync_thread = threading.Thread(
+            target=self._sync_loop, args=(interval,), name="local-vector-index-sync", daemon=True
+        )
+        self._sync_thread.start()
+
+    def stop(self):
+        """Stop the background sync"""
+        self._stop_sync.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout=2.0)
+            self._sync_thread = None
+
+    # -- search -----------------------------------------------------------------
+
+    def covers(self, city: Optional[str]) -> bool:
+        """Can this index answer a search with this city filter (same matching as ILIKE '%city%')?"""
+        if city and ("%" in city or "_" in city):
+            # LIKE wildcards in the filter, only PostgreSQL matches those the same way
+            return False
+        if not self.cities:
+            return True
+        if not city or self._known_cities is None:
+            return False
+        needle = city.lower()
+        matching = [known for known in self._known_cities if needle in known]
+        # no match may just be a city added since the last sync, let pgvector say so
+        return bool(matching) and all(known in self.cities for known in matching)
+
+    def _passes(self, event_id, record, city, max_price, indoor, min_duration, max_duration) -> bool:
+        if city and city.lower() not in record["city"].lower():
+            return False
+        if max_price is not None:
+            price = self._prices.get(event_id)
+            if price is None or price > max_price:
+                return False
+        if indoor is not None and record["indoor"] != indoor:
+            return False
+        if min_duration and record["duration_min"] < min_duration:
+            return False
+        if max_duration and record["duration_min"] > max_duration:
+            return False
+        return True
+
+    def _query(self, query, k, top_k, city, max_price, indoor, min_duration, max_duration):
+        # caller holds the lock
+        self._index.set_ef(max(self.ef_search, k))
+        labels, distances = self._index.knn_query(query, k=k)
+
+        results = []
+        for event_id, distance in zip(labels[0], distances[0]):
+            event_id = int(event_id)
+            record = self._records.get(event_id)
+            if record is None or not self._passes(event_id, record, city, max_price, indoor,
+                                                  min_duration, max_duration):
+                continue
+            result = dict(record)
+            result["categories"] = list(record["categories"])
+            result["similarity_score"] = float(1.0 - distance)
+            results.append(result)
+            if len(results) == top_k:
+                break
+        return results
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        city: str = None,
+        max_price_tier: int = None,
+        indoor: bool = None,
+        min_duration: int = None,
+        max_duration: int = None,
+        similarity_threshold: float = 0.1
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top_k events, filtered like the pgvector search.
+        Returns None when the index can't give a complete answer.
+        """
+        if self._index is None or not self.covers(city):
+            return None
+
+        max_price = PRICE_TIER_MAX.get(max_price_tier, 200.0) if max_price_tier else None
+        filtered = any(v is not None and v != "" for v in (city, max_price, indoor, min_duration, max_duration))
+
+        with self._lock:
+            total = len(self._records)
+            if total == 0:
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32)
+            k = min(total, top_k * OVERSAMPLE if filtered else top_k)
+            while True:
+                results = self._query(query, k, top_k, city, max_price, indoor, min_duration, max_duration)
+                if len(results) == top_k or k == total:
+                    break
+                if k >= top_k * MAX_OVERSAMPLE:
+                    # filters are too selective for the ANN scan, pgvector can do better
+                    return None
+                k = min(total, k * 2)
+
+        # threshold after the top_k, like the pgvector search
+        return [r for r in results if r["similarity_score"] >= similarity_threshold]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "events": len(self._records),
+            "cities": self.cities or "all",
+            "last_modified": str(self._last_modified) if self._last_modified else None,
+        }
+
+
+# Global instance
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_vector_index(db_config=None) -> Optional[LocalVectorIndex]:
+    """
+    Get the local index if it's enabled (LOCAL_VECTOR_INDEX=true) and hnswlib is
+    installed. The first call starts the background build.
+    """
+    global _local_index
+    if _local_index is not None:
+        return _local_index
+
+    from ..config import LocalVectorIndexConfig
+    config = LocalVectorIndexConfig.from_env()
+    if not config.enabled or db_config is None:
+        return None
+    if not HNSWLIB_AVAILABLE:
+        logger.warning("⚠️  LOCAL_VECTOR_INDEX is on but hnswlib isn't installed (pip install hnswlib)")
+        return None
+
+    with _local_index_lock:
+        if _local_index is None:
+            _local_index = LocalVectorIndex(db_config, cities=config.cities, ef_search=config.ef_search)
+            _local_index.start(config.sync_interval)
+    return _local_index
+
+
+def shutdown_local_vector_index():
+    """Stop the background sync of the global local index"""
+    global _local_index
+    if _local_index is not None:
+        _local_index.stop()
+        _local_index = None
@@ -5,10 +5,8 @@ and pgvector for efficient similarity search.
 import json
 import logging
 import os
-import pickle
 from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
-from datetime import datetime
 
 # Load environment variables from .env file
 try:
@@ -17,11 +15,6 @@ try:
 except ImportError:
     pass
 
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
 
 try:
     import psycopg2
@@ -31,29 +24,127 @@ except ImportError:
     POSTGRESQL_AVAILABLE = False
 
 from ..db_config import get_db_config
+from ..embedding_service import get_embedding_service
+from ..model_registry import get_sentence_transformer, SENTENCE_TRANSFORMERS_AVAILABLE
+from ..metrics import get_metrics
+from .bulk_ingest import bulk_save
+from .fallback_index import FallbackIndex, get_fallback_index
+from .local_vector_index import get_local_vector_index
 
 logger = logging.getLogger(__name__)
 
+# Candidate list size for HNSW scans - raised to top_k for bigger searches
+HNSW_EF_SEARCH = 40
+
+# Single-query search: the top_k nearest rows ({candidates}), then categories and the
+# threshold. Unfiltered searches walk the HNSW index; filtered ones use an exact scan
+# because pgvector applies WHERE clauses after picking its ef_search candidates, so a
+# selective filter (city, price, ...) would leave far fewer than top_k rows.
+SEARCH_CANDIDATE_COLUMNS = """
+            e.event_id, e.title, e.description, e.price, e.duration_min,
+            e.indoor, e.kid_friendly, e.website, e.phone, e.rating,
+            e.review_count, {vibe}, l.city, l.name as venue_name, l.address,
+            e.embedding <=> %s::vector(384) AS distance
+        FROM event e
+        LEFT JOIN location l ON e.location_id = l.location_id
+        WHERE e.embedding IS NOT NULL"""
+# event.vibe comes from the V9_1_0 migration; databases without it get NULL vibes
+VIBE_COLUMN = "e.vibe"
+NO_VIBE_COLUMN = "NULL::text AS vibe"
+# SQLSTATE for an undefined column
+UNDEFINED_COLUMN = "42703"
+INDEX_SCAN_SQL = f"""
+        SELECT {SEARCH_CANDIDATE_COLUMNS}
+        ORDER BY distance
+        LIMIT %s"""
+# MATERIALIZED keeps the planner from turning this back into an index scan
+EXACT_SCAN_SQL = f"""
+        WITH filtered AS MATERIALIZED (
+            SELECT {SEARCH_CANDIDATE_COLUMNS}{{filters}}
+        )
+        SELECT * FROM filtered
+        ORDER BY distance
+        LIMIT %s"""
+
+SIMPLE_SEARCH_SQL = """
+    SELECT 
+        n.event_id,
+        n.title,
+        n.description,
+        n.city,
+        n.price,
+        CASE 
+            WHEN n.price <= 25 THEN 1
+            WHEN n.price <= 75 THEN 2
+            ELSE 3
+        END as price_tier,
+        COALESCE(n.duration_min, 60) as duration_min,
+        COALESCE(n.indoor, false) as indoor,
+        COALESCE(n.kid_friendly, false) as kid_friendly,
+        COALESCE(n.website, '') as website,
+        COALESCE(n.phone, '') as phone,
+        COALESCE(n.rating, 0.0) as rating,
+        COALESCE(n.review_count, 0) as review_count,
+        n.venue_name,
+        n.address,
+        1 - n.distance AS similarity_score,
+        n.vibe,
+        COALESCE(c.names, ARRAY[]::text[]) AS categories
+    FROM ({candidates}
+    ) n
+    LEFT JOIN LATERAL (
+        SELECT array_agg(ec.name::text) AS names
+        FROM event_category_link ecl
+        JOIN event_category ec ON ecl.category_id = ec.category_id
+        WHERE ecl.event_id = n.event_id
+    ) c ON true
+    WHERE 1 - n.distance >= %s
+    ORDER BY n.distance
+"""
+SET_EF_SEARCH_SQL = "SELECT set_config('hnsw.ef_search', %s, true)"
+
+# Row counts for get_stats, in one round-trip
+STATS_KEYS = (
+    "postgresql_events_with_embeddings", "postgresql_total_events",
+    "postgresql_locations", "postgresql_categories"
+)
+STATS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM event WHERE embedding IS NOT NULL),
+        (SELECT COUNT(*) FROM event),
+        (SELECT COUNT(*) FROM location),
+        (SELECT COUNT(*) FROM event_category)
+"""
+
 class PostgreSQLVectorStore:
     """PostgreSQL-backed vector store for date ideas with semantic search capabilities"""
     
+    # set to False the first time a search finds the event.vibe column missing
+    has_vibe_column = True
+    
     def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_fallback: bool = True):
         self.model_name = model_name
         self.model = None
+        self.embedder = None
         self.use_fallback = use_fallback
         self.db_config = get_db_config()
         
-        # Fallback file path for backwards compatibility
+        # Fallback index (mmap .npy + metadata sidecars); the old pickle file is only
+        # read to convert it the first time
         self.fallback_file = os.path.join(
             os.path.dirname(__file__), 
             "../../data/date_ideas_vector_store.pkl"
         )
+        self.fallback_index_path = os.path.splitext(self.fallback_file)[0]
         
         # Initialize the model
         self._load_model()
         
         # Check database connectivity
         self._check_db_connection()
+        
+        # Optional in-process HNSW tier (LOCAL_VECTOR_INDEX=true), pgvector stays the fallback
+        self.local_index = get_local_vector_index(self.db_config) if POSTGRESQL_AVAILABLE else None
     
     def _load_model(self):
         """Load the sentence transformer model"""
@@ -61,11 +152,13 @@ class PostgreSQLVectorStore:
             logger.error("sentence-transformers not available. Install with: pip install sentence-transformers")
             return
             
-        try:
-            self.model = SentenceTransformer(self.model_name)
-            logger.info(f"Loaded sentence transformer model: {self.model_name}")
-        except Exception as e:
-            logger.error(f"Failed to load sentence transformer model: {e}")
+        # Shared with every other user of this model through the registry
+        self.model = get_sentence_transformer(self.model_name)
+        if self.model is None:
+            logger.error(f"Failed to load sentence transformer model: {self.model_name}")
+            return
+        self.embedder = get_embedding_service(self.model_name, self.model)
+        logger.info(f"Loaded sentence transformer model: {self.model_name}")
     
     def _check_db_connection(self):
         """Check if PostgreSQL is available and configured"""
@@ -151,14 +244,8 @@ class PostgreSQLVectorStore:
         
         logger.info(f"Adding {len(date_ideas)} date ideas to vector store")
         
-        # Create embeddings
-        embedding_texts = [self._create_embedding_text(idea) for idea in date_ideas]
-        
-        try:
-            embeddings = self.model.encode(embedding_texts, convert_to_numpy=True)
-            logger.info(f"Created embeddings with shape: {embeddings.shape}")
-        except Exception as e:
-            logger.error(f"Failed to create embeddings: {e}")
+        embeddings = self._prepare_ingest(date_ideas)
+        if embeddings is None:
             return False
         
         # Try to save to PostgreSQL first
@@ -172,98 +259,72 @@ class PostgreSQLVectorStore:
             logger.error("Failed to save date ideas - no storage backend available")
             return False
     
+    def _prepare_ingest(self, date_ideas: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Embed the ideas and classify their vibes (the CPU-bound half of ingest)"""
+        embedding_texts = [self._create_embedding_text(idea) for idea in date_ideas]
+        
+        try:
+            embeddings = self.model.encode(embedding_texts, convert_to_numpy=True)
+            logger.info(f"Created embeddings with shape: {embeddings.shape}")
+        except Exception as e:
+            logger.error(f"Failed to create embeddings: {e}")
+            return None
+        
+        # Classify vibes once at ingest so searches don't have to
+        self._add_predicted_vibes(date_ideas)
+        return embeddings
+    
+    def _add_predicted_vibes(self, date_ideas: List[Dict[str, Any]]) -> None:
+        """Fill in predicted_vibe for ideas that don't have one, in a single batch"""
+        missing = [idea for idea in date_ideas if not idea.get("predicted_vibe")]
+        if not missing:
+            return
+        
+        try:
+            from ..core.ml_integration import get_ml_wrapper
+            texts = [f"{idea.get('title', '')} {idea.get('description', '')}" for idea in missing]
+            vibes = get_ml_wrapper().classify_vibes_batch(texts)
+        except Exception as e:
+            logger.warning(f"Vibe classification at ingest failed: {e}")
+            return
+        
+        if vibes is None:
+            # leave vibe NULL so the query-time fallback classifies these later
+            logger.warning(f"Vibe classifier unavailable - storing {len(missing)} date ideas without a vibe")
+            return
+        
+        for idea, vibe in zip(missing, vibes):
+            idea["predicted_vibe"] = vibe
+        logger.info(f"Classified vibes for {len(missing)} date ideas")
+    
     def _save_to_postgresql(self, date_ideas: List[Dict[str, Any]], embeddings: np.ndarray) -> bool:
-        """Save date ideas and embeddings to PostgreSQL using Java schema"""
+        """Save date ideas and embeddings to PostgreSQL (Java schema) with the COPY bulk path"""
         try:
             with self.db_config.get_connection() as conn:
-                register_vector(conn)
                 with conn.cursor() as cur:
-                    # Insert/update events and related data
-                    for i, idea in enumerate(date_ideas):
-                        embedding_vector = embeddings[i].tolist()
-                        
-                        # Handle location first
-                        location_id = self._upsert_location(cur, idea)
-                        
-                        # Handle categories
-                        category_ids = self._upsert_categories(cur, idea.get("categories", []))
-                        
-                        # Handle event
-                        event_id = self._upsert_event(cur, idea, location_id, embedding_vector)
-                        
-                        # Link categories to event
-                        self._link_event_categories(cur, event_id, category_ids)
-                    
+                    inserted, updated = bulk_save(
+                        cur, date_ideas, embeddings, self._location_values, self._event_values
+                    )
                     conn.commit()
-                    logger.info(f"Saved {len(date_ideas)} date ideas to PostgreSQL (Java schema)")
+                    logger.info(f"Saved {len(date_ideas)} date ideas to PostgreSQL ({inserted} new, {updated} updated)")
                     return True
         except Exception as e:
             logger.error(f"Failed to save to PostgreSQL: {e}")
             return False
     
-    def _upsert_location(self, cur, idea: Dict[str, Any]) -> Optional[int]:
-        """Insert or update location and return location_id"""
+    @staticmethod
+    def _location_values(idea: Dict[str, Any]) -> Optional[Tuple[str, str, str, float, float]]:
+        """(name, address, city, lat, lon) for an idea, or None if it has no location"""
         city = idea.get("city", "")
         address = idea.get("address", "")
         venue_name = idea.get("venue_name", "")
-        lat = idea.get("lat", 0.0)
-        lon = idea.get("lon", 0.0)
-        
         if not city and not address and not venue_name:
             return None
-        
-        # Try to find existing location
-        cur.execute("""
-            SELECT location_id FROM location 
-            WHERE city = %s AND COALESCE(address, '') = %s AND COALESCE(name, '') = %s
-        """, (city, address, venue_name))
-        
-        result = cur.fetchone()
-        if result:
-            location_id = result[0]
-            # Update coordinates if provided
-            if lat != 0.0 or lon != 0.0:
-                cur.execute("""
-                    UPDATE location SET lat = %s, lon = %s 
-                    WHERE location_id = %s AND (lat IS NULL OR lon IS NULL)
-                """, (lat, lon, location_id))
-            return location_id
-        
-        # Insert new location
-        cur.execute("""
-            INSERT INTO location (name, address, city, lat, lon)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING location_id
-        """, (venue_name, address, city, lat, lon))
-        
-        return cur.fetchone()[0]
+        return venue_name, address, city, idea.get("lat", 0.0), idea.get("lon", 0.0)
     
-    def _upsert_categories(self, cur, categories: List[str]) -> List[int]:
-        """Insert or update categories and return category_ids"""
-        category_ids = []
-        
-        for category in categories:
-            if not category:
-                continue
-                
-            # Try to find existing category
-            cur.execute("SELECT category_id FROM event_category WHERE name = %s", (category,))
-            result = cur.fetchone()
-            
-            if result:
-                category_ids.append(result[0])
-            else:
-                # Insert new category
-                cur.execute("""
-                    INSERT INTO event_category (name) VALUES (%s)
-                    RETURNING category_id
-                """, (category,))
-                category_ids.append(cur.fetchone()[0])
-        
-        return category_ids
-    
-    def _upsert_event(self, cur, idea: Dict[str, Any], location_id: Optional[int], embedding_vector: List[float]) -> int:
-        """Insert or update event and return event_id"""
+    @staticmethod
+    def _event_values(idea: Dict[str, Any], location_id: Optional[int], embedding_vector: List[float]) -> Tuple[Optional[int], tuple]:
+        """(existing event_id or None, column values in bulk_ingest.EVENT_COLUMNS order) for an idea"""
         # Extract event ID from the idea ID if it exists
         idea_id = idea.get("id", "")
         event_id = None
@@ -281,98 +342,32 @@ class PostgreSQLVectorStore:
             price_map = {1: 25.0, 2: 75.0, 3: 150.0}
             price = price_map.get(price_tier, 25.0)
         
-        # Prepare event data
-        event_data = {
-            "title": idea.get("title", "Untitled Event"),
-            "description": idea.get("description", ""),
-            "price": price,
-            "location_id": location_id,
-            "duration_min": idea.get("duration_min", 60),
-            "indoor": idea.get("indoor", False),
-            "kid_friendly": idea.get("kid_friendly", False),
-            "website": idea.get("website", ""),
-            "phone": idea.get("phone", ""),
-            "rating": idea.get("rating", 0.0),
-            "review_count": idea.get("review_count", 0),
-            "is_ai_recommended": True,  # Mark as AI recommended since it's from vector store
-            "ai_score": idea.get("similarity_score", 0.0) if "similarity_score" in idea else 5.0,
-            "popularity": idea.get("popularity", 0),
-            "embedding": embedding_vector,
-            "metadata": json.dumps(idea.get("metadata", {}))
-        }
-        
-        if event_id:
-            # Update existing event
-            cur.execute("""
-                UPDATE event SET
-                    title = %s, description = %s, price = %s, location_id = %s,
-                    duration_min = %s, indoor = %s, kid_friendly = %s,
-                    website = %s, phone = %s, rating = %s, review_count = %s,
-                    is_ai_recommended = %s, ai_score = %s, popularity = %s,
-                    embedding = %s, metadata = %s, modified_time = NOW()
-                WHERE event_id = %s
-                RETURNING event_id
-            """, (
-                event_data["title"], event_data["description"], event_data["price"], event_data["location_id"],
-                event_data["duration_min"], event_data["indoor"], event_data["kid_friendly"],
-                event_data["website"], event_data["phone"], event_data["rating"], event_data["review_count"],
-                event_data["is_ai_recommended"], event_data["ai_score"], event_data["popularity"],
-                event_data["embedding"], event_data["metadata"], event_id
-            ))
-            result = cur.fetchone()
-            return result[0] if result else event_id
-        else:
-            # Insert new event
-            cur.execute("""
-                INSERT INTO event (
-                    title, description, price, location_id, duration_min, indoor, kid_friendly,
-                    website, phone, rating, review_count, is_ai_recommended, ai_score, popularity,
-                    embedding, metadata
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-                RETURNING event_id
-            """, (
-                event_data["title"], event_data["description"], event_data["price"], event_data["location_id"],
-                event_data["duration_min"], event_data["indoor"], event_data["kid_friendly"],
-                event_data["website"], event_data["phone"], event_data["rating"], event_data["review_count"],
-                event_data["is_ai_recommended"], event_data["ai_score"], event_data["popularity"],
-                event_data["embedding"], event_data["metadata"]
-            ))
-            return cur.fetchone()[0]
-    
-    def _link_event_categories(self, cur, event_id: int, category_ids: List[int]):
-        """Link event to categories"""
-        if not category_ids:
-            return
-        
-        # Clear existing links
-        cur.execute("DELETE FROM event_category_link WHERE event_id = %s", (event_id,))
-        
-        # Insert new links
-        for category_id in category_ids:
-            cur.execute("""
-                INSERT INTO event_category_link (event_id, category_id)
-                VALUES (%s, %s)
-                ON CONFLICT DO NOTHING
-            """, (event_id, category_id))
+        values = (
+            idea.get("title", "Untitled Event"),
+            idea.get("description", ""),
+            price,
+            location_id,
+            idea.get("duration_min", 60),
+            idea.get("indoor", False),
+            idea.get("kid_friendly", False),
+            idea.get("website", ""),
+            idea.get("phone", ""),
+            idea.get("rating", 0.0),
+            idea.get("review_count", 0),
+            True,  # is_ai_recommended - it's from the vector store
+            idea.get("similarity_score", 0.0) if "similarity_score" in idea else 5.0,
+            idea.get("popularity", 0),
+            embedding_vector,
+            idea.get("predicted_vibe"),
+            json.dumps(idea.get("metadata", {}))
+        )
+        return event_id, values
     
     def _save_to_file(self, date_ideas: List[Dict[str, Any]], embeddings: np.ndarray) -> bool:
-        """Fallback: save to pickle file"""
+        """Fallback: save to the file-based index"""
         try:
-            os.makedirs(os.path.dirname(self.fallback_file), exist_ok=True)
-            
-            data = {
-                "embeddings": embeddings,
-                "date_ideas": date_ideas,
-                "model_name": self.model_name,
-                "created_at": datetime.now().isoformat()
-            }
-            
-            with open(self.fallback_file, "wb") as f:
-                pickle.dump(data, f)
-            
-            logger.info(f"Saved vector store data to {self.fallback_file}")
+            FallbackIndex.save(self.fallback_index_path, date_ideas, embeddings, self.model_name)
+            logger.info(f"Saved vector store data to {self.fallback_index_path}.*")
             return True
         except Exception as e:
             logger.error(f"Failed to save to file: {e}")
@@ -400,12 +395,23 @@ class PostgreSQLVectorStore:
         
         # Create embedding for the query
         try:
-            query_embedding = self.model.encode([query], convert_to_numpy=True)[0]
+            # Cached + micro-batched with other concurrent searches
+            query_embedding = self.embedder.encode(query)
             logger.debug(f"✅ Query embedding created: shape={query_embedding.shape}")
         except Exception as e:
             logger.error(f"Failed to create query embedding: {e}")
             return []
         
+        # Local HNSW index answers without a database round-trip when it can
+        if self.local_index is not None:
+            results = self.local_index.search(
+                query_embedding, top_k, city, max_price_tier, indoor,
+                min_duration, max_duration, similarity_threshold
+            )
+            if results is not None:
+                get_metrics().increment_counter("vector_search.local_index")
+                return results
+        
         # Try PostgreSQL search first with simple direct query
         if POSTGRESQL_AVAILABLE:
             results = self._search_postgresql_simple(
@@ -437,105 +443,35 @@ class PostgreSQLVectorStore:
         max_duration: int,
         similarity_threshold: float
     ) -> Optional[List[Dict[str, Any]]]:
-        """Simple PostgreSQL search without complex function calls"""
+        """
+        Single-query PostgreSQL search.
+        
+        Without filters the inner query orders by the raw cosine distance so pgvector can
+        walk the HNSW index (idx_event_embedding) and stop after top_k rows. With filters
+        it scans the matching rows exactly, so it still returns top_k of them. Either way
+        the distance is computed once per candidate, categories come from one lateral
+        array_agg, and the similarity threshold is applied to the top_k afterwards.
+        """
+        def run(cur):
+            cur.execute(SET_EF_SEARCH_SQL, self._ef_search_params(top_k))
+            cur.execute(*self._simple_search_query(
+                query_embedding, top_k, city, max_price_tier, indoor,
+                min_duration, max_duration, similarity_threshold, vibe=self.has_vibe_column
+            ))
+            return cur.fetchall()
+        
         try:
             with self.db_config.get_connection() as conn:
                 register_vector(conn)
                 with conn.cursor() as cur:
-                    # Build the basic query
-                    query = """
-                        SELECT 
-                            e.event_id,
-                            e.title,
-                            e.description,
-                            l.city,
-                            e.price,
-                            CASE 
-                                WHEN e.price <= 25 THEN 1
-                                WHEN e.price <= 75 THEN 2
-                                ELSE 3
-                            END as price_tier,
-                            COALESCE(e.duration_min, 60) as duration_min,
-                            COALESCE(e.indoor, false) as indoor,
-                            COALESCE(e.kid_friendly, false) as kid_friendly,
-                            COALESCE(e.website, '') as website,
-                            COALESCE(e.phone, '') as phone,
-                            COALESCE(e.rating, 0.0) as rating,
-                            COALESCE(e.review_count, 0) as review_count,
-                            l.name as venue_name,
-                            l.address,
-                            (1 - (e.embedding <=> %s::vector(384))) AS similarity_score
-                        FROM event e
-                        LEFT JOIN location l ON e.location_id = l.location_id
-                        WHERE e.embedding IS NOT NULL
-                            AND (1 - (e.embedding <=> %s::vector(384))) >= %s
-                    """
-                    
-                    params = [query_embedding.tolist(), query_embedding.tolist(), similarity_threshold]
-                    
-                    # Add filters
-                    if city:
-                        query += " AND l.city ILIKE %s"
-                        params.append(f"%{city}%")
-                    
-                    if max_price_tier:
-                        max_price_map = {1: 25.0, 2: 75.0, 3: 200.0}
-                        max_price = max_price_map.get(max_price_tier, 200.0)
-                        query += " AND e.price <= %s"
-                        params.append(max_price)
-                    
-                    if indoor is not None:
-                        query += " AND COALESCE(e.indoor, false) = %s"
-                        params.append(indoor)
-                    
-                    if min_duration:
-                        query += " AND COALESCE(e.duration_min, 60) >= %s"
-                        params.append(min_duration)
-                    
-                    if max_duration:
-                        query += " AND COALESCE(e.duration_min, 60) <= %s"
-                        params.append(max_duration)
-                    
-                    query += " ORDER BY similarity_score DESC LIMIT %s"
-                    params.append(top_k)
-                    
-                    cur.execute(query, params)
-                    rows = cur.fetchall()
-                    
-                    results = []
-                    for row in rows:
-                        # Get categories for this event
-                        cur.execute("""
-                            SELECT ec.name 
-                            FROM event_category_link ecl 
-                            JOIN event_category ec ON ecl.category_id = ec.category_id 
-                            WHERE ecl.event_id = %s
-                        """, (row[0],))
-                        
-                        event_categories = [cat[0] for cat in cur.fetchall()]
-                        
-                        result = {
-                            "id": f"event_{row[0]}",
-                            "title": row[1],
-                            "description": row[2] or "",
-                            "categories": event_categories,
-                            "city": row[3] or "",
-                            "lat": 0.0,  # Not in this query
-                            "lon": 0.0,  # Not in this query
-                            "price_tier": row[5],
-                            "duration_min": row[6],
-                            "indoor": row[7],
-                            "kid_friendly": row[8],
-                            "website": row[9],
-                            "phone": row[10],
-                            "rating": row[11],
-                            "review_count": row[12],
-                            "venue_name": row[13] or "",
-                            "address": row[14] or "",
-                            "similarity_score": float(row[15]),
-                            "source": "postgresql_simple"
-                        }
-                        results.append(result)
+                    try:
+                        rows = run(cur)
+                    except Exception as e:
+                        if not self._vibe_column_missing(e):
+                            raise
+                        conn.rollback()
+                        rows = run(cur)
+                    results = [self._simple_search_result(row) for row in rows]
                     
                     logger.info(f"Found {len(results)} results from PostgreSQL simple search")
                     return results
@@ -543,6 +479,97 @@ class PostgreSQLVectorStore:
         except Exception as e:
             logger.error(f"PostgreSQL simple search failed: {e}")
             return None
+    
+    def _vibe_column_missing(self, error: Exception) -> bool:
+        """
+        Whether a search failed only because event.vibe doesn't exist yet. If so, later
+        searches select NULL for it instead.
+        """
+        code = getattr(error, "pgcode", None) or getattr(error, "sqlstate", None)
+        if not self.has_vibe_column or code != UNDEFINED_COLUMN or "vibe" not in str(error):
+            return False
+        logger.warning("⚠️ event.vibe is missing (V9_1_0 migration not applied) - searching without stored vibes")
+        self.has_vibe_column = False
+        return True
+    
+    @staticmethod
+    def _ef_search_params(top_k: int) -> Tuple[str]:
+        # hnsw.ef_search caps how many rows an index scan can return (default 40)
+        return (str(max(HNSW_EF_SEARCH, top_k)),)
+    
+    @staticmethod
+    def _simple_search_query(
+        query_embedding: np.ndarray,
+        top_k: int,
+        city: str,
+        max_price_tier: int,
+        indoor: bool,
+        min_duration: int,
+        max_duration: int,
+        similarity_threshold: float,
+        vibe: bool = True
+    ) -> Tuple[str, List[Any]]:
+        """SQL and parameters for the single-query search (vibe=False for a schema without event.vibe)"""
+        filters = []
+        params = [query_embedding.tolist()]
+        
+        if city:
+            filters.append("l.city ILIKE %s")
+            params.append(f"%{city}%")
+        
+        if max_price_tier:
+            max_price_map = {1: 25.0, 2: 75.0, 3: 200.0}
+            filters.append("e.price <= %s")
+            params.append(max_price_map.get(max_price_tier, 200.0))
+        
+        if indoor is not None:
+            filters.append("COALESCE(e.indoor, false) = %s")
+            params.append(indoor)
+        
+        if min_duration:
+            filters.append("COALESCE(e.duration_min, 60) >= %s")
+            params.append(min_duration)
+        
+        if max_duration:
+            filters.append("COALESCE(e.duration_min, 60) <= %s")
+            params.append(max_duration)
+        
+        vibe_column = VIBE_COLUMN if vibe else NO_VIBE_COLUMN
+        if filters:
+            candidates = EXACT_SCAN_SQL.format(filters="".join(f" AND {f}" for f in filters), vibe=vibe_column)
+        else:
+            candidates = INDEX_SCAN_SQL.format(vibe=vibe_column)
+        params.extend([top_k, similarity_threshold])
+        
+        return SIMPLE_SEARCH_SQL.format(candidates=candidates), params
+    
+    @staticmethod
+    def _simple_search_result(row) -> Dict[str, Any]:
+        """Row of SIMPLE_SEARCH_SQL -> result dict"""
+        result = {
+            "id": f"event_{row[0]}",
+            "title": row[1],
+            "description": row[2] or "",
+            "categories": list(row[17]),
+            "city": row[3] or "",
+            "lat": 0.0,  # Not in this query
+            "lon": 0.0,  # Not in this query
+            "price_tier": row[5],
+            "duration_min": row[6],
+            "indoor": row[7],
+            "kid_friendly": row[8],
+            "website": row[9],
+            "phone": row[10],
+            "rating": row[11],
+            "review_count": row[12],
+            "venue_name": row[13] or "",
+            "address": row[14] or "",
+            "similarity_score": float(row[15]),
+            "source": "postgresql_simple"
+        }
+        if row[16]:
+            result["predicted_vibe"] = row[16]
+        return result
 
     def _search_postgresql(
         self,
@@ -636,40 +663,23 @@ class PostgreSQLVectorStore:
         min_duration: int,
         max_duration: int
     ) -> List[Dict[str, Any]]:
-        """Fallback search using pickle file"""
-        # Load data from file if not already loaded
+        """Fallback search using the file-based index"""
         try:
-            if not os.path.exists(self.fallback_file):
+            index = get_fallback_index(self.fallback_index_path, legacy_pickle=self.fallback_file)
+            if index is None or len(index) == 0:
                 logger.warning("No fallback data file found")
                 return []
             
-            with open(self.fallback_file, "rb") as f:
-                data = pickle.load(f)
-            
-            embeddings = data.get("embeddings")
-            date_ideas = data.get("date_ideas", [])
-            
-            if embeddings is None or len(date_ideas) == 0:
-                logger.warning("No data in fallback file")
-                return []
-            
-            # Calculate similarities
-            similarities = np.dot(embeddings, query_embedding)
-            sorted_indices = np.argsort(similarities)[::-1]
+            # Filters are applied before ranking, so filtered searches still get top_k results
+            matches = index.search(
+                query_embedding, top_k,
+                city=city, max_price_tier=max_price_tier, indoor=indoor,
+                min_duration=min_duration, max_duration=max_duration
+            )
             
             results = []
-            for idx in sorted_indices[:top_k]:
-                date_idea = date_ideas[idx].copy()
-                similarity_score = float(similarities[idx])
-                
-                # Apply filters (simplified version)
-                if city and date_idea.get("city", "").lower() != city.lower():
-                    continue
-                if max_price_tier and date_idea.get("price_tier", 1) > max_price_tier:
-                    continue
-                if indoor is not None and date_idea.get("indoor") != indoor:
-                    continue
-                
+            for row, similarity_score in matches:
+                date_idea = dict(index.date_ideas[row])
                 date_idea["similarity_score"] = similarity_score
                 date_idea["source"] = "file_fallback"
                 date_idea["entity_references"] = self._build_entity_references(date_idea)
@@ -728,52 +738,44 @@ class PostgreSQLVectorStore:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
-        stats = {
-            "model_name": self.model_name,
-            "model_loaded": self.model is not None,
-            "postgresql_available": POSTGRESQL_AVAILABLE,
-            "use_fallback": self.use_fallback
-        }
+        stats = self._base_stats()
         
         # Try to get count from PostgreSQL
         if POSTGRESQL_AVAILABLE:
             try:
                 with self.db_config.get_connection() as conn:
                     with conn.cursor() as cur:
-                        # Count events with embeddings
-                        cur.execute("SELECT COUNT(*) FROM event WHERE embedding IS NOT NULL")
-                        embedding_count = cur.fetchone()[0]
-                        
-                        # Count total events
-                        cur.execute("SELECT COUNT(*) FROM event")
-                        total_count = cur.fetchone()[0]
-                        
-                        # Count locations and categories
-                        cur.execute("SELECT COUNT(*) FROM location")
-                        location_count = cur.fetchone()[0]
-                        
-                        cur.execute("SELECT COUNT(*) FROM event_category")
-                        category_count = cur.fetchone()[0]
-                        
-                        stats.update({
-                            "postgresql_events_with_embeddings": embedding_count,
-                            "postgresql_total_events": total_count,
-                            "postgresql_locations": location_count,
-                            "postgresql_categories": category_count
-                        })
+                        cur.execute(STATS_SQL)
+                        stats.update(zip(STATS_KEYS, cur.fetchone()))
             except Exception as e:
                 stats["postgresql_error"] = str(e)
         
-        # Try to get count from fallback file
-        if self.use_fallback and os.path.exists(self.fallback_file):
+        self._add_fallback_stats(stats)
+        return stats
+    
+    def _base_stats(self) -> Dict[str, Any]:
+        """Stats that don't need the database"""
+        stats = {
+            "model_name": self.model_name,
+            "model_loaded": self.model is not None,
+            "postgresql_available": POSTGRESQL_AVAILABLE,
+            "use_fallback": self.use_fallback
+        }
+        if self.embedder is not None:
+            stats["embeddings"] = self.embedder.get_stats()
+        if self.local_index is not None:
+            stats["local_index"] = self.local_index.get_stats()
+        return stats
+    
+    def _add_fallback_stats(self, stats: Dict[str, Any]) -> None:
+        """Try to get count from fallback file"""
+        if self.use_fallback:
             try:
-                with open(self.fallback_file, "rb") as f:
-                    data = pickle.load(f)
-                    stats["fallback_count"] = len(data.get("date_ideas", []))
+                index = get_fallback_index(self.fallback_index_path, legacy_pickle=self.fallback_file)
+                if index is not None:
+                    stats["fallback_count"] = len(index)
             except Exception as e:
                 stats["fallback_error"] = str(e)
-        
-        return stats
 
 
 # Global instance
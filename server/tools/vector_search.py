@@ -9,11 +9,15 @@ are deprecated and should use this module instead.
 
 # Import the actual implementation from postgresql_vector_store
 from .postgresql_vector_store import PostgreSQLVectorStore, get_vector_store
+from .async_vector_store import AsyncPostgreSQLVectorStore, get_async_vector_store
 
 # For backwards compatibility, expose both names
 VectorStore = PostgreSQLVectorStore
 DateIdeaVectorStore = PostgreSQLVectorStore
 
 # Export the main interface
-__all__ = ['PostgreSQLVectorStore', 'VectorStore', 'DateIdeaVectorStore', 'get_vector_store']
+__all__ = [
+    'PostgreSQLVectorStore', 'VectorStore', 'DateIdeaVectorStore', 'get_vector_store',
+    'AsyncPostgreSQLVectorStore', 'get_async_vector_store'
+]
 
@@ -0,0 +1,383 @@
+"""
+Request Tracing
+Lightweight timing spans for the chat pipeline.
+
+A trace is started per chat request. span() blocks and @traced functions below it -
+including in tasks and threads started from it, which inherit the context - are
+recorded against that trace with their parent span. Every finished span is also
+observed in MetricsCollector as span.<name>.seconds, and each trace's per-stage
+breakdown is logged and kept for its session (get_session_timings).
+
+With opentelemetry-sdk and the OTLP exporter installed and OTEL_EXPORTER_OTLP_ENDPOINT
+set, finished traces are exported over OTLP as well.
+"""
+
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import TracingConfig
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Traces kept per session for get_session_timings (oldest dropped first)
+MAX_TRACES_PER_SESSION = 20
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _reset(token: contextvars.Token):
+    """Restore the previous current span (a generator closed from another context can't)"""
+    try:
+        _current_span.reset(token)
+    except (ValueError, RuntimeError):
+        pass
+
+
+class Span:
+    """One timed stage of a request; parent is the span that was current when it started"""
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        trace: Optional["Trace"] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.parent = parent
+        self.trace = trace
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (to now while the span is still open)"""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self):
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        get_metrics().observe(f"span.{self.name}.seconds", self.duration)
+        if self.trace is not None and self is not self.trace.root:
+            self.trace._record(self)
+
+
+class Trace:
+    """The spans recorded for one request"""
+
+    def __init__(
+        self,
+        name: str,
+        session_id: Optional[str] = None,
+        max_spans: int = 256,
+        tracer: Optional["Tracer"] = None
+    ):
+        self.name = name
+        self.session_id = session_id
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.root = Span(name, trace=self, attributes={'session_id': session_id} if session_id else None)
+        self._tracer = tracer
+        self._token: Optional[contextvars.Token] = None
+        self._lock = threading.Lock()
+
+    def _record(self, span: Span):
+        # spans finish on the loop and in worker threads
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def activate(self) -> "Trace":
+        """Make the root span current, so spans started from here on belong to this trace"""
+        self._token = _current_span.set(self.root)
+        return self
+
+    def finish(self, error: Optional[str] = None):
+        """End the trace (only the first call counts) and hand it to the tracer"""
+        if self.root.end is not None:
+            return
+        if self._token is None:
+            # never activated (tracing disabled), so there's nothing to report
+            self.root.end = time.perf_counter()
+            return
+        self.root.error = error
+        self.root.finish()
+        _reset(self._token)
+        self._token = None
+        if self._tracer is not None:
+            self._tracer._finished(self)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Seconds per stage (spans with the same name are summed), slowest first"""
+        with self._lock:
+            spans = list(self.spans)
+        totals: Dict[str, float] = {}
+        for span in spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return {name: round(seconds, 4) for name, seconds in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'trace': self.name,
+            'session_id': self.session_id,
+            'total_seconds': round(self.duration, 4),
+            'stages': self.breakdown(),
+            'dropped_spans': self.dropped,
+            'error': self.root.error,
+            'timestamp': time.time()
+        }
+
+    def __enter__(self) -> "Trace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=exc_type.__name__ if exc_type is not None else None)
+        return False
+
+
+class _OtlpExporter:
+    """Replays finished traces into an OpenTelemetry tracer provider that exports over OTLP"""
+
+    def __init__(self, provider, otel_trace, status_type):
+        self.provider = provider
+        self.tracer = provider.get_tracer(__name__)
+        self.otel_trace = otel_trace
+        self.status_type = status_type
+
+    @classmethod
+    def create(cls, config: TracingConfig) -> Optional["_OtlpExporter"]:
+        try:
+            from opentelemetry import trace as otel_trace
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.trace import Status, StatusCode
+        except ImportError:
+            logger.warning("⚠️ OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk / the OTLP exporter aren't installed")
+            return None
+
+        provider = TracerProvider(resource=Resource.create({'service.name': config.service_name}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=config.otlp_endpoint)))
+        logger.info(f"📡 Exporting traces over OTLP to {config.otlp_endpoint}")
+        return cls(provider, otel_trace, lambda error: Status(StatusCode.ERROR, error))
+
+    @staticmethod
+    def _attributes(span: Span) -> Dict[str, Any]:
+        return {
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in span.attributes.items() if value is not None
+        }
+
+    def export(self, trace: Trace):
+        with trace._lock:
+            spans = [trace.root] + sorted(trace.spans, key=lambda s: s.start)
+        # parents start before their children, so each parent exists by the time it's needed
+        started = {}
+        for span in spans:
+            parent = started.get(id(span.parent)) if span.parent is not None else None
+            context = self.otel_trace.set_span_in_context(parent) if parent is not None else None
+            started[id(span)] = self.tracer.start_span(
+                span.name, context=context, start_time=span.start_ns, attributes=self._attributes(span)
+            )
+        for span in spans:
+            otel_span = started[id(span)]
+            if span.error:
+                otel_span.set_status(self.status_type(span.error))
+            otel_span.end(end_time=span.start_ns + int(span.duration * 1e9))
+
+    def shutdown(self):
+        self.provider.shutdown()
+
+
+class Tracer:
+    """Starts traces, keeps recent breakdowns per session and exports finished traces"""
+
+    def __init__(self, config: Optional[TracingConfig] = None):
+        self.config = config or TracingConfig.from_env()
+        self.enabled = self.config.enabled
+        self._sessions: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exporter = _OtlpExporter.create(self.config) if self.enabled and self.config.otlp_endpoint else None
+
+    def start_trace(self, name: str, session_id: Optional[str] = None) -> Trace:
+        """
+        Start a trace for one request and make it current.
+        Use it as a context manager, or call finish() on it when the request is done.
+        """
+        trace = Trace(name, session_id, max_spans=self.config.max_spans, tracer=self)
+        if self.enabled:
+            trace.activate()
+        return trace
+
+    def _finished(self, trace: Trace):
+        summary = trace.summary()
+        if trace.session_id:
+            with self._lock:
+                traces = self._sessions.pop(trace.session_id, [])
+                traces.append(summary)
+                self._sessions[trace.session_id] = traces[-MAX_TRACES_PER_SESSION:]
+                while len(self._sessions) > self.config.max_sessions:
+                    self._sessions.popitem(last=False)
+
+        stages = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in list(summary['stages'].items())[:8])
+        logger.info(f"⏱️ [TRACE] {trace.name} {summary['total_seconds']:.2f}s (session: {trace.session_id}): {stages or 'no spans'}")
+
+        if self._exporter is not None:
+            try:
+                self._exporter.export(trace)
+            except Exception as e:
+                logger.warning(f"⚠️ OTLP trace export failed: {e}")
+
+    def session_timings(self, session_id: str) -> List[Dict[str, Any]]:
+        """Breakdowns of the session's recent traces, oldest first"""
+        with self._lock:
+            return list(self._sessions.get(session_id, []))
+
+    def shutdown(self):
+        if self._exporter is not None:
+            self._exporter.shutdown()
+            self._exporter = None
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, if any"""
+    return _current_span.get()
+
+
+def _open_span(name: str, attributes: Dict[str, Any]) -> Optional[Span]:
+    """A new child of the current span (not made current), or None with tracing disabled"""
+    if not get_tracer().enabled:
+        return None
+    parent = _current_span.get()
+    return Span(name, parent=parent, trace=parent.trace if parent is not None else None, attributes=attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a child of the current span:
+
+        with span("search.semantic", limit=limit):
+            ...
+
+    Outside a trace the span is still observed in the metrics, just not part of a tree.
+    """
+    current = _open_span(name, attributes)
+    if current is None:
+        yield None
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _reset(token)
+        current.finish()
+
+
+def traced(name: str):
+    """Decorator form of span() for sync, async and async generator functions"""
+    def decorator(func: Callable):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                # The span covers the whole stream, not just the first item. It's only
+                # current while the generator runs: the consumer's code between items
+                # isn't part of it, and spans the generator leaves open across a yield
+                # are current again when it resumes, as if it had its own context.
+                agen = func(*args, **kwargs)
+                current = _open_span(name, {})
+                inside = current if current is not None else _current_span.get()
+                try:
+                    while True:
+                        token = _current_span.set(inside)
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        except Exception as e:
+                            if current is not None:
+                                current.error = type(e).__name__
+                            raise
+                        finally:
+                            inside = _current_span.get()
+                            _reset(token)
+                        yield item
+                finally:
+                    token = _current_span.set(inside)
+                    try:
+                        await agen.aclose()
+                    finally:
+                        _reset(token)
+                        if current is not None:
+                            current.finish()
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return sync_wrapper
+
+    return decorator
+
+
+# Global tracer
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get global tracer instance"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def start_trace(name: str, session_id: Optional[str] = None) -> Trace:
+    """Start a trace for one request on the global tracer"""
+    return get_tracer().start_trace(name, session_id)
+
+
+def get_session_timings(session_id: str) -> List[Dict[str, Any]]:
+    """Per-stage latency breakdowns of a session's recent requests"""
+    return get_tracer().session_timings(session_id)
+
+
+def shutdown_tracing():
+    """Flush and stop the OTLP exporter, if one was started"""
+    if _tracer is not None:
+        _tracer.shutdown()
@@ -50,6 +50,7 @@ CREATE TABLE IF NOT EXISTS event (
     
     -- Vector embedding for semantic search (384 dimensions for all-MiniLM-L6-v2)
     embedding vector(384),
+    vibe TEXT,                             -- Predicted vibe(s), classified at ingest
     
     -- Additional metadata
     metadata JSONB DEFAULT '{}'::jsonb,
@@ -154,7 +155,10 @@ CREATE INDEX IF NOT EXISTS idx_location_coords ON location (lat, lon);
 -- Indexes for category relationships
 CREATE INDEX IF NOT EXISTS idx_event_category_link_event ON event_category_link (event_id);
 CREATE INDEX IF NOT EXISTS idx_event_category_link_category ON event_category_link (category_id);
-CREATE INDEX IF NOT EXISTS idx_event_category_name ON event_category (name);
+-- Category names are unique (bulk ingest upserts with ON CONFLICT (name)); the old
+-- non-unique idx_event_category_name is dropped so it can't shadow the unique one
+DROP INDEX IF EXISTS idx_event_category_name;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_event_category_name ON event_category (name);
 
 -- Vector similarity search index using HNSW (Hierarchical Navigable Small World)
 -- This enables fast approximate nearest neighbor search
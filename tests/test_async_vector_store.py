@@ -0,0 +1,147 @@
+"""
+Tests for the async vector store on a (fake) AsyncConnectionPool
+"""
+
+import sys
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.db_config import DatabaseConfig
+from server.tools import async_vector_store
+from server.tools.postgresql_vector_store import PostgreSQLVectorStore
+from server.tools.async_vector_store import AsyncPostgreSQLVectorStore, as_async_vector_store
+
+QUERY_DELAY = 0.2
+
+
+def make_row(event_id):
+    return (event_id, f"Event {event_id}", "desc", "Ottawa", 20.0, 1, 60, True, False,
+            "", "", 4.5, 10, "Venue", "1 Main St", 0.8, None, ["Dining"])
+
+
+class FakeAsyncCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.log.append(sql)
+        if "FROM event e" in sql:
+            await asyncio.sleep(QUERY_DELAY)  # database I/O
+            self.rows = [make_row(1), make_row(2)]
+        elif "COUNT(*)" in sql:
+            self.rows = [(5, 6, 7, 8)]
+
+    async def fetchall(self):
+        return self.rows
+
+    async def fetchone(self):
+        return self.rows[0]
+
+
+class FakePool:
+    def __init__(self):
+        self.log = []
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = type("FakeConn", (), {"cursor": lambda _self: FakeAsyncCursor(self.log)})()
+        yield conn
+
+
+class FakeEmbedder:
+    async def encode_async(self, text):
+        return np.zeros(384, dtype=np.float32)
+
+    def get_stats(self):
+        return {}
+
+
+@pytest.fixture
+def async_store():
+    store = PostgreSQLVectorStore.__new__(PostgreSQLVectorStore)
+    store.model = object()
+    store.model_name = "fake"
+    store.embedder = FakeEmbedder()
+    store.local_index = None
+    store.use_fallback = False
+    async_store = AsyncPostgreSQLVectorStore(store)
+    async_store.pool = FakePool()
+    return async_store
+
+
+class TestAsyncVectorStore:
+    def test_search_results(self, async_store):
+        """Rows come back in the same shape as the sync simple search"""
+        results = asyncio.run(async_store.search("romantic dinner", top_k=2, city="Ottawa"))
+        assert [r["id"] for r in results] == ["event_1", "event_2"]
+        assert results[0]["categories"] == ["Dining"]
+        assert any("set_config" in sql for sql in async_store.pool.log)
+
+    def test_concurrent_searches_overlap(self, async_store):
+        """Database waits overlap instead of blocking the loop one after another"""
+        async def run():
+            return await asyncio.gather(*(async_store.search(f"query {i}") for i in range(5)))
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+        assert all(len(r) == 2 for r in results)
+        assert elapsed < QUERY_DELAY * 2
+
+    def test_get_stats(self, async_store):
+        """Counts come from a single query"""
+        stats = asyncio.run(async_store.get_stats())
+        assert stats["postgresql_total_events"] == 6
+        assert stats["postgresql_categories"] == 8
+
+    def test_wraps_sync_store(self, async_store):
+        """Search engines handed a sync store get the async wrapper"""
+        wrapped = as_async_vector_store(async_store.store)
+        assert isinstance(wrapped, AsyncPostgreSQLVectorStore)
+        assert wrapped.store is async_store.store
+        assert as_async_vector_store(None) is None
+
+    def test_pool_gets_credentials_as_keywords(self, async_store, monkeypatch):
+        """A password with URL characters reaches psycopg unchanged"""
+        opened = {}
+
+        class RecordingPool:
+            def __init__(self, conninfo="", **kwargs):
+                opened["conninfo"] = conninfo
+                opened.update(kwargs)
+
+            async def open(self):
+                pass
+
+        config = DatabaseConfig.__new__(DatabaseConfig)
+        config.connection_params = {"user": "app", "password": "p@ss:w/rd#1", "host": "db", "dbname": "dates"}
+        async_store.store.db_config = config
+        async_store.pool = None
+        monkeypatch.setattr(async_vector_store, "AsyncConnectionPool", RecordingPool, raising=False)
+        monkeypatch.setattr(async_vector_store, "register_vector_async", None, raising=False)
+
+        asyncio.run(async_store._get_pool())
+        assert opened["conninfo"] == ""
+        assert opened["kwargs"]["password"] == "p@ss:w/rd#1"
+
+    def test_connection_string_escapes_credentials(self):
+        """The URL form percent-encodes the user and password"""
+        config = DatabaseConfig.__new__(DatabaseConfig)
+        config.user, config.password = "app", "p@ss:w/rd#1"
+        config.host, config.port, config.database = "db", 5432, "dates"
+        assert config.connection_string == "postgresql://app:p%40ss%3Aw%2Frd%231@db:5432/dates"
@@ -0,0 +1,172 @@
+"""
+Tests for the COPY-based bulk ingest path
+"""
+
+import sys
+import os
+import asyncio
+import io
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from server.tools.bulk_ingest import (
+    bulk_save, bulk_save_async, build_copy_payloads, COPY_EVENT_SQL, COPY_CATEGORY_SQL,
+    STAGE_EVENT_COLUMNS, RESOLVE_SQL, LINK_SQL, UPDATE_EVENTS_SQL, INSERT_EVENTS_SQL
+)
+from server.tools.postgresql_vector_store import PostgreSQLVectorStore
+
+
+def make_ideas(n):
+    return [
+        {
+            "id": f"event_{i}" if i % 2 else f"new_{i}",
+            "title": f"Idea {i}",
+            "description": "Line one\nline\ttwo \\ done",
+            "city": "Ottawa",
+            "venue_name": f"Venue {i % 3}",
+            "address": "1 Main St",
+            "categories": ["Dining", "Dining", "Outdoor", ""],
+            "metadata": {"note": "tab\there"},
+        }
+        for i in range(n)
+    ]
+
+
+class FakeCursor:
+    """Records statements; the event writes report rowcounts like PostgreSQL would"""
+
+    def __init__(self, existing_ids=()):
+        self.existing_ids = {str(i) for i in existing_ids}
+        self.executed = []
+        self.copies = []
+        self.staged_ids = []
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql == UPDATE_EVENTS_SQL:
+            self.rowcount = len(set(self.staged_ids) & self.existing_ids)
+        elif sql == INSERT_EVENTS_SQL:
+            self.rowcount = self.staged_ids.count("\\N")
+
+    def copy_expert(self, sql, file):
+        payload = file.read()
+        self.copies.append((sql, payload))
+        if sql == COPY_EVENT_SQL:
+            self.staged_ids = [row[1] for row in copy_rows(payload)]
+
+
+class FakeAsyncCopy:
+    def __init__(self, cursor, sql):
+        self.cursor, self.sql = cursor, sql
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def write(self, payload):
+        self.cursor.copy_expert(self.sql, io.StringIO(payload))
+
+
+class FakeAsyncCursor(FakeCursor):
+    """The psycopg 3 side: awaitable execute and copy() as an async context manager"""
+
+    async def execute(self, sql, params=None):
+        FakeCursor.execute(self, sql, params)
+
+    def copy(self, sql):
+        return FakeAsyncCopy(self, sql)
+
+
+def copy_rows(payload):
+    return [line.split("\t") for line in payload.splitlines()]
+
+
+class TestCopyPayloads:
+    def test_event_rows(self):
+        """One escaped COPY line per idea, with the stage column layout"""
+        ideas = make_ideas(2)
+        events, _ = build_copy_payloads(
+            ideas, np.ones((2, 4), dtype=np.float32),
+            PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values, offset=10
+        )
+        rows = copy_rows(events)
+        assert len(rows) == 2
+        assert all(len(row) == len(STAGE_EVENT_COLUMNS) for row in rows)
+
+        first = dict(zip(STAGE_EVENT_COLUMNS, rows[0]))
+        assert first["idx"] == "10"
+        assert first["event_id"] == "\\N"
+        assert first["has_location"] == "t"
+        assert first["loc_city"] == "Ottawa"
+        assert first["description"] == "Line one\\nline\\ttwo \\\\ done"
+        assert first["embedding"] == "[1,1,1,1]"
+        assert first["metadata"] == json.dumps({"note": "tab\there"}).replace("\\", "\\\\")
+
+        second = dict(zip(STAGE_EVENT_COLUMNS, rows[1]))
+        assert second["event_id"] == "1"
+
+    def test_category_rows_deduplicated(self):
+        """Empty and repeated categories are dropped per idea"""
+        _, categories = build_copy_payloads(
+            make_ideas(2), np.zeros((2, 4)),
+            PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values
+        )
+        assert copy_rows(categories) == [["0", "Dining"], ["0", "Outdoor"], ["1", "Dining"], ["1", "Outdoor"]]
+
+    def test_idea_without_location(self):
+        events, categories = build_copy_payloads(
+            [{"title": "Nowhere"}], np.zeros((1, 4)),
+            PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values
+        )
+        row = dict(zip(STAGE_EVENT_COLUMNS, copy_rows(events)[0]))
+        assert row["has_location"] == "f"
+        assert row["loc_city"] == "\\N"
+        assert categories == ""
+
+
+class TestBulkSave:
+    def test_statement_count_is_per_chunk(self):
+        """Round-trips grow with the number of chunks, not the number of ideas"""
+        cur = FakeCursor()
+        bulk_save(
+            cur, make_ideas(250), np.zeros((250, 4)),
+            PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values, chunk_size=100
+        )
+        assert len(cur.copies) == 6
+        assert [sql for sql, _ in cur.copies] == [COPY_EVENT_SQL, COPY_CATEGORY_SQL] * 3
+        assert sum(len(copy_rows(payload)) for sql, payload in cur.copies if sql == COPY_EVENT_SQL) == 250
+        assert len(cur.executed) == 3 * (3 + len(RESOLVE_SQL) + 2 + len(LINK_SQL))
+
+    def test_counts_only_matched_updates(self):
+        """Staged event ids that aren't in the event table don't count as updated"""
+        cur = FakeCursor(existing_ids=[1, 3, 5])
+        inserted, updated = bulk_save(
+            cur, make_ideas(20), np.zeros((20, 4)),
+            PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values
+        )
+        # even indexes are new ideas, odd ones reference event_1 .. event_19
+        assert inserted == 10
+        assert updated == 3
+
+    def test_async_path_runs_the_same_statements(self):
+        args = (make_ideas(250), np.zeros((250, 4)),
+                PostgreSQLVectorStore._location_values, PostgreSQLVectorStore._event_values)
+        sync_cur, async_cur = FakeCursor(existing_ids=[1, 3]), FakeAsyncCursor(existing_ids=[1, 3])
+        assert bulk_save(sync_cur, *args, chunk_size=100) == asyncio.run(bulk_save_async(async_cur, *args, chunk_size=100))
+        assert async_cur.executed == sync_cur.executed
+        assert async_cur.copies == sync_cur.copies
+
+    def test_new_locations_deduplicated_on_the_match_key(self):
+        """Staged locations that differ only by NULL vs '' would match one row, so only one is inserted"""
+        insert = next(sql for sql in RESOLVE_SQL if "INSERT INTO location" in sql)
+        match = RESOLVE_SQL[0]
+        for column in ("address", "name"):
+            assert f"COALESCE(l.{column}, '')" in match
+            assert f"COALESCE(s.loc_{column}, '')" in match
+        assert "DISTINCT ON (loc_city, COALESCE(loc_address, ''), COALESCE(loc_name, ''))" in insert
@@ -0,0 +1,98 @@
+"""
+Tests for the bounded planner caches in final/cache_manager
+"""
+
+import sys
+import os
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+
+import cache_manager
+from cache_manager import BoundedCache
+
+
+@pytest.fixture
+def events():
+    recorded = []
+    cache_manager.set_metrics_sink(lambda event, namespace, count: recorded.append((event, namespace, count)))
+    yield recorded
+    cache_manager.set_metrics_sink(None)
+    cache_manager.clear_cache()
+
+
+class TestBoundedCache:
+    def test_lru_eviction(self, events):
+        """The least recently used entry goes first once the cache is full"""
+        cache = BoundedCache('test', max_size=3, ttl=60)
+        for key in 'abc':
+            cache.set(key, key.upper())
+        cache.get('a')  # a is now the most recently used
+        cache.set('d', 'D')
+
+        assert len(cache) == 3
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+        assert cache.evictions == 1
+        assert ('eviction', 'test', 1) in events
+
+    def test_ttl_expiry(self, events):
+        """Expired entries are misses and get dropped"""
+        cache = BoundedCache('test', max_size=10, ttl=0.05)
+        cache.set('k', 1)
+        assert cache.get('k') == 1
+        time.sleep(0.06)
+        assert cache.get('k') is None
+        assert len(cache) == 0
+        assert cache.stats()['expirations'] == 1
+        assert [e for e, _, _ in events] == ['hit', 'miss']
+
+    def test_remove_expired(self):
+        """The sweeper's cleanup only removes expired entries"""
+        cache = BoundedCache('test', max_size=10, ttl=0.05)
+        cache.set('old', 1)
+        time.sleep(0.06)
+        cache.set('new', 2)
+        assert cache.remove_expired() == 1
+        assert cache.get('new') == 2
+
+    def test_concurrent_writes_stay_bounded(self):
+        """Many threads writing at once never push the cache past max_size"""
+        cache = BoundedCache('test', max_size=50, ttl=60)
+
+        def writer(offset):
+            for i in range(500):
+                cache.set(offset + i, i)
+                cache.get(offset + i // 2)
+
+        threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(cache) == 50
+        assert cache.evictions == 8 * 500 - 50
+
+
+class TestCacheManager:
+    def test_vibe_cache_round_trip(self, events):
+        """Module functions keep working on top of the bounded caches"""
+        assert cache_manager.get_cached_vibe_prediction("Cozy Cafe") is None
+        cache_manager.cache_vibe_prediction("Cozy Cafe", ['cozy'])
+        assert cache_manager.get_cached_vibe_prediction("cozy cafe") == ['cozy']
+
+        stats = cache_manager.get_cache_stats()
+        assert stats['vibe_predictions'] == 1
+        assert stats['namespaces']['vibe']['hits'] == 1
+        assert ('miss', 'vibe', 1) in events and ('hit', 'vibe', 1) in events
+
+    def test_namespaces_have_own_limits(self):
+        """Each namespace has its own size and TTL"""
+        assert cache_manager.get_cache('vibe').ttl == cache_manager.VIBE_CACHE_TTL
+        assert cache_manager.get_cache('search').ttl == cache_manager.CACHE_TTL_SECONDS
+        assert all(cache_manager.get_cache(name).max_size > 0 for name in cache_manager.NAMESPACES)
@@ -0,0 +1,149 @@
+"""
+Tests for the REST chat routes sharing one handler, and the SSE conversation stream
+"""
+
+import sys
+import os
+import json
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.api.routes import chat
+from server.config import StreamingConfig
+from server.tracing import span
+
+
+class FakeStorage:
+    def __init__(self):
+        self.messages = []
+        self.metadata = []
+
+    async def add_message(self, session_id, role, content, metadata=None):
+        self.messages.append((session_id, role, content))
+        self.metadata.append(metadata)
+
+    async def get_session_messages(self, session_id, limit, include_system):
+        return [m for m in self.messages if m[0] == session_id][:limit]
+
+
+class FakeEngine:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = []
+
+    async def run_chat(self, messages, agent_tools, session_id, constraints, user_location):
+        self.calls.append({"messages": messages, "session_id": session_id, "constraints": constraints})
+        with span("fake.generate"):
+            for i, chunk in enumerate(self.chunks):
+                if i == self.fail_after:
+                    raise RuntimeError("model went away")
+                await asyncio.sleep(0)
+                yield chunk
+
+
+class FakeHandler:
+    instances = 0
+
+    def __init__(self, chunks=("Try ", "the ", "canal ", "walk."), fail_after=None):
+        FakeHandler.instances += 1
+        self.llm_engine = FakeEngine(list(chunks), fail_after)
+        self.agent_tools = object()
+        self.chat_storage = FakeStorage()
+        self.streaming_config = StreamingConfig(max_chars=8, max_delay=1.0, max_pending=1024)
+        self.cleaned_up = False
+
+    async def cleanup(self):
+        self.cleaned_up = True
+
+
+def make_client(handler):
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.state.chat_handler = handler
+    return TestClient(app)
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+PAYLOAD = {
+    "session_id": "s1",
+    "messages": [{"role": "user", "content": "Something fun in Ottawa"}],
+    "constraints": {"city": "Ottawa"},
+}
+
+
+class TestSharedHandler:
+    def test_requests_reuse_the_app_handler(self):
+        """Every route uses the handler created at startup instead of building its own"""
+        handler = FakeHandler()
+        client = make_client(handler)
+        created = FakeHandler.instances
+
+        for _ in range(3):
+            assert client.post("/api/chat/conversation", json=PAYLOAD).status_code == 200
+        assert client.get("/api/chat/history/s1").status_code == 200
+
+        assert FakeHandler.instances == created
+        assert len(handler.llm_engine.calls) == 3
+        assert not handler.cleaned_up
+
+    def test_conversation_response_and_storage(self):
+        handler = FakeHandler()
+        response = make_client(handler).post("/api/chat/conversation", json=PAYLOAD)
+        assert response.json()["response"] == "Try the canal walk."
+        assert handler.chat_storage.messages == [
+            ("s1", "user", "Something fun in Ottawa"),
+            ("s1", "assistant", "Try the canal walk."),
+        ]
+        assert handler.llm_engine.calls[0]["constraints"]["city"] == "Ottawa"
+
+    def test_stage_timings_on_the_response_and_session(self):
+        """The per-stage breakdown is returned, stored with the assistant message and kept for the session"""
+        handler = FakeHandler()
+        client = make_client(handler)
+        timings = client.post("/api/chat/conversation", json={**PAYLOAD, "session_id": "timed"}).json()["timings"]
+        assert timings["trace"] == "chat.rest"
+        assert set(timings["stages"]) == {"fake.generate"}
+        assert timings["total_seconds"] >= timings["stages"]["fake.generate"]
+        assert handler.chat_storage.metadata[-1] == {"timings": timings["stages"]}
+
+        traces = client.get("/api/chat/session/timed/timings").json()["traces"]
+        assert traces[-1]["stages"] == timings["stages"]
+
+
+class TestConversationStream:
+    def test_deltas_then_done(self):
+        """Coalesced deltas carry the whole response; done comes after it's stored"""
+        handler = FakeHandler()
+        response = make_client(handler).post("/api/chat/conversation/stream", json=PAYLOAD)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_events(response.text)
+        deltas = [data["text"] for event, data in events if event == "delta"]
+        assert "".join(deltas) == "Try the canal walk."
+        assert len(deltas) < len(handler.llm_engine.chunks)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["session_id"] == "s1"
+        assert "fake.generate" in events[-1][1]["timings"]
+        assert handler.chat_storage.messages[-1] == ("s1", "assistant", "Try the canal walk.")
+
+    def test_failure_mid_stream_is_an_error_event(self):
+        """The 200 has already gone out, so a failure is reported in the stream and nothing is stored"""
+        handler = FakeHandler(fail_after=2)
+        response = make_client(handler).post("/api/chat/conversation/stream", json=PAYLOAD)
+        events = parse_events(response.text)
+        assert events[-1] == ("error", {"detail": "model went away"})
+        assert "done" not in [event for event, _ in events]
+        assert handler.chat_storage.messages == []
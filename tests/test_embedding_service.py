@@ -0,0 +1,120 @@
+"""
+Tests for the cached, micro-batched embedding service
+"""
+
+import sys
+import os
+import threading
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.embedding_service import EmbeddingService, normalize_text
+
+
+class FakeModel:
+    """Records every encode call; the embedding is just the text length"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts, convert_to_numpy=True):
+        with self.lock:
+            self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts])
+
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+
+@pytest.fixture
+def service(model):
+    service = EmbeddingService(model, cache_size=3, batch_window_ms=50)
+    yield service
+    service.close()
+
+
+class TestEmbeddingService:
+    def test_normalized_cache_hits(self, service, model):
+        """Repeated phrasings (any case / spacing) only hit the model once"""
+        first = service.encode("Romantic  Dinner")
+        second = service.encode("  romantic dinner ")
+        np.testing.assert_array_equal(first, second)
+        assert model.calls == [["romantic dinner"]]
+        assert service.get_stats()["hits"] == 1
+
+    def test_lru_bound(self, service, model):
+        """The cache keeps at most cache_size entries, dropping the oldest"""
+        for text in ["a", "b", "c", "d"]:
+            service.encode(text)
+        assert service.get_stats()["cache_size"] == 3
+        service.encode("a")
+        assert model.calls[-1] == ["a"]
+
+    def test_concurrent_requests_share_a_batch(self, service, model):
+        """Requests arriving within the batch window go to the model together"""
+        texts = [f"query {i}" for i in range(8)] + ["query 0"]
+        barrier = threading.Barrier(len(texts))
+        results = {}
+
+        def worker(i, text):
+            barrier.wait()
+            results[i] = service.encode(text)
+
+        threads = [threading.Thread(target=worker, args=(i, t)) for i, t in enumerate(texts)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(model.calls) < len(texts)
+        assert sum(len(call) for call in model.calls) == 8  # duplicate encoded once
+        assert all(results[i][0] == len(normalize_text(t)) for i, t in enumerate(texts))
+
+    def test_encode_async(self, service, model):
+        """Async callers are batched too and don't block the loop"""
+        async def run():
+            return await asyncio.gather(*(service.encode_async(f"date idea {i}") for i in range(5)))
+
+        vectors = asyncio.run(run())
+        assert len(vectors) == 5
+        assert len(model.calls) == 1
+
+    def test_encode_many(self, service, model):
+        """encode_many mixes cached and new texts and keeps the order"""
+        service.encode("b")
+        vectors = service.encode_many(["aaa", "b", "cc"])
+        assert vectors[:, 0].tolist() == [3, 1, 2]
+
+    def test_model_errors_reach_the_caller(self, model):
+        """A failing encode raises in every waiting caller"""
+        def broken(texts, convert_to_numpy=True):
+            raise RuntimeError("model failed")
+
+        model.encode = broken
+        service = EmbeddingService(model, batch_window_ms=1)
+        with pytest.raises(RuntimeError):
+            service.encode("anything")
+        service.close()
+
+    def test_encode_after_close_restarts_worker(self, service, model):
+        """Stores keep their service across shutdowns - a closed service still encodes"""
+        service.encode("before")
+        service.close()
+        vector = service.encode("after close", timeout=2.0)
+        assert vector[0] == len("after close")
+        service.close()
+        service.close()  # closing twice is fine
+
+    def test_cached_vectors_are_read_only(self, service, model):
+        """Every caller shares the cached array, so it can't be modified in place"""
+        vector = service.encode("shared")
+        with pytest.raises(ValueError):
+            vector[0] = 42
+        assert service.encode("shared")[0] == len("shared")
@@ -0,0 +1,139 @@
+"""
+Tests for the memory-mapped file fallback index
+"""
+
+import sys
+import os
+import pickle
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.tools import fallback_index
+from server.tools.fallback_index import FallbackIndex, get_fallback_index
+
+
+def make_ideas(n=200, seed=3):
+    rng = np.random.default_rng(seed)
+    ideas = [{
+        "id": f"idea_{i}",
+        "title": f"Idea {i}",
+        "city": ["Ottawa", "Toronto", "Montreal"][i % 3],
+        "price_tier": int(rng.integers(1, 4)),
+        "indoor": bool(i % 2),
+        "duration_min": int(rng.choice([30, 60, 120, 180])),
+    } for i in range(n)]
+    embeddings = rng.normal(size=(n, 16)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return ideas, embeddings
+
+
+def brute_force(ideas, embeddings, query, top_k, city=None, max_price_tier=None, indoor=None):
+    scored = []
+    for i, idea in enumerate(ideas):
+        if city and idea["city"].lower() != city.lower():
+            continue
+        if max_price_tier and idea["price_tier"] > max_price_tier:
+            continue
+        if indoor is not None and idea["indoor"] != indoor:
+            continue
+        scored.append((float(embeddings[i] @ query), i))
+    scored.sort(key=lambda s: -s[0])
+    return [i for _, i in scored[:top_k]]
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    fallback_index._indexes.clear()
+    return str(tmp_path / "store")
+
+
+class TestFallbackIndex:
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"city": "ottawa"},
+        {"city": "Toronto", "max_price_tier": 1},
+        {"indoor": False, "max_price_tier": 2},
+    ])
+    def test_filtered_search_matches_brute_force(self, base_path, filters):
+        """Filters apply before ranking, so filtered searches still return top_k"""
+        ideas, embeddings = make_ideas()
+        FallbackIndex.save(base_path, ideas, embeddings, "test-model")
+        index = get_fallback_index(base_path)
+        query = embeddings[7]
+
+        found = [row for row, _ in index.search(query, 10, **filters)]
+        assert found == brute_force(ideas, embeddings, query, 10, **filters)
+        assert len(found) == 10
+
+    def test_embeddings_are_memory_mapped(self, base_path):
+        """The matrix is float32 and opened with mmap"""
+        ideas, embeddings = make_ideas(20)
+        FallbackIndex.save(base_path, ideas, embeddings)
+        index = get_fallback_index(base_path)
+        assert isinstance(index.embeddings, np.memmap)
+        assert index.embeddings.dtype == np.float32
+
+    def test_loaded_once_until_files_change(self, base_path):
+        """Repeated lookups reuse the loaded index; a new save is picked up"""
+        ideas, embeddings = make_ideas(20)
+        FallbackIndex.save(base_path, ideas, embeddings)
+        first = get_fallback_index(base_path)
+        assert get_fallback_index(base_path) is first
+
+        FallbackIndex.save(base_path, ideas[:10], embeddings[:10])
+        reloaded = get_fallback_index(base_path)
+        assert reloaded is not first
+        assert len(reloaded) == 10
+
+    def test_converts_legacy_pickle(self, base_path, tmp_path):
+        """An old pickle vector store is converted on first use"""
+        ideas, embeddings = make_ideas(30)
+        legacy = str(tmp_path / "old.pkl")
+        with open(legacy, "wb") as f:
+            pickle.dump({"embeddings": embeddings, "date_ideas": ideas, "model_name": "m"}, f)
+
+        index = get_fallback_index(base_path, legacy_pickle=legacy)
+        assert len(index) == 30
+        assert index.model_name == "m"
+        assert os.path.exists(FallbackIndex.manifest_path(base_path))
+
+    def test_missing_index(self, base_path):
+        """No files means no index"""
+        assert get_fallback_index(base_path) is None
+
+    def test_keeps_current_and_previous_generation(self, base_path, tmp_path):
+        """Each save writes a new generation; only the last two stay on disk"""
+        ideas, embeddings = make_ideas(10)
+        generations = [FallbackIndex.save(base_path, ideas, embeddings) for _ in range(4)]
+
+        assert FallbackIndex.current_generation(base_path) == generations[-1]
+        on_disk = {name.split(".")[1] for name in os.listdir(tmp_path) if name.endswith(".npy")}
+        assert on_disk == set(generations[-2:])
+
+    def test_readers_never_see_mixed_generations(self, base_path):
+        """A load racing with saves always gets vectors and ideas from the same save"""
+        ideas, embeddings = make_ideas(40)
+        FallbackIndex.save(base_path, ideas, embeddings)
+        stop = threading.Event()
+
+        def writer():
+            n = 40
+            while not stop.is_set():
+                n = 20 if n == 40 else 40
+                FallbackIndex.save(base_path, ideas[:n], embeddings[:n])
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(200):
+                fallback_index._indexes.clear()
+                index = get_fallback_index(base_path)
+                assert len(index.date_ideas) == index.embeddings.shape[0]
+                assert len(index.columns["price_tier"]) == index.embeddings.shape[0]
+        finally:
+            stop.set()
+            thread.join()
@@ -0,0 +1,124 @@
+"""
+Tests for the fast intent tier in front of the zero-shot NLI model
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from server.ml import fast_intent, hybrid_router
+from server.ml.fast_intent import FastIntentClassifier, NEW_DATE_REQUEST, FOLLOW_UP_QUESTION
+from server.ml.hybrid_router import HybridRouter, IntentType
+from server.llm import engine
+
+NEW_REQUESTS = [
+    "Find me a romantic dinner in Ottawa",
+    "Can you suggest a fun thing to do saturday night",
+    "Recommend a cozy cafe",
+    "Show me something outdoorsy for a first date",
+]
+FOLLOW_UPS = [
+    "What time does it close?",
+    "Does the second one have parking",
+    "Is it vegan friendly",
+    "Do they take reservations for 8pm",
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return fast_intent.get_fast_intent_classifier()
+
+
+class NoModel:
+    """Stands in for a registry getter whose model must not be needed"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        raise AssertionError("slow model was used")
+
+
+class TestFastIntentClassifier:
+    @pytest.mark.parametrize("message", NEW_REQUESTS)
+    def test_confident_new_requests(self, classifier, message):
+        label, confidence, _ = classifier.classify(message)
+        assert label == NEW_DATE_REQUEST
+        assert confidence >= classifier.threshold
+
+    @pytest.mark.parametrize("message", FOLLOW_UPS)
+    def test_confident_follow_ups(self, classifier, message):
+        label, confidence, _ = classifier.classify(message)
+        assert label == FOLLOW_UP_QUESTION
+
+    @pytest.mark.parametrize("message", ["hmm", "asdf qwerty", "ok"])
+    def test_abstains_without_known_words(self, classifier, message):
+        """Character n-grams alone would be confident about anything - those go to NLI"""
+        assert classifier.classify(message) is None
+
+    def test_abstains_below_threshold(self, classifier):
+        strict = FastIntentClassifier(fast_intent.training_examples(), threshold=0.999)
+        assert strict.classify("I want a cheap date idea") is None
+        assert classifier.predict("I want a cheap date idea")[0] == NEW_DATE_REQUEST
+
+    def test_threshold_comes_from_model_config(self, monkeypatch):
+        monkeypatch.setenv("FAST_INTENT_THRESHOLD", "0.95")
+        assert fast_intent.build_fast_intent_classifier().threshold == 0.95
+
+    def test_single_digit_milliseconds(self, classifier):
+        start = time.perf_counter()
+        for _ in range(50):
+            classifier.classify("does the second one have parking")
+        assert (time.perf_counter() - start) / 50 < 0.01
+
+    def test_shared_through_the_registry(self, classifier):
+        assert fast_intent.get_fast_intent_classifier() is classifier
+
+
+class TestRouting:
+    def test_hybrid_router_skips_models_when_confident(self, classifier, monkeypatch):
+        nli, embedding = NoModel(), NoModel()
+        monkeypatch.setattr(hybrid_router, "get_zero_shot_classifier", nli)
+        monkeypatch.setattr(hybrid_router, "get_sentence_transformer", embedding)
+
+        intent, confidence, metadata = HybridRouter.route("Find me a romantic dinner in Ottawa")
+        assert intent == IntentType.NEW_DATE_REQUEST
+        assert metadata["stages"][-1]["stage"] == "fast"
+
+        intent, _, _ = HybridRouter.route("What time does it close?")
+        assert intent == IntentType.FOLLOW_UP_QUESTION
+        assert nli.calls == embedding.calls == 0
+
+    def test_hybrid_router_falls_through_when_unsure(self, classifier, monkeypatch):
+        monkeypatch.setattr(HybridRouter, "_stage_fast", staticmethod(lambda message: None))
+        monkeypatch.setattr(hybrid_router, "EMBEDDING_AVAILABLE", False)
+        monkeypatch.setattr(hybrid_router, "NLI_AVAILABLE", False)
+        intent, _, metadata = HybridRouter.route("something vague here")
+        assert intent == IntentType.AMBIGUOUS
+
+    def test_engine_uses_fast_tier_before_nli(self, classifier, monkeypatch):
+        nli = NoModel()
+        monkeypatch.setattr(engine, "get_zero_shot_classifier", nli)
+        scores = engine._score_intent_ml("What time does it close?")
+        assert scores["detail_question"] >= classifier.threshold
+        assert engine.is_follow_up_question("What time does it close?", []) is True
+        assert engine.is_follow_up_question("Recommend a cozy cafe", []) is False
+        assert nli.calls == 0
+
+    def test_engine_falls_back_to_nli(self, classifier, monkeypatch):
+        calls = []
+
+        def fake_nli(message, labels, multi_label=False):
+            calls.append(message)
+            return {"labels": labels, "scores": [0.7, 0.1, 0.1, 0.1]}
+
+        monkeypatch.setattr(engine, "ML_CLASSIFIER_AVAILABLE", True)
+        monkeypatch.setattr(engine, "get_zero_shot_classifier", lambda: fake_nli)
+        assert engine._score_intent_ml("hmm")["new_request"] == 0.7
+        assert calls == ["hmm"]
@@ -0,0 +1,129 @@
+"""
+Tests for the vectorized GA fitness engine
+
+BatchFitness has to give the same scores as ga_planner.calculate_fitness
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from ga_fitness import BatchFitness
+from ga_planner import calculate_fitness
+
+
+TYPES = [
+    ('italian_restaurant', 'italian_restaurant,restaurant,food'),
+    ('vietnamese_restaurant', 'vietnamese_restaurant,restaurant,food'),
+    ('bar', 'bar,establishment'),
+    ('museum', 'museum,tourist_attraction'),
+    ('cafe', 'cafe,coffee_shop,food'),
+    ('bakery', 'bakery,food'),
+    ('park', 'park'),
+    ('store', 'store'),
+]
+VIBES = ['romantic', 'casual', 'energetic', 'cozy', 'family', 'outdoors']
+
+
+def make_venues(n=60, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        vtype, all_types = TYPES[i % len(TYPES)]
+        rows.append({
+            'id': f'v{i}',
+            'name': f'Venue {i}' if i % 11 else f'Ciao Italia {i}',
+            'address': rng.choice(['123 Bank St, Ottawa', '45 Elgin St, Ottawa', '9 Main St, Gatineau']),
+            'short_address': rng.choice(['Bank St', 'Elgin St', 'Main St']),
+            'lat': 45.40 + rng.random() * 0.05,
+            'lon': -75.72 + rng.random() * 0.05,
+            'rating': round(3 + rng.random() * 2, 1),
+            'reviews_count': rng.choice([0, 5, 50, 250, 2000, np.nan]),
+            'cost': rng.choice([0, 10, 25, 40, 60]),
+            'type': vtype,
+            'all_types': all_types,
+            'primary_type_display_name': vtype.replace('_', ' ').title(),
+            'true_vibe': ', '.join(rng.sample(VIBES, 2)),
+            'reservable': rng.random() < 0.5,
+            'good_for_children': rng.random() < 0.5,
+            'outdoor_seating': rng.random() < 0.5,
+            'live_music': rng.random() < 0.5,
+            'good_for_groups': rng.random() < 0.5,
+        })
+    return pd.DataFrame(rows)
+
+
+def random_population(df, size, length, seed=3):
+    rng = random.Random(seed)
+    records = df.to_dict('records')
+    population = []
+    for _ in range(size):
+        n = rng.randint(1, length)
+        # sample with replacement sometimes so duplicates get covered too
+        if rng.random() < 0.2:
+            population.append([rng.choice(records) for _ in range(n)])
+        else:
+            population.append(rng.sample(records, n))
+    return population
+
+
+SCENARIOS = [
+    dict(budget_limit=150, target_types=['italian'], target_vibes=['romantic']),
+    dict(budget_limit=100, target_types=['museum', 'bar'], target_vibes=['energetic', 'family']),
+    dict(budget_limit=200, target_types=None, target_vibes=['outdoors'], hidden_gem=True),
+    dict(budget_limit=80, target_types=['coffee'], target_vibes=[('cozy', 0.9)],
+         location_filter='elgin'),
+    dict(budget_limit=150, target_types=None, target_vibes=None, location_filter=(45.42, -75.69)),
+    # cuisine targets are normalized (case, tuples) the same way in both engines
+    dict(budget_limit=150, target_types=['Italian'], target_vibes=None),
+    dict(budget_limit=150, target_types=[('Vietnamese', 0.8)], target_vibes=['casual']),
+]
+
+
+class TestBatchFitness:
+    @pytest.mark.parametrize("scenario", SCENARIOS)
+    def test_matches_scalar_fitness(self, scenario):
+        """Batch scores should match calculate_fitness for every individual"""
+        df = make_venues()
+        population = random_population(df, 200, 5)
+
+        fitness = BatchFitness(df, scenario['budget_limit'], scenario.get('location_filter'),
+                               scenario.get('hidden_gem', False), scenario.get('target_types'),
+                               scenario.get('target_vibes'))
+        batch = fitness.score_population(population)
+
+        expected = [calculate_fitness(ind, scenario['budget_limit'], scenario.get('location_filter'),
+                                      scenario.get('hidden_gem', False), None,
+                                      scenario.get('target_types'), scenario.get('target_vibes'))
+                    for ind in population]
+
+        np.testing.assert_allclose(batch, expected, atol=1e-6)
+
+    def test_duplicates_and_budget_score_zero(self):
+        """Duplicate venues and over-budget itineraries are hard fails"""
+        df = make_venues()
+        records = df.to_dict('records')
+        fitness = BatchFitness(df, budget_limit=0)
+        paid = [r for r in records if r['cost'] > 0][:2]
+        free = [r for r in records if r['cost'] == 0][:1]
+
+        scores = fitness.score_population([paid, free + free, free])
+        assert scores[0] == 0
+        assert scores[1] == 0
+        assert scores[2] > 0
+
+    def test_encode_pads_short_itineraries(self):
+        """Shorter itineraries are padded with -1"""
+        df = make_venues(10)
+        records = df.to_dict('records')
+        fitness = BatchFitness(df, budget_limit=500)
+        idx = fitness.encode([records[:3], records[3:4]])
+        assert idx.shape == (2, 3)
+        assert list(idx[1]) == [3, -1, -1]
@@ -0,0 +1,87 @@
+"""
+Tests for the vectorized heuristic scorer
+
+VectorizedScorer has to give the same scores as score_venue
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import random
+import pytest
+import numpy as np
+
+from config.scoring_config import ScoringConfig
+from heuristic_planner import VectorizedScorer, score_venue, run_heuristic_search
+from test_ga_fitness import make_venues
+
+
+STATES = [
+    dict(current_location=None, current_cost=0, needed_types={'italian'}, visited_types=set(),
+         current_hour=19, stop_number=0),
+    dict(current_location={'lat': 45.42, 'lon': -75.70}, current_cost=40, needed_types={'museum', 'bar'},
+         visited_types={'bar', 'italian_restaurant'}, current_hour=10, stop_number=1),
+    dict(current_location={'lat': 45.41, 'lon': -75.69}, current_cost=90, needed_types=set(),
+         visited_types={'cafe'}, current_hour=None, stop_number=2),
+]
+
+
+class TestVectorizedScorer:
+    @pytest.fixture(autouse=True)
+    def no_noise(self, monkeypatch):
+        # the random tie-breaker is drawn differently, so turn it off for comparisons
+        monkeypatch.setattr(ScoringConfig, 'RANDOMNESS_MULTIPLIER', 0.0)
+
+    @pytest.mark.parametrize("state", STATES)
+    @pytest.mark.parametrize("target_vibes,hidden_gem", [
+        (['romantic'], False), (['family', 'energetic'], True), ('outdoors', False)])
+    def test_matches_score_venue(self, state, target_vibes, hidden_gem):
+        """Array scores should match score_venue for every venue"""
+        df = make_venues(80)
+        df['similarity_score'] = np.linspace(0, 2.5, len(df))
+        scorer = VectorizedScorer(df, target_vibes, hidden_gem)
+        scores = scorer.score(state['current_location'], state['current_cost'], 100,
+                              state['needed_types'], state['visited_types'],
+                              current_hour=state['current_hour'], stop_number=state['stop_number'])
+
+        expected = [score_venue(venue, state['current_location'], state['current_cost'], target_vibes, 100,
+                                state['needed_types'], hidden_gem, state['visited_types'],
+                                current_hour=state['current_hour'], stop_number=state['stop_number'])
+                    for _, venue in df.iterrows()]
+
+        np.testing.assert_allclose(scores, expected, atol=1e-6)
+
+
+class TestRunHeuristicSearch:
+    def test_plan_respects_budget_and_uniqueness(self):
+        """Greedy plan has no repeats and stays within budget"""
+        random.seed(0)
+        plan = run_heuristic_search(make_venues(200), ['romantic'], 100, 4, target_types=['italian'])
+        ids = [v['id'] for v in plan]
+        assert len(ids) == len(set(ids))
+        assert sum(v['cost'] for v in plan) <= 100
+        assert any('italian' in v['type'] for v in plan)
+
+    def test_seeded_runs_are_reproducible(self):
+        """random.seed still controls the plan"""
+        random.seed(42)
+        first = [v['id'] for v in run_heuristic_search(make_venues(200), ['cozy'], 150, 3, randomness=0.5)]
+        random.seed(42)
+        second = [v['id'] for v in run_heuristic_search(make_venues(200), ['cozy'], 150, 3, randomness=0.5)]
+        assert first == second
+
+    def test_should_stop_ends_search_early(self):
+        """The planner pool's cancel check is polled before every step"""
+        random.seed(0)
+        calls = []
+
+        def stop_after_two():
+            calls.append(1)
+            return len(calls) > 2
+
+        plan = run_heuristic_search(make_venues(200), ['cozy'], 150, 5, randomness=0, should_stop=stop_after_two)
+        assert len(plan) == 1
+        assert run_heuristic_search(make_venues(200), ['cozy'], 150, 5, should_stop=lambda: True) == []
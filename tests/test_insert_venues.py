@@ -0,0 +1,207 @@
+"""
+Tests for the batched venue insert in db_manager
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+import numpy as np
+
+import db_manager
+
+
+class FakeModel:
+    """Records every encode call; the vector is the text length so rows can be checked"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        return np.array([[float(len(text))] * 3 for text in texts], dtype=np.float32)
+
+
+class FakeCursor:
+    """Answers the id / stored-content lookups; stored maps id -> venue as it is in the table"""
+
+    def __init__(self, stored):
+        self.stored = stored if isinstance(stored, dict) else {i: {'id': i} for i in stored}
+        self.result = []
+        self.pruned = False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("DELETE FROM venue_changes"):
+            self.pruned = True
+            return
+        columns = [c.strip() for c in sql.split("SELECT", 1)[1].split("FROM", 1)[0].split(",")]
+        found = [self.stored[i] for i in params[0] if i in self.stored]
+        self.result = [
+            tuple(db_manager.venue_content_hash(venue) if c == 'content_hash' else venue.get(c) for c in columns)
+            for venue in found
+        ]
+
+    def fetchall(self):
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, stored=()):
+        self.cur = FakeCursor(stored)
+        self.committed = False
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def make_venues(n, start=0):
+    return [{
+        'id': f"v{i}",
+        'name': f"Venue {i % 7}",
+        'description': "" if i % 5 == 0 else f"A place number {i}",
+        'rating': 4.0,
+    } for i in range(start, start + n)]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    state = {'model': FakeModel(), 'statements': [], 'conn': FakeConnection()}
+
+    def fake_execute_values(cur, sql, rows, page_size=100):
+        state['statements'].append((sql, list(rows)))
+
+    monkeypatch.setattr(db_manager, '_embedding_model', state['model'])
+    monkeypatch.setattr(db_manager, 'get_connection', lambda: state['conn'])
+    monkeypatch.setattr(db_manager, 'return_connection', lambda conn: None)
+    monkeypatch.setattr(db_manager, 'execute_values', fake_execute_values)
+    return state
+
+
+class TestInsertVenues:
+    def test_one_statement_per_chunk(self, db):
+        """Round-trips grow with the number of chunks, not the number of venues"""
+        assert db_manager.insert_venues(make_venues(250), chunk_size=100) == 250
+        assert len(db['statements']) == 3
+        assert [len(rows) for _, rows in db['statements']] == [100, 100, 50]
+        assert all(len(row) == len(db_manager.VENUE_COLUMNS) for _, rows in db['statements'] for row in rows)
+        assert db['conn'].committed
+
+    def test_texts_encoded_in_batches_once_each(self, db):
+        """One encode call per chunk; repeated names and empty descriptions are encoded once"""
+        db_manager.insert_venues(make_venues(35))
+        assert len(db['model'].calls) == 1
+        texts = db['model'].calls[0]
+        assert len(texts) == len(set(texts))
+        assert "venue" in texts
+        assert sum(text.startswith("Venue ") for text in texts) == 7
+
+    def test_rows_carry_their_own_embeddings(self, db):
+        """Each row gets the vectors of its own description and name"""
+        venues = make_venues(6)
+        db_manager.insert_venues(venues)
+        rows = db['statements'][0][1]
+        for venue, row in zip(venues, rows):
+            assert row[0] == venue['id']
+            assert row[-2][0] == len(venue['description'] or "venue")
+            assert row[-1][0] == len(venue['name'])
+            assert row[db_manager.VENUE_COLUMNS.index('true_vibe')] == 'casual'
+
+    def test_existing_venues_are_not_encoded(self, db):
+        """An existing id keeps its stored row, so its text isn't embedded again"""
+        db['conn'] = FakeConnection(stored={"v1", "v2"})
+        db_manager.insert_venues(make_venues(4))
+        encoded = db['model'].calls[0]
+        assert "A place number 1" not in encoded
+        assert "A place number 3" in encoded
+
+        rows = {row[0]: row for row in db['statements'][0][1]}
+        assert rows["v1"][-2:] == (None, None)
+        assert rows["v3"][-2] is not None
+
+    def test_duplicate_ids_keep_the_last(self, db):
+        """The same id twice in one batch becomes one row (ON CONFLICT can't hit a row twice)"""
+        venues = make_venues(3) + [dict(make_venues(1)[0], name="Renamed")]
+        assert db_manager.insert_venues(venues) == 3
+        rows = db['statements'][0][1]
+        assert [row[0] for row in rows] == ["v0", "v1", "v2"]
+        assert rows[0][1] == "Renamed"
+
+    def test_empty(self, db):
+        assert db_manager.insert_venues([]) == 0
+        assert db['statements'] == []
+
+
+class TestSyncVenues:
+    def test_unchanged_venues_are_skipped(self, db):
+        """Matching content hashes mean no write and no encoding at all"""
+        venues = make_venues(5)
+        db['conn'] = FakeConnection(stored={venue['id']: dict(venue) for venue in venues})
+        stats = db_manager.sync_venues(venues)
+        assert stats == {'inserted': 0, 'updated': 0, 'unchanged': 5, 'embedded': 0}
+        assert db['statements'] == []
+        assert db['model'].calls == []
+        assert db['conn'].cur.pruned
+
+    def test_only_changed_text_is_reencoded(self, db):
+        """A rating change keeps both embeddings and the vibe; a new description re-embeds just that"""
+        venues = make_venues(3)
+        db['conn'] = FakeConnection(stored={venue['id']: dict(venue) for venue in venues})
+        venues[0] = dict(venues[0], rating=3.5)
+        venues[1] = dict(venues[1], description="Now with a patio")
+        labeled = []
+
+        stats = db_manager.sync_venues(venues, label_vibe=lambda venue: labeled.append(venue['id']) or "outdoors")
+        assert stats == {'inserted': 0, 'updated': 2, 'unchanged': 1, 'embedded': 1}
+        assert db['model'].calls == [["Now with a patio"]]
+        assert labeled == ["v1"]
+
+        rows = {row[0]: dict(zip(db_manager.VENUE_COLUMNS, row)) for row in db['statements'][0][1]}
+        assert set(rows) == {"v0", "v1"}
+        assert rows["v0"]['description_embedding'] is None and rows["v0"]['name_embedding'] is None
+        assert rows["v0"]['true_vibe'] is None
+        assert rows["v1"]['description_embedding'] == [float(len("Now with a patio"))] * 3
+        assert rows["v1"]['name_embedding'] is None
+        assert rows["v1"]['true_vibe'] == "outdoors"
+        assert rows["v1"]['content_hash'] == db_manager.venue_content_hash(venues[1])
+
+    def test_new_venues_are_embedded_and_labeled(self, db):
+        stats = db_manager.sync_venues(make_venues(2), label_vibe=lambda venue: "cozy")
+        assert stats['inserted'] == 2
+        rows = [dict(zip(db_manager.VENUE_COLUMNS, row)) for row in db['statements'][0][1]]
+        assert all(row['true_vibe'] == "cozy" and row['name_embedding'] for row in rows)
+
+    def test_upsert_keeps_stored_values_it_did_not_recompute(self):
+        """NULL embeddings / vibe in the statement mean keep what the row has"""
+        sql = db_manager.SYNC_VENUES_SQL
+        assert "true_vibe = COALESCE(EXCLUDED.true_vibe, venues.true_vibe)" in sql
+        assert "description_embedding = COALESCE(EXCLUDED.description_embedding" in sql
+        assert "content_hash = EXCLUDED.content_hash" in sql
+
+
+class TestContentHash:
+    def test_same_venue_from_dataframe_record(self):
+        """A DataFrame round trip (numpy scalars, NaN for missing floats) hashes the same"""
+        import pandas as pd
+        venue = dict(make_venues(1)[0], lat=None, serves_beer=True, reviews_count=12)
+        record = pd.DataFrame([venue, dict(venue, id="other", lat=45.1)]).to_dict('records')[0]
+        assert db_manager.venue_content_hash(record) == db_manager.venue_content_hash(venue)
+
+    def test_vibe_and_cost_are_not_content(self):
+        venue = make_venues(1)[0]
+        assert db_manager.venue_content_hash(dict(venue, true_vibe="x", cost=99)) == db_manager.venue_content_hash(venue)
+        assert db_manager.venue_content_hash(dict(venue, rating=1.0)) != db_manager.venue_content_hash(venue)
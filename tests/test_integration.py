@@ -57,6 +57,34 @@ class TestSearchEngineIntegration:
         results = await search_engine.semantic_search("romantic dinner", limit=5)
         
         assert isinstance(results, list)
+    
+    @pytest.mark.asyncio
+    async def test_semantic_search_batches_missing_vibes(self):
+        """Stored vibes are kept and the rest are classified in one batch"""
+        from server.core.search_engine import SearchEngine
+        
+        class FakeVectorStore:
+            def search(self, query, top_k):
+                return [
+                    {'title': 'Wine Bar', 'description': 'candlelit', 'predicted_vibe': 'romantic'},
+                    {'title': 'Arcade', 'description': 'games'},
+                    {'title': 'Gallery', 'description': 'modern art'},
+                ]
+        
+        class FakeMLWrapper:
+            def __init__(self):
+                self.batches = []
+            
+            def predict_vibes_batch(self, texts):
+                self.batches.append(texts)
+                return ['energetic', 'artsy']
+        
+        search_engine = SearchEngine(vector_store=FakeVectorStore())
+        search_engine.ml_wrapper = FakeMLWrapper()
+        results = await search_engine.semantic_search("date ideas", limit=3)
+        
+        assert [r['predicted_vibe'] for r in results] == ['romantic', 'energetic', 'artsy']
+        assert search_engine.ml_wrapper.batches == [['Arcade games', 'Gallery modern art']]
 
 
 class TestEnhancedLLMEngine:
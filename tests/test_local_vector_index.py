@@ -0,0 +1,217 @@
+"""
+Tests for the in-process HNSW tier in front of pgvector
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.tools.local_vector_index import LocalVectorIndex, HNSWLIB_AVAILABLE
+
+requires_hnswlib = pytest.mark.skipif(not HNSWLIB_AVAILABLE, reason="hnswlib isn't installed")
+
+DIM = 16
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def make_rows(n=300, seed=9, start_id=1):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        vector = rng.normal(size=DIM).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        rows.append((
+            start_id + i, f"Event {i}", "desc", ["Ottawa", "Toronto"][i % 2],
+            float(rng.choice([15, 50, 120])), int(rng.choice([60, 120])), bool(i % 3 == 0), False,
+            "", "", 4.0, 10, "Venue", "Addr", "romantic" if i % 5 == 0 else None,
+            ["Dining"], BASE_TIME + timedelta(minutes=i), vector
+        ))
+    return rows
+
+
+def brute_force(rows, query, top_k, city=None, max_price=None, indoor=None):
+    scored = []
+    for row in rows:
+        if city and city.lower() not in row[3].lower():
+            continue
+        if max_price is not None and row[4] > max_price:
+            continue
+        if indoor is not None and row[6] != indoor:
+            continue
+        scored.append((float(row[17] @ query), row[0]))
+    scored.sort(reverse=True)
+    return [f"event_{event_id}" for _, event_id in scored[:top_k]]
+
+
+class FakeSource:
+    """Stands in for the database queries behind build() / sync()"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def fetch(self, since=None):
+        return [r for r in self.rows if since is None or r[16] >= since]
+
+    def version(self):
+        return len(self.rows), max((r[0] for r in self.rows), default=None)
+
+    def cities(self):
+        return sorted({r[3].lower() for r in self.rows})
+
+
+@pytest.fixture
+def source():
+    return FakeSource(make_rows())
+
+
+@pytest.fixture
+def index(source):
+    index = LocalVectorIndex(db_config=None, dim=DIM, ef_search=200)
+    index._fetch = source.fetch
+    index._version = source.version
+    index._fetch_cities = source.cities
+    index.build()
+    return index
+
+
+@requires_hnswlib
+class TestLocalVectorIndex:
+    @pytest.mark.parametrize("filters,max_price", [
+        ({}, None),
+        ({"city": "ottawa"}, None),
+        ({"max_price_tier": 2, "indoor": True}, 75.0),
+    ])
+    def test_matches_brute_force(self, index, source, filters, max_price):
+        """Same top_k as an exact scan (HNSW recall is exact at this size)"""
+        query = source.rows[12][17]
+        results = index.search(query, 10, similarity_threshold=-1.0, **filters)
+        expected = brute_force(source.rows, query, 10, city=filters.get("city"),
+                               max_price=max_price, indoor=filters.get("indoor"))
+        assert [r["id"] for r in results] == expected
+
+    def test_records_match_pgvector_shape(self, index, source):
+        """Results carry the same fields as the simple pgvector search"""
+        result = index.search(source.rows[0][17], 1)[0]
+        assert result["id"] == "event_1"
+        assert result["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+        assert result["categories"] == ["Dining"]
+        assert result["predicted_vibe"] == "romantic"
+        assert result["price_tier"] == {15.0: 1, 50.0: 2, 120.0: 3}[source.rows[0][4]]
+
+    def test_null_price_matches_pgvector(self, source):
+        """A NULL price is tier 3 and never passes a max_price_tier filter, as in SQL"""
+        rows = [r[:4] + (None,) + r[5:] if r[0] == 1 else r for r in source.rows]
+        index = LocalVectorIndex(db_config=None, dim=DIM, ef_search=200)
+        index.build(rows)
+        assert index.search(rows[0][17], 1)[0]["price_tier"] == 3
+        results = index.search(rows[0][17], 10, similarity_threshold=-1.0, max_price_tier=3)
+        assert "event_1" not in [r["id"] for r in results]
+
+    def test_threshold_applies_after_top_k(self, index, source):
+        """Rows below the threshold are dropped from the top_k, not replaced"""
+        results = index.search(source.rows[0][17], 5, similarity_threshold=0.99)
+        assert [r["id"] for r in results] == ["event_1"]
+
+    def test_too_selective_filter_falls_back(self, source):
+        """If filtering leaves too few candidates, pgvector has to answer"""
+        index = LocalVectorIndex(db_config=None, dim=DIM)
+        index.build(make_rows(2000))
+        assert index.search(source.rows[0][17], 10, city="nowhere") is None
+
+    def test_small_index_filters_exhaustively(self, index, source):
+        """When every row has been checked the (short) answer is exact"""
+        assert index.search(source.rows[0][17], 10, city="nowhere") == []
+
+    def test_uncovered_city_falls_back(self, source):
+        """An index limited to hot cities doesn't answer for other cities"""
+        index = LocalVectorIndex(db_config=None, dim=DIM, cities=["Ottawa"])
+        index._fetch_cities = source.cities
+        index.build([r for r in source.rows if r[3] == "Ottawa"])
+        assert index.search(source.rows[0][17], 5, city="Toronto") is None
+        assert index.search(source.rows[0][17], 5) is None
+        assert index.search(source.rows[0][17], 5, city="ottawa") is not None
+
+    def test_sync_adds_and_updates(self, index, source):
+        """Changed rows are re-read and new rows added without a rebuild"""
+        new_rows = make_rows(5, seed=1, start_id=1000)
+        new_rows = [r[:16] + (BASE_TIME + timedelta(days=1),) + r[17:] for r in new_rows]
+        source.rows.extend(new_rows)
+        before = index._index
+
+        assert index.sync() >= 5
+        assert len(index) == len(source.rows)
+        assert index._index is before
+        assert index.search(new_rows[0][17], 1)[0]["id"] == "event_1000"
+
+    def test_sync_rebuilds_after_delete(self, index, source):
+        """A deleted row disappears via a full rebuild"""
+        deleted = source.rows.pop(0)
+        index.sync()
+        assert len(index) == len(source.rows)
+        assert index.search(deleted[17], 1)[0]["id"] != "event_1"
+
+    def test_not_ready_returns_none(self):
+        """Until the first build finishes, searches go to pgvector"""
+        index = LocalVectorIndex(db_config=None, dim=DIM)
+        assert index.search(np.zeros(DIM), 5) is None
+
+    def test_sync_rebuilds_after_delete_and_stale_insert(self, index, source):
+        """A delete plus an insert the modified_time cursor misses still triggers a rebuild"""
+        deleted = source.rows.pop(0)
+        late = make_rows(1, seed=2, start_id=5000)[0]
+        source.rows.append(late[:16] + (BASE_TIME - timedelta(days=1),) + late[17:])
+
+        index.sync()
+        assert len(index) == len(source.rows)
+        assert index.search(late[17], 1)[0]["id"] == "event_5000"
+        assert index.search(deleted[17], 1)[0]["id"] != "event_1"
+
+
+class TestCityRouting:
+    """covers() decides whether the index answers or pgvector does - no hnswlib needed"""
+
+    def make_index(self, cities, known_cities):
+        index = LocalVectorIndex(db_config=None, dim=DIM, cities=cities)
+        index._fetch_cities = lambda: known_cities
+        index._refresh_cities()
+        return index
+
+    def test_all_cities_loaded_covers_everything(self):
+        """Without hot cities every row is loaded, so any filter can be answered"""
+        index = LocalVectorIndex(db_config=None, dim=DIM)
+        assert index.covers(None)
+        assert index.covers("otta")
+
+    def test_hot_city_matches_like_sql(self):
+        """Case-insensitive substring match, like city ILIKE '%city%'"""
+        index = self.make_index(["Ottawa"], ["ottawa", "toronto"])
+        assert index.covers("Ottawa")
+        assert index.covers("TAWA")
+        assert not index.covers("Toronto")
+        assert not index.covers(None)
+
+    def test_substring_of_unindexed_city_goes_to_pgvector(self):
+        """"Ottawa" also matches Ottawa-Gatineau rows in SQL, which the index doesn't hold"""
+        index = self.make_index(["Ottawa"], ["ottawa", "ottawa-gatineau"])
+        assert not index.covers("ottawa")
+
+        both = self.make_index(["Ottawa", "Ottawa-Gatineau"], ["ottawa", "ottawa-gatineau"])
+        assert both.covers("ottawa")
+
+    def test_unknown_city_and_wildcards_go_to_pgvector(self):
+        """No known match (maybe a new city) or LIKE wildcards aren't answered locally"""
+        index = self.make_index(["Ottawa"], ["ottawa"])
+        assert not index.covers("Kingston")
+        assert not index.covers("Ott_wa")
+        assert not LocalVectorIndex(db_config=None, dim=DIM).covers("%")
+
+    def test_search_routes_uncovered_filters(self):
+        """search() returns None (use pgvector) before touching the index"""
+        index = self.make_index(["Ottawa"], ["ottawa", "ottawa-gatineau"])
+        index._index = object()
+        assert index.search(np.zeros(DIM), 5, city="ottawa") is None
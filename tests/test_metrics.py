@@ -0,0 +1,283 @@
+"""
+Tests for the histogram-backed MetricsCollector and its Prometheus exposition
+"""
+
+import sys
+import os
+import asyncio
+import random
+import socket
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from server import metrics as metrics_module
+from server.interceptors import _timed_behavior
+from server.metrics import Histogram, MetricsCollector, LATENCY_BUCKETS, SIZE_BUCKETS, buckets_for
+from server.middleware import MetricsMiddleware
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    """A fresh collector behind get_metrics()"""
+    collector = MetricsCollector()
+    monkeypatch.setattr(metrics_module, "_metrics", collector)
+    return collector
+
+
+def parse_prometheus(text):
+    """{series (name plus labels): value} for every sample line"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+class TestHistogram:
+    def test_quantiles_land_in_the_right_bucket(self):
+        """Each estimate is within the bucket holding the true percentile"""
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-2.5, 1.0) for _ in range(20000))
+        histogram = Histogram(LATENCY_BUCKETS)
+        for value in values:
+            histogram.observe(value)
+
+        bounds = [0.0] + list(LATENCY_BUCKETS) + [float("inf")]
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            upper = next(i for i, bound in enumerate(bounds) if bound >= exact)
+            assert bounds[upper - 1] <= histogram.quantile(q) <= bounds[upper]
+
+    def test_estimates_stay_within_observed_range(self):
+        histogram = Histogram(LATENCY_BUCKETS)
+        for value in (0.2, 0.21, 0.22):
+            histogram.observe(value)
+        assert 0.2 <= histogram.quantile(0.5) <= 0.22
+        assert histogram.quantile(0.99) <= 0.22
+
+        histogram.observe(500.0)  # past the last bucket
+        assert histogram.quantile(0.99) == pytest.approx(500.0, rel=0.05)
+
+    def test_memory_does_not_grow_with_samples(self):
+        histogram = Histogram(LATENCY_BUCKETS)
+        for i in range(100000):
+            histogram.observe(i / 1000.0)
+        assert len(histogram.counts) == len(LATENCY_BUCKETS) + 1
+        assert histogram.count == 100000
+
+    def test_empty(self):
+        assert Histogram().quantile(0.5) is None
+        assert Histogram().summary()["count"] == 0
+
+    def test_buckets_follow_the_unit(self):
+        assert buckets_for("chat.stream.ttfb_seconds") is LATENCY_BUCKETS
+        assert buckets_for("chat.stream.messages") is SIZE_BUCKETS
+
+
+class TestMetricsCollector:
+    def test_request_percentiles_per_endpoint(self):
+        metrics = MetricsCollector()
+        for i in range(100):
+            metrics.record_request("GET /a", 0.01 * (i + 1), 200)
+        metrics.record_request("GET /b", 0.5, 503)
+
+        result = metrics.get_metrics()
+        a = result["response_times"]["GET /a"]
+        assert a["count"] == 100
+        assert a["avg"] == pytest.approx(0.505)
+        assert a["p50"] == pytest.approx(0.5, abs=0.05)
+        assert a["p99"] == pytest.approx(0.99, abs=0.1)
+        assert result["average_response_times"]["GET /b"] == 0.5
+        assert result["total_errors"] == 1
+
+    def test_api_call_latency_and_errors(self):
+        metrics = MetricsCollector()
+        metrics.record_api_call("openai", 0.4)
+        metrics.record_api_call("openai", 1.2, error=True)
+        metrics.record_api_call("serpapi")
+        result = metrics.get_metrics()
+        assert result["api_calls"] == {"openai": 2, "serpapi": 1}
+        assert result["api_errors"] == {"openai": 1}
+        assert result["api_response_times"]["openai"]["max"] == 1.2
+        assert "serpapi" not in result["api_response_times"]
+
+    def test_concurrent_updates_are_not_lost(self):
+        metrics = MetricsCollector()
+
+        def work():
+            for _ in range(5000):
+                metrics.increment_counter("planner.completed")
+                metrics.observe("planner.genetic.seconds", 0.1)
+                metrics.record_request("Chat", 0.1, 200)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result = metrics.get_metrics()
+        assert result["counters"]["planner.completed"] == 40000
+        assert result["observations"]["planner.genetic.seconds"]["count"] == 40000
+        assert result["total_requests"] == 40000
+
+    def test_track_api_call_times_and_counts_failures(self, collector):
+        @metrics_module.track_api_call("places")
+        async def lookup(fail):
+            if fail:
+                raise RuntimeError("quota")
+            return "ok"
+
+        assert asyncio.run(lookup(False)) == "ok"
+        with pytest.raises(RuntimeError):
+            asyncio.run(lookup(True))
+        assert collector.api_calls["places"] == 2
+        assert collector.api_errors["places"] == 1
+        assert collector.api_times["places"].count == 2
+
+    def test_reset(self):
+        metrics = MetricsCollector()
+        metrics.record_request("GET /a", 0.1, 500)
+        metrics.observe("x.seconds", 1.0)
+        metrics.reset()
+        result = metrics.get_metrics()
+        assert result["response_times"] == {} and result["observations"] == {}
+        assert result["total_requests"] == 0
+
+
+class TestPrometheus:
+    def test_exposition_format(self):
+        metrics = MetricsCollector()
+        metrics.record_request("GET /api/chat/history/{session_id}", 0.02, 200)
+        metrics.record_request("GET /api/chat/history/{session_id}", 3.0, 500)
+        metrics.record_api_call("openai", 0.3)
+        metrics.increment_counter("planner.completed", 3)
+        metrics.set_gauge("planner.queue_depth", 2)
+        metrics.observe("span.search.semantic.seconds", 0.04)
+
+        text = metrics.render_prometheus()
+        samples = parse_prometheus(text)
+        endpoint = 'endpoint="GET /api/chat/history/{session_id}"'
+
+        assert "# TYPE ai_orchestrator_request_duration_seconds histogram" in text
+        assert samples[f'ai_orchestrator_request_duration_seconds_bucket{{{endpoint},le="0.025"}}'] == 1
+        assert samples[f'ai_orchestrator_request_duration_seconds_bucket{{{endpoint},le="+Inf"}}'] == 2
+        assert samples[f"ai_orchestrator_request_duration_seconds_count{{{endpoint}}}"] == 2
+        assert samples[f"ai_orchestrator_request_duration_seconds_sum{{{endpoint}}}"] == pytest.approx(3.02)
+        assert samples[f"ai_orchestrator_request_errors_total{{{endpoint}}}"] == 1
+        assert samples['ai_orchestrator_api_call_duration_seconds_count{api="openai"}'] == 1
+        assert samples["ai_orchestrator_planner_completed_total"] == 3
+        assert samples["ai_orchestrator_planner_queue_depth"] == 2
+        assert samples['ai_orchestrator_span_search_semantic_seconds_bucket{le="0.05"}'] == 1
+
+    def test_buckets_are_cumulative(self):
+        metrics = MetricsCollector()
+        for value in (0.001, 0.2, 0.2, 9.0):
+            metrics.observe("chat.stream.ttfb_seconds", value)
+        buckets = [
+            value for series, value in parse_prometheus(metrics.render_prometheus()).items()
+            if series.startswith("ai_orchestrator_chat_stream_ttfb_seconds_bucket")
+        ]
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == 4
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsCollector()
+        metrics.record_api_call('odd"api\\', 0.1)
+        assert 'api="odd\\"api\\\\"' in metrics.render_prometheus()
+
+
+class TestEndpoints:
+    def test_middleware_records_route_templates(self, collector):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        @app.get("/stream")
+        async def stream():
+            async def body():
+                for _ in range(3):
+                    await asyncio.sleep(0.02)
+                    yield "x"
+            return StreamingResponse(body())
+
+        client = TestClient(app)
+        for item_id in range(5):
+            client.get(f"/items/{item_id}")
+        client.get("/items/not-a-number")
+        client.get("/nope")
+        client.get("/stream")
+
+        times = collector.get_metrics()["response_times"]
+        assert times["GET /items/{item_id}"]["count"] == 6
+        assert times["GET unmatched"]["count"] == 1
+        assert times["GET /stream"]["max"] >= 0.06  # timed to the last chunk, not the headers
+        assert collector.request_errors["GET /items/{item_id}"] == 1
+
+    def test_fastapi_metrics_endpoint(self, collector):
+        from server.api.app import create_app
+
+        client = TestClient(create_app())
+        client.get("/api/health/does-not-exist")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "ai_orchestrator_request_duration_seconds_count" in response.text
+        assert 'endpoint="GET /metrics"' not in response.text
+
+    def test_sidecar_server_for_grpc(self, collector):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        collector.increment_counter("planner.completed")
+        server = metrics_module.start_metrics_server(port, host="127.0.0.1")
+        try:
+            assert server is not None
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                body = response.read().decode()
+            assert "ai_orchestrator_planner_completed_total 1" in body
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/other", timeout=5)
+        finally:
+            metrics_module.shutdown_metrics_server()
+
+    def test_sidecar_disabled_with_port_zero(self):
+        assert metrics_module.start_metrics_server(0) is None
+
+
+class TestGrpcInterceptor:
+    def test_unary_and_streaming_methods_are_timed(self, collector):
+        async def unary(request, context):
+            await asyncio.sleep(0.01)
+            return "pong"
+
+        async def stream(request, context):
+            for chunk in ("a", "b"):
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def failing(request, context):
+            raise RuntimeError("boom")
+
+        async def run():
+            assert await _timed_behavior("/svc/HealthCheck", unary)(None, None) == "pong"
+            assert [c async for c in _timed_behavior("/svc/Chat", stream)(None, None)] == ["a", "b"]
+            with pytest.raises(RuntimeError):
+                await _timed_behavior("/svc/KillChat", failing)(None, None)
+
+        asyncio.run(run())
+        times = collector.get_metrics()["response_times"]
+        assert times["/svc/Chat"]["max"] >= 0.02
+        assert times["/svc/HealthCheck"]["count"] == 1
+        assert collector.request_errors == {"/svc/KillChat": 1}
@@ -0,0 +1,178 @@
+"""
+Tests for the shared, lazily loaded model registry
+"""
+
+import sys
+import os
+import subprocess
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from server import model_registry
+from server.model_registry import ModelRegistry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise OSError("no network")
+        return object()
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    """A new global registry whose zero-shot / sentence-transformer loaders are counted fakes"""
+    loaders = {"zero-shot": CountingLoader(), "sentence-transformer": CountingLoader()}
+    monkeypatch.setattr(model_registry, "_registry", None)
+    monkeypatch.setattr(model_registry, "TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(model_registry, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(model_registry, "_load_zero_shot", lambda name: loaders["zero-shot"]())
+    monkeypatch.setattr(model_registry, "_load_sentence_transformer", lambda name: loaders["sentence-transformer"]())
+    return loaders
+
+
+class TestModelRegistry:
+    def test_loads_on_first_use_only(self):
+        registry = ModelRegistry()
+        loader = CountingLoader()
+        registry.register("m", loader)
+        assert loader.calls == 0
+        assert not registry.is_loaded("m")
+
+        model = registry.get("m")
+        assert registry.get("m") is model
+        assert loader.calls == 1
+        assert registry.is_loaded("m")
+
+    def test_concurrent_first_use_loads_once(self):
+        """A request and the warm-up asking at the same time share one load"""
+        registry = ModelRegistry()
+        loader = CountingLoader(delay=0.05)
+        registry.register("m", loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("m"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert loader.calls == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_failed_load_backs_off_then_retries(self, monkeypatch):
+        """A model that can't load returns None without paying the failure per message, and loads once it can"""
+        clock = [1000.0]
+        monkeypatch.setattr(model_registry.time, "monotonic", lambda: clock[0])
+        registry = ModelRegistry(retry_seconds=60)
+        loader = CountingLoader(fail=True)
+        registry.register("m", loader)
+        assert registry.get("m") is None
+        assert registry.get("m") is None
+        assert loader.calls == 1
+        assert registry.stats()["m"]["error"] == "OSError: no network"
+        assert registry.stats()["m"]["loaded"] is False
+        assert not registry.is_loaded("m")
+
+        loader.fail = False
+        clock[0] += 61
+        assert registry.get("m") is not None
+        assert loader.calls == 2
+        assert registry.stats()["m"]["error"] is None
+        assert registry.is_loaded("m")
+
+    def test_models_load_concurrently(self):
+        """A slow load doesn't hold up a different model"""
+        registry = ModelRegistry()
+        registry.register("slow", CountingLoader(delay=0.5))
+        registry.register("fast", CountingLoader())
+        thread = threading.Thread(target=registry.get, args=("slow",))
+        thread.start()
+        time.sleep(0.05)
+        start = time.perf_counter()
+        registry.get("fast")
+        assert time.perf_counter() - start < 0.25
+        thread.join()
+
+    def test_unknown_model(self):
+        with pytest.raises(KeyError):
+            ModelRegistry().get("missing")
+
+    def test_register_keeps_the_first_loader(self):
+        registry = ModelRegistry()
+        first, second = CountingLoader(), CountingLoader()
+        registry.register("m", first)
+        registry.register("m", second)
+        registry.get("m")
+        assert (first.calls, second.calls) == (1, 0)
+
+    def test_warm_up_in_background_with_stats(self):
+        registry = ModelRegistry()
+        registry.register("a", CountingLoader(delay=0.01))
+        registry.register("b", CountingLoader())
+        thread = registry.warm_up()
+        thread.join(timeout=5)
+        stats = registry.stats()
+        assert stats["a"]["loaded"] and stats["b"]["loaded"]
+        assert stats["a"]["load_seconds"] >= 0.01
+        assert stats["a"]["rss_mb"] is not None
+
+    def test_warm_up_only_listed_models(self):
+        registry = ModelRegistry()
+        registry.register("a", CountingLoader())
+        registry.register("b", CountingLoader())
+        registry.warm_up(["b", "nope"]).join(timeout=5)
+        assert not registry.is_loaded("a")
+        assert registry.is_loaded("b")
+
+
+class TestSharedModels:
+    def test_one_zero_shot_pipeline_for_every_module(self, fresh_registry):
+        """The classifiers that each built their own BART-MNLI now share one"""
+        from server.ml import vibe_classifier, type_classifier
+
+        first = vibe_classifier._get_classifier()
+        assert type_classifier._get_classifier() is first
+        assert model_registry.get_zero_shot_classifier() is first
+        assert fresh_registry["zero-shot"].calls == 1
+
+    def test_sentence_transformer_shared_by_name(self, fresh_registry):
+        from server.ml import venue_similarity
+
+        model = venue_similarity._get_model()
+        assert model_registry.get_sentence_transformer("all-MiniLM-L6-v2") is model
+        assert fresh_registry["sentence-transformer"].calls == 1
+
+    def test_warm_up_models_respects_config(self, fresh_registry, monkeypatch):
+        monkeypatch.setenv("MODEL_WARMUP", "false")
+        assert model_registry.warm_up_models() is None
+
+        monkeypatch.setenv("MODEL_WARMUP", "true")
+        monkeypatch.setenv("MODEL_WARMUP_MODELS", "zero-shot:facebook/bart-large-mnli")
+        model_registry.warm_up_models().join(timeout=5)
+        assert fresh_registry["zero-shot"].calls == 1
+        assert fresh_registry["sentence-transformer"].calls == 0
+
+
+def test_importing_the_handler_loads_no_models():
+    """Import is cheap: no pipeline or sentence-transformer is built until it's needed"""
+    code = (
+        "import sys; import server.chat_handler, server.ml.hybrid_router, server.ml.intent_classifier; "
+        "print('transformers.pipelines' in sys.modules, 'sentence_transformers' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["False", "False"]
@@ -0,0 +1,228 @@
+"""
+Tests for the concurrent Google Places fetcher, against a local stub server
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+
+from places_fetcher import PlacesFetcher, TokenBucket, parse_place
+
+FIELD_MASK = "places.id,places.displayName"
+
+
+class StubPlaces:
+    """
+    Fake searchText endpoint: every query has `pages` pages of `per_page` places,
+    optional failures per query, and a fixed response delay.
+    """
+
+    def __init__(self, pages=1, per_page=3, delay=0.0, shared_ids=False):
+        self.pages = pages
+        self.per_page = per_page
+        self.delay = delay
+        self.shared_ids = shared_ids
+        self.failures = {}  # query -> list of statuses to return first
+        self.requests = []
+        self.headers = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def respond(self, body, headers):
+        with self.lock:
+            self.requests.append(body)
+            self.headers.append(headers)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            queued = self.failures.get(body["textQuery"])
+            status = queued.pop(0) if queued else 200
+        try:
+            time.sleep(self.delay)
+            if status != 200:
+                return status, {"error": {"code": status}}
+            page = int(body.get("pageToken", "0"))
+            prefix = "shared" if self.shared_ids else body["textQuery"]
+            places = [
+                {"id": f"{prefix}-{page}-{i}", "displayName": {"text": f"{body['textQuery']} {page}.{i}"}}
+                for i in range(self.per_page)
+            ]
+            data = {"places": places}
+            if page + 1 < self.pages:
+                data["nextPageToken"] = str(page + 1)
+            return 200, data
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def stub():
+    places = StubPlaces()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status, data = places.respond(body, dict(self.headers))
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    places.url = f"http://127.0.0.1:{server.server_address[1]}/v1/places:searchText"
+    yield places
+    server.shutdown()
+    server.server_close()
+
+
+def make_fetcher(stub, **kwargs):
+    options = dict(rate=1000.0, burst=1000, concurrency=8, backoff=0.01)
+    options.update(kwargs)
+    return PlacesFetcher("test-key", FIELD_MASK, url=stub.url, **options)
+
+
+def collect(fetcher, queries, **kwargs):
+    async def run():
+        return [batch async for batch in fetcher.iter_batches(queries, **kwargs)]
+    return asyncio.run(run())
+
+
+class TestPlacesFetcher:
+    def test_follows_page_tokens(self, stub):
+        """Each query is paged through with nextPageToken (which is added to the field mask)"""
+        stub.pages = 3
+        venues = asyncio.run(make_fetcher(stub).fetch_all(["cafes", "bars"]))
+        assert len(venues) == 2 * 3 * 3
+        assert {r.get("pageToken") for r in stub.requests} == {None, "1", "2"}
+        assert stub.headers[0]["X-Goog-FieldMask"] == FIELD_MASK + ",nextPageToken"
+        assert stub.headers[0]["X-Goog-Api-Key"] == "test-key"
+
+    def test_max_pages(self, stub):
+        stub.pages = 5
+        venues = asyncio.run(make_fetcher(stub, max_pages=2).fetch_all(["cafes"]))
+        assert len(venues) == 2 * 3
+
+    def test_queries_run_concurrently(self, stub):
+        """Slow responses overlap across queries, up to the concurrency limit"""
+        stub.delay = 0.1
+        queries = [f"q{i}" for i in range(8)]
+        start = time.perf_counter()
+        venues = asyncio.run(make_fetcher(stub, concurrency=4).fetch_all(queries))
+        elapsed = time.perf_counter() - start
+
+        assert len(venues) == 8 * 3
+        assert stub.max_in_flight == 4
+        assert elapsed < 8 * stub.delay * 0.6
+
+    def test_token_bucket_limits_rate(self, stub):
+        """Requests start no faster than the configured rate once the burst is used"""
+        start = time.perf_counter()
+        asyncio.run(make_fetcher(stub, rate=20.0, burst=1).fetch_all([f"q{i}" for i in range(6)]))
+        assert time.perf_counter() - start >= 5 / 20.0 * 0.9
+
+    def test_retries_rate_limits_and_server_errors(self, stub):
+        """429 and 5xx are retried; the query still returns all its places"""
+        stub.failures = {"cafes": [429, 503]}
+        fetcher = make_fetcher(stub)
+        venues = asyncio.run(fetcher.fetch_all(["cafes", "bars"]))
+        assert len(venues) == 6
+        assert fetcher.stats["retries"] == 2
+        assert fetcher.stats["failed_queries"] == 0
+
+    def test_client_errors_are_not_retried(self, stub):
+        """A 400 fails that query only, without retrying"""
+        stub.failures = {"bad": [400]}
+        fetcher = make_fetcher(stub)
+        venues = asyncio.run(fetcher.fetch_all(["bad", "bars"]))
+        assert len(venues) == 3
+        assert sum(r["textQuery"] == "bad" for r in stub.requests) == 1
+        assert fetcher.stats["failed_queries"] == 1
+
+    def test_gives_up_after_max_retries(self, stub):
+        stub.failures = {"cafes": [503] * 10}
+        fetcher = make_fetcher(stub, max_retries=2)
+        assert asyncio.run(fetcher.fetch_all(["cafes"])) == []
+        assert len(stub.requests) == 3
+
+    def test_streams_unique_batches(self, stub):
+        """Batches arrive as pages do, deduplicated across queries and against seen_ids"""
+        stub.shared_ids = True
+        stub.pages = 2
+        seen = {"shared-0-0"}
+        batches = collect(make_fetcher(stub), ["a", "b", "c"], batch_size=2, seen_ids=seen)
+        ids = [venue["id"] for batch in batches for venue in batch]
+        assert len(ids) == len(set(ids)) == 5
+        assert "shared-0-0" not in ids
+        assert all(len(batch) >= 2 for batch in batches[:-1])
+        assert seen == {f"shared-{p}-{i}" for p in range(2) for i in range(3)}
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        async def run():
+            bucket = TokenBucket(rate=50.0, burst=3)
+            start = time.perf_counter()
+            for _ in range(3):
+                await bucket.acquire()
+            burst = time.perf_counter() - start
+            for _ in range(5):
+                await bucket.acquire()
+            return burst, time.perf_counter() - start
+
+        burst, total = asyncio.run(run())
+        assert burst < 0.05
+        assert total >= 5 / 50.0 * 0.9
+
+
+def test_parse_place():
+    """Places API fields flatten into the venue record the database expects"""
+    venue = parse_place({
+        "id": "abc",
+        "displayName": {"text": "Cafe"},
+        "types": ["cafe", "food"],
+        "editorialSummary": {"text": "Cozy"},
+        "servesCoffee": True,
+        "regularOpeningHours": {"weekdayDescriptions": ["Mon: 9-5"]},
+    })
+    assert venue["name"] == "Cafe"
+    assert venue["type"] == "cafe"
+    assert venue["all_types"] == "cafe|food"
+    assert venue["description"] == "Cozy"
+    assert venue["serves_coffee"] is True
+    assert venue["serves_beer"] is False
+    assert json.loads(venue["regular_opening_hours"]) == {"weekdayDescriptions": ["Mon: 9-5"]}
+    assert venue["price_level"] == "PRICE_LEVEL_UNSPECIFIED"
+
+
+def test_fetch_and_store_writes_batches(stub, monkeypatch):
+    """fetch_and_store_venues streams each fetched batch into insert_venues"""
+    import fetch_and_store_venues
+
+    written = []
+    monkeypatch.setattr(fetch_and_store_venues.db_manager, "insert_venues", lambda venues: written.append(venues) or len(venues))
+    monkeypatch.setattr(fetch_and_store_venues, "prepare_venues", lambda venues: venues)
+    monkeypatch.setattr(fetch_and_store_venues, "SEARCH_QUERIES", ["cafes", "bars", "parks"])
+    stub.pages = 2
+
+    stored = asyncio.run(fetch_and_store_venues._fetch_and_store("key", make_fetcher(stub)))
+    assert stored == 3 * 2 * 3
+    assert sum(len(batch) for batch in written) == stored
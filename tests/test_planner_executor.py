@@ -0,0 +1,99 @@
+"""
+Tests for the planner process pool
+
+Covers the bounded queue, per-request timeouts and session cancellation
+"""
+
+import sys
+import os
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from server.planner_executor import PlannerExecutor, should_stop
+from server.exceptions import PlannerBusyError, PlannerTimeoutError, PlannerCancelledError
+
+
+# worker functions have to be importable from the spawned processes
+
+def square(x):
+    return x * x
+
+
+def wait_until_stopped(seconds):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if should_stop():
+            return 'stopped'
+        time.sleep(0.01)
+    return 'finished'
+
+
+@pytest.fixture
+def executor():
+    executor = PlannerExecutor(max_workers=1, max_queue=2, timeout_seconds=30, warm_venues=False)
+    yield executor
+    executor.shutdown()
+
+
+class TestPlannerExecutor:
+    def test_runs_in_worker(self, executor):
+        """Results come back from the worker process"""
+        result = asyncio.run(executor.run(square, 7))
+        assert result == 49
+        assert executor.get_stats()['completed'] == 1
+        assert executor.in_flight == 0
+
+    def test_rejects_when_queue_full(self, executor):
+        """Submitting past max_queue raises PlannerBusyError"""
+        async def run_test():
+            jobs = [asyncio.create_task(executor.run(wait_until_stopped, 5, session_id='s1'))
+                    for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(PlannerBusyError):
+                await executor.run(square, 2)
+            executor.cancel_session('s1')
+            await asyncio.gather(*jobs, return_exceptions=True)
+
+        asyncio.run(run_test())
+        assert executor.get_stats()['rejected'] == 1
+
+    def test_timeout_stops_worker(self, executor):
+        """A timed out job raises PlannerTimeoutError and the worker is told to stop"""
+        async def run_test():
+            with pytest.raises(PlannerTimeoutError):
+                await executor.run(wait_until_stopped, 30, timeout=0.5)
+            # the worker should notice its cancel flag and free up quickly
+            return await executor.run(square, 3, timeout=10)
+
+        assert asyncio.run(run_test()) == 9
+        assert executor.get_stats()['timeouts'] == 1
+
+    def test_cancel_session(self, executor):
+        """cancel_session cancels running and queued jobs for that session only"""
+        async def run_test():
+            running = asyncio.create_task(executor.run(wait_until_stopped, 30, session_id='killed'))
+            queued = asyncio.create_task(executor.run(wait_until_stopped, 30, session_id='killed'))
+            await asyncio.sleep(0.5)
+            assert executor.cancel_session('killed') == 2
+            assert executor.cancel_session('other') == 0
+            return await asyncio.gather(running, queued, return_exceptions=True)
+
+        results = asyncio.run(run_test())
+        assert all(isinstance(r, PlannerCancelledError) for r in results)
+
+    def test_task_cancellation_propagates(self, executor):
+        """Cancelling the awaiting task raises CancelledError (not PlannerCancelledError) and stops the worker"""
+        async def run_test():
+            task = asyncio.create_task(executor.run(wait_until_stopped, 30, session_id='gone'))
+            await asyncio.sleep(0.5)
+            executor.cancel_session('gone')
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await executor.run(square, 4, timeout=10)
+
+        assert asyncio.run(run_test()) == 16
@@ -0,0 +1,89 @@
+"""
+Tests for the venue spatial index
+
+Matrix and BallTree modes have to agree with planner_utils.haversine_distance
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+import numpy as np
+
+from spatial_index import SpatialIndex
+from planner_utils import haversine_distance
+from venue_index import VenueIndex
+from test_ga_fitness import make_venues
+
+
+def random_coords(n=300, seed=5):
+    rng = np.random.default_rng(seed)
+    return 45.30 + rng.random(n) * 0.3, -75.90 + rng.random(n) * 0.4
+
+
+@pytest.fixture(params=['matrix', 'tree'])
+def index(request):
+    lat, lon = random_coords()
+    return SpatialIndex(lat, lon, matrix_max=1000 if request.param == 'matrix' else 0)
+
+
+class TestSpatialIndex:
+    def test_modes(self):
+        """Small sets get a distance matrix, big ones don't"""
+        lat, lon = random_coords()
+        assert SpatialIndex(lat, lon, matrix_max=1000).matrix is not None
+        assert SpatialIndex(lat, lon, matrix_max=10).matrix is None
+
+    def test_pair_distances(self, index):
+        """Pair distances match the scalar haversine"""
+        a = np.array([[0, 5], [17, 250]])
+        b = np.array([[1, 5], [299, 3]])
+        dist = index.pair_distances(a, b)
+        assert dist.shape == (2, 2)
+        for i, j, d in zip(a.ravel(), b.ravel(), dist.ravel()):
+            expected = haversine_distance(index.lat[i], index.lon[i], index.lat[j], index.lon[j])
+            assert d == pytest.approx(expected, abs=1e-9)
+
+    def test_distances_from(self, index):
+        """Point distances are the same whether or not the venue row is given"""
+        rows = np.array([3, 8, 100])
+        by_point = index.distances_from(index.lat[42], index.lon[42], rows)
+        by_row = index.distances_from(index.lat[42], index.lon[42], rows, row=42)
+        np.testing.assert_allclose(by_point, by_row, atol=1e-9)
+        assert len(index.distances_from(45.42, -75.69)) == len(index)
+
+    @pytest.mark.parametrize("radius", [0.5, 2.0, 8.0])
+    def test_within_matches_brute_force(self, index, radius):
+        """Radius queries return exactly the venues within the radius"""
+        lat, lon = 45.42, -75.70
+        expected = [i for i in range(len(index))
+                    if haversine_distance(lat, lon, index.lat[i], index.lon[i]) <= radius]
+        assert list(index.within(lat, lon, radius)) == expected
+
+    def test_neighbors_excludes_self(self, index):
+        """neighbors() doesn't include the venue itself"""
+        found = index.neighbors(10, 3.0)
+        assert 10 not in found
+        assert all(haversine_distance(index.lat[10], index.lon[10], index.lat[i], index.lon[i]) <= 3.0 + 1e-9
+                   for i in found)
+
+    def test_tree_skips_missing_coordinates(self):
+        """Venues without coordinates never come back from radius queries"""
+        lat, lon = random_coords(50)
+        lat[7] = np.nan
+        index = SpatialIndex(lat, lon, matrix_max=0)
+        assert 7 not in index.within(45.45, -75.70, 100)
+
+    def test_venue_index_rebuilds_after_extend(self):
+        """Extending a VenueIndex gives it a new spatial index covering the new venues"""
+        df = make_venues(40)
+        venue_index = VenueIndex(df.iloc[:20])
+        first = venue_index.spatial()
+        assert len(first) == 20
+
+        venue_index.extend(df)
+        assert len(venue_index.spatial()) == 40
+        assert venue_index.spatial() is not first
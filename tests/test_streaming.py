@@ -0,0 +1,175 @@
+"""
+Tests for the coalescing stage between the LLM stream and the ChatDelta messages
+"""
+
+import sys
+import os
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from server.streaming import StreamCoalescer
+from server.config import StreamingConfig, parse_log_levels
+from server.metrics import MetricsCollector
+
+
+async def paced(chunks, delay=0.0):
+    for chunk in chunks:
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        yield chunk
+
+
+def run(coalescer, source, consume_delay=0.0):
+    async def consume():
+        messages = []
+        async for text in coalescer.stream(source):
+            messages.append(text)
+            if consume_delay:
+                await asyncio.sleep(consume_delay)
+        return messages
+    return asyncio.run(consume())
+
+
+TOKENS = [f"tok{i} " for i in range(200)]
+
+
+class TestStreamCoalescer:
+    def test_full_text_is_preserved(self):
+        """Coalesced messages and text() both reproduce the stream exactly"""
+        coalescer = StreamCoalescer(max_chars=64, max_delay=0.01)
+        messages = run(coalescer, paced(TOKENS))
+        assert "".join(messages) == "".join(TOKENS)
+        assert coalescer.text() == "".join(TOKENS)
+        assert coalescer.chunk_count == len(TOKENS)
+        assert coalescer.message_count == len(messages)
+
+    def test_fast_chunks_are_coalesced_by_size(self):
+        """A fast stream becomes about total/max_chars messages instead of one per token"""
+        coalescer = StreamCoalescer(max_chars=100, max_delay=1.0)
+        messages = run(coalescer, paced(TOKENS))
+        total = len("".join(TOKENS))
+        assert len(messages) <= total // 100 + 2
+        assert all(len(m) >= 100 for m in messages[1:-1])
+
+    def test_first_text_is_sent_immediately(self):
+        """The window doesn't delay time to first byte"""
+        coalescer = StreamCoalescer(max_chars=10_000, max_delay=5.0)
+
+        async def consume():
+            stream = coalescer.stream(paced(["Hello", " world"] * 3, delay=0.05))
+            first = await asyncio.wait_for(stream.__anext__(), 0.5)
+            rest = [text async for text in stream]
+            return first, rest
+
+        first, rest = asyncio.run(consume())
+        assert first == "Hello"
+        assert coalescer.time_to_first_message < 0.5
+
+    def test_slow_chunks_flush_after_the_delay(self):
+        """A pause longer than max_delay flushes what's pending instead of waiting for size"""
+        coalescer = StreamCoalescer(max_chars=10_000, max_delay=0.02)
+        messages = run(coalescer, paced(["a ", "b ", "c ", "d "], delay=0.08))
+        assert messages == ["a ", "b ", "c ", "d "]
+
+    def test_slow_consumer_gets_bigger_messages(self):
+        """While a write is blocked the reader keeps pulling, so fewer messages carry the same text"""
+        fast = StreamCoalescer(max_chars=20, max_delay=0.001)
+        slow = StreamCoalescer(max_chars=20, max_delay=0.001)
+        fast_messages = run(fast, paced(TOKENS, delay=0.001))
+        slow_messages = run(slow, paced(TOKENS, delay=0.001), consume_delay=0.05)
+        assert "".join(slow_messages) == "".join(TOKENS)
+        assert len(slow_messages) < len(fast_messages) / 2
+
+    def test_reader_stops_at_max_pending(self):
+        """Past max_pending chars the LLM stream isn't pulled until the consumer catches up"""
+        pulled = []
+
+        async def source():
+            for i in range(100):
+                pulled.append(i)
+                yield "x" * 10
+
+        coalescer = StreamCoalescer(max_chars=10, max_delay=0.0, max_pending=50)
+
+        async def consume():
+            stream = coalescer.stream(source())
+            await stream.__anext__()
+            await asyncio.sleep(0.05)  # a blocked write
+            seen = len(pulled)
+            rest = [text async for text in stream]
+            return seen, rest
+
+        seen, rest = asyncio.run(consume())
+        # what the first message carried, one full window, and the chunk waiting on it
+        assert seen <= 5 + 5 + 1
+        assert len(pulled) == 100
+
+    def test_whitespace_waits_for_text(self):
+        """Blank chunks are never sent on their own"""
+        coalescer = StreamCoalescer(max_chars=1, max_delay=0.0)
+        messages = run(coalescer, paced(["Hi", " ", "\n", "there", "  "]))
+        assert all(m.strip() for m in messages)
+        assert "".join(messages) == "Hi \nthere"
+
+    def test_upstream_error_is_raised(self):
+        async def failing():
+            yield "partial "
+            raise RuntimeError("llm failed")
+
+        coalescer = StreamCoalescer()
+        with pytest.raises(RuntimeError, match="llm failed"):
+            run(coalescer, failing())
+        assert coalescer.text() == "partial "
+
+    def test_consumer_closing_early_stops_the_reader(self):
+        """Abandoning the stream (client went away) cancels the pull from the LLM"""
+        pulled = []
+
+        async def endless():
+            while True:
+                pulled.append(1)
+                await asyncio.sleep(0.001)
+                yield "x "
+
+        async def consume():
+            stream = StreamCoalescer(max_chars=4).stream(endless())
+            await stream.__anext__()
+            await stream.aclose()
+            count = len(pulled)
+            await asyncio.sleep(0.05)
+            return count, len(pulled)
+
+        before, after = asyncio.run(consume())
+        assert after == before
+
+    def test_from_config(self, monkeypatch):
+        monkeypatch.setenv("STREAM_COALESCE_CHARS", "512")
+        monkeypatch.setenv("STREAM_COALESCE_MS", "20")
+        coalescer = StreamCoalescer.from_config(StreamingConfig.from_env())
+        assert coalescer.max_chars == 512
+        assert coalescer.max_delay == pytest.approx(0.02)
+
+
+def test_parse_log_levels():
+    """LOG_LEVELS sets hot-path loggers individually; junk entries are ignored"""
+    levels = parse_log_levels("server.chat_handler.stream=debug, server.chat_handler.request=WARNING,bad,x=NOPE")
+    assert levels == {
+        "server.chat_handler.stream": logging.DEBUG,
+        "server.chat_handler.request": logging.WARNING,
+    }
+
+
+def test_observations_summarize_samples():
+    metrics = MetricsCollector()
+    for value in (0.1, 0.3):
+        metrics.observe("chat.stream.ttfb_seconds", value)
+    summary = metrics.get_metrics()["observations"]["chat.stream.ttfb_seconds"]
+    assert summary["count"] == 2
+    assert summary["avg"] == pytest.approx(0.2)
+    assert summary["max"] == 0.3
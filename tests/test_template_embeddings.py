@@ -0,0 +1,163 @@
+"""
+Tests for the precomputed intent template matrix and batched routing in HybridRouter
+"""
+
+import sys
+import os
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.ml import hybrid_router
+from server.ml.hybrid_router import HybridRouter, IntentType, TemplateEmbeddings, load_template_embeddings
+
+
+class FakeModel:
+    """Deterministic bag-of-words vectors; records each encode call"""
+
+    dim = 64
+
+    def __init__(self):
+        self.calls = []
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().replace("?", "").split():
+            vector[zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vector
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False):
+        self.calls.append(list(texts))
+        vectors = np.array([self._vector(text) for text in texts])
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+class NoModel:
+    def __call__(self, *args, **kwargs):
+        raise AssertionError("the model was needed")
+
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+
+@pytest.fixture
+def templates(model):
+    return TemplateEmbeddings.build(model, "fake-model", HybridRouter.INTENT_TEMPLATES)
+
+
+@pytest.fixture
+def router(model, templates, monkeypatch):
+    """Embedding stage only: no fast tier, no NLI, the fake model and its template matrix"""
+    monkeypatch.setattr(HybridRouter, "_stage_fast", staticmethod(lambda message: None))
+    monkeypatch.setattr(hybrid_router, "EMBEDDING_AVAILABLE", True)
+    monkeypatch.setattr(hybrid_router, "NLI_AVAILABLE", False)
+    monkeypatch.setattr(hybrid_router, "get_sentence_transformer", lambda *args: model)
+    monkeypatch.setattr(hybrid_router, "get_template_embeddings", lambda: templates)
+    model.calls.clear()  # building the matrix above
+    return HybridRouter
+
+
+class TestTemplateEmbeddings:
+    def test_normalized_matrix_grouped_by_intent(self, templates):
+        sizes = [len(group) for group in HybridRouter.INTENT_TEMPLATES.values()]
+        assert templates.matrix.shape == (sum(sizes), FakeModel.dim)
+        assert templates.matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(templates.matrix, axis=1), 1.0)
+        assert templates.intents == list(HybridRouter.INTENT_TEMPLATES)
+        assert templates.counts == sizes
+
+    def test_scores_match_per_template_cosine(self, model, templates):
+        """The matrix product gives the same best-template similarity the per-intent loop did"""
+        messages = ["What are the hours of the museum?", "Find me a fun date idea"]
+        vectors = model.encode(messages, normalize_embeddings=True)
+        scores = templates.scores(vectors)
+        assert scores.shape == (2, len(templates.intents))
+        for row, vector in zip(scores, vectors):
+            for column, phrases in enumerate(HybridRouter.INTENT_TEMPLATES.values()):
+                expected = max(
+                    float(vector @ model.encode([phrase], normalize_embeddings=True)[0]) for phrase in phrases
+                )
+                assert row[column] == pytest.approx(expected, abs=1e-5)
+
+    def test_version_tracks_model_and_templates(self):
+        base = TemplateEmbeddings.version_for("m", HybridRouter.INTENT_TEMPLATES)
+        edited = dict(HybridRouter.INTENT_TEMPLATES)
+        edited[IntentType.NEW_DATE_REQUEST] = edited[IntentType.NEW_DATE_REQUEST] + ["Plan us a picnic"]
+        assert TemplateEmbeddings.version_for("other", HybridRouter.INTENT_TEMPLATES) != base
+        assert TemplateEmbeddings.version_for("m", edited) != base
+        assert TemplateEmbeddings.version_for("m", HybridRouter.INTENT_TEMPLATES) == base
+
+    def test_artifact_round_trip(self, templates, tmp_path):
+        path = templates.save(str(tmp_path))
+        assert os.path.basename(path) == f"intent_templates.{templates.version}.npz"
+        loaded = TemplateEmbeddings.load(path)
+        assert loaded.version == templates.version
+        assert loaded.intents == templates.intents
+        assert np.array_equal(loaded.matrix, templates.matrix)
+        assert [p for p in os.listdir(tmp_path) if p.endswith(".tmp")] == []
+
+
+class TestLoadAtBoot:
+    def test_builds_and_saves_when_missing(self, model, tmp_path, monkeypatch):
+        monkeypatch.setattr(hybrid_router, "get_sentence_transformer", lambda name: model)
+        templates = load_template_embeddings("fake-model", str(tmp_path))
+        assert len(model.calls) == 1
+        assert os.path.exists(TemplateEmbeddings.path_for(str(tmp_path), templates.version))
+
+    def test_existing_artifact_needs_no_encoding(self, templates, tmp_path, monkeypatch):
+        templates.save(str(tmp_path))
+        monkeypatch.setattr(hybrid_router, "get_sentence_transformer", NoModel())
+        loaded = load_template_embeddings("fake-model", str(tmp_path))
+        assert np.array_equal(loaded.matrix, templates.matrix)
+
+    def test_unreadable_artifact_is_rebuilt(self, model, templates, tmp_path, monkeypatch):
+        path = TemplateEmbeddings.path_for(str(tmp_path), templates.version)
+        with open(path, "wb") as f:
+            f.write(b"not an npz")
+        monkeypatch.setattr(hybrid_router, "get_sentence_transformer", lambda name: model)
+        assert np.array_equal(load_template_embeddings("fake-model", str(tmp_path)).matrix, templates.matrix)
+
+
+class TestRouting:
+    MESSAGES = [
+        "What are the hours?",
+        "Find me a romantic dinner",
+        "hi",
+        "What's 5+5",
+        "Is there parking near the venue?",
+        "Suggest a fun activity for tonight",
+    ]
+
+    def test_route_encodes_only_the_message(self, router, model):
+        """Templates are never re-encoded per message"""
+        intent, confidence, metadata = router.route("What are the hours?")
+        assert intent == IntentType.FOLLOW_UP_QUESTION
+        assert confidence == pytest.approx(1.0)
+        assert model.calls == [["What are the hours?"]]
+        assert metadata["stages"][0]["stage"] == "embedding"
+
+    def test_route_many_matches_route(self, router, model):
+        batched = router.route_many(self.MESSAGES)
+        single = [router.route(message) for message in self.MESSAGES]
+        assert [(i, round(c, 6)) for i, c, _ in batched] == [(i, round(c, 6)) for i, c, _ in single]
+        assert batched[2][0] == IntentType.INVALID
+        assert batched[3][2]["final_decision"] == "Off-topic detected"
+
+    def test_route_many_encodes_in_batches(self, router, model):
+        router.route_many(self.MESSAGES * 10, batch_size=16)
+        routed = [text for call in model.calls for text in call]
+        assert len(routed) == 40
+        assert [len(call) for call in model.calls] == [16, 16, 8]
+
+    def test_embedding_failure_is_ambiguous(self, router, monkeypatch):
+        monkeypatch.setattr(hybrid_router, "get_template_embeddings", lambda: None)
+        intent, confidence, metadata = router.route("Find me a romantic dinner")
+        assert intent == IntentType.AMBIGUOUS
+        assert "error" in metadata["stages"][0]
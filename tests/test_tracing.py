@@ -0,0 +1,293 @@
+"""
+Tests for per-request timing spans
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from server import tracing
+from server.config import TracingConfig
+from server.metrics import MetricsCollector
+from server.tracing import Tracer, span, traced, current_span
+
+
+def make_config(**overrides):
+    values = dict(enabled=True, max_spans=256, max_sessions=1000, otlp_endpoint=None, service_name="test")
+    values.update(overrides)
+    return TracingConfig(**values)
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    collector = MetricsCollector()
+    monkeypatch.setattr(tracing, "get_metrics", lambda: collector)
+    return collector
+
+
+@pytest.fixture
+def tracer(monkeypatch, metrics):
+    tracer = Tracer(make_config())
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return tracer
+
+
+def by_name(trace):
+    return {s.name: s for s in trace.spans}
+
+
+class TestSpans:
+    def test_nested_spans_form_a_tree(self, tracer):
+        with tracer.start_trace("chat", session_id="s1") as trace:
+            with span("search"):
+                with span("search.semantic", limit=5):
+                    time.sleep(0.01)
+            with span("format"):
+                pass
+
+        spans = by_name(trace)
+        assert spans["search"].parent is trace.root
+        assert spans["search.semantic"].parent is spans["search"]
+        assert spans["search.semantic"].attributes == {"limit": 5}
+        assert spans["format"].parent is trace.root
+        assert trace.breakdown()["search.semantic"] >= 0.01
+        assert list(trace.breakdown())[0] == "search"  # slowest first
+        assert current_span() is None
+
+    def test_finished_spans_are_observed(self, tracer, metrics):
+        with tracer.start_trace("chat"):
+            with span("planner.genetic"):
+                pass
+        observed = metrics.get_metrics()["observations"]
+        assert observed["span.planner.genetic.seconds"]["count"] == 1
+        assert observed["span.chat.seconds"]["count"] == 1
+
+    def test_span_outside_a_trace_only_records_the_metric(self, tracer, metrics):
+        with span("warmup") as current:
+            assert current.trace is None
+        assert metrics.get_metrics()["observations"]["span.warmup.seconds"]["count"] == 1
+
+    def test_error_is_recorded_and_raised(self, tracer):
+        with pytest.raises(ValueError):
+            with tracer.start_trace("chat") as trace:
+                with span("storage.store_message"):
+                    raise ValueError("db down")
+        assert by_name(trace)["storage.store_message"].error == "ValueError"
+        assert trace.summary()["error"] == "ValueError"
+
+    def test_tasks_and_threads_report_to_the_trace(self, tracer):
+        """Work started from a request (tasks, to_thread) inherits its context"""
+        def encode():
+            with span("encode"):
+                time.sleep(0.005)
+
+        async def search(name):
+            with span(name):
+                await asyncio.to_thread(encode)
+
+        async def handle():
+            with tracer.start_trace("chat") as trace:
+                await asyncio.gather(asyncio.create_task(search("a")), asyncio.create_task(search("b")))
+            return trace
+
+        trace = asyncio.run(handle())
+        names = sorted(s.name for s in trace.spans)
+        assert names == ["a", "b", "encode", "encode"]
+        assert {s.parent.name for s in trace.spans if s.name == "encode"} == {"a", "b"}
+
+    def test_span_count_is_bounded(self, tracer, monkeypatch):
+        tracer.config.max_spans = 3
+        with tracer.start_trace("chat") as trace:
+            for _ in range(5):
+                with span("storage.store_message"):
+                    pass
+        assert len(trace.spans) == 3
+        assert trace.dropped == 2
+
+    def test_disabled_tracing_is_a_no_op(self, monkeypatch, metrics):
+        tracer = Tracer(make_config(enabled=False))
+        monkeypatch.setattr(tracing, "_tracer", tracer)
+        with tracer.start_trace("chat", session_id="s1") as trace:
+            with span("search") as current:
+                assert current is None
+        assert trace.spans == []
+        assert tracer.session_timings("s1") == []
+        assert metrics.get_metrics()["observations"] == {}
+
+
+class TestTraced:
+    def test_sync_and_async_functions(self, tracer):
+        @traced("sync")
+        def sync():
+            return 1
+
+        @traced("async")
+        async def coro():
+            await asyncio.sleep(0)
+            return 2
+
+        async def run():
+            with tracer.start_trace("chat") as trace:
+                assert sync() == 1
+                assert await coro() == 2
+            return trace
+
+        assert set(by_name(asyncio.run(run()))) == {"sync", "async"}
+
+    def test_async_generator_span_covers_the_stream(self, tracer):
+        @traced("llm.run_chat")
+        async def run_chat():
+            for chunk in ("a", "b"):
+                await asyncio.sleep(0.01)
+                with span("chunk"):
+                    yield chunk
+
+        async def run():
+            with tracer.start_trace("chat") as trace:
+                assert [c async for c in run_chat()] == ["a", "b"]
+            return trace
+
+        trace = asyncio.run(run())
+        spans = [s for s in trace.spans if s.name == "llm.run_chat"]
+        assert len(spans) == 1 and spans[0].duration >= 0.02
+        assert all(s.parent is spans[0] for s in trace.spans if s.name == "chunk")
+
+    def test_async_generator_span_is_not_current_for_the_consumer(self, tracer):
+        @traced("llm.run_chat")
+        async def run_chat():
+            with span("openai.format"):
+                for chunk in ("a", "b"):
+                    yield chunk
+                    assert current_span().name == "openai.format"
+
+        async def run():
+            with tracer.start_trace("chat") as trace:
+                async for _ in run_chat():
+                    assert current_span() is trace.root
+                    with span("grpc.send"):
+                        pass
+            return trace
+
+        trace = asyncio.run(run())
+        spans = by_name(trace)
+        assert spans["grpc.send"].parent is trace.root
+        assert spans["openai.format"].parent is spans["llm.run_chat"]
+
+    def test_abandoned_async_generator_closes_its_span(self, tracer):
+        @traced("llm.run_chat")
+        async def run_chat():
+            while True:
+                yield "x"
+
+        async def run():
+            with tracer.start_trace("chat") as trace:
+                agen = run_chat()
+                await agen.__anext__()
+                await agen.aclose()
+            return trace
+
+        trace = asyncio.run(run())
+        assert by_name(trace)["llm.run_chat"].end is not None
+
+
+class TestSessions:
+    def test_breakdown_kept_per_session(self, tracer):
+        for _ in range(2):
+            with tracer.start_trace("chat", session_id="s1"):
+                with span("search"):
+                    pass
+        timings = tracing.get_session_timings("s1")
+        assert len(timings) == 2
+        assert set(timings[-1]["stages"]) == {"search"}
+        assert timings[-1]["session_id"] == "s1"
+        assert tracing.get_session_timings("other") == []
+
+    def test_oldest_sessions_are_dropped(self, monkeypatch, metrics):
+        tracer = Tracer(make_config(max_sessions=2))
+        for session_id in ("a", "b", "c"):
+            tracer.start_trace("chat", session_id=session_id).finish()
+        assert tracer.session_timings("a") == []
+        assert len(tracer.session_timings("c")) == 1
+
+    def test_finish_is_idempotent(self, tracer):
+        trace = tracer.start_trace("chat", session_id="s1")
+        trace.finish()
+        trace.finish()
+        assert len(tracer.session_timings("s1")) == 1
+        assert current_span() is None
+
+
+class FakeOtelSpan:
+    def __init__(self, name, parent, start_time):
+        self.name, self.parent, self.start_time = name, parent, start_time
+        self.end_time = None
+        self.status = None
+
+    def set_status(self, status):
+        self.status = status
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeOtel:
+    """Just enough of opentelemetry.trace and a tracer for the exporter"""
+
+    def __init__(self):
+        self.spans = []
+
+    def set_span_in_context(self, parent):
+        return parent
+
+    def start_span(self, name, context=None, start_time=None, attributes=None):
+        otel_span = FakeOtelSpan(name, context, start_time)
+        self.spans.append(otel_span)
+        return otel_span
+
+
+def test_otlp_export_keeps_parents_and_times(tracer):
+    otel = FakeOtel()
+    exporter = tracing._OtlpExporter.__new__(tracing._OtlpExporter)
+    exporter.tracer, exporter.otel_trace, exporter.status_type = otel, otel, lambda error: error
+    tracer._exporter = exporter
+
+    with pytest.raises(RuntimeError):
+        with tracer.start_trace("chat"):
+            with span("search"):
+                with span("search.semantic"):
+                    raise RuntimeError("timeout")
+
+    exported = {s.name: s for s in otel.spans}
+    assert exported["chat"].parent is None
+    assert exported["search"].parent is exported["chat"]
+    assert exported["search.semantic"].parent is exported["search"]
+    assert exported["search.semantic"].status == "RuntimeError"
+    assert all(s.end_time >= s.start_time for s in otel.spans)
+
+
+def test_search_engine_stages_are_traced(tracer):
+    """vibe_filtered_search -> semantic_search shows up as nested stages"""
+    from server.core.search_engine import SearchEngine
+
+    class Store:
+        async def search(self, query, top_k):
+            return [{"title": "Canal walk", "description": "", "predicted_vibe": "romantic"}]
+
+    engine = SearchEngine.__new__(SearchEngine)
+    engine.vector_store = Store()
+    engine.web_client = None
+
+    async def run():
+        with tracer.start_trace("chat") as trace:
+            results = await engine.vibe_filtered_search("walk", ["romantic"])
+        return trace, results
+
+    trace, results = asyncio.run(run())
+    assert len(results) == 1
+    spans = by_name(trace)
+    assert spans["search.semantic"].parent is spans["search.vibe_filtered"]
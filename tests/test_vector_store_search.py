@@ -0,0 +1,178 @@
+"""
+Tests for the single-query PostgreSQL vector search
+
+Runs against a fake connection that records the SQL, so no database is needed
+"""
+
+import sys
+import os
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import numpy as np
+
+from server.tools import postgresql_vector_store
+from server.tools.postgresql_vector_store import PostgreSQLVectorStore
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+class UndefinedColumn(Exception):
+    """What psycopg2 raises for a column the schema doesn't have"""
+    pgcode = "42703"
+
+
+class NoVibeCursor(FakeCursor):
+    """A database from before the event.vibe migration"""
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        if 'e.vibe' in sql:
+            raise UndefinedColumn('column e.vibe does not exist')
+
+
+class FakeDBConfig:
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.rollbacks = 0
+
+    @contextmanager
+    def get_connection(self):
+        def rollback(_self):
+            self.rollbacks += 1
+        conn = type('FakeConn', (), {'cursor': lambda _self: self.cursor, 'rollback': rollback})()
+        yield conn
+
+
+def make_row(event_id, similarity, categories, vibe=None):
+    return (event_id, f"Event {event_id}", "desc", "Ottawa", 20.0, 1, 60, True, False,
+            "", "", 4.5, 10, "Venue", "1 Main St", similarity, vibe, categories)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(postgresql_vector_store, 'register_vector', lambda conn: None, raising=False)
+    store = PostgreSQLVectorStore.__new__(PostgreSQLVectorStore)
+    store.cursor = FakeCursor([make_row(1, 0.9, ['Dining', 'Wine'], 'romantic'), make_row(2, 0.5, [])])
+    store.db_config = FakeDBConfig(store.cursor)
+    return store
+
+
+class TestSimpleSearch:
+    def test_one_query_for_rows_and_categories(self, store):
+        """Categories come back with the rows - no query per result"""
+        results = store._search_postgresql_simple(
+            np.zeros(384), 60, "Ottawa", 2, True, None, None, 120, 0.3)
+
+        queries = [sql for sql, _ in store.cursor.executed]
+        assert len(queries) == 2  # hnsw.ef_search set_config + the search
+        assert store.cursor.executed[0][1] == ('60',)
+        assert 'array_agg' in queries[1] and 'LATERAL' in queries[1]
+        assert sum('event_category_link' in q for q in queries) == 1
+
+        assert [r['categories'] for r in results] == [['Dining', 'Wine'], []]
+        assert results[0]['predicted_vibe'] == 'romantic'
+        assert 'predicted_vibe' not in results[1]
+
+    def test_distance_computed_once_and_threshold_after_limit(self, store):
+        """The ANN scan orders by distance and the threshold is checked after LIMIT"""
+        store._search_postgresql_simple(np.zeros(384), 10, None, None, None, None, None, None, 0.2)
+        sql, params = store.cursor.executed[1]
+
+        assert sql.count('<=>') == 1
+        assert sql.index('LIMIT %s') < sql.index('1 - n.distance >= %s')
+        assert params[-2:] == [10, 0.2]
+
+    def test_unfiltered_search_uses_index_scan(self, store):
+        """Without filters the inner query is a plain ORDER BY distance LIMIT (HNSW-able)"""
+        store._search_postgresql_simple(np.zeros(384), 10, None, None, None, None, None, None, 0.2)
+        sql, _ = store.cursor.executed[1]
+        assert 'MATERIALIZED' not in sql
+
+    def test_filtered_search_scans_exactly(self, store):
+        """
+        Filters go inside a materialized CTE that is ordered and limited afterwards, so
+        the LIMIT applies to rows that already passed the filters - an HNSW scan would
+        filter its ef_search candidates and could return fewer than top_k
+        """
+        store._search_postgresql_simple(np.zeros(384), 25, "Ottawa", 1, False, None, 30, 90, 0.2)
+        sql, params = store.cursor.executed[1]
+
+        cte = sql[sql.index('AS MATERIALIZED ('):sql.index('SELECT * FROM filtered')]
+        for clause in ('l.city ILIKE', 'e.price <=', 'e.indoor', 'e.duration_min, 60) >=', 'e.duration_min, 60) <='):
+            assert clause in cte
+        assert sql.index('SELECT * FROM filtered') < sql.index('ORDER BY distance') < sql.index('LIMIT %s')
+        assert params == [[0.0] * 384, '%Ottawa%', 25.0, False, 30, 90, 25, 0.2]
+
+
+    def test_missing_vibe_column_falls_back(self, store):
+        """Without the V9_1_0 migration the search still works, with NULL vibes"""
+        store.cursor = NoVibeCursor([make_row(1, 0.9, [])])
+        store.db_config = FakeDBConfig(store.cursor)
+
+        results = store._search_postgresql_simple(np.zeros(384), 10, None, None, None, None, None, None, 0.2)
+        assert [r['id'] for r in results] == ['event_1']
+        assert store.db_config.rollbacks == 1
+        assert store.has_vibe_column is False
+        assert 'NULL::text AS vibe' in store.cursor.executed[-1][0]
+
+        # later searches go straight to the query without it
+        store.cursor.executed.clear()
+        assert store._search_postgresql_simple(np.zeros(384), 10, None, None, None, None, None, None, 0.2)
+        assert len(store.cursor.executed) == 2
+        assert PostgreSQLVectorStore.has_vibe_column is True
+
+    def test_other_errors_are_not_retried(self, store):
+        def fail(sql, params=None):
+            raise UndefinedColumn('column e.nope does not exist')
+        store.cursor.execute = fail
+        assert store._search_postgresql_simple(np.zeros(384), 10, None, None, None, None, None, None, 0.2) is None
+        assert store.db_config.rollbacks == 0
+        assert store.has_vibe_column is True
+
+
+class FakeMLWrapper:
+    def __init__(self, vibes):
+        self.vibes = vibes
+
+    def classify_vibes_batch(self, texts):
+        return None if self.vibes is None else self.vibes[:len(texts)]
+
+
+class TestIngestVibes:
+    def test_stored_only_when_model_ran(self, monkeypatch):
+        """Ideas without a vibe get one from the classifier, existing vibes are kept"""
+        from server.core import ml_integration
+        monkeypatch.setattr(ml_integration, 'get_ml_wrapper', lambda: FakeMLWrapper(['artsy']))
+        ideas = [{'title': 'Gallery', 'description': 'art'}, {'title': 'Bar', 'predicted_vibe': 'romantic'}]
+
+        PostgreSQLVectorStore._add_predicted_vibes(None, ideas)
+        assert [i['predicted_vibe'] for i in ideas] == ['artsy', 'romantic']
+
+    def test_unavailable_model_leaves_vibe_null(self, monkeypatch):
+        """No placeholder vibe is persisted, so the query-time fallback can classify it later"""
+        from server.core import ml_integration
+        monkeypatch.setattr(ml_integration, 'get_ml_wrapper', lambda: FakeMLWrapper(None))
+        ideas = [{'title': 'Gallery', 'description': 'art'}]
+
+        PostgreSQLVectorStore._add_predicted_vibes(None, ideas)
+        assert ideas[0].get('predicted_vibe') is None
+        assert PostgreSQLVectorStore._event_values(ideas[0], None, [])[1][15] is None
@@ -0,0 +1,133 @@
+"""
+Tests for the shared venue feature index used by both planners
+"""
+
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+import pandas as pd
+
+import venue_index
+from venue_index import VenueIndex, get_venue_index, clear_venue_index
+from planner_utils import (get_venue_slot, get_venue_stage, get_venue_cuisine,
+                           venue_matches_type, get_venue_features)
+
+
+def make_venues():
+    return pd.DataFrame([
+        {'id': 'a', 'name': 'Ciao Italia', 'type': 'italian_restaurant',
+         'all_types': 'italian_restaurant,restaurant,food', 'primary_type_display_name': 'Italian Restaurant',
+         'true_vibe': 'romantic, cozy', 'reservable': True, 'good_for_children': False},
+        {'id': 'b', 'name': 'The Pub', 'type': 'pub', 'all_types': 'pub,bar',
+         'primary_type_display_name': 'Pub', 'true_vibe': 'energetic', 'live_music': 'true'},
+        {'id': 'c', 'name': 'Art Gallery', 'type': 'art_gallery', 'all_types': 'art_gallery,tourist_attraction',
+         'primary_type_display_name': 'Art Gallery', 'true_vibe': 'neutral', 'good_for_children': True},
+        {'id': 'd', 'name': 'Sweet Spot', 'type': 'bakery', 'all_types': 'bakery,food',
+         'primary_type_display_name': 'Bakery', 'true_vibe': None},
+    ])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_venue_index()
+    yield
+    clear_venue_index()
+
+
+class TestVenueIndex:
+    def test_matches_planner_utils(self):
+        """Precomputed values should match the per-call helper functions"""
+        df = make_venues()
+        index = VenueIndex(df)
+        for venue in df.to_dict('records'):
+            assert index.slot_of(venue) == get_venue_slot(venue)
+            assert index.stage_of(venue) == get_venue_stage(venue)
+            assert index.cuisine_of(venue) == get_venue_cuisine(venue)
+            assert index.features_of(venue) == get_venue_features(venue)
+            for target in ['italian', 'bar', 'music', 'dessert', 'museum']:
+                assert index.matches_type(venue, target) == venue_matches_type(venue, target)
+
+    def test_vibes_and_tokens(self):
+        """Vibes are parsed into sets, type fields into tokens"""
+        index = VenueIndex(make_venues())
+        row = index.row_of['a']
+        assert index.vibes[row] == frozenset({'romantic', 'cozy'})
+        assert {'italian', 'restaurant', 'ciao'} <= index.type_tokens[row]
+
+    def test_unknown_venue_falls_back(self):
+        """Venues not in the index are computed on the fly"""
+        index = VenueIndex(make_venues())
+        venue = {'id': 'zzz', 'type': 'night_club', 'all_types': 'night_club,bar', 'true_vibe': 'energetic'}
+        assert index.slot_of(venue) == 'drinks'
+        assert index.vibes_of(venue) == frozenset({'energetic'})
+
+
+class TestVenueIndexCache:
+    def test_no_version_is_not_cached(self):
+        """Without a snapshot version every call builds a fresh index"""
+        df = make_venues()
+        assert get_venue_index(df) is not get_venue_index(df)
+
+    def test_same_version_reuses_index(self):
+        """Dataframes from the same snapshot share an index"""
+        df = make_venues()
+        df.attrs['venues_version'] = ('2024-01-01', 4)
+        first = get_venue_index(df)
+        subset = df[df['id'] != 'a']
+        assert get_venue_index(subset) is first
+
+    def test_subset_then_full_extends(self):
+        """A filtered subset first, then more venues from the same snapshot"""
+        df = make_venues()
+        df.attrs['venues_version'] = ('2024-01-01', 4)
+        first = get_venue_index(df.iloc[:2])
+        first.type_match('bar')
+        index = get_venue_index(df)
+        assert index is first
+        assert len(index) == 4
+        assert list(index.type_match('bar')) == [venue_matches_type(v, 'bar') for v in df.to_dict('records')]
+
+    def test_new_version_rebuilds(self):
+        """A new updated_at version invalidates the cached index"""
+        df = make_venues()
+        df['updated_at'] = pd.Timestamp('2024-01-01')
+        first = get_venue_index(df)
+        df['updated_at'] = pd.Timestamp('2024-02-01')
+        assert venue_index.venues_version(df) == pd.Timestamp('2024-02-01')
+        assert get_venue_index(df) is not first
+
+    def test_readers_never_see_unpublished_rows(self):
+        """Ids show up in row_of only once every column has the row"""
+        base = make_venues()
+        index = VenueIndex(base.iloc[:1])
+        index.type_match('bar')
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    ids = list(index.row_of)
+                    rows = index.rows(ids)
+                    index.slot_id[rows], index.lat[rows], index.type_match('bar')[rows]
+                    [index.features[name][rows] for name in index.features]
+                except IndexError as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for batch in range(200):
+            more = base.copy()
+            more['id'] = [f'{batch}-{i}' for i in range(len(more))]
+            index.extend(more)
+        done.set()
+        reader.join()
+
+        assert not errors
+        assert len(index) == 1 + 200 * 4
+        assert len(index.slot_id) == len(index.row_of) == len(index.type_match('bar'))
@@ -0,0 +1,228 @@
+"""
+Tests for the in-memory venue snapshot
+
+VenueSnapshot.filter has to pick the same venues as db_manager.get_venues_for_ga's SQL
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import db_manager
+import venue_snapshot
+from venue_snapshot import VenueSnapshot
+from test_ga_fitness import make_venues
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def make_snapshot_df(n=80):
+    df = make_venues(n)
+    df.loc[3, 'true_vibe'] = None
+    df.loc[5, 'rating'] = np.nan
+    df['true_vibe'] = df['true_vibe'].str.upper().where(df.index % 4 == 0, df['true_vibe'])
+    df['updated_at'] = [BASE_TIME + timedelta(minutes=i) for i in range(n)]
+    return df
+
+
+def sql_filter(df, vibes=None, types=None, max_cost=None, min_rating=0, limit=500):
+    # what the ILIKE / cost / rating WHERE clause + ORDER BY rating DESC would keep
+    mask = pd.Series(True, index=df.index)
+    if vibes:
+        vibe_col = df['true_vibe'].str.lower()
+        mask &= np.logical_or.reduce([vibe_col.str.contains(v.lower(), regex=False).fillna(False) for v in vibes])
+    if types:
+        type_col = df['type'].str.lower()
+        mask &= np.logical_or.reduce([type_col.str.contains(t.lower(), regex=False).fillna(False) for t in types])
+    if max_cost:
+        mask &= df['cost'] <= max_cost
+    if min_rating > 0:
+        mask &= df['rating'] >= min_rating
+    return df[mask].sort_values('rating', ascending=False, na_position='first', kind='stable').head(limit)
+
+
+FILTERS = [
+    dict(),
+    dict(vibes=['romantic']),
+    dict(vibes=['Cozy', 'family'], types=['restaurant']),
+    dict(types=['bar', 'cafe'], max_cost=25),
+    dict(vibes=['outdoors'], min_rating=4.0, limit=5),
+    dict(types=['nothing-matches']),
+]
+
+
+class TestVenueSnapshot:
+    @pytest.mark.parametrize("filters", FILTERS)
+    def test_filter_matches_sql_semantics(self, filters):
+        """In-memory filtering keeps the same venues in the same order"""
+        df = make_snapshot_df()
+        snapshot = VenueSnapshot(df, version=('v1', len(df)))
+
+        result = snapshot.filter(**filters)
+        expected = sql_filter(df, **filters)
+
+        assert list(result['id']) == list(expected['id'])
+        assert result.attrs['venues_version'] == ('v1', len(df))
+
+    def test_filter_returns_independent_copy(self):
+        """Planners add columns to the filtered frame, that mustn't leak into the snapshot"""
+        df = make_snapshot_df()
+        snapshot = VenueSnapshot(df)
+        result = snapshot.filter(limit=10)
+        result['similarity_score'] = 1.0
+        assert 'similarity_score' not in snapshot.df.columns
+
+    def test_merged_replaces_changed_rows(self):
+        """Changed rows replace the old ones by id, new ones are added"""
+        df = make_snapshot_df(10)
+        snapshot = VenueSnapshot(df, version=('v1', 10))
+
+        changed = df.iloc[[2]].copy()
+        changed['true_vibe'] = 'mysterious'
+        changed['updated_at'] = BASE_TIME + timedelta(days=1)
+        added = df.iloc[[0]].copy()
+        added['id'] = 'new'
+        merged = snapshot.merged(pd.concat([changed, added]), ('v2', 11))
+
+        assert len(merged) == 11
+        assert merged.version == ('v2', 11)
+        assert list(merged.filter(vibes=['mysterious'])['id']) == ['v2']
+        assert merged.latest_update == BASE_TIME + timedelta(days=1)
+
+
+class TestRefresh:
+    @pytest.fixture(autouse=True)
+    def reset_snapshot(self):
+        yield
+        venue_snapshot._snapshot = None
+
+    def test_refresh_is_incremental(self, monkeypatch):
+        """Refresh only loads rows updated since the newest one in the snapshot"""
+        df = make_snapshot_df(10)
+        venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+
+        changed = df.iloc[[9]].copy()
+        changed['rating'] = 1.0
+        calls = []
+
+        def fake_snapshot(since=None):
+            calls.append(since)
+            return changed, ('v2', 10)
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v2', 10))
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot', fake_snapshot)
+
+        snapshot = venue_snapshot.refresh_venue_snapshot()
+        assert calls == [df['updated_at'].max()]
+        assert snapshot.version == ('v2', 10)
+        assert snapshot.filter()['id'].iloc[-1] == 'v9'
+        assert venue_snapshot.get_venue_snapshot() is snapshot
+
+    def test_refresh_skips_when_unchanged(self, monkeypatch):
+        """Same version means no row query at all"""
+        df = make_snapshot_df(10)
+        current = venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v1', 10))
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot',
+                            lambda since=None: pytest.fail("shouldn't load rows"))
+
+        assert venue_snapshot.refresh_venue_snapshot() is current
+
+    def test_refresh_reloads_after_delete(self, monkeypatch):
+        """If rows disappeared the whole table is reloaded"""
+        df = make_snapshot_df(10)
+        venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+        remaining = df.iloc[:8].copy()
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v2', 8))
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot',
+                            lambda since=None: (df.iloc[:0], ('v2', 8)) if since else (remaining, ('v2', 8)))
+
+        snapshot = venue_snapshot.refresh_venue_snapshot()
+        assert len(snapshot) == 8
+        assert snapshot.version == ('v2', 8)
+
+    def test_refresh_from_change_log(self, monkeypatch):
+        """With a change log cursor only the logged ids are re-read; deletes need no reload"""
+        df = make_snapshot_df(10)
+        df.attrs['venue_change_id'] = 5
+        venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+
+        changed = df.iloc[[9]].copy()
+        changed['rating'] = 1.0
+        calls = []
+
+        def fake_snapshot(since=None, ids=None):
+            calls.append((since, ids))
+            return changed, ('v2', 9)
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v2', 9))
+        monkeypatch.setattr(db_manager, 'get_venue_changes', lambda after: (8, ['v9'], ['v2']))
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot', fake_snapshot)
+
+        snapshot = venue_snapshot.refresh_venue_snapshot()
+        assert calls == [(None, ['v9'])]
+        assert len(snapshot) == 9
+        assert 'v2' not in set(snapshot.df['id'])
+        assert snapshot.df.loc[snapshot.df['id'] == 'v9', 'rating'].item() == 1.0
+        assert snapshot.change_id == 8
+
+    def test_pruned_change_log_reloads(self, monkeypatch):
+        """If the log no longer reaches back to our cursor the table is reloaded"""
+        df = make_snapshot_df(10)
+        df.attrs['venue_change_id'] = 5
+        venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+        reloaded = make_snapshot_df(12)
+        reloaded.attrs['venue_change_id'] = 40
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v2', 12))
+        monkeypatch.setattr(db_manager, 'get_venue_changes', lambda after: None)
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot', lambda since=None, ids=None: (reloaded, ('v2', 12)))
+
+        snapshot = venue_snapshot.refresh_venue_snapshot()
+        assert len(snapshot) == 12
+        assert snapshot.change_id == 40
+
+    def test_failed_load_backs_off(self, monkeypatch):
+        """With the database down, requests don't each retry the full load"""
+        calls = []
+
+        def failing_snapshot(since=None):
+            calls.append(since)
+            return None, None
+
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot', failing_snapshot)
+        monkeypatch.setattr(venue_snapshot, '_next_load_attempt', 0.0)
+        monkeypatch.setattr(venue_snapshot, '_load_failures', 0)
+
+        assert venue_snapshot.get_venue_snapshot() is None
+        assert venue_snapshot.get_venue_snapshot() is None
+        assert len(calls) == 1
+
+        # once the backoff has passed it tries again, and a success clears it
+        monkeypatch.setattr(venue_snapshot, '_next_load_attempt', 0.0)
+        df = make_snapshot_df(10)
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot', lambda since=None: (df, ('v1', 10)))
+        assert len(venue_snapshot.get_venue_snapshot()) == 10
+        assert venue_snapshot._load_failures == 0
+
+    def test_failed_reload_keeps_last_snapshot(self, monkeypatch):
+        """A reload that can't reach the database keeps serving the current snapshot"""
+        df = make_snapshot_df(10)
+        current = venue_snapshot.set_venue_snapshot(df, ('v1', 10))
+
+        monkeypatch.setattr(db_manager, 'get_venues_version', lambda: ('v2', 8))
+        monkeypatch.setattr(db_manager, 'get_venues_snapshot',
+                            lambda since=None: (df.iloc[:0], ('v2', 8)) if since else (None, None))
+        monkeypatch.setattr(venue_snapshot, '_load_failures', 0)
+
+        assert venue_snapshot.refresh_venue_snapshot() is current
+        assert venue_snapshot.get_venue_snapshot() is current
@@ -0,0 +1,107 @@
+"""
+Tests for the compiled keyword-vibe matcher
+
+VibeMatcher has to find the same vibes as the old per-vibe regex loop
+"""
+
+import sys
+import os
+import re
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'final'))
+
+import pytest
+
+from vibe_matcher import VibeMatcher
+
+SEED = {
+    'romantic': ['romantic', 'intimate', 'candlelit', 'date night'],
+    'fancy': ['fancy', 'upscale', 'fine dining'],
+    'casual': ['casual', 'laid-back', 'chill'],
+    'artsy': ['art', 'artsy', 'gallery'],
+    'family': ['family', 'kids', 'family-friendly'],
+    'energetic': ['music', 'dance', 'party'],
+}
+LEARNED = {
+    'romantic': ['dinner', 'wine', 'night', 'date'],
+    'fancy': ['fine', 'wine', 'tasting', 'dining'],
+    'energetic': ['dance floor', 'nightlife', 'dj'],
+}
+TYPE_MAP = {'bar': ['casual'], 'sports_bar': ['energetic'], 'museum': ['artsy', 'historic'],
+            'cafe': ['cozy']}
+
+WORDS = ['a', 'the', 'with', 'romantic', 'date', 'night', 'fine', 'dining', 'wine', 'tasting',
+         'art', 'artsy', 'artistic', 'family-friendly', 'family', 'kids', 'laid-back', 'laid',
+         'music', 'musical', 'dance', 'floor', 'nightlife', 'dj', 'chill', 'dinner', 'gallery!',
+         'upscale,', '(party)', 'candlelit.', 'date-night']
+
+
+def old_keyword_vibes(text, venue_type=None, use_learned=True):
+    # the matching get_keyword_vibes did before the compiled matcher
+    text = text.lower()
+    vibes = set()
+    for vibe, keys in SEED.items():
+        pattern = r'\b(' + '|'.join(map(re.escape, keys)) + r')\b'
+        if re.search(pattern, text):
+            vibes.add(vibe)
+    if use_learned and LEARNED:
+        for vibe, keys in LEARNED.items():
+            match_count = 0
+            for key in keys:
+                if len(key) >= 4:
+                    if re.search(r'\b' + re.escape(key) + r'\b', text):
+                        match_count += 1
+            if match_count >= 2:
+                vibes.add(vibe)
+    if venue_type:
+        venue_type_lower = venue_type.lower().replace(' ', '_')
+        if venue_type_lower in TYPE_MAP:
+            vibes.update(TYPE_MAP[venue_type_lower])
+        else:
+            for type_key, type_vibes in TYPE_MAP.items():
+                if type_key in venue_type_lower or venue_type_lower in type_key:
+                    vibes.update(type_vibes)
+    return vibes
+
+
+def random_texts(n=300, seed=11):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+@pytest.fixture
+def matcher():
+    return VibeMatcher(SEED, LEARNED, TYPE_MAP)
+
+
+class TestVibeMatcher:
+    @pytest.mark.parametrize("use_learned", [True, False])
+    def test_matches_old_regex_loop(self, matcher, use_learned):
+        """Same vibes as the per-vibe regexes, including overlapping keywords"""
+        for text in random_texts():
+            assert matcher.match(text, use_learned=use_learned) == old_keyword_vibes(text, use_learned=use_learned), text
+
+    @pytest.mark.parametrize("venue_type", ['bar', 'Sports Bar', 'wine_bar', 'museum', 'park', None])
+    def test_type_vibes(self, matcher, venue_type):
+        """Exact type keys win, otherwise partial matches are merged"""
+        assert matcher.match('', venue_type) == old_keyword_vibes('', venue_type)
+
+    def test_overlapping_keywords(self, matcher):
+        """A shorter keyword inside a longer one at the same spot still counts"""
+        assert matcher.match('Family-Friendly Fine Dining') == {'family', 'fancy'}
+        assert matcher.match('fine dining', use_learned=True) == {'fancy'}
+        assert matcher.match('artistic') == set()
+
+    def test_batch_matches_single(self, matcher):
+        """match_batch gives the same answer as match for every text"""
+        texts = random_texts(200) + ['', 'date\nnight', 'music\ndance floor']
+        types = [random.Random(i).choice(['bar', 'cafe', None]) for i in range(len(texts))]
+        batch = matcher.match_batch(texts, types)
+        assert batch == [matcher.match(t, v) for t, v in zip(texts, types)]
+
+    def test_empty_tables(self):
+        """No keywords means no vibes (and no regex errors)"""
+        assert VibeMatcher({}).match('romantic music') == set()
+        assert VibeMatcher({}).match_batch(['a', 'b']) == [set(), set()]